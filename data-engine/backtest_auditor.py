@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 import yfinance as yf
 from datetime import datetime, timedelta
+from candle_archive import candle_archive # V7500: Local OHLCV history with gap-aware backfill
 
 # Load env variables
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,6 +25,27 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+def fetch_price_path(symbol, start_dt, end_dt):
+    """
+    V7500: 1h (highs, lows, closes) after a signal. Read from the candle archive
+    (only missing bars are downloaded); Yahoo Finance stays as the fallback.
+    """
+    start_ms, end_ms = int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000)
+    try:
+        candle_archive.backfill(symbol, '1h', start_ms, end_ms)
+        bars = candle_archive.read(symbol, '1h', start_ms, end_ms)
+        if len(bars):
+            return bars[:, 2], bars[:, 3], bars[:, 4]
+    except Exception as e:
+        logger.warning(f"   Archive read failed for {symbol}: {e}")
+
+    # Need to convert symbol: BTC/USDT -> BTC-USD
+    yf_symbol = symbol.replace("/", "-").replace("USDT", "USD")
+    df = yf.download(yf_symbol, start=start_dt, end=end_dt, interval="1h", progress=False)
+    if df.empty:
+        return None
+    return df['High'].to_numpy().ravel(), df['Low'].to_numpy().ravel(), df['Close'].to_numpy().ravel()
+
 def audit_signals():
     logger.info("--- STARTING HISTORICAL AUDIT ---")
     
@@ -51,19 +73,17 @@ def audit_signals():
             
             logger.info(f"Auditing {symbol} (ID: {sig_id})...")
             
-            # 2. Fetch Historical Data (Yahoo Finance)
-            # Need to convert symbol: BTC/USDT -> BTC-USD
-            yf_symbol = symbol.replace("/", "-").replace("USDT", "USD")
-            
+            # 2. Fetch Historical Data (V7500: candle archive, Yahoo Finance fallback)
             # Start date = created_at
             start_dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
             end_dt = start_dt + timedelta(days=7) # Look ahead 7 days max
             
-            df = yf.download(yf_symbol, start=start_dt, end=end_dt, interval="1h", progress=False)
+            path = fetch_price_path(symbol, start_dt, end_dt)
             
-            if df.empty:
-                logger.warning(f"   No data for {yf_symbol}")
+            if path is None:
+                logger.warning(f"   No data for {symbol}")
                 continue
+            highs, lows, closes = path
             
             # 3. Simulate Trade
             outcome = "PENDING"
@@ -73,9 +93,8 @@ def audit_signals():
             
             direction = 1 if "LONG" in (sig.get('direction') or "LONG") else -1
             
-            for index, row in df.iterrows():
-                high = float(row['High'].iloc[0])
-                low = float(row['Low'].iloc[0])
+            for high, low in zip(highs, lows):
+                high, low = float(high), float(low)
                 
                 # Check Max Profit/Drawdown
                 if direction == 1: # LONG
@@ -110,7 +129,7 @@ def audit_signals():
             
             # If still pending after 7 days, assume close at last price
             if outcome == "PENDING":
-                last_price = float(df['Close'].iloc[-1].iloc[0])
+                last_price = float(closes[-1])
                 exit_price = last_price
                 # Calculate final PnL
                 if direction == 1:
@@ -3,27 +3,45 @@ import ccxt
 import requests
 import json
 from dotenv import load_dotenv
-
-# V2000: Rate Limiting Implementation
-try:
-    from ratelimit import limits, sleep_and_retry
-    RATE_LIMIT_AVAILABLE = True
-except ImportError:
-    print("   [BINANCE] Warning: ratelimit library not installed. Install with: pip install ratelimit")
-    RATE_LIMIT_AVAILABLE = False
-    # Create dummy decorators
-    def limits(calls, period):
-        def decorator(func):
-            return func
-        return decorator
-    def sleep_and_retry(func):
-        return func
+from candle_cache import CandleCache # V6200: Incremental OHLCV
+from ticker_cache import TickerCache # V7000: Shared short-TTL ticker snapshots
+from single_flight import single_flight # V7100: Cross-process request coalescing
+from rate_limiter import rate_limiter, endpoint_weight # V7200: Redis-shared weight budgets
+from provider_router import ProviderRouter, OPEN # V7300: Latency/error-scored provider order
+from markets_cache import markets_cache # V7400: Persisted ccxt markets metadata
+from instrument_registry import instrument_registry # V7700: Symbol mapping, precision and limits
 
 # Load credentials
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 load_dotenv(dotenv_path=os.path.join(parent_dir, '.env.local'))
 
+# CoinCap asset ids for the tier-3 fallback (default: lowercase base)
+COINCAP_IDS = {'btc': 'bitcoin', 'eth': 'ethereum', 'sol': 'solana', 'bnb': 'binance-coin',
+               'xrp': 'xrp', 'doge': 'dogecoin', 'ada': 'cardano'}
+
+# Exchange providers the router orders; CoinCap/CoinGecko stay the last resort after them
+MARKET_PROVIDERS = ('kraken', 'binance')
+# Ranges starting at `since` (archive backfill): Kraken only serves the latest 720 bars
+HISTORY_PROVIDERS = ('binance',)
+
+# Binance USD-M 24hr ticker weight: 1 per symbol, 40 for the whole market
+BINANCE_ALL_TICKERS_WEIGHT = 40
+
+def proxy_config(proxy=None):
+    """
+    V311/V7200: BINANCE_PROXY as ccxt client config, shared by the sync BinanceTrader and the
+    async MarketGateway so both route the same way. httpsProxy is the unified key both ccxt
+    clients honor (the legacy `proxies` dict is requests-only and ignored by async ccxt).
+    """
+    proxy = proxy if proxy is not None else os.getenv("BINANCE_PROXY")
+    return {'httpsProxy': proxy} if proxy else {}
+
+def _coincap_asset_id(symbol):
+    """BTC/USDT -> bitcoin"""
+    base = symbol.split('/')[0].lower()
+    return COINCAP_IDS.get(base, base)
+
 class BinanceTrader:
     def __init__(self):
         self.api_key = os.getenv("BINANCE_API_KEY")
@@ -46,7 +64,7 @@ class BinanceTrader:
         }
         
         if self.proxy:
-            binance_config['proxies'] = {'https': self.proxy, 'http': self.proxy}
+            binance_config.update(proxy_config(self.proxy))
             print(f"   [BINANCE] Proxy Enabled: {self.proxy}")
 
         self.exchange = ccxt.binance(binance_config)
@@ -54,6 +72,32 @@ class BinanceTrader:
         # V311: RESILIENT DATA LAYER (Kraken Fallback for 451 Errors)
         self.fallback_exchange = ccxt.kraken({'enableRateLimit': True})
         
+        # V6200: Per-(symbol, timeframe) candle buffers topped up with delta requests
+        self.candle_cache = CandleCache()
+        
+        # V7000: Ticker snapshots shared across callers for TICKER_CACHE_TTL seconds
+        self.ticker_cache = TickerCache()
+        
+        # V7100: Concurrent identical requests from other processes share one exchange call
+        self.single_flight = single_flight
+        
+        # V7200: Weight budgets shared by every process on this IP (replaces per-process @limits)
+        # Market data spends from the scan lane; orders use the execution lane and preempt it
+        self.rate_limiter = rate_limiter
+        self.lane = os.getenv("RATE_LIMIT_LANE", "scan")
+        
+        # V7300: Fallback order chosen per request from rolling latency/error stats with circuit breakers
+        # (BadSymbol = pair not listed there, not a provider failure)
+        self.router = ProviderRouter(neutral_errors=(ccxt.BadSymbol,))
+        
+        # V7400: Markets metadata from the on-disk cache (no download at startup when it exists)
+        self.markets_cache = markets_cache
+        self.markets_cache.hydrate(self.exchange)
+        self.markets_cache.hydrate(self.fallback_exchange)
+        
+        # V7700: Venue symbols, tick/lot sizes and minimums from one table built off those markets
+        self.instruments = instrument_registry
+        self.instruments.attach(self.exchange, self.fallback_exchange)
         
         self.is_connected = False
         if self.api_key and self.secret:
@@ -65,7 +109,7 @@ class BinanceTrader:
                 
                 # Pre-load markets to avoid "symbol not found" errors
                 print("   [BINANCE] Loading Futures Markets...")
-                self.exchange.load_markets()
+                self.markets_cache.load(self.exchange)
 
                 # V500: SECURITY AUDIT - CHECK WITHDRAWAL PERMISSIONS
                 try:
@@ -90,29 +134,34 @@ class BinanceTrader:
                 print(f"   [BINANCE] Connectivity error: {e}")
                 if "Safety Abort" in str(e): raise e
 
-    def _resolve_symbol(self, symbol):
+    def _charge(self, source, kind, limit=None, lane=None):
+        """V7200: Blocks until the endpoint's weight is available in the shared bucket."""
+        bucket = 'kraken' if source == 'kraken' else 'binance_futures'
+        self.rate_limiter.acquire(bucket, endpoint_weight(bucket, kind, limit), lane or self.lane)
+
+    def _venue_symbol(self, source, symbol):
         """
-        V3500: Smart Symbol Resolution for Futures.
-        BTC/USDT -> BTC/USDT:USDT if needed.
+        V7700: Registry lookup replacing V3500 _resolve_symbol / V311 _map_symbol_to_kraken.
+        BTC/USDT -> BTC/USDT:USDT on Binance Futures, BTC/USD on Kraken.
         """
-        if not self.exchange.markets:
-            try: self.exchange.load_markets()
-            except: pass
-            
-        if symbol in self.exchange.markets: return symbol
-        
-        # Try appending :USDT (Linear standard)
+        if source == 'kraken':
+            mapped = self.instruments.kraken_symbol(symbol)
+            if mapped is None:
+                raise ccxt.BadSymbol(f"kraken has no market for {symbol}")
+            return mapped
+        instrument = self.instruments.get(symbol)
+        if instrument:
+            return instrument.binance
+        # Registry not built yet (no markets loaded): V3500 linear suffix
         alt = f"{symbol}:USDT"
-        if alt in self.exchange.markets: return alt
-        
-        # Try different formats just in case
-        return symbol
+        return alt if alt in (self.exchange.markets or {}) else symbol
 
     def get_live_balance(self):
         """Fetch real USDT balance from Binance Futures Wallet."""
         if not self.is_connected: return 0
         try:
             # V600: Fetching swap/futures balance
+            self._charge('binance', 'balance', lane='execution')
             balance = self.exchange.fetch_balance({'type': 'swap'})
             return float(balance.get('USDT', {}).get('free', balance['total'].get('USDT', 0)))
         except Exception as e:
@@ -131,26 +180,10 @@ class BinanceTrader:
             print(f"   [BINANCE] Error fetching margin level: {e}")
             return 999.0
 
-    def _map_symbol_to_kraken(self, symbol):
-        """Standardizes symbols for Kraken (USDT -> USD)."""
-        if not symbol: return symbol
-        return symbol.replace("/USDT", "/USD")
-
     def _fetch_coincap_ticker(self, symbol):
         """Tier-3 Fallback: CoinCap (No Geo-Block)."""
         try:
-            # Map BTC/USDT -> bitcoin
-            base = symbol.split('/')[0].lower()
-            # Mapping common coins
-            # A robust map would be better, but heuristic for top coins:
-            asset_id = base
-            if base == 'btc': asset_id = 'bitcoin'
-            elif base == 'eth': asset_id = 'ethereum'
-            elif base == 'sol': asset_id = 'solana'
-            elif base == 'bnb': asset_id = 'binance-coin'
-            elif base == 'xrp': asset_id = 'xrp'
-            elif base == 'doge': asset_id = 'dogecoin'
-            
+            asset_id = _coincap_asset_id(symbol)
             url = f"https://api.coincap.io/v2/assets/{asset_id}"
             res = requests.get(url, timeout=5)
             if res.status_code == 200:
@@ -167,71 +200,182 @@ class BinanceTrader:
             print(f"   [COINCAP] Error: {e}")
         return None
 
+    def _fetch_coincap_tickers(self, symbols):
+        """Tier-3 Fallback, batched: one /assets?ids= request for every symbol."""
+        ids = {}
+        for symbol in symbols:
+            ids.setdefault(_coincap_asset_id(symbol), []).append(symbol)
+        tickers = {}
+        try:
+            res = requests.get("https://api.coincap.io/v2/assets", params={'ids': ",".join(ids)}, timeout=5)
+            if res.status_code == 200:
+                for data in res.json()['data']:
+                    price = float(data['priceUsd'])
+                    for symbol in ids.get(data['id'], []):
+                        tickers[symbol] = {
+                            'symbol': symbol,
+                            'last': price,
+                            'bid': price,
+                            'ask': price,
+                            'percentage': float(data['changePercent24Hr'] or 0)
+                        }
+        except Exception as e:
+            print(f"   [COINCAP] Error: {e}")
+        return tickers
+
     # V2600: MARKET DATA CAPABILITIES (Kraken Primary)
-    @sleep_and_retry
-    @limits(calls=1200, period=60)  # Binance limit: 1200 requests/minute
-    def fetch_ohlcv(self, symbol, timeframe='1h', limit=100):
+    def fetch_ohlcv(self, symbol, timeframe='1h', limit=100, since=None):
         """
         Fetch historical candle data (V2600: Kraken Primary).
-        Rate Limited: 1200 calls/minute (Binance API limit).
+        V7200: Each provider call spends its kline weight from the shared rate limiter.
+        V6200: After the first download only bars since the last cached candle are requested.
+        V7100: Coalesced with identical concurrent requests from other processes.
+        V7500: With `since`, one page starting there (candle archive backfill), bypassing the candle cache.
         """
-        kraken_symbol = self._map_symbol_to_kraken(symbol)
-        try:
-            # Try Kraken First
-            return self.fallback_exchange.fetch_ohlcv(kraken_symbol, timeframe, limit=limit)
-        except Exception as e:
-            # print(f"   [KRAKEN] Fetch OHLCV failed for {kraken_symbol}: {e}. Falling back to Binance...")
+        if since is not None:
+            return self.single_flight.do(f"ohlcv:{symbol}:{timeframe}:{limit}:{since}",
+                                         lambda: self._fetch_ohlcv_chain(symbol, timeframe, limit, since=since)[0])
+        return self.single_flight.do(f"ohlcv:{symbol}:{timeframe}:{limit}",
+                                     lambda: self._fetch_ohlcv_cached(symbol, timeframe, limit))
+
+    def _fetch_ohlcv_cached(self, symbol, timeframe, limit):
+        """Candle-cache delta or full chain download (this process only)."""
+        plan = self.candle_cache.plan(symbol, timeframe, limit)
+        if plan and self.router.state(plan[0], 'ohlcv') != OPEN:
+            source, since, delta_limit = plan
             try:
-                # V3500: Resolve Symbol Correctly
-                target_sym = self._resolve_symbol(symbol)
-                return self.exchange.fetch_ohlcv(target_sym, timeframe, limit=limit)
-            except Exception as b_err:
-                if "451" in str(b_err) or "Service unavailable" in str(b_err):
-                     # print(f"   [BINANCE] Geo-Block Detected (451). Switching to CoinGecko (OHLC).")
-                     return self._fetch_coincap_ohlcv(symbol, timeframe, limit)
-                     
-                # print(f"   [BINANCE] Fallback Fetch OHLCV failed for {symbol}: {b_err}")
-                return self._fetch_coincap_ohlcv(symbol, timeframe, limit) # Last resort
-
-    @sleep_and_retry
-    @limits(calls=1200, period=60)  # Binance limit: 1200 requests/minute
+                bars = self.router.call(source, 'ohlcv', lambda: self._fetch_ohlcv_from(
+                    source, symbol, timeframe, delta_limit, since=since))
+                if self.candle_cache.merge(symbol, timeframe, bars):
+                    return self.candle_cache.read(symbol, timeframe, limit)
+            except Exception:
+                pass
+            # Gap or provider failure: drop the buffer and take the full fallback chain
+            self.candle_cache.invalidate(symbol, timeframe)
+
+        bars, source = self._fetch_ohlcv_chain(symbol, timeframe, limit)
+        if bars and source in ('kraken', 'binance'):
+            self.candle_cache.store(symbol, timeframe, bars, source)
+        return bars
+
+    def _fetch_ohlcv_from(self, source, symbol, timeframe, limit, since=None):
+        """Single-provider OHLCV request (no fallback)."""
+        self._charge(source, 'ohlcv', limit)
+        if source == 'kraken':
+            return self.fallback_exchange.fetch_ohlcv(self._venue_symbol('kraken', symbol), timeframe, since=since, limit=limit)
+        return self.exchange.fetch_ohlcv(self._venue_symbol('binance', symbol), timeframe, since=since, limit=limit)
+
+    def _fetch_ohlcv_chain(self, symbol, timeframe, limit, since=None):
+        """Full download: Kraken/Binance in router order, CoinGecko last. Returns (bars, source)."""
+        # V7300: An open circuit is skipped without paying its timeout
+        providers = MARKET_PROVIDERS if since is None else HISTORY_PROVIDERS
+        last_err = None
+        for source in self.router.order('ohlcv', providers):
+            try:
+                return self.router.call(source, 'ohlcv', lambda: self._fetch_ohlcv_from(
+                    source, symbol, timeframe, limit, since=since)), source
+            except Exception as e:
+                last_err = e
+        if since is not None:
+            raise last_err  # CoinGecko only has the latest window; callers must not read this as "no bars"
+        return self._fetch_coincap_ohlcv(symbol, timeframe, limit), 'coingecko' # Last resort
+
     def fetch_ticker(self, symbol):
         """
-        Fetch real-time price info (V2600: Kraken Primary).
-        Rate Limited: 1200 calls/minute (Binance API limit).
+        Fetch real-time price info (V2600: Kraken Primary, V7300: reordered by provider health).
+        V7000: Served from the ticker cache when a snapshot younger than the TTL exists.
         """
-        kraken_symbol = self._map_symbol_to_kraken(symbol)
-        try:
-            # Try Kraken First
-            return self.fallback_exchange.fetch_ticker(kraken_symbol)
-        except Exception as e:
-            # print(f"   [KRAKEN] Fetch Ticker failed for {kraken_symbol}: {e}. Falling back to Binance...")
+        cached = self.ticker_cache.get(symbol)
+        if cached:
+            return cached
+        ticker = self.single_flight.do(f"ticker:{symbol}", lambda: self._fetch_ticker_chain(symbol))
+        self.ticker_cache.put(symbol, ticker)
+        return ticker
+
+    def fetch_tickers(self, symbols):
+        """
+        V7000: Batched tickers {symbol: ticker} with the fetch_ticker fallback chain:
+        one Kraken request for every listed pair, Binance for the rest, CoinCap last.
+        Symbols no provider can price are left out.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        return self.ticker_cache.get_many(symbols, lambda missing: self.single_flight.do(
+            f"tickers:{','.join(sorted(missing))}", lambda: self._fetch_tickers_chain(missing)))
+
+    def _fetch_tickers_chain(self, symbols):
+        """Batched chain: Kraken/Binance in router order for whatever is still missing, CoinCap last."""
+        tickers = {}
+        for source in self.router.order('tickers', MARKET_PROVIDERS):
+            missing = [s for s in symbols if s not in tickers]
+            if not missing:
+                break
+            try:
+                tickers.update(self._fetch_tickers_from(source, missing))
+            except Exception:
+                pass
+
+        # V312: COINCAP FALLBACK (Geo-Block Bypass)
+        missing = [s for s in symbols if s not in tickers]
+        if missing:
+            tickers.update(self._fetch_coincap_tickers(missing))
+        return tickers
+
+    def _fetch_tickers_from(self, source, symbols):
+        tickers = {}
+        if source == 'kraken':
+            # Kraken: a single /Ticker call for all listed pairs (unlisted pairs would fail the whole call)
+            markets = self.fallback_exchange.load_markets()
+            kraken = {self.instruments.kraken_symbol(s): s for s in symbols}
+            listed = [k for k in kraken if k and k in markets]
+            if listed:
+                self._charge('kraken', 'tickers')
+                batch = self.router.call('kraken', 'tickers', lambda: self.fallback_exchange.fetch_tickers(listed))
+                for k, ticker in batch.items():
+                    if k in kraken:
+                        tickers[kraken[k]] = ticker
+            return tickers
+
+        # Binance: per-symbol weight 1, whole-market call weight 40
+        resolved = {self._venue_symbol('binance', s): s for s in symbols}
+        if len(symbols) >= BINANCE_ALL_TICKERS_WEIGHT:
+            self._charge('binance', 'tickers')
+            batch = self.router.call('binance', 'tickers', lambda: self.exchange.fetch_tickers(list(resolved)))
+            for r, ticker in batch.items():
+                if r in resolved:
+                    tickers[resolved[r]] = ticker
+            return tickers
+        for r, s in resolved.items():
+            if self.router.state('binance', 'tickers') == OPEN:
+                break  # Circuit opened mid-batch: the remaining symbols go to CoinCap
             try:
-                # Map to Futures if needed
-                target_sym = self._resolve_symbol(symbol)
-                return self.exchange.fetch_ticker(target_sym)
+                self._charge('binance', 'ticker')
+                tickers[s] = self.router.call('binance', 'tickers', lambda: self.exchange.fetch_ticker(r))
             except Exception as b_err:
-                # V312: COINCAP FALLBACK (Geo-Block Bypass)
                 if "451" in str(b_err) or "Service unavailable" in str(b_err):
-                     # print(f"   [BINANCE] Geo-Block Detected (451). Switching to CoinCap.")
-                     return self._fetch_coincap_ticker(symbol)
-                
-                # print(f"   [BINANCE] Fallback Fetch Ticker failed for {symbol}: {b_err}")
-                return self._fetch_coincap_ticker(symbol) # Try anyway
+                    break  # Geo-blocked: the remaining symbols go to CoinCap
+        return tickers
+
+    def _fetch_ticker_chain(self, symbol):
+        """Single-symbol chain: Kraken/Binance in router order, CoinCap last."""
+        for source in self.router.order('ticker', MARKET_PROVIDERS):
+            try:
+                return self.router.call(source, 'ticker', lambda: self._fetch_ticker_from(source, symbol))
+            except Exception:
+                continue
+        # V312: COINCAP FALLBACK (Geo-Block Bypass)
+        return self._fetch_coincap_ticker(symbol)
+
+    def _fetch_ticker_from(self, source, symbol):
+        """Single-provider ticker request (no fallback)."""
+        self._charge(source, 'ticker')
+        if source == 'kraken':
+            return self.fallback_exchange.fetch_ticker(self._venue_symbol('kraken', symbol))
+        return self.exchange.fetch_ticker(self._venue_symbol('binance', symbol))
 
     def _fetch_coincap_ohlcv(self, symbol, timeframe='1h', limit=100):
         """Tier-3 Fallback: CoinCap History."""
         try:
-            # Map BTC/USDT -> bitcoin
-            base = symbol.split('/')[0].lower()
-            asset_id = base
-            if base == 'btc': asset_id = 'bitcoin'
-            elif base == 'eth': asset_id = 'ethereum'
-            elif base == 'sol': asset_id = 'solana'
-            elif base == 'bnb': asset_id = 'binance-coin'
-            elif base == 'xrp': asset_id = 'xrp'
-            elif base == 'doge': asset_id = 'dogecoin'
-            elif base == 'ada': asset_id = 'cardano'
+            asset_id = _coincap_asset_id(symbol)
             
             # Map Timeframe: 5m -> m5, 1h -> h1
             interval = timeframe.replace('m', 'm').replace('h', 'h')
@@ -285,39 +429,28 @@ class BinanceTrader:
             print(f"   [COINGECKO] Error: {e}")
         return []
 
-    @sleep_and_retry
-    @limits(calls=1200, period=60)  # Binance limit: 1200 requests/minute
     def fetch_order_book(self, symbol, limit=50):
         """
         Fetch L2 Order Book (V2600: Kraken Primary).
-        Rate Limited: 1200 calls/minute (Binance API limit).
+        V7200: Each provider call spends its depth weight from the shared rate limiter.
+        V7100: Coalesced with identical concurrent requests from other processes.
         """
-        kraken_symbol = self._map_symbol_to_kraken(symbol)
-        try:
-            # Try Kraken First
-            return self.fallback_exchange.fetch_order_book(kraken_symbol, limit=limit)
-        except Exception as e:
-            print(f"   [KRAKEN] Fetch Order Book failed for {kraken_symbol}: {e}. Falling back to Binance...")
+        return self.single_flight.do(f"book:{symbol}:{limit}", lambda: self._fetch_order_book_chain(symbol, limit))
+
+    def _fetch_order_book_chain(self, symbol, limit):
+        for source in self.router.order('order_book', MARKET_PROVIDERS):
             try:
-                return self.exchange.fetch_order_book(symbol, limit=limit)
-            except Exception as b_err:
-                print(f"   [BINANCE] Fallback Fetch Order Book failed for {symbol}: {b_err}")
-                return None
+                return self.router.call(source, 'order_book', lambda: self._fetch_order_book_from(source, symbol, limit))
+            except Exception as e:
+                print(f"   [{source.upper()}] Fetch Order Book failed for {symbol}: {e}")
+        return None
 
-    # V314: FUTURES SYMBOL MAPPER
-    def _map_to_futures_symbol(self, symbol):
-        """
-        Maps generic symbols to Binance Futures format.
-        BTC/USDT -> BTC/USDT:USDT (Linear)
-        """
-        if ":" in symbol: return symbol
-        if "/USD" in symbol and "/USDT" not in symbol:
-             symbol = symbol.replace("/USD", "/USDT")
-        
-        # Check if we need to append :USDT
-        # For linear contracts, it's often safer to use the standard ID if loaded, 
-        # but let's try the common suffix if simple lookup fails.
-        return symbol
+    def _fetch_order_book_from(self, source, symbol, limit):
+        """Single-provider L2 request (no fallback)."""
+        self._charge(source, 'order_book', limit)
+        if source == 'kraken':
+            return self.fallback_exchange.fetch_order_book(self._venue_symbol('kraken', symbol), limit=limit)
+        return self.exchange.fetch_order_book(self._venue_symbol('binance', symbol), limit=limit)
 
     def execute_market_order(self, symbol, side, amount, leverage=1):
         """
@@ -332,46 +465,41 @@ class BinanceTrader:
             print("   [BINANCE] Error: Not connected to API.")
             return None
 
-        # Map to Futures
-        symbol = self._map_to_futures_symbol(symbol)
-
         print(f"   [BINANCE] PRE-ORDER DIAGNOSTICS (MARGIN): {symbol} | Side: {side} | Target Amount: {amount}")
 
         try:
             # 1. Load Markets (if not loaded)
             if not self.exchange.markets:
                 print("   [BINANCE] Loading market data...")
-                self.exchange.load_markets()
+                self.markets_cache.load(self.exchange)
             
-            # Check if symbol exists in markets
-            if symbol not in self.exchange.markets:
-                 # Try appending :USDT if missing
-                 alt_symbol = f"{symbol}:USDT"
-                 if alt_symbol in self.exchange.markets:
-                     symbol = alt_symbol
-                     print(f"   [BINANCE] Auto-Corrected Symbol to {symbol}")
-                 else:
-                     print(f"   [BINANCE] CRITICAL: Market {symbol} not found in Futures.")
-                     return None
+            # V7700: Map to Futures via the instrument registry (BTC/USD, BTC/USDT -> BTC/USDT:USDT)
+            instrument = self.instruments.get(symbol)
+            if instrument is None:
+                print(f"   [BINANCE] CRITICAL: Market {symbol} not found in Futures.")
+                return None
+            symbol = instrument.binance
 
             # V2500: Leverage Upgrade (Cap raised to 10x)
             target_leverage = min(leverage, 10)
             try:
+                self._charge('binance', 'leverage', lane='execution')
                 self.exchange.set_leverage(target_leverage, symbol)
                 print(f"   [BINANCE] Leverage set to {target_leverage}x for {symbol}")
             except Exception as lv_err:
                 print(f"   [BINANCE] Leverage warning: {lv_err}")
 
-            # 2. Precision Handling
-            clean_amount = self.exchange.amount_to_precision(symbol, amount)
+            # 2. Precision Handling (V7700: lot size and minimum quantity from the registry)
+            clean_amount = self.instruments.order_amount(symbol, amount)
             print(f"   [BINANCE] Precision Adjustment: {amount} -> {clean_amount}")
             
-            if float(clean_amount) <= 0:
-                print(f"   [BINANCE] ERROR: Amount {clean_amount} is too small.")
+            if clean_amount is None:
+                print(f"   [BINANCE] ERROR: Amount {amount} is too small.")
                 return None
 
             # 4. Final Execution (V600: Standard Futures Market Order)
             print(f"   [BINANCE] EXECUTING FUTURES ORDER: {side.upper()} {clean_amount} {symbol}")
+            self._charge('binance', 'order', lane='execution')
             order = self.exchange.create_market_order(symbol, side, clean_amount)
             print(f"   [BINANCE] SUCCESS: Order ID {order.get('id')} executed on Futures.")
             return order
@@ -387,6 +515,7 @@ class BinanceTrader:
         if not self.is_connected: return []
         try:
             # V600: Fetching real futures positions
+            self._charge('binance', 'positions', lane='execution')
             positions = self.exchange.fetch_positions()
             active_positions = []
             
@@ -427,18 +556,22 @@ class BinanceTrader:
 
         try:
             # 1. Prepare Symbol
-            symbol = self._resolve_symbol(symbol)
+            symbol = self._venue_symbol('binance', symbol)
             
             # 2. Set Leverage
             try:
+                self._charge('binance', 'leverage', lane='execution')
                 self.exchange.set_leverage(leverage, symbol)
             except Exception: pass # Maybe already set
 
             # 3. Execute ENTRY (Market)
-            # Precision adjustment
-            qty = self.exchange.amount_to_precision(symbol, amount)
+            # Precision adjustment (V7700: registry lot size; below the minimum is rejected here, not by Binance)
+            qty = self.instruments.order_amount(symbol, amount)
+            if qty is None:
+                raise ValueError(f"Amount {amount} below the minimum for {symbol}")
             
             print(f"   [EXEC] Sending MARKET {side} {qty} {symbol}...")
+            self._charge('binance', 'order', lane='execution')
             entry_order = self.exchange.create_order(symbol, 'market', side, qty)
             
             result['entry_id'] = entry_order['id']
@@ -455,21 +588,23 @@ class BinanceTrader:
             # STOP LOSS (STOP_MARKET)
             # Binance Futures uses 'stopPrice'
             sl_params = {
-                'stopPrice': self.exchange.price_to_precision(symbol, stop_loss),
+                'stopPrice': self.instruments.round_price(symbol, stop_loss),
                 'reduceOnly': True
             }
             
             print(f"   [EXEC] Sending SL ({exit_side}) @ {stop_loss}...")
+            self._charge('binance', 'order', lane='execution')
             sl_order = self.exchange.create_order(symbol, 'STOP_MARKET', exit_side, qty, params=sl_params)
             result['sl_id'] = sl_order['id']
             
             # TAKE PROFIT (TAKE_PROFIT_MARKET)
             tp_params = {
-                'stopPrice': self.exchange.price_to_precision(symbol, take_profit),
+                'stopPrice': self.instruments.round_price(symbol, take_profit),
                 'reduceOnly': True
             }
             
             print(f"   [EXEC] Sending TP ({exit_side}) @ {take_profit}...")
+            self._charge('binance', 'order', lane='execution')
             tp_order = self.exchange.create_order(symbol, 'TAKE_PROFIT_MARKET', exit_side, qty, params=tp_params)
             result['tp_id'] = tp_order['id']
             
@@ -489,14 +624,16 @@ class BinanceTrader:
         """
         if self.mode != "LIVE": return None
         try:
-            symbol = self._resolve_symbol(symbol)
+            symbol = self._venue_symbol('binance', symbol)
             # 1. Fetch current open orders for this symbol
+            self._charge('binance', 'open_orders', lane='execution')
             orders = self.exchange.fetch_open_orders(symbol)
             
             # 2. Cancel existing STOP_MARKET orders
             for order in orders:
                 if order['type'] == 'STOP_MARKET':
                     print(f"   [EXEC] Canceling existing SL order {order['id']}...")
+                    self._charge('binance', 'cancel', lane='execution')
                     self.exchange.cancel_order(order['id'], symbol)
             
             # 3. Get current position size (to match)
@@ -513,10 +650,11 @@ class BinanceTrader:
 
             # 4. Create new STOP_MARKET order
             params = {
-                'stopPrice': self.exchange.price_to_precision(symbol, new_sl_price),
+                'stopPrice': self.instruments.round_price(symbol, new_sl_price),
                 'reduceOnly': True
             }
-            precision_qty = self.exchange.amount_to_precision(symbol, qty)
+            precision_qty = self.instruments.round_amount(symbol, qty)
+            self._charge('binance', 'order', lane='execution')
             new_order = self.exchange.create_order(symbol, 'STOP_MARKET', side, precision_qty, params=params)
             print(f"   [EXEC] SUCCESS: New SL set at {new_sl_price} for {symbol}")
             return new_order
@@ -528,7 +666,8 @@ class BinanceTrader:
         """Emergency Wipe of all open orders for a symbol."""
         if not self.is_connected: return
         try:
-            symbol = self._resolve_symbol(symbol)
+            symbol = self._venue_symbol('binance', symbol)
+            self._charge('binance', 'cancel', lane='execution')
             return self.exchange.cancel_all_orders(symbol)
         except Exception as e:
             print(f"   [BINANCE] Error canceling all orders: {e}")
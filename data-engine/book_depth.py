@@ -0,0 +1,196 @@
+"""
+COSMOS AI - Order Book Depth Analytics
+One vectorized pass over an order book (V8400): the levels are converted to
+NumPy arrays once and every consumer reads the same result.
+
+- Depth curves: cumulative quantity and quote notional per level, per side.
+- Imbalance: (bid - ask) / (bid + ask) over the whole book and at DEPTHS levels.
+- Slippage: VWAP of a market order that walks the book, in bps from the touch
+  (best ask for buys, best bid for sells), per level and for SLIPPAGE_NOTIONALS;
+  max_notional() inverts the curve for order sizing.
+- Walls: levels within the first WALL_LEVELS holding more than WALL_SHARE of
+  their side, adjacent ones merged into one cluster (cosmos_quant's whale walls).
+- Spread in bps and pct of the mid.
+
+Cumulative sums run in level order, so the totals are bit-identical to summing
+the levels in Python (scanner.calculate_imbalance, book_store.book_metrics).
+DepthCache keeps one result per (symbol, book update).
+"""
+import numpy as np
+
+DEPTHS = (10, 50, 100)
+SLIPPAGE_NOTIONALS = (1_000, 10_000, 50_000, 100_000)   # Quote currency (USDT)
+WALL_SHARE = 0.05       # Level holding > 5% of its side's volume
+WALL_LEVELS = 10        # Only levels near the price count as walls
+EMPTY = np.empty(0)
+
+
+def book_arrays(levels):
+    """ccxt levels [[price, qty, ...], ...] -> (price, qty) float64 arrays."""
+    if not levels:
+        return EMPTY, EMPTY
+    arr = np.asarray(levels, dtype=np.float64)
+    return np.ascontiguousarray(arr[:, 0]), np.ascontiguousarray(arr[:, 1])
+
+
+def _side(price, qty, sign, notionals, wall_share, wall_levels):
+    """Depth curve, slippage and walls for one side (sign +1 asks / buys, -1 bids / sells)."""
+    n = len(price)
+    cum_qty = np.cumsum(qty)
+    cum_notional = np.cumsum(price * qty)
+    out = {"levels": n, "price": price, "qty": qty, "cum_qty": cum_qty, "cum_notional": cum_notional,
+           "volume": cum_qty[-1] if n else 0.0, "notional": cum_notional[-1] if n else 0.0}
+    if not n:
+        out.update(best=None, slippage_bps=EMPTY, slippage={float(x): np.nan for x in notionals}, walls=[])
+        return out
+
+    best = price[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out["slippage_bps"] = sign * (cum_notional / cum_qty / best - 1.0) * 1e4  # After consuming levels 0..k
+
+        # Notional N is reached inside level k: cum_notional[k-1] < N <= cum_notional[k]
+        targets = np.asarray(notionals, dtype=np.float64)
+        k = np.searchsorted(cum_notional, targets)
+        kk = np.minimum(k, n - 1)
+        prev_notional = np.where(kk > 0, cum_notional[kk - 1], 0.0)
+        prev_qty = np.where(kk > 0, cum_qty[kk - 1], 0.0)
+        filled = prev_qty + (targets - prev_notional) / price[kk]
+        bps = np.where(k < n, sign * (targets / filled / best - 1.0) * 1e4, np.nan)  # NaN: deeper than the book
+    out["best"] = best
+    out["slippage"] = dict(zip(targets.tolist(), bps.tolist()))
+    out["walls"] = walls_at(out, None, wall_share, wall_levels)
+    return out
+
+
+def walls_at(side, depth=None, wall_share=WALL_SHARE, wall_levels=WALL_LEVELS):
+    """
+    Wall clusters of one side, measured against the volume of its top `depth` levels (all when None):
+    levels within the first wall_levels above wall_share of that volume, runs of adjacent levels merged.
+    """
+    volume = _volume_at(side, depth)
+    near = side["qty"][:min(wall_levels, depth or wall_levels)]
+    flags = near > volume * wall_share
+    starts = np.flatnonzero(flags & ~np.r_[False, flags[:-1]])
+    ends = np.flatnonzero(flags & ~np.r_[flags[1:], False]) + 1
+    walls = []
+    for s, e in zip(starts, ends):
+        top = s + int(near[s:e].argmax())
+        qty = near[s:e].sum()
+        walls.append({"price": side["price"][top], "from": side["price"][s], "to": side["price"][e - 1],
+                      "qty": qty, "share": qty / volume, "levels": int(e - s)})
+    return walls
+
+
+def analyze(bids, asks, depths=DEPTHS, notionals=SLIPPAGE_NOTIONALS, wall_share=WALL_SHARE, wall_levels=WALL_LEVELS):
+    """
+    Full depth analytics for sorted ccxt levels (best first). Sides are dicts with the
+    arrays (price, qty, cum_qty, cum_notional, slippage_bps) and their summaries.
+    """
+    bid, ask = (_side(*book_arrays(levels), sign, notionals, wall_share, wall_levels)
+                for levels, sign in ((bids, -1.0), (asks, 1.0)))
+    result = {"bid": bid, "ask": ask, "imbalance": imbalance_at(bid, ask),
+              "depth": {d: depth_at(bid, ask, d) for d in depths}}
+
+    if bid["levels"] and ask["levels"]:
+        mid = (bid["best"] + ask["best"]) / 2
+        spread = ask["best"] - bid["best"]
+        result.update(mid=mid, spread_bps=spread / mid * 1e4 if mid else 0.0, spread_pct=spread / mid * 100 if mid else 0.0)
+    else:
+        result.update(mid=None, spread_bps=0.0, spread_pct=0.0)
+    return result
+
+
+def _volume_at(side, depth):
+    n = min(depth, side["levels"]) if depth is not None else side["levels"]
+    return side["cum_qty"][n - 1] if n else 0.0
+
+
+def imbalance_at(bid, ask, depth=None):
+    """Imbalance over the top `depth` levels of each side (all levels when None); 0 on an empty book."""
+    bid_vol, ask_vol = _volume_at(bid, depth), _volume_at(ask, depth)
+    total = bid_vol + ask_vol
+    return (bid_vol - ask_vol) / total if total else 0.0
+
+
+def depth_at(bid, ask, depth):
+    """Volume and imbalance over the top `depth` levels."""
+    return {"bid": _volume_at(bid, depth), "ask": _volume_at(ask, depth), "imbalance": imbalance_at(bid, ask, depth)}
+
+
+def slippage_bps(analytics, side, notional):
+    """Expected slippage (bps from the touch) of a `side` ('buy'/'sell') market order of `notional`; NaN if too deep."""
+    book_side = analytics["ask" if side == "buy" else "bid"]
+    cached = book_side["slippage"].get(float(notional))
+    if cached is not None:
+        return cached
+    n = book_side["levels"]
+    k = int(np.searchsorted(book_side["cum_notional"], notional))
+    if k >= n:
+        return float('nan')
+    price, cum_qty, cum_notional = book_side["price"], book_side["cum_qty"], book_side["cum_notional"]
+    filled = (cum_qty[k - 1] if k else 0.0) + (notional - (cum_notional[k - 1] if k else 0.0)) / price[k]
+    sign = 1.0 if side == "buy" else -1.0
+    return float(sign * (notional / filled / book_side["best"] - 1.0) * 1e4)
+
+
+def max_notional(analytics, side, max_bps):
+    """
+    Largest `side` market order (quote notional) whose VWAP stays within `max_bps` of the touch.
+    Capped at the visible book (a lower bound when the book is truncated).
+    """
+    book_side = analytics["ask" if side == "buy" else "bid"]
+    n = book_side["levels"]
+    if not n:
+        return 0.0
+    curve = book_side["slippage_bps"]
+    j = int(np.searchsorted(curve, max_bps, side='right')) - 1  # Last level fully consumable (curve is non-decreasing)
+    if j < 0:
+        return 0.0
+    if j >= n - 1:
+        return float(book_side["notional"])
+    sign = 1.0 if side == "buy" else -1.0
+    vwap = book_side["best"] * (1.0 + sign * max_bps / 1e4)
+    price = book_side["price"][j + 1]
+    cum_qty, cum_notional = book_side["cum_qty"][j], book_side["cum_notional"][j]
+    extra = (vwap * cum_qty - cum_notional) / (price - vwap)  # Partial fill of level j+1 that lands on the target VWAP
+    return float(cum_notional + max(extra, 0.0) * price)
+
+
+class DepthCache:
+    """
+    One analytics result per (symbol, book update), keyed by the book's nonce/timestamp.
+    A shallower copy of the same update (e.g. scanner's top 50 of the gateway's 100) is a
+    prefix of it, so it reuses the deeper result; callers read their depth via imbalance_at.
+    Books without symbol, nonce and timestamp are analyzed without caching.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, book, symbol=None):
+        bids, asks = book.get('bids') or [], book.get('asks') or []
+        symbol = symbol or book.get('symbol')
+        version = (book.get('nonce'), book.get('timestamp'))
+        if not symbol or version == (None, None):
+            self.misses += 1
+            return analyze(bids, asks)
+
+        cached = self._entries.get(symbol)
+        if cached and cached[0] == version and cached[1]["bid"]["levels"] >= len(bids) and cached[1]["ask"]["levels"] >= len(asks):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        result = analyze(bids, asks)
+        self._entries[symbol] = (version, result)
+        return result
+
+    def stats(self):
+        return {"symbols": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton (in-process; book_keeper publishes the summary to Redis through BookStore)
+depth_cache = DepthCache()
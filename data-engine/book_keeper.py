@@ -0,0 +1,263 @@
+"""
+COSMOS AI - Book Keeper (Stream Layer)
+Maintains a local L2 order book per symbol from a REST snapshot plus Binance Futures
+@depth@100ms diffs (update-id sequencing, gap detection, resync) and publishes
+top-N snapshots with imbalance/depth figures to Redis (see book_store.py).
+"""
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+
+import websockets
+from dotenv import load_dotenv
+
+from book_store import BookStore, TOP_N
+from candle_builder import get_stream_universe, stream_name
+
+# Load env
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+load_dotenv(dotenv_path=os.path.join(parent_dir, '.env.local'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - [BOOK KEEPER] - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Futures stream: same market type as BinanceTrader (defaultType 'swap')
+BINANCE_FUTURES_WSS = os.getenv("BOOK_WSS", "wss://fstream.binance.com/stream")
+SNAPSHOT_LIMIT = int(os.getenv("BOOK_SNAPSHOT_LIMIT", "1000"))
+PUBLISH_INTERVAL = float(os.getenv("BOOK_PUBLISH_INTERVAL", "0.1"))  # Seconds between writes per symbol
+HEARTBEAT_INTERVAL = 1.0     # Re-publish quiet books so readers do not treat them as stale
+MAX_BUFFER = 2000            # Diff events held while a snapshot is in flight
+UNIVERSE_REFRESH = 1800
+
+
+class LocalOrderBook:
+    """
+    One symbol's L2 book. Follows Binance USD-M rules:
+    drop diffs with u < lastUpdateId, the first applied diff must straddle the snapshot
+    (U <= lastUpdateId <= u), and every later diff's pu must equal the previous u.
+    """
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = {}
+        self.asks = {}
+        self.last_update_id = None
+        self.event_time = 0
+        self.synced = False
+        self._expect_first = False
+        self._buffer = []
+
+        # Metrics
+        self.resyncs = 0
+        self.applied = 0
+
+    def reset(self):
+        """Drops the book; diffs are buffered until the next snapshot."""
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+        self._buffer = []
+
+    def on_event(self, event):
+        """Returns 'buffered', 'stale', 'applied' or 'gap' (caller must resync)."""
+        if not self.synced:
+            self._buffer.append(event)
+            if len(self._buffer) > MAX_BUFFER:
+                self._buffer = self._buffer[-MAX_BUFFER:]
+            return 'buffered'
+        status = self._apply(event)
+        if status == 'gap':
+            self._buffer.append(event)  # Replayed against the next snapshot
+        return status
+
+    def apply_snapshot(self, snapshot):
+        """
+        snapshot: ccxt order book (bids/asks + 'nonce' = lastUpdateId).
+        Replays the buffered diffs; returns 'synced' or 'gap'.
+        """
+        self.bids = {float(p): float(q) for p, q, *_ in snapshot['bids']}
+        self.asks = {float(p): float(q) for p, q, *_ in snapshot['asks']}
+        self.last_update_id = int(snapshot['nonce'])
+        self.event_time = snapshot.get('timestamp') or int(time.time() * 1000)
+        self.synced = True
+        self._expect_first = True
+
+        buffered, self._buffer = self._buffer, []
+        for i, event in enumerate(buffered):
+            if self._apply(event) == 'gap':
+                self._buffer = buffered[i:]
+                return 'gap'
+        return 'synced'
+
+    def _apply(self, event):
+        first_id, final_id = event['U'], event['u']
+        if final_id < self.last_update_id:
+            return 'stale'
+
+        if self._expect_first:
+            if first_id > self.last_update_id:
+                self._gap()
+                return 'gap'  # Snapshot older than the first diff we hold
+            self._expect_first = False
+        elif event.get('pu') != self.last_update_id:
+            self._gap()
+            return 'gap'
+
+        for side, levels in ((self.bids, event['b']), (self.asks, event['a'])):
+            for price, qty in levels:
+                price, qty = float(price), float(qty)
+                if qty == 0:
+                    side.pop(price, None)
+                else:
+                    side[price] = qty
+
+        self.last_update_id = final_id
+        self.event_time = event.get('E', self.event_time)
+        self.applied += 1
+        return 'applied'
+
+    def _gap(self):
+        self.resyncs += 1
+        self.reset()
+
+    def top(self, n=TOP_N):
+        """Best `n` levels per side, sorted best first."""
+        bids = [[p, q] for p, q in heapq.nlargest(n, self.bids.items())]
+        asks = [[p, q] for p, q in heapq.nsmallest(n, self.asks.items())]
+        return bids, asks
+
+
+def fetch_snapshot(symbol):
+    """REST snapshot from Binance Futures (ccxt puts lastUpdateId in 'nonce')."""
+    from binance_engine import live_trader
+    return live_trader.exchange.fetch_order_book(live_trader.instruments.binance_symbol(symbol), limit=SNAPSHOT_LIMIT)
+
+
+class BookKeeperService:
+    def __init__(self, store, universe_fn=get_stream_universe, snapshot_fn=fetch_snapshot, top_n=TOP_N):
+        self.store = store
+        self.universe_fn = universe_fn
+        self.snapshot_fn = snapshot_fn
+        self.top_n = top_n
+        self.books = {}       # stream name -> LocalOrderBook
+        self._syncing = set()
+        self._last_publish = {}
+
+    def _subscribe_books(self, universe):
+        self.books = {stream_name(s): LocalOrderBook(s) for s in universe}
+
+    async def _resync(self, book):
+        """Snapshot in a worker thread while diffs keep buffering; retries on a stale snapshot."""
+        if book.symbol in self._syncing:
+            return
+        self._syncing.add(book.symbol)
+        try:
+            while True:
+                snapshot = await asyncio.to_thread(self.snapshot_fn, book.symbol)
+                if book.apply_snapshot(snapshot) == 'synced':
+                    self.publish(book, force=True)
+                    return
+                logger.warning(f"{book.symbol} snapshot behind the diff stream. Retrying...")
+                await asyncio.sleep(0.5)
+        except Exception as e:
+            logger.error(f"Snapshot failed for {book.symbol}: {e}")
+            book.reset()
+        finally:
+            self._syncing.discard(book.symbol)
+
+    def publish(self, book, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_publish.get(book.symbol, 0) < PUBLISH_INTERVAL:
+            return
+        bids, asks = book.top(self.top_n)
+        self.store.write(book.symbol, bids, asks, book.event_time, book.last_update_id)
+        self._last_publish[book.symbol] = now
+
+    def on_event(self, event):
+        book = self.books.get(event['s'].lower())
+        if not book:
+            return
+        status = book.on_event(event)
+        if status == 'applied':
+            self.publish(book)
+        elif status == 'gap':
+            logger.warning(f"{book.symbol} sequence gap (resync #{book.resyncs}).")
+            asyncio.ensure_future(self._resync(book))
+        elif status == 'buffered' and book.symbol not in self._syncing:
+            asyncio.ensure_future(self._resync(book))
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            for book in self.books.values():
+                if book.synced and now - self._last_publish.get(book.symbol, 0) >= HEARTBEAT_INTERVAL:
+                    self.publish(book, force=True)
+
+    def stats(self):
+        books = list(self.books.values())
+        return {
+            "books": len(books),
+            "synced": sum(1 for b in books if b.synced),
+            "resyncs": sum(b.resyncs for b in books),
+            "diffs_applied": sum(b.applied for b in books),
+        }
+
+    async def connect_stream(self):
+        universe = self.universe_fn()
+        url = f"{BINANCE_FUTURES_WSS}?streams=" + "/".join(f"{stream_name(s)}@depth@100ms" for s in universe)
+
+        async with websockets.connect(url, ping_interval=20, max_queue=4096) as ws:
+            logger.info(f"Connected to Binance Futures depth diffs: {len(universe)} Assets.")
+            self._subscribe_books(universe)  # Fresh books: every symbol resyncs on its first diff
+            heartbeat = asyncio.ensure_future(self._heartbeat())
+            last_log = time.time()
+            try:
+                while True:
+                    message = await ws.recv()
+                    data = json.loads(message).get('data', {})
+                    if data.get('e') == 'depthUpdate':
+                        self.on_event(data)
+
+                    if time.time() - last_log > 300:
+                        last_log = time.time()
+                        logger.info(f"Keeper stats: {self.stats()}")
+
+                    # Universe changes: reconnect with the new stream list
+                    if time.time() - self._connected_at > UNIVERSE_REFRESH:
+                        if {stream_name(s) for s in self.universe_fn()} != set(self.books):
+                            logger.info("Universe changed. Reconnecting...")
+                            return
+                        self._connected_at = time.time()
+            finally:
+                heartbeat.cancel()
+
+    async def run(self):
+        while True:
+            self._connected_at = time.time()
+            try:
+                await self.connect_stream()
+            except Exception as e:
+                logger.error(f"Connection Lost. Reconnecting in 5s... ({e})")
+                await asyncio.sleep(5)
+
+
+def main():
+    from redis_engine import redis_engine
+    if not redis_engine.client:
+        logger.error("Redis offline. Book keeper has nowhere to publish. Exiting.")
+        return
+    service = BookKeeperService(BookStore(redis_engine.client))
+    logger.info("--- NEXUS BOOK KEEPER STARTED ---")
+    asyncio.run(service.run())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("Book Keeper Stopped.")
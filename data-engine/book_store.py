@@ -0,0 +1,120 @@
+"""
+COSMOS AI - Book Store
+Redis layout shared by book_keeper.py (writer) and the order book readers
+(scanner.fetch_order_book, cosmos_quant, MarketGateway, redis_engine.get_liquidity).
+
+book:{SYMBOL}        compact top-N snapshot + precomputed imbalance/depth (short TTL)
+liquidity:{symbol}   {"bid", "ask"} top-N volume (RedisEngine.get_liquidity format), plus
+                     quote notional and slippage points (V8400)
+"""
+import os
+import json
+import time
+
+import numpy as np
+
+import book_depth # V8400: One-pass depth analytics
+
+TOP_N = int(os.getenv("BOOK_TOP_N", "100"))          # Covers quant_engine (100) and analyze_quant_signal (50)
+METRIC_DEPTHS = (10, 50, 100)
+BOOK_TTL = 10                                        # Seconds; a dead keeper lets readers fall back to REST
+MAX_BOOK_AGE_MS = int(os.getenv("BOOK_MAX_AGE_MS", "2000"))
+
+
+def book_metrics(bids, asks, depths=METRIC_DEPTHS):
+    """
+    Imbalance and cumulative volume at several depths, plus spread.
+    bids/asks are sorted [[price, qty], ...] (best first).
+    V8400: Summary of book_depth.analyze (adds spread_bps, quote notional and the slippage curve points).
+    """
+    analytics = book_depth.analyze(bids, asks, depths=depths)
+    metrics = {"imbalance": {}, "bid_depth": {}, "ask_depth": {}}
+    for depth, values in analytics["depth"].items():
+        metrics["imbalance"][str(depth)] = round(values["imbalance"], 4)
+        metrics["bid_depth"][str(depth)] = float(values["bid"])
+        metrics["ask_depth"][str(depth)] = float(values["ask"])
+
+    metrics["spread_pct"] = analytics["spread_pct"]
+    metrics["spread_bps"] = analytics["spread_bps"]
+    metrics["bid_notional"] = float(analytics["bid"]["notional"])
+    metrics["ask_notional"] = float(analytics["ask"]["notional"])
+    metrics["slippage_bps"] = {
+        side: {f"{notional:g}": (None if np.isnan(bps) else round(bps, 3)) for notional, bps in analytics[key]["slippage"].items()}
+        for side, key in (("buy", "ask"), ("sell", "bid"))
+    }
+    return metrics
+
+
+class BookStore:
+    def __init__(self, client, top_n=TOP_N):
+        self.client = client
+        self.top_n = top_n
+
+    # --- Writer side (book_keeper.py) ---
+
+    def write(self, symbol, bids, asks, timestamp, update_id):
+        """bids/asks: top-N sorted levels. One pipeline per update."""
+        metrics = book_metrics(bids, asks)
+        payload = {
+            "bids": bids,
+            "asks": asks,
+            "timestamp": timestamp,                  # Exchange event time
+            "written_at": int(time.time() * 1000),   # Local clock, used for staleness
+            "nonce": update_id,
+            **metrics,
+        }
+        deepest = str(METRIC_DEPTHS[-1])
+        pipe = self.client.pipeline()
+        pipe.set(f"book:{symbol.upper()}", json.dumps(payload), ex=BOOK_TTL)
+        pipe.set(f"liquidity:{symbol}", json.dumps({"bid": metrics["bid_depth"][deepest], "ask": metrics["ask_depth"][deepest],
+                                                    "bid_usd": metrics["bid_notional"], "ask_usd": metrics["ask_notional"],
+                                                    "slippage_bps": metrics["slippage_bps"]}), ex=60)
+        pipe.execute()
+        return payload
+
+    # --- Reader side ---
+
+    def read_payload(self, symbol, max_age_ms=MAX_BOOK_AGE_MS, now_ms=None):
+        try:
+            raw = self.client.get(f"book:{symbol.upper()}")
+        except Exception:
+            return None
+        if not raw:
+            return None
+        payload = json.loads(raw)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if now_ms - payload.get("written_at", 0) > max_age_ms:
+            return None
+        return payload
+
+    def read(self, symbol, limit=50, max_age_ms=MAX_BOOK_AGE_MS, now_ms=None):
+        """
+        ccxt-shaped order book (bids, asks, timestamp, nonce) truncated to `limit`,
+        or None when the replica is missing, stale or shallower than requested.
+        """
+        if limit > self.top_n:
+            return None
+        payload = self.read_payload(symbol, max_age_ms=max_age_ms, now_ms=now_ms)
+        if not payload:
+            return None
+        return {
+            "symbol": symbol,
+            "bids": payload["bids"][:limit],
+            "asks": payload["asks"][:limit],
+            "timestamp": payload["timestamp"],
+            "nonce": payload["nonce"],
+        }
+
+
+def _build_default_store():
+    try:
+        from redis_engine import redis_engine
+        if redis_engine.client:
+            return BookStore(redis_engine.client)
+    except Exception as e:
+        print(f"   [BOOK STORE] Redis unavailable ({e}). Local book replica disabled.")
+    return None
+
+
+# Singleton (None when Redis is offline; callers fall back to REST)
+book_store = _build_default_store()
@@ -2,57 +2,31 @@ import os
 import time
 import pandas as pd
 import numpy as np
-import ccxt
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 from dotenv import load_dotenv
 from db import sync_model_metadata
+from indicators import calculate_rsi, calculate_macd, calculate_atr # V6600: Shared NumPy kernels (Wilder ATR)
+from candle_archive import candle_archive # V7500: Local OHLCV history
+from candle_cache import timeframe_ms
 
 # Path Fixing for imports
 load_dotenv(dotenv_path="../.env.local")
 
-# V310: BINANCE CONFIG (Replaces Kraken)
-exchange = ccxt.binance({
-    'apiKey': os.getenv('BINANCE_API_KEY'),
-    'secret': os.getenv('BINANCE_SECRET'),
-    'enableRateLimit': True,
-})
-
 MODEL_PATH = "cosmos_model.joblib"
 FEATURE_COLS = ['rsi_value', 'imbalance_ratio', 'spread_pct', 'atr_value', 'macd_line', 'histogram']
 
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    exp1 = series.ewm(span=fast, adjust=False).mean()
-    exp2 = series.ewm(span=slow, adjust=False).mean()
-    macd_line = exp1 - exp2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, histogram
-
-def calculate_atr(df, period=14):
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(14).mean()
-
 def fetch_historical_data(symbol='BTC/USDT', timeframe='15m', limit=2000):
     """V310: Fetch historical data from Binance."""
     print(f"   >>> Fetching {limit} historical candles for {symbol} ({timeframe})...")
     # Ensure symbol is Binance compatible (e.g. BTC/USDT)
     binance_symbol = symbol.replace('/USD', '/USDT')
-    bars = exchange.fetch_ohlcv(binance_symbol, timeframe=timeframe, limit=limit)
-    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    return df
+    # V7500: Only bars missing from the local archive are downloaded (BinanceTrader, Futures klines)
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - (limit + 1) * timeframe_ms(timeframe)
+    candle_archive.backfill(binance_symbol, timeframe, start_ms, now_ms=now_ms)
+    return candle_archive.read_df(binance_symbol, timeframe, start_ms).tail(limit).reset_index(drop=True)
 
 def bootstrap_brain():
     """
@@ -78,7 +52,7 @@ def bootstrap_brain():
         df['symbol'] = symbol
         df['rsi_value'] = calculate_rsi(df['close'])
         df['atr_value'] = calculate_atr(df)
-        macd_line, histogram = calculate_macd(df['close'])
+        macd_line, _, histogram = calculate_macd(df['close'])
         df['macd_line'] = macd_line
         df['histogram'] = histogram
         df['imbalance_ratio'] = 0 
@@ -0,0 +1,232 @@
+"""
+COSMOS AI - Candle Archive
+Local columnar OHLCV history: one NumPy file per (symbol, timeframe, month),
+memory-mapped on read, so backtests, audits and training read years of bars
+from disk instead of paging the exchange.
+
+{dir}/{BASE-QUOTE}/{tf}/{YYYY-MM}.npy   float64 (n, 6) [ts_ms, open, high, low, close, volume], sorted, unique ts
+{dir}/{BASE-QUOTE}/{tf}/holes.json      [[from_ms, to_ms], ...] ranges the exchange confirmed empty
+
+backfill() finds the missing bars in a range and fetches only those spans,
+one page at a time, through BinanceTrader.fetch_ohlcv(since=...).
+"""
+import os
+import sys
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from candle_cache import timeframe_ms
+
+ARCHIVE_DIR = os.getenv("CANDLE_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".candle_archive"))
+PAGE_LIMIT = 1000  # Binance klines weight 5 up to 1000 bars
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _month_bounds(key):
+    """'2024-02' -> (start_ms, next_month_start_ms)"""
+    month = np.datetime64(key, 'M')
+    return (int(month.astype('datetime64[ms]').astype(np.int64)),
+            int((month + 1).astype('datetime64[ms]').astype(np.int64)))
+
+
+def _subtract(ranges, holes):
+    """Inclusive [a, b] ranges minus inclusive holes."""
+    out = []
+    for a, b in ranges:
+        pieces = [(a, b)]
+        for h0, h1 in holes:
+            nxt = []
+            for p0, p1 in pieces:
+                if h1 < p0 or h0 > p1:
+                    nxt.append((p0, p1))
+                    continue
+                if p0 < h0:
+                    nxt.append((p0, h0 - 1))
+                if h1 < p1:
+                    nxt.append((h1 + 1, p1))
+            pieces = nxt
+        out.extend(pieces)
+    return out
+
+
+class CandleArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.bars_written = 0
+        self.pages_fetched = 0
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace('/', '-').replace(':', '-'), timeframe)
+
+    def months(self, symbol, timeframe):
+        try:
+            names = os.listdir(self._dir(symbol, timeframe))
+        except OSError:
+            return []
+        return sorted(n[:-4] for n in names if n.endswith('.npy'))
+
+    # --- Write ---
+
+    def write(self, symbol, timeframe, bars):
+        """Merges bars into their month partitions (a re-sent timestamp replaces the stored bar)."""
+        arr = np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+        if not len(arr):
+            return 0
+        keys = arr[:, 0].astype(np.int64).astype('datetime64[ms]').astype('datetime64[M]').astype(str)
+        directory = self._dir(symbol, timeframe)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            for key in np.unique(keys):
+                path = os.path.join(directory, f"{key}.npy")
+                part = arr[keys == key]
+                if os.path.exists(path):
+                    part = np.concatenate([np.load(path), part])
+                part = part[np.argsort(part[:, 0], kind='stable')]
+                last = np.r_[part[1:, 0] != part[:-1, 0], True]  # Keep the latest copy of each ts
+                self._save(path, part[last])
+        self.bars_written += len(arr)
+        return len(arr)
+
+    def _save(self, path, arr):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp, path)  # Readers holding the old mmap keep a consistent file
+
+    # --- Read ---
+
+    def read(self, symbol, timeframe, start_ms=None, end_ms=None):
+        """Bars with start_ms <= ts <= end_ms as a float64 (n, 6) array."""
+        start = start_ms if start_ms is not None else -np.inf
+        end = end_ms if end_ms is not None else np.inf
+        directory = self._dir(symbol, timeframe)
+        chunks = []
+        for key in self.months(symbol, timeframe):
+            m0, m1 = _month_bounds(key)
+            if m1 <= start or m0 > end:
+                continue
+            part = np.load(os.path.join(directory, f"{key}.npy"), mmap_mode='r')
+            lo = np.searchsorted(part[:, 0], start, side='left')
+            hi = np.searchsorted(part[:, 0], end, side='right')
+            if hi > lo:
+                chunks.append(part[lo:hi])
+        return np.concatenate(chunks) if chunks else np.empty((0, 6))
+
+    def read_df(self, symbol, timeframe, start_ms=None, end_ms=None):
+        df = pd.DataFrame(self.read(symbol, timeframe, start_ms, end_ms), columns=COLUMNS)
+        df['timestamp'] = df['timestamp'].astype(np.int64)
+        return df
+
+    # --- Gaps and backfill ---
+
+    def _holes_path(self, symbol, timeframe):
+        return os.path.join(self._dir(symbol, timeframe), "holes.json")
+
+    def holes(self, symbol, timeframe):
+        try:
+            with open(self._holes_path(symbol, timeframe)) as f:
+                return [tuple(h) for h in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    def _add_hole(self, symbol, timeframe, start, end):
+        if end < start:
+            return
+        with self._lock:
+            holes = self.holes(symbol, timeframe) + [(start, end)]
+            os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+            with open(self._holes_path(symbol, timeframe), 'w') as f:
+                json.dump(sorted(holes), f)
+
+    def _next_bar(self, symbol, timeframe, after_ms):
+        """Open time of the first archived bar after after_ms (None if there is none)."""
+        for key in self.months(symbol, timeframe):
+            if _month_bounds(key)[1] <= after_ms:
+                continue
+            ts = self.read(symbol, timeframe, after_ms + 1, _month_bounds(key)[1] - 1)[:, 0]
+            if len(ts):
+                return int(ts[0])
+        return None
+
+    def gaps(self, symbol, timeframe, start_ms, end_ms):
+        """Inclusive [from_ms, to_ms] spans of bar open times missing in the range."""
+        step = timeframe_ms(timeframe)
+        start = -(-start_ms // step) * step
+        end = end_ms // step * step
+        if end < start:
+            return []
+        ts = self.read(symbol, timeframe, start, end)[:, 0].astype(np.int64)
+        edges = np.concatenate([[start - step], ts, [end + step]])
+        idx = np.flatnonzero(np.diff(edges) > step)
+        spans = [(int(edges[i] + step), int(edges[i + 1] - step)) for i in idx]
+        return _subtract(spans, self.holes(symbol, timeframe))
+
+    def backfill(self, symbol, timeframe, start_ms, end_ms=None, fetch=None, page=PAGE_LIMIT, now_ms=None):
+        """
+        Fetches only the missing spans of [start_ms, end_ms] (default: up to the last closed bar).
+        fetch(symbol, timeframe, since, limit) defaults to BinanceTrader.fetch_ohlcv.
+        Fetch errors stop that span without recording it as a hole. Returns the bars written.
+        """
+        if fetch is None:
+            from binance_engine import live_trader
+            fetch = lambda s, tf, since, limit: live_trader.fetch_ohlcv(s, tf, limit=limit, since=since)
+        step = timeframe_ms(timeframe)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        last_closed = now_ms // step * step - step
+        end_ms = min(end_ms if end_ms is not None else last_closed, last_closed)
+
+        written, cursor = 0, None
+        for gap_start, gap_end in self.gaps(symbol, timeframe, start_ms, end_ms):
+            since = gap_start if cursor is None else max(gap_start, cursor)  # A previous page may have covered it
+            while since <= gap_end:
+                try:
+                    bars = fetch(symbol, timeframe, since, page) or []
+                except Exception as e:
+                    print(f"   [ARCHIVE] {symbol} {timeframe} fetch from {since} failed: {e}")
+                    break
+                self.pages_fetched += 1
+                arr = np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+                arr = arr[(arr[:, 0] >= since) & (arr[:, 0] <= last_closed)]  # No forming bar
+                if not len(arr):
+                    # Only confirmed empty when a later bar is known; at the tail it may just not be published yet
+                    known = self._next_bar(symbol, timeframe, since)
+                    if known is not None:
+                        self._add_hole(symbol, timeframe, since, min(known - step, gap_end))
+                    break
+                if arr[0, 0] > since:
+                    # Nothing listed before the first returned bar (pre-listing or exchange downtime)
+                    self._add_hole(symbol, timeframe, since, min(int(arr[0, 0]) - step, gap_end))
+                for i in np.flatnonzero(np.diff(arr[:, 0]) > step):
+                    # Missing between two returned bars (exchange downtime inside the page)
+                    self._add_hole(symbol, timeframe, int(arr[i, 0]) + step, int(arr[i + 1, 0]) - step)
+                written += self.write(symbol, timeframe, arr)
+                since = cursor = int(arr[-1, 0]) + step
+        return written
+
+    def stats(self):
+        return {"bars_written": self.bars_written, "pages_fetched": self.pages_fetched}
+
+
+# Singleton (backtest_auditor, bootstrap_cosmos)
+candle_archive = CandleArchive()
+
+
+if __name__ == "__main__":
+    # python candle_archive.py BTC/USDT ETH/USDT 1h 365  -> backfill the last 365 days
+    symbols = [a for a in sys.argv[1:] if '/' in a]
+    rest = [a for a in sys.argv[1:] if '/' not in a]
+    timeframe = rest[0] if rest else '1h'
+    days = int(rest[1]) if len(rest) > 1 else 365
+    start = int(time.time() * 1000) - days * 86_400_000
+    for sym in symbols or ['BTC/USDT']:
+        t0 = time.time()
+        n = candle_archive.backfill(sym, timeframe, start)
+        print(f"   [ARCHIVE] {sym} {timeframe}: {n} bars written in {time.time() - t0:.1f}s "
+              f"({len(candle_archive.read(sym, timeframe, start))} archived in range)")
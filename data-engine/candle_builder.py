@@ -0,0 +1,282 @@
+"""
+COSMOS AI - Candle Builder (Stream Layer)
+Builds 1m/5m/15m/1h/4h OHLCV locally from Binance Futures @kline_1m streams and
+publishes closed bars to Redis (see candle_store.py), so scanner.fetch_data
+reads candles with zero REST calls.
+V8200: Also mirrors every write into shared-memory rings (shm_candles.py) that
+processes on the same host map directly.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+
+import websockets
+from dotenv import load_dotenv
+
+from candle_cache import timeframe_ms
+from candle_store import CandleStore, STREAM_TIMEFRAMES, MAX_STORED_BARS
+from shm_candles import SharedCandleWriter, SHM_ENABLED
+
+# Load env
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+load_dotenv(dotenv_path=os.path.join(parent_dir, '.env.local'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - [CANDLE BUILDER] - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Futures stream: same market type as BinanceTrader (defaultType 'swap')
+BINANCE_FUTURES_WSS = os.getenv("CANDLE_WSS", "wss://fstream.binance.com/stream")
+MINUTE_MS = 60_000
+BACKFILL_1M = 300               # > 240 closed 1m bars: enough to rebuild an open 4h bucket
+LIVE_WRITE_INTERVAL = 1.0       # Seconds between forming-bar writes per symbol
+UNIVERSE_REFRESH = 1800         # Seconds (same cadence as the worker's dynamic list)
+
+
+def stream_name(symbol):
+    """BTC/USDT -> btcusdt"""
+    return symbol.replace('/', '').lower()
+
+
+def _merge_minute(bar, minute, bucket):
+    """Folds a 1m bar into a higher-timeframe bar starting at `bucket`."""
+    if bar is None:
+        return [bucket, minute[1], minute[2], minute[3], minute[4], minute[5]]
+    return [bar[0], bar[1], max(bar[2], minute[2]), min(bar[3], minute[3]), minute[4], bar[5] + minute[5]]
+
+
+class CandleBuilder:
+    """
+    Per-symbol bar state. Closed history lives in Redis; in memory we only keep
+    the open higher-timeframe buckets (built from closed 1m bars) and the forming 1m bar.
+    """
+    def __init__(self, store, timeframes=STREAM_TIMEFRAMES, mirror=None):
+        self.store = store
+        self.mirror = mirror  # V8200: SharedCandleWriter (same writer interface)
+        self._sinks = [s for s in (store, mirror) if s is not None]
+        self.higher = [tf for tf in timeframes if tf != '1m']
+        self._partial = {}      # (symbol, tf) -> open bucket aggregated from closed 1m bars
+        self._forming = {}      # symbol -> forming 1m bar
+        self._last_minute = {}  # symbol -> ts of the last closed 1m bar (dedup)
+        self._last_live = {}    # symbol -> monotonic time of the last live write
+
+        # Metrics
+        self.closed_bars = 0
+        self.last_close_latency_ms = 0.0
+
+    def is_seeded(self, symbol):
+        return symbol in self._last_minute
+
+    def seed(self, symbol, history, now_ms=None):
+        """
+        Backfill from REST ({tf: ohlcv_list}). Closed bars go to Redis as-is; the open
+        higher-timeframe buckets are rebuilt from closed 1m bars so no volume is counted twice.
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed = {}
+        for tf, bars in history.items():
+            tf_ms = timeframe_ms(tf)
+            closed[tf] = [list(b) for b in bars if b[0] + tf_ms <= now_ms]
+            for sink in self._sinks:
+                sink.replace_history(symbol, tf, closed[tf])
+
+        minutes = closed.get('1m', [])
+        for tf in self.higher:
+            tf_ms = timeframe_ms(tf)
+            bucket = now_ms - now_ms % tf_ms
+            part = None
+            for minute in minutes:
+                if minute[0] >= bucket:
+                    part = _merge_minute(part, minute, bucket)
+            self._partial[(symbol, tf)] = part
+
+        self._forming.pop(symbol, None)
+        self._last_minute[symbol] = minutes[-1][0] if minutes else 0
+
+    def on_kline(self, symbol, k):
+        """Handles a Binance kline payload ('k' object of a @kline_1m event)."""
+        if not self.is_seeded(symbol):
+            return
+        minute = [int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+
+        if k.get('x'):
+            if minute[0] <= self._last_minute[symbol]:
+                return  # Duplicate close (reconnect overlap)
+            self._last_minute[symbol] = minute[0]
+            self._forming.pop(symbol, None)
+            self._close_minute(symbol, minute)
+            if k.get('T'):
+                self.last_close_latency_ms = max(0.0, time.time() * 1000 - int(k['T']))
+            self._write_live(symbol, force=True)
+        else:
+            self._forming[symbol] = minute
+            self._write_live(symbol)
+
+    def _close_minute(self, symbol, minute):
+        self._emit(symbol, '1m', minute)
+        for tf in self.higher:
+            tf_ms = timeframe_ms(tf)
+            bucket = minute[0] - minute[0] % tf_ms
+            part = self._partial.get((symbol, tf))
+            if part is not None and part[0] != bucket:
+                # The minute that should have closed it never arrived (stream gap)
+                self._emit(symbol, tf, part)
+                part = None
+            part = _merge_minute(part, minute, bucket)
+            if minute[0] + MINUTE_MS >= bucket + tf_ms:
+                self._emit(symbol, tf, part)
+                part = None
+            self._partial[(symbol, tf)] = part
+
+    def _emit(self, symbol, tf, bar):
+        for sink in self._sinks:
+            sink.append_closed(symbol, tf, bar)
+        self.closed_bars += 1
+
+    def live_bars(self, symbol):
+        """Forming bar per timeframe: open bucket + forming 1m bar."""
+        forming = self._forming.get(symbol)
+        out = {}
+        if forming:
+            out['1m'] = forming
+        for tf in self.higher:
+            part = self._partial.get((symbol, tf))
+            if forming:
+                bucket = forming[0] - forming[0] % timeframe_ms(tf)
+                part = _merge_minute(part if part and part[0] == bucket else None, forming, bucket)
+            if part:
+                out[tf] = part
+        return out
+
+    def _write_live(self, symbol, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_live.get(symbol, 0) < LIVE_WRITE_INTERVAL:
+            return
+        bars = self.live_bars(symbol)
+        if bars:
+            for sink in self._sinks:
+                sink.set_live(symbol, bars)
+            self._last_live[symbol] = now
+
+    def stats(self):
+        return {
+            "symbols": len(self._last_minute),
+            "closed_bars": self.closed_bars,
+            "last_close_latency_ms": round(self.last_close_latency_ms, 1),
+        }
+
+
+def get_stream_universe():
+    """
+    conf_global.json trading_pairs + dynamic top-volume list (blacklist applied).
+    V7600: The same published universe the scanners read.
+    """
+    from universe_service import universe_service
+    try:
+        symbols = universe_service.symbols()
+        if symbols:
+            return symbols
+    except Exception as e:
+        logger.warning(f"Dynamic universe unavailable: {e}")
+    from scanner import SYMBOLS, PRIORITY_ASSETS, ASSET_BLACKLIST
+    unique = list(dict.fromkeys(list(PRIORITY_ASSETS) + list(SYMBOLS)))
+    return [s for s in unique if not any(b in s.upper() for b in ASSET_BLACKLIST)]
+
+
+def fetch_history(symbol):
+    """REST backfill from Binance Futures (same market the stream reports)."""
+    from binance_engine import live_trader
+    history = {}
+    for tf in STREAM_TIMEFRAMES:
+        limit = BACKFILL_1M if tf == '1m' else MAX_STORED_BARS
+        history[tf] = live_trader._fetch_ohlcv_from('binance', symbol, tf, limit)
+    return history
+
+
+class CandleStreamService:
+    def __init__(self, builder, universe_fn=get_stream_universe, history_fn=fetch_history):
+        self.builder = builder
+        self.universe_fn = universe_fn
+        self.history_fn = history_fn
+        self.symbols = {}  # stream name -> symbol
+
+    async def _seed(self, symbols):
+        for symbol in symbols:
+            try:
+                history = await asyncio.to_thread(self.history_fn, symbol)
+                self.builder.seed(symbol, history)
+                self.symbols[stream_name(symbol)] = symbol
+            except Exception as e:
+                logger.error(f"Backfill failed for {symbol}: {e}")
+
+    async def _resubscribe(self, ws, universe):
+        wanted = {stream_name(s): s for s in universe}
+        added = [s for name, s in wanted.items() if name not in self.symbols]
+        removed = [name for name in self.symbols if name not in wanted]
+
+        if added:
+            await ws.send(json.dumps({"method": "SUBSCRIBE", "params": [f"{stream_name(s)}@kline_1m" for s in added], "id": int(time.time())}))
+            await self._seed(added)
+        if removed:
+            await ws.send(json.dumps({"method": "UNSUBSCRIBE", "params": [f"{n}@kline_1m" for n in removed], "id": int(time.time()) + 1}))
+            for name in removed:
+                self.symbols.pop(name, None)
+        if added or removed:
+            logger.info(f"Universe updated: +{len(added)} / -{len(removed)} ({len(self.symbols)} streams)")
+
+    async def connect_stream(self):
+        universe = self.universe_fn()
+        url = f"{BINANCE_FUTURES_WSS}?streams=" + "/".join(f"{stream_name(s)}@kline_1m" for s in universe)
+
+        async with websockets.connect(url, ping_interval=20, max_queue=4096) as ws:
+            logger.info(f"Connected to Binance Futures klines: {len(universe)} Assets.")
+            # Backfill after subscribing so no closed minute falls between REST and stream
+            self.symbols = {}
+            await self._seed(universe)
+            last_refresh = time.time()
+
+            while True:
+                message = await ws.recv()
+                data = json.loads(message).get('data', {})
+                if data.get('e') == 'kline':
+                    symbol = self.symbols.get(data['s'].lower())
+                    if symbol:
+                        self.builder.on_kline(symbol, data['k'])
+
+                if time.time() - last_refresh > UNIVERSE_REFRESH:
+                    last_refresh = time.time()
+                    await self._resubscribe(ws, self.universe_fn())
+                    logger.info(f"Builder stats: {self.builder.stats()}")
+
+    async def run(self):
+        while True:
+            try:
+                await self.connect_stream()
+            except Exception as e:
+                logger.error(f"Connection Lost. Reconnecting in 5s... ({e})")
+                await asyncio.sleep(5)
+
+
+def main():
+    from redis_engine import redis_engine
+    store = CandleStore(redis_engine.client) if redis_engine.client else None
+    mirror = SharedCandleWriter() if SHM_ENABLED else None
+    if not store and not mirror:
+        logger.error("Redis offline and shared memory disabled. Candle builder has nowhere to publish. Exiting.")
+        return
+    service = CandleStreamService(CandleBuilder(store, mirror=mirror))
+    logger.info(f"--- NEXUS CANDLE BUILDER STARTED (redis={bool(store)}, shm={bool(mirror)}) ---")
+    try:
+        asyncio.run(service.run())
+    finally:
+        if mirror:
+            mirror.close()  # Readers see the segments disappear and fall back to Redis / REST
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("Candle Builder Stopped.")
@@ -0,0 +1,109 @@
+"""
+COSMOS AI - Candle Cache
+Per-(symbol, timeframe) OHLCV ring buffers used by BinanceTrader.fetch_ohlcv
+so repeated polls only download the bars that changed.
+"""
+import os
+import time
+import threading
+from collections import deque
+from itertools import islice
+
+import ccxt
+
+DEFAULT_MAX_BARS = int(os.getenv("OHLCV_CACHE_BARS", "1000"))
+
+
+def timeframe_ms(timeframe):
+    """'5m' -> 300000"""
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+class CandleCache:
+    def __init__(self, max_bars=DEFAULT_MAX_BARS):
+        self.max_bars = max_bars
+        self._entries = {}  # (symbol, timeframe) -> {'bars': deque, 'source': str}
+        self._lock = threading.Lock()
+
+        # Metrics: how many calls were served by delta vs full downloads
+        self.full_fetches = 0
+        self.delta_fetches = 0
+        self.bars_downloaded = 0
+
+    def plan(self, symbol, timeframe, limit, now_ms=None):
+        """
+        Returns (source, since, delta_limit) when the cache can be topped up with a
+        delta request, or None when a full download is needed.
+        """
+        entry = self._entries.get((symbol, timeframe))
+        if not entry or len(entry['bars']) < limit:
+            return None
+
+        tf = timeframe_ms(timeframe)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        last_ts = entry['bars'][-1][0]
+
+        # Bars elapsed since the last cached (possibly still-forming) bar, plus that bar itself
+        missing = int((now_ms - last_ts) // tf) + 2
+        if missing > limit:
+            return None  # Stale for longer than the window: cheaper to refetch once
+        return entry['source'], last_ts, missing
+
+    def store(self, symbol, timeframe, bars, source):
+        """Replaces the buffer with a full download."""
+        with self._lock:
+            self._entries[(symbol, timeframe)] = {
+                'bars': deque(bars, maxlen=max(self.max_bars, len(bars))),
+                'source': source
+            }
+            self.full_fetches += 1
+            self.bars_downloaded += len(bars)
+
+    def merge(self, symbol, timeframe, bars):
+        """
+        Applies a delta download: the still-forming bar and anything newer are replaced.
+        Returns False if the delta does not connect to the buffer (gap) so the caller refetches.
+        """
+        if not bars:
+            return False
+
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe))
+            if not entry:
+                return False
+            buf = entry['bars']
+
+            first_ts = bars[0][0]
+            if first_ts > buf[-1][0] + timeframe_ms(timeframe):
+                return False
+
+            while buf and buf[-1][0] >= first_ts:
+                buf.pop()
+            buf.extend(bars)
+
+            self.delta_fetches += 1
+            self.bars_downloaded += len(bars)
+            return True
+
+    def read(self, symbol, timeframe, limit):
+        """Returns the latest `limit` bars as the usual ccxt list-of-lists."""
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe))
+            if not entry:
+                return []
+            buf = entry['bars']
+            return list(islice(buf, max(0, len(buf) - limit), None))
+
+    def invalidate(self, symbol, timeframe):
+        with self._lock:
+            self._entries.pop((symbol, timeframe), None)
+
+    def stats(self):
+        calls = self.full_fetches + self.delta_fetches
+        return {
+            "series": len(self._entries),
+            "full_fetches": self.full_fetches,
+            "delta_fetches": self.delta_fetches,
+            "delta_ratio": round(self.delta_fetches / calls, 3) if calls else 0.0,
+            "bars_downloaded": self.bars_downloaded
+        }
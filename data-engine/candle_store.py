@@ -0,0 +1,105 @@
+"""
+COSMOS AI - Candle Store
+Redis layout shared by candle_builder.py (writer) and scanner.fetch_data (reader).
+
+candles:{SYMBOL}:{tf}        list of closed bars, JSON [ts, o, h, l, c, v], oldest first
+candles:{SYMBOL}:{tf}:live   forming bar (short TTL, refreshed by the builder)
+channel 'candle_closed'      {"symbol", "timeframe", "bar"} on every bar close
+"""
+import os
+import json
+import time
+
+from candle_cache import timeframe_ms
+
+STREAM_TIMEFRAMES = ['1m', '5m', '15m', '1h', '4h']
+MAX_STORED_BARS = int(os.getenv("CANDLE_STORE_BARS", "500"))
+LIVE_TTL = 120  # Seconds; a stalled builder lets readers fall back to REST
+CLOSED_CHANNEL = "candle_closed"
+
+
+def _key(symbol, timeframe):
+    return f"candles:{symbol.upper()}:{timeframe}"
+
+
+class CandleStore:
+    def __init__(self, client, max_bars=MAX_STORED_BARS):
+        self.client = client
+        self.max_bars = max_bars
+
+    # --- Writer side (candle_builder.py) ---
+
+    def replace_history(self, symbol, timeframe, bars):
+        """Backfill: overwrites the closed-bar list."""
+        key = _key(symbol, timeframe)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        if bars:
+            pipe.rpush(key, *[json.dumps(b) for b in bars[-self.max_bars:]])
+        pipe.execute()
+
+    def append_closed(self, symbol, timeframe, bar):
+        key = _key(symbol, timeframe)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, json.dumps(bar))
+        pipe.ltrim(key, -self.max_bars, -1)
+        pipe.publish(CLOSED_CHANNEL, json.dumps({"symbol": symbol.upper(), "timeframe": timeframe, "bar": bar}))
+        pipe.execute()
+
+    def set_live(self, symbol, bars_by_tf):
+        """Writes the forming bar of every timeframe in one round trip."""
+        pipe = self.client.pipeline()
+        for timeframe, bar in bars_by_tf.items():
+            pipe.set(f"{_key(symbol, timeframe)}:live", json.dumps(bar), ex=LIVE_TTL)
+        pipe.execute()
+
+    # --- Reader side (scanner.fetch_data) ---
+
+    def read(self, symbol, timeframe, limit=100, now_ms=None):
+        """
+        Returns the latest `limit` bars (closed + forming, like a REST fetch_ohlcv),
+        or None when the stream does not cover the request or is stale.
+        """
+        if timeframe not in STREAM_TIMEFRAMES or limit > self.max_bars:
+            return None
+        key = _key(symbol, timeframe)
+        try:
+            pipe = self.client.pipeline()
+            pipe.lrange(key, -limit, -1)
+            pipe.get(f"{key}:live")
+            closed, live = pipe.execute()
+        except Exception:
+            return None
+
+        # The live key doubles as the builder heartbeat (short TTL)
+        if not live:
+            return None
+        bars = [json.loads(b) for b in closed]
+        live_bar = json.loads(live)
+        if not bars or live_bar[0] > bars[-1][0]:
+            bars.append(live_bar)  # Skipped right after a close, when the live key still holds the closed bucket
+
+        # Latest bar must be current and the tail contiguous
+        tf = timeframe_ms(timeframe)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if now_ms - bars[-1][0] > 2 * tf:
+            return None
+        if len(bars) > 1 and bars[-1][0] - bars[-2][0] != tf:
+            return None
+        if len(bars) < limit:
+            return None
+        return bars[-limit:]
+
+
+def _build_default_store():
+    try:
+        from redis_engine import redis_engine
+        if redis_engine.client:
+            return CandleStore(redis_engine.client)
+    except Exception as e:
+        print(f"   [CANDLE STORE] Redis unavailable ({e}). Stream candles disabled.")
+    return None
+
+
+# Singleton (None when Redis is offline; callers fall back to REST)
+candle_store = _build_default_store()
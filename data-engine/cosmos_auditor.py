@@ -21,6 +21,7 @@ supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Init Binance (Unified Engine)
 from binance_engine import live_trader
+from indicators import calculate_rsi # V6600: Shared NumPy kernels
 
 def fetch_market_data(symbol, timeframe='5m', limit=50):
     try:
@@ -34,13 +35,6 @@ def fetch_market_data(symbol, timeframe='5m', limit=50):
         print(f"Error fetching data for {symbol}: {e}")
         return None
 
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
 def audit_active_signals():
     print("\n--- 🕵️ COSMOS AI AUDITOR START ---")
     
@@ -1,4 +1,5 @@
 import os
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
@@ -45,6 +46,9 @@ from deepseek_engine import deepseek_engine # V700
 from openai_engine import openai_engine # V800
 from cosmos_validator import validator # V900 (PhD Upgrade)
 from redis_engine import redis_engine # V1000 (Liquidity Check)
+import vpin # V7900: Vectorized VPIN
+from model_holder import model_holder, atomic_dump # V6000: Resident Model
+from feature_store import feature_store, FEATURE_COLS # V8000: Versioned per-bar feature vectors
 
 class CosmosBrain:
     def __init__(self):
@@ -56,8 +60,10 @@ class CosmosBrain:
         else:
             self.imputer = None
             
-        self.feature_cols = ['rsi_value', 'imbalance_ratio', 'spread_pct', 'atr_value', 'macd_line', 'histogram']
+        self.feature_cols = list(FEATURE_COLS) # rsi_value, imbalance_ratio, spread_pct, atr_value, macd_line, histogram
+        self.feature_store = feature_store # V8000
         self.is_trained = False
+        self.model_holder = model_holder
         self.load_model()
         
         # V490: Link Deep Brain
@@ -104,17 +110,21 @@ class CosmosBrain:
     def save_model(self):
         if not ML_AVAILABLE or not self.model: return
         try:
-            joblib.dump({'model': self.model, 'imputer': self.imputer}, MODEL_PATH)
+            atomic_dump({'model': self.model, 'imputer': self.imputer}, MODEL_PATH)
             print("   >>> Cosmos Brain: Knowledge saved to disk.")
         except Exception as e:
             print(f"   >>> Cosmos Brain: Save failed ({e})")
 
     def fetch_training_data(self):
-        """Fetches Closed Trades + Analytics Signals for training (V125: Includes Ghost Trades)."""
+        """
+        Fetches Closed Trades + their entry features for training (V125: Includes Ghost Trades).
+        V8000: Features come from the feature store as of each trade's open time; only trades
+        it has no vector for fall back to the market_signals join.
+        """
         try:
             # 1. Get Closed Trades (Select fallback features too)
             res_pos = self.supabase.table("paper_positions") \
-                .select("signal_id, pnl, status, rsi_entry, atr_entry") \
+                .select("signal_id, pnl, status, rsi_entry, atr_entry, symbol, opened_at") \
                 .eq("status", "CLOSED") \
                 .limit(1000) \
                 .execute()
@@ -122,44 +132,20 @@ class CosmosBrain:
             positions = res_pos.data
             if not positions: return pd.DataFrame()
             
-            # 2. Extract Signal IDs (Filter out None, but keep 9999)
-            sig_ids = [p['signal_id'] for p in positions if p['signal_id']]
-            
-            # 3. Get Analytics for these signals
-            # V500: Use signals or market_signals as main source if analytics_signals is locked/missing
-            res_analytics = self.supabase.table("market_signals") \
-                .select("*") \
-                .in_("symbol", [p.get('symbol') for p in positions if p.get('symbol')]) \
-                .execute()
-            
-            analytics = res_analytics.data
-            df_pos = pd.DataFrame(positions)
-            
-            if not analytics:
-                # If no analytics found (e.g. all manual trades), create empty DF with columns
-                df_ana = pd.DataFrame(columns=['signal_id'] + self.feature_cols)
-            else:
-                df_ana = pd.DataFrame(analytics)
-            
-            # 4. Merge (Left Join to keep Ghost Trades)
-            # V125: Use LEFT JOIN so manual/adopted trades aren't dropped
-            df = pd.merge(df_pos, df_ana, on='signal_id', how='left')
-            
-            # 5. Feature Reconstruction (Fallback Logic)
-            # If rsi_value is NaN (missing analytics), use rsi_entry from position
-            if 'rsi_value' not in df.columns and 'rsi' in df.columns:
-                df['rsi_value'] = df['rsi']
-            
-            if 'rsi_value' in df.columns and 'rsi_entry' in df.columns:
-                df['rsi_value'] = df['rsi_value'].fillna(df['rsi_entry'])
-                
-            if 'atr_value' not in df.columns and 'atr' in df.columns:
-                df['atr_value'] = df['atr']
-
-            if 'atr_value' in df.columns and 'atr_entry' in df.columns:
-                df['atr_value'] = df['atr_value'].fillna(df['atr_entry'])
-            
-            # Fill remaining missing technicals with Neutral/Zero
+            # 2. Point-in-time vectors from the feature store
+            stored = self.stored_features_as_of(positions)
+            covered = ~np.isnan(stored).all(axis=1)
+            frames = []
+            if covered.any():
+                df_store = pd.DataFrame([p for p, c in zip(positions, covered) if c])
+                df_store[self.feature_cols] = stored[covered]
+                frames.append(df_store)
+            if not covered.all():
+                # 3. Trades recorded before the store existed: market_signals join (V125 fallbacks)
+                frames.append(self._join_signal_features([p for p, c in zip(positions, covered) if not c]))
+            df = pd.concat(frames, ignore_index=True)
+            
+            # 4. Fill remaining missing technicals with Neutral/Zero
             df.fillna({
                 'rsi_value': 50,
                 'imbalance_ratio': 0, 
@@ -169,9 +155,10 @@ class CosmosBrain:
                 'histogram': 0
             }, inplace=True)
 
-            print(f"   [V125] Training Data Fetched: {len(df)} samples (Including recovered ghosts)")
+            print(f"   [V125] Training Data Fetched: {len(df)} samples (Including recovered ghosts, "
+                  f"{int(covered.sum())} from the feature store)")
             
-            # 6. Define Target: 1 if PnL > 0, else 0
+            # 5. Define Target: 1 if PnL > 0, else 0
             df['target'] = (df['pnl'] > 0).astype(int)
             
             return df
@@ -179,6 +166,60 @@ class CosmosBrain:
             print(f"   !!! Cosmos Data Fetch Error: {e}")
             return pd.DataFrame()
 
+    def stored_features_as_of(self, positions, timeframe='5m'):
+        """
+        V8000: (N, 6) feature-store vectors in force when each position opened: the closing vector of
+        the last bar stored by then (the open bar is only stored after it closes). NaN rows where none.
+        """
+        out = np.full((len(positions), len(self.feature_cols)), np.nan)
+        by_symbol = {}
+        for i, p in enumerate(positions):
+            if p.get('symbol') and p.get('opened_at'):
+                by_symbol.setdefault(p['symbol'], []).append(i)
+        for symbol, rows in by_symbol.items():
+            out[rows] = self.feature_store.as_of(symbol, timeframe, [positions[i]['opened_at'] for i in rows])
+        return out
+
+    def _join_signal_features(self, positions):
+        """Legacy path: entry features rebuilt by joining each trade's market_signals row."""
+        # Get Analytics for these signals
+        # V500: Use signals or market_signals as main source if analytics_signals is locked/missing
+        res_analytics = self.supabase.table("market_signals") \
+            .select("*") \
+            .in_("symbol", [p.get('symbol') for p in positions if p.get('symbol')]) \
+            .execute()
+        
+        analytics = res_analytics.data
+        df_pos = pd.DataFrame(positions)
+        
+        if not analytics:
+            # If no analytics found (e.g. all manual trades), create empty DF with columns
+            df_ana = pd.DataFrame(columns=['signal_id'] + self.feature_cols)
+        else:
+            df_ana = pd.DataFrame(analytics)
+            if 'signal_id' not in df_ana.columns:
+                df_ana = pd.DataFrame(columns=['signal_id'] + self.feature_cols)
+            df_ana = df_ana.drop(columns=[c for c in ('symbol', 'status', 'pnl') if c in df_ana.columns])
+        
+        # Merge (Left Join to keep Ghost Trades)
+        # V125: Use LEFT JOIN so manual/adopted trades aren't dropped
+        df = pd.merge(df_pos, df_ana, on='signal_id', how='left')
+        
+        # Feature Reconstruction (Fallback Logic)
+        # If rsi_value is NaN (missing analytics), use rsi_entry from position
+        if 'rsi_value' not in df.columns and 'rsi' in df.columns:
+            df['rsi_value'] = df['rsi']
+        
+        if 'rsi_value' in df.columns and 'rsi_entry' in df.columns:
+            df['rsi_value'] = df['rsi_value'].fillna(df['rsi_entry'])
+            
+        if 'atr_value' not in df.columns and 'atr' in df.columns:
+            df['atr_value'] = df['atr']
+
+        if 'atr_value' in df.columns and 'atr_entry' in df.columns:
+            df['atr_value'] = df['atr_value'].fillna(df['atr_entry'])
+        return df
+
     def train(self):
         if not ML_AVAILABLE:
             print("   >>> Cosmos Brain: Training skipped (Safe Mode).")
@@ -206,6 +247,9 @@ class CosmosBrain:
         self.is_trained = True
         self.save_model()
         
+        # V6000: Serve the fresh model immediately to every caller in this process
+        self.model_holder.publish(self.model, source="brain.train()")
+        
         print(f"   >>> Cosmos Brain: Training Complete. Accuracy on Memory: {accuracy:.2%}")
         
         # V72: Sync to Neural Link (Cloud)
@@ -238,29 +282,28 @@ class CosmosBrain:
              
         try:
             # Check last 12 predictions (approx last 1h of 'mood')
-            correct_preds = 0
-            test_samples = df_5m.tail(12) 
+            test_samples = df_5m.tail(12)
+            closes = test_samples['close'].to_numpy(dtype=np.float64)
+            n = len(closes) - 1
             
-            for i in range(len(test_samples) - 1):
-                row = test_samples.iloc[i]
-                next_row = test_samples.iloc[i+1]
-                
-                # Mock features for this historical point
-                feat = {
-                    'rsi_value': row.get('rsi', 50),
-                    'imbalance_ratio': 0, # Cannot backtest imbalance without historical book
-                    'spread_pct': 0.0002,
-                    'atr_value': row.get('atr', 0),
-                    'macd_line': 0,
-                    'histogram': 0
-                }
-                
-                prob = self.predict_success(feat)
-                real_gain = (next_row['close'] - row['close']) / row['close']
-                
-                # If AI was bullish (>0.5) and price went up, or bearish (<0.5) and price went down
-                if (prob > 0.5 and real_gain > 0) or (prob < 0.5 and real_gain < 0):
-                    correct_preds += 1
+            # Mock features for these historical points (V6100: one batch instead of 11 calls)
+            X = np.zeros((n, len(self.feature_cols)))
+            X[:, 0] = test_samples['rsi'].to_numpy()[:n] if 'rsi' in test_samples else 50
+            X[:, 1] = 0 # Cannot backtest imbalance without historical book
+            X[:, 2] = 0.0002
+            X[:, 3] = test_samples['atr'].to_numpy()[:n] if 'atr' in test_samples else 0
+            
+            # V8000: The scanner's closing vectors for these bars, where it stored them
+            if 'timestamp' in test_samples:
+                stored = self.feature_store.at_bars(symbol, '5m', test_samples['timestamp'].to_numpy()[:n])
+                hit = ~np.isnan(stored).all(axis=1)
+                X[hit] = stored[hit]
+            
+            probs = self.predict_success_batch(X)
+            real_gain = (closes[1:] - closes[:-1]) / closes[:-1]
+            
+            # If AI was bullish (>0.5) and price went up, or bearish (<0.5) and price went down
+            correct_preds = int((((probs > 0.5) & (real_gain > 0)) | ((probs < 0.5) & (real_gain < 0))).sum())
             
             recent_accuracy = correct_preds / 11
             print(f"       [BACKTEST] Recent 1h AI Accuracy for {symbol}: {recent_accuracy:.1%}")
@@ -332,55 +375,63 @@ class CosmosBrain:
         summary = " ".join(insights)
         return f"{conviction}: {summary}"
 
-    def predict_success(self, features):
+    def _features_to_matrix(self, rows):
+        """V6100: list of feature dicts -> (N, 6) float64 matrix (missing key = 0, None = NaN for the imputer)."""
+        X = np.empty((len(rows), len(self.feature_cols)), dtype=np.float64)
+        for i, features in enumerate(rows):
+            for j, col in enumerate(self.feature_cols):
+                val = features.get(col, 0)
+                X[i, j] = np.nan if val is None else val
+        return X
+
+    def predict_success_batch(self, features):
         """
-        Predicts probability of WIN.
-        features: dict with keys matching feature_cols
+        V6100: Vectorized inference.
+        features: (N, 6) array ordered like feature_cols, or a list of feature dicts.
+        Returns an (N,) array of WIN probabilities from a single imputer/predict_proba pass.
         """
+        n = (features.shape[0] if features.ndim > 1 else 1) if isinstance(features, np.ndarray) else len(features)
+        neutral = np.full(n, 0.5)
+        if n == 0:
+            return neutral
+
         if not ML_AVAILABLE:
-            return 0.5 # Neutral Safe Mode
+            return neutral # Neutral Safe Mode
 
         if not self.is_trained:
-            return 0.5 # Neutral if untrained
-            
-        # V410: Path Robustness
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Priority 1: Check for 'xgb_model.pkl' (Generated by force_retrain.py)
-        model_path = os.path.join(current_dir, "xgb_model.pkl")
-        
-        # Priority 2: Legacy fallback
-        if not os.path.exists(model_path):
-             model_path = os.path.join(current_dir, "xgb_model_v4.pkl")
-             
-        # Priority 3: Root fallback
-        if not os.path.exists(model_path):
-             model_path = "xgb_model.pkl"
-
-        print(f"   [BRAIN] Loading Neural Model from: {model_path}")
-        self.model = joblib.load(model_path)
-        print("   [BRAIN] Model Loaded Successfully.")
+            return neutral # Neutral if untrained
+
+        # V6000: Resident model (loaded once, hot-reloaded on artifact change)
+        model = self.model_holder.get()
+        if model is None:
+            return neutral
+        self.model = model
+        start = time.perf_counter()
         try:
-            # Convert dict to DF
-            input_df = pd.DataFrame([features])
-            
-            # Fill missing columns if any
-            for col in self.feature_cols:
-                if col not in input_df.columns:
-                    input_df[col] = 0
-            
-            # Reorder
-            input_df = input_df[self.feature_cols]
-            
-            # Impute
-            input_data = self.imputer.transform(input_df)
-            
-            # Predict Prob of Class 1 (Win)
-            prob = self.model.predict_proba(input_data)[0][1]
-            return prob
+            if isinstance(features, np.ndarray):
+                X = np.asarray(features, dtype=np.float64).reshape(n, len(self.feature_cols))
+            else:
+                X = self._features_to_matrix(features)
+
+            with warnings.catch_warnings():
+                # Imputer/model may carry feature names from a DataFrame fit; the matrix is already ordered
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+                input_data = self.imputer.transform(X)
+
+                # Predict Prob of Class 1 (Win)
+                probs = model.predict_proba(input_data)[:, 1]
+            self.model_holder.record_inference(time.perf_counter() - start, rows=n)
+            return probs
         except Exception as e:
             print(f"Prediction Error: {e}")
-            return 0.5
+            return neutral
+
+    def predict_success(self, features):
+        """
+        Predicts probability of WIN.
+        features: dict with keys matching feature_cols
+        """
+        return float(self.predict_success_batch([features])[0])
 
     def decide_trade(self, symbol, signal_type, features, df_5m=None, oracle_insight=None, min_conf=0.90):
         """
@@ -517,10 +568,13 @@ class CosmosBrain:
         self.last_university = validation_result.get('university', 'Unknown')  # Fix 2: Guardar universidad
              
         # 6. VPIN TOXICITY CHECK
-        # Estimate volume buckets from features if available (mocking for now as we lack granular data in features)
-        # In production, this would use real Order Book flow
-        toxicity = validator.calculate_vpin(0.5, 0.5, 1.0) # Placeholder
-        if toxicity > 0.6:
+        # V7900: Scan-panel feature, else the trade-stream value in Redis, else the 5m candles
+        toxicity = features.get('vpin')
+        if toxicity is None:
+            toxicity = redis_engine.get_vpin(symbol)
+        if toxicity is None and df_5m is not None and not df_5m.empty:
+            toxicity = vpin.vpin_from_candles(df_5m['close'], df_5m['volume'])
+        if (toxicity or 0) > vpin.TOXIC_THRESHOLD:
              print("       [TOXIC FLOW] High VPIN detected. Reducing position size request.")
              # Logic to reduce size would happen in PaperTrader, here we just note it.
 
@@ -533,8 +587,10 @@ class CosmosBrain:
             
             # Simple Rule: Need at least $50k depth to enter safely without slippage
             min_depth_usd = 50000 
-            # Convert volume to USD (approx)
-            depth_usd = (bid_vol if "SELL" in signal_type else ask_vol) * features.get('price', 0)
+            # Convert volume to USD (approx; V8400: exact quote notional when book_keeper published it)
+            depth_usd = liq_data.get('bid_usd' if "SELL" in signal_type else 'ask_usd')
+            if depth_usd is None:
+                depth_usd = (bid_vol if "SELL" in signal_type else ask_vol) * features.get('price', 0)
             
             if depth_usd < min_depth_usd:
                 return False, prob, f"REJECTED by Liquidity Filter: Depth ${depth_usd:.0f} < ${min_depth_usd}. Slippage Risk."
@@ -603,12 +659,14 @@ class CosmosBrain:
         # Ensure biases exist
         if not hasattr(self, 'asset_biases'): self.asset_biases = {}
         
-        for asset in asset_data_list:
+        # V6100: Score the whole list in one inference pass
+        probs = self.predict_success_batch([asset['features'] for asset in asset_data_list])
+        
+        for asset, prob in zip(asset_data_list, probs):
             symbol = asset['symbol']
             features = asset['features']
             sig_type = asset['signal_type']
-            
-            prob = self.predict_success(features)
+            prob = float(prob)
             trend = self.get_trend_status(features)
             
             # 1. Base Score
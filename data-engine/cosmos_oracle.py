@@ -15,6 +15,10 @@ load_dotenv(dotenv_path=os.path.join(parent_dir, '.env.local'))
 
 from binance_engine import live_trader
 from dex_scanner import DEXScanner # V4000: Multi-Chain Integration
+from instrument_registry import instrument_registry # V7700: Symbol mapping from cached markets
+from indicators import calculate_rsi, calculate_macd, calculate_ema, calculate_atr # V6600: Shared NumPy kernels (Wilder ATR)
+from feature_store import feature_store, FEATURE_COLS # V8000: Model features written by the scanner
+from shm_candles import shm_candles # V8200: Candles mapped from the stream producer's shared memory
 
 # Singleton for DEX Scanning
 dex_scanner = DEXScanner()
@@ -34,62 +38,42 @@ SYMBOLS = GLOBAL_CONFIG.get("trading_pairs", ["BTC/USDT", "SOL/USDT", "ETH/USDT"
 # V1500: Dedup Cache
 SIGNAL_COOLDOWN = {}
 
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    exp1 = series.ewm(span=fast, adjust=False).mean()
-    exp2 = series.ewm(span=slow, adjust=False).mean()
-    macd_line = exp1 - exp2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-def calculate_ema(series, period=200):
-    return series.ewm(span=period, adjust=False).mean()
-
-def calculate_atr(df, period=14):
-    high_low = df['high'] - df['low']
-    high_close = (df['high'] - df['close'].shift()).abs()
-    low_close = (df['low'] - df['close'].shift()).abs()
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-    return true_range.rolling(period).mean()
-
 def run_oracle_step(symbol='BTC/USDT'):
     """
     V410 Multi-Asset Oracle Step (5m Focus)
     """
     try:
         # 1. FETCH 5m DATA (V410: Shifted from 1m for better signal quality)
-        bars = live_trader.fetch_ohlcv(symbol, timeframe='5m', limit=100)
-        if not bars or len(bars) < 50:
+        bars = shm_candles.read_array(symbol, '5m', 100) if shm_candles else None
+        if bars is None:
+            bars = live_trader.fetch_ohlcv(symbol, timeframe='5m', limit=100)
+        if bars is None or len(bars) < 50:
             print(f"   [ORACLE] Skipping {symbol}: Insufficient data.")
             return
 
         df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
         # 2. COMPUTE TECHS
-        df['RSI'] = calculate_rsi(df['close'])
+        # V8000: Live technicals; the book fields come from the scanner's vector of the last closed bar
         df['EMA_200'] = calculate_ema(df['close'])
-        df['ATR'] = calculate_atr(df)
-        macd, sig, hist = calculate_macd(df['close'])
-        
         latest = df.iloc[-1]
+        macd, sig, hist = calculate_macd(df['close'])
+        model_features = {
+            'rsi_value': calculate_rsi(df['close']).iloc[-1],
+            'atr_value': calculate_atr(df).iloc[-1],
+            'histogram': hist.iloc[-1],
+            'macd_line': macd.iloc[-1],
+            'imbalance_ratio': 0,
+        }
+        closed = feature_store.latest(symbol, '5m', int(df['timestamp'].iloc[-2]))
+        if closed is not None:
+            model_features.update(imbalance_ratio=closed['imbalance_ratio'], spread_pct=closed['spread_pct'])
         
         features = {
             'price': latest['close'],
-            'rsi_value': latest['RSI'],
             'ema_200': latest['EMA_200'],
-            'atr_value': latest['ATR'], 
-            'histogram': hist.iloc[-1],
-            'macd_line': macd.iloc[-1],
-            'imbalance_ratio': 0,
-            'dex_force': dex_scanner.calculate_dex_force(symbol.replace('/USDT', '')) # V4000
+            **{k: model_features[k] for k in FEATURE_COLS if k in model_features},
+            'dex_force': dex_scanner.calculate_dex_force(instrument_registry.base(symbol)) # V4000 (V7700: registry base)
         }
         
         # 3. BLM ANALYSIS & RANKING (V90)
@@ -143,14 +127,14 @@ def run_oracle_step(symbol='BTC/USDT'):
             SIGNAL_COOLDOWN[symbol] = {"timestamp": time.time(), "type": signal_type}
             
             print(f"      !!! SCALP OPPORTUNITY: {symbol} {signal_type} !!!")
-            atr = latest['ATR']
+            atr = features['atr_value']
             sl = latest['close'] - (atr * 2.5) if "BUY" in signal_type else latest['close'] + (atr * 2.5)
             tp = latest['close'] + (atr * 2.1) if "BUY" in signal_type else latest['close'] - (atr * 2.1)
             
             sig_id = insert_signal(
                 symbol=symbol,
                 price=latest['close'],
-                rsi=latest['RSI'],
+                rsi=features['rsi_value'],
                 signal_type=f"{signal_type} (SCALP)",
                 confidence=int(prob * 100),
                 stop_loss=round(sl, 4),
@@ -162,14 +146,14 @@ def run_oracle_step(symbol='BTC/USDT'):
                 insert_analytics(
                     signal_id=sig_id,
                     ema_200=latest['EMA_200'],
-                    rsi_value=latest['RSI'],
-                    atr_value=latest['ATR'],
-                    imbalance_ratio=0,
-                    spread_pct=0,
+                    rsi_value=features['rsi_value'],
+                    atr_value=features['atr_value'],
+                    imbalance_ratio=features['imbalance_ratio'],
+                    spread_pct=features.get('spread_pct', 0),
                     depth_score=0,
-                    macd_line=macd.iloc[-1],
+                    macd_line=features['macd_line'],
                     signal_line=0,
-                    histogram=hist.iloc[-1],
+                    histogram=features['histogram'],
                     ai_score=prob
                 )
                 
@@ -218,7 +202,7 @@ def run_oracle_step(symbol='BTC/USDT'):
             reasoning=reasoning,
             technical={
                 "price": latest['close'],
-                "rsi": latest['RSI'],
+                "rsi": features['rsi_value'],
                 "ema_200": latest['EMA_200'],
                 "dex_force": features.get('dex_force', 0),
                 "type": "RECURSIVE_RANK_SCAN"
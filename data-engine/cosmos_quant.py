@@ -1,6 +1,9 @@
 import logging
 # We will use the live_trader from binance_engine to fetch order books
 from binance_engine import live_trader
+from book_store import book_store # V6500: Local L2 replica (book_keeper.py)
+import book_depth # V8400: One-pass depth analytics
+from book_depth import depth_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("CosmosQuant")
@@ -9,14 +12,18 @@ class QuantAnalyzer:
     def __init__(self):
         pass
 
-    def analyze_order_flow(self, symbol):
+    def analyze_order_flow(self, symbol, book=None):
         """
         Analyzes the Order Book (Depth) to detect Whale Walls and Imbalance.
         Returns a dict with 'imbalance_score', 'whale_wall_side', and 'valid'.
+        V6300: `book` lets the worker pass the gateway prefetch instead of refetching.
         """
         try:
             # Fetch Depth (Limit 50 is enough for immediate pressure)
-            book = live_trader.fetch_order_book(symbol, limit=100)
+            if book is None and book_store:
+                book = book_store.read(symbol, limit=100)
+            if book is None:
+                book = live_trader.fetch_order_book(symbol, limit=100)
             if not book:
                 return {'valid': False, 'reason': 'No Data'}
 
@@ -26,9 +33,15 @@ class QuantAnalyzer:
             if not bids or not asks:
                 return {'valid': False, 'reason': 'Empty Book'}
 
+            # V8400: Shared depth analytics (computed once per book update)
+            analytics = depth_cache.get(book, symbol)
+            depth = max(len(bids), len(asks)) # This book's levels (the cached result may be deeper)
+            bid_side, ask_side = analytics['bid'], analytics['ask']
+
             # 1. Calculate Total Volume in Top 50 levels
-            total_bid_vol = sum([b[1] for b in bids])
-            total_ask_vol = sum([a[1] for a in asks])
+            levels = book_depth.depth_at(bid_side, ask_side, depth)
+            total_bid_vol = float(levels['bid'])
+            total_ask_vol = float(levels['ask'])
             
             if total_bid_vol == 0 or total_ask_vol == 0:
                  return {'valid': False, 'reason': 'Zero Volume'}
@@ -38,18 +51,9 @@ class QuantAnalyzer:
             # Negative = Selling Pressure
             imbalance = (total_bid_vol - total_ask_vol) / (total_bid_vol + total_ask_vol)
 
-            # 3. Detect Whale Walls (Single orders > 5% of total side volume)
-            whale_walls = []
-            
-            # Check Bids
-            for b in bids[:10]: # Only check near price
-                if b[1] > (total_bid_vol * 0.05):
-                    whale_walls.append(f"BUY_WALL @ {b[0]}")
-            
-            # Check Asks
-            for a in asks[:10]:
-                if a[1] > (total_ask_vol * 0.05):
-                    whale_walls.append(f"SELL_WALL @ {a[0]}")
+            # 3. Detect Whale Walls (Single orders > 5% of total side volume, near price; adjacent levels merged)
+            whale_walls = [f"BUY_WALL @ {w['price']}" for w in book_depth.walls_at(bid_side, depth)]
+            whale_walls += [f"SELL_WALL @ {w['price']}" for w in book_depth.walls_at(ask_side, depth)]
 
             return {
                 'valid': True,
@@ -57,6 +61,8 @@ class QuantAnalyzer:
                 'bid_vol': total_bid_vol,
                 'ask_vol': total_ask_vol,
                 'whale_walls': whale_walls,
+                'spread_bps': analytics['spread_bps'],
+                'slippage_bps': {'buy': ask_side['slippage'], 'sell': bid_side['slippage']},
                 'sentiment': 'BULLISH' if imbalance > 0.2 else ('BEARISH' if imbalance < -0.2 else 'NEUTRAL')
             }
 
@@ -28,6 +28,7 @@ scanner_engine = None
 macro_brain = None
 quant_engine = None
 live_trader = None
+market_gateway = None
 whale_monitor = None  # Fix 1: Declarar whale_monitor globalmente
 
 try:
@@ -40,6 +41,9 @@ try:
 except ImportError as e:
     logger.warning(f"Redis Engine missing: {e}")
 
+from universe_service import universe_service # V7600: Background-refreshed, versioned scan universe
+from instrument_registry import instrument_registry # V7700: Symbol mapping from cached markets
+
 try:
     from macro_feed import macro_brain
 except ImportError as e:
@@ -52,6 +56,7 @@ except ImportError as e:
     
 try:
     from binance_engine import live_trader
+    from market_gateway import market_gateway # V6300: Concurrent universe fetch
     from dex_scanner import DEXScanner # V4100
     from whales_monitor import WhaleMonitor # V4200
     from nexus_indexer import NexusIndexer # V5000 (Sovereign)
@@ -156,8 +161,7 @@ def main_loop():
     worker_started = False
     last_optimization = 0
     last_training_time = 0
-    last_dynamic_update = 0
-    dynamic_pairs = []
+    universe_version = None
     min_confidence_threshold = 25
     macro_sentiment = "NEUTRAL"
     
@@ -181,6 +185,9 @@ def main_loop():
 
     threading.Thread(target=redis_listener, daemon=True).start()
     
+    # V7600: Top-volume refresh runs in the background; the loop only reads the published universe
+    universe_service.start()
+    
     while True:
         # Fix 3: Check Circuit Breaker ANTES de procesar
         if circuit_breaker:
@@ -226,7 +233,10 @@ def main_loop():
             # We import logic from scanner.py to avoid code duplication
             # Assumption: scanner.py functions are stateless enough or valid
             # 1. Fetch Candidates & Scan
-            from scanner import fetch_data, analyze_market, analyze_quant_signal, fetch_fear_greed, get_top_vol_pairs, SYMBOLS, PRIORITY_ASSETS
+            from scanner import fetch_data, analyze_market, analyze_quant_signal, fetch_fear_greed, SYMBOLS, PRIORITY_ASSETS
+            from scanner import frame_from_bundle, book_from_bundle, ASSET_BLACKLIST
+            from scanner import scan_panel, analyze_from_panel
+            from scanner import SCAN_FAST_PATH, bars_from_bundle, bars_to_df, analyze_bars # V8300
             
             logger.info("Scanning markets...")
             fng_index = fetch_fear_greed()
@@ -246,37 +256,58 @@ def main_loop():
                 except Exception as e:
                     logger.error(f"Recursive Training Failed: {e}")
 
-            # V24: Dynamic Asset List Update (Every 30m)
-            if time.time() - last_dynamic_update > 1800:
-                logger.info("   [DYNAMIC] Updating top volume assets...")
-                try:
-                    dynamic_pairs = get_top_vol_pairs(limit=10)
-                    last_dynamic_update = time.time()
-                except Exception as de:
-                    logger.error(f"Dynamic Update Failed: {de}")
-                    if not dynamic_pairs: dynamic_pairs = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
-
-            # Combine symbols: Priority + Static + Dynamic
-            symbols_to_scan = list(set(PRIORITY_ASSETS + SYMBOLS + dynamic_pairs))
+            # V7600: Priority + Static + Dynamic (blacklist applied) from the universe service, O(1) per cycle
+            symbols_to_scan = universe_service.symbols()
+            if not symbols_to_scan:
+                symbols_to_scan = [s for s in dict.fromkeys(PRIORITY_ASSETS + SYMBOLS) if not any(b in s for b in ASSET_BLACKLIST)]
+            snapshot_version = universe_service.version()
+            if snapshot_version != universe_version:
+                logger.info(f"   [UNIVERSE] Version {snapshot_version}: {len(symbols_to_scan)} Assets")
+                universe_version = snapshot_version
             logger.info(f"Scanning {len(symbols_to_scan)} Assets: {symbols_to_scan}")
             
             generated_signals = [] 
             
+            # V6300: Fetch 5m/15m/4h + ticker + book for every symbol concurrently
+            bundles = {}
+            if market_gateway:
+                bundles = market_gateway.fetch_universe(symbols_to_scan)
+                logger.info(f"   [GATEWAY] {market_gateway.stats()}")
+            if not SCAN_FAST_PATH:
+                panel_5m, panel_15m = scan_panel(bundles, '5m'), scan_panel(bundles, '15m') # V6800: One pass per timeframe
+            
+            # V7800: SMC (FVG / order blocks) for every prefetched 5m frame in one vectorized pass
+            from smc_engine import smc_engine
+            smc_batch = smc_engine.analyze_batch({s: (b or {}).get('frames', {}).get('5m', [])[-100:] for s, b in bundles.items()})
+            
+            # V7000: Symbols without a gateway ticker share one batched request. The result is kept for
+            # the loop below: the ticker cache TTL (~1s) is far shorter than a scan cycle
+            missing_tickers = [s for s in symbols_to_scan if not (bundles.get(s) or {}).get('ticker')]
+            prefetched_tickers = {}
+            if live_trader and missing_tickers:
+                try:
+                    prefetched_tickers = live_trader.fetch_tickers(missing_tickers) or {}
+                except Exception as e:
+                    logger.warning(f"Batched ticker prefetch failed: {e}")
+            
             for symbol in symbols_to_scan:
+                bundle = bundles.get(symbol)
                 try:
-                    # V310: GLOBAL BLACKLIST CHECK
-                    from scanner import ASSET_BLACKLIST
-                    if any(b in symbol for b in ASSET_BLACKLIST):
-                         # logger.info(f"Skipping Blacklisted Asset: {symbol}")
-                         continue
-
                     # Fetch Data (5m and 15m for confluence)
-                    df_5m = fetch_data(symbol, timeframe='5m', limit=100)
-                    df_15m = fetch_data(symbol, timeframe='15m', limit=100)
-                    df_4h = fetch_data(symbol, timeframe='4h', limit=50) # V1400: High Timeframe for Structure
-                    
-                    techs_5m = analyze_market(df_5m)
-                    techs_15m = analyze_market(df_15m)
+                    if SCAN_FAST_PATH:
+                        # V8300: Raw OHLCV arrays; confluence features come with the techs
+                        bars_5m = bars_from_bundle(bundle, symbol, '5m', limit=100)
+                        df_5m = None
+                        df_4h = bars_from_bundle(bundle, symbol, '4h', limit=50) # V1400: High Timeframe for Structure
+                        techs_5m = analyze_bars(bars_5m, symbol, '5m')
+                        techs_15m = analyze_bars(bars_from_bundle(bundle, symbol, '15m', limit=100), symbol, '15m')
+                    else:
+                        df_5m = frame_from_bundle(bundle, symbol, '5m', limit=100)
+                        df_15m = frame_from_bundle(bundle, symbol, '15m', limit=100)
+                        df_4h = frame_from_bundle(bundle, symbol, '4h', limit=50) # V1400: High Timeframe for Structure
+                        
+                        techs_5m = analyze_from_panel(panel_5m, symbol, df_5m)
+                        techs_15m = analyze_from_panel(panel_15m, symbol, df_15m)
                     
                     if techs_5m and techs_15m:
                         # Confluence Check
@@ -315,15 +346,13 @@ def main_loop():
                         real_price = p_5m 
                         if live_trader:
                             try:
-                                ticker = live_trader.fetch_ticker(symbol)
+                                ticker = (bundle or {}).get('ticker') or prefetched_tickers.get(symbol) or live_trader.fetch_ticker(symbol)
                                 real_price = float(ticker['last']) if ticker and 'last' in ticker else p_5m
                             except Exception as e:
                                 pass 
 
-                        # V42: SMC ORDER BLOCK ANALYSIS
-                        # Import here to avoid circular dep issues at top level if any
-                        from smc_engine import smc_engine
-                        smc_data = smc_engine.analyze(df_5m)
+                        # V42: SMC ORDER BLOCK ANALYSIS (V7800: from the batch pass when prefetched)
+                        smc_data = smc_batch.get(symbol) or smc_engine.analyze(df_5m if df_5m is not None else bars_to_df(bars_5m))
                         
                         # AI + Quant Analysis
                         quant_signal = analyze_quant_signal(
@@ -332,7 +361,8 @@ def main_loop():
                             sentiment_score=fng_index, 
                             df_confluence=df_5m, 
                             df_htf=df_4h,
-                            current_price=real_price
+                            current_price=real_price,
+                            book=book_from_bundle(bundle)
                         )
                         
                         if quant_signal:
@@ -344,7 +374,7 @@ def main_loop():
                                 
                             # V3400: ORDER FLOW & WHALE CHECK
                             if quant_engine:
-                                flow_analysis = quant_engine.analyze_order_flow(symbol)
+                                flow_analysis = quant_engine.analyze_order_flow(symbol, book=(bundle or {}).get('book'))
                                 if flow_analysis['valid']:
                                     if "BUY" in quant_signal['signal'] and flow_analysis['sentiment'] == 'BEARISH':
                                         continue
@@ -365,8 +395,8 @@ def main_loop():
 
                             # V4100: DEX CONFLUENCE
                             # Check decentralized liquidity for the asset
-                            # We strip '/USDT' for the scanner
-                            dex_force = dex_scanner.calculate_dex_force(symbol.replace('/USDT', ''))
+                            # V7700: Base asset from the instrument registry
+                            dex_force = dex_scanner.calculate_dex_force(instrument_registry.base(symbol))
                             if abs(dex_force) > 0.4:
                                 logger.info(f"   [DEX FORCE] {symbol} Multi-Chain Force: {dex_force:.2f}")
 
@@ -438,6 +468,7 @@ def main_loop():
                                 "dex_force": dex_force,
                                 "nli_score": nli_score,
                                 "whale_sentiment": whale_sentiment,
+                                "vpin": techs_5m.get('vpin'), # V7900: Order-flow toxicity (scan panel)
                                 "academic_thesis_id": academic_res.get('thesis_id'),
                                 "p_value": academic_res.get('p_value')
                             }
@@ -456,8 +487,9 @@ def main_loop():
                     logger.error(f"Error scanning {symbol}: {e}")
                     continue
                 
-                # Tiny sleep to be nice to API
-                time.sleep(0.5)
+                # Tiny sleep to be nice to API (only when we fell back to sync per-symbol fetches)
+                if not bundle:
+                    time.sleep(0.5)
 
             if not generated_signals:
                 logger.info("No signals generated this cycle.")
@@ -575,6 +607,18 @@ def main_loop():
             except Exception as e:
                 logger.error(f"Audit/Oracle Cycle Failed: {e}")
 
+            # V6000: Model residency metrics (load count should stay flat between retrains)
+            if brain:
+                logger.info(f"   [BRAIN] Model stats: {brain.model_holder.stats()}")
+            if live_trader:
+                logger.info(f"   [OHLCV CACHE] {live_trader.candle_cache.stats()}")
+
+            # V6700: Persist incremental indicator state (EMA200 stays warm across restarts)
+            from indicator_state import indicator_engine
+            if indicator_engine:
+                indicator_engine.save()
+                logger.info(f"   [INDICATORS] {indicator_engine.stats()}")
+
             # Sleep remainder of minute
             elapsed = time.time() - start_time
             sleep_time = max(0, LOOP_INTERVAL - elapsed)
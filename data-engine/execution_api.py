@@ -8,6 +8,9 @@ from supabase import create_client, Client
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 from pusher import Pusher
+from rate_limiter import rate_limiter, endpoint_weight # V7200: Shared exchange weight budget
+from markets_cache import markets_cache # V7400: Markets metadata without a per-request download
+from instrument_registry import instrument_registry # V7700: Lot/tick sizes and minimums
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -122,8 +125,15 @@ def execute_trade(req: TradeRequest, x_secret_auth: str = Header(None)):
         # But we are trading here.
         
         # E. Execution Logic (Reused from binance_engine logic basically)
-        # 1. Load Markets
-        exchange.load_markets()
+        # V7200: Reserve the whole trade's weight on the execution lane (preempts scanning)
+        orders = 1 + (req.stop_loss > 0) + (req.take_profit > 0)
+        rate_limiter.acquire('binance_futures', endpoint_weight('binance_futures', 'leverage')
+                             + endpoint_weight('binance_futures', 'ticker')
+                             + orders * endpoint_weight('binance_futures', 'order'), lane='execution')
+
+        # 1. Load Markets (V7400: from the markets cache file)
+        markets_cache.load(exchange)
+        instrument_registry.attach(exchange)  # Lot/tick sizes even when the cache file is unavailable
         market = exchange.market(req.symbol)
         
         # 2. Set Leverage
@@ -134,7 +144,10 @@ def execute_trade(req: TradeRequest, x_secret_auth: str = Header(None)):
         # 3. Calc Amount
         price = exchange.fetch_ticker(req.symbol)['last']
         amount_coins = req.amount_usd / price
-        amount_precision = exchange.amount_to_precision(req.symbol, amount_coins)
+        # V7700: Lot size, min qty and min notional checked here instead of by a rejected order
+        amount_precision = instrument_registry.order_amount(req.symbol, amount_coins, price)
+        if amount_precision is None:
+            raise ValueError(f"Order size {req.amount_usd} USD is below the minimum for {req.symbol}")
         
         # 4. Execute Market Order
         order = exchange.create_market_order(req.symbol, req.side, amount_precision)
@@ -146,12 +159,12 @@ def execute_trade(req: TradeRequest, x_secret_auth: str = Header(None)):
         exit_side = 'sell' if req.side == 'buy' else 'buy'
         
         if req.stop_loss > 0:
-            sl_price = exchange.price_to_precision(req.symbol, req.stop_loss)
+            sl_price = instrument_registry.round_price(req.symbol, req.stop_loss)
             sl_order = exchange.create_order(req.symbol, 'STOP_MARKET', exit_side, amount_precision, params={'stopPrice': sl_price, 'reduceOnly': True})
             sl_id = sl_order['id']
             
         if req.take_profit > 0:
-            tp_price = exchange.price_to_precision(req.symbol, req.take_profit)
+            tp_price = instrument_registry.round_price(req.symbol, req.take_profit)
             tp_order = exchange.create_order(req.symbol, 'TAKE_PROFIT_MARKET', exit_side, amount_precision, params={'stopPrice': tp_price, 'reduceOnly': True})
             tp_id = tp_order['id']
             
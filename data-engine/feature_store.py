@@ -0,0 +1,253 @@
+"""
+COSMOS AI - Feature Store
+The model's feature vector per (symbol, timeframe, bar) is computed once, by the
+scanner, and stored versioned; the oracle, the backtest and training read it
+instead of rebuilding it (V8000). Predictions always use live features; a bar is
+stored only once it has closed, with the last live vector seen for it (observe()).
+
+features:v{version}:{SYMBOL}:{tf}   Redis hash, latest vector {bar_ts, written_at, <FEATURE_COLS>}
+{dir}/{BASE-QUOTE}/{tf}/v{version}/{YYYY-MM}.npy
+                                    float64 (n, 2 + len(FEATURE_COLS)) [bar_ts, written_at, features...],
+                                    sorted, unique bar_ts (the first vector written for a bar wins)
+
+written_at is kept so training can ask for the vector that existed at a given
+time (as_of) rather than one written after the trade was opened.
+Bump FEATURE_VERSION whenever a feature's definition changes: each version has
+its own keys and files, so old and new vectors never mix.
+"""
+import os
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from candle_archive import _month_bounds
+from candle_cache import timeframe_ms
+
+FEATURE_VERSION = 1
+FEATURE_COLS = ['rsi_value', 'imbalance_ratio', 'spread_pct', 'atr_value', 'macd_line', 'histogram']  # CosmosBrain.feature_cols
+STORE_DIR = os.getenv("FEATURE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".feature_store"))
+LATEST_TTL = 86_400   # Seconds; a symbol that leaves the universe expires from Redis
+MAX_AS_OF_BARS = 2    # as_of() ignores vectors older than this many bars
+
+# Stores the vector only if it is for a newer bar than the one held (one write per bar across processes)
+WRITE_ONCE_LUA = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'bar_ts') or '-1')
+if current >= tonumber(ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+
+def bar_ms(ts):
+    """Bar open time in ms from ms ints, pandas/NumPy datetimes or ISO strings."""
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    if isinstance(ts, (float, np.floating)):
+        return int(ts)
+    return int(pd.Timestamp(ts).value // 1_000_000)
+
+
+def _symbol_key(symbol):
+    """BTC/USDT, BTC/USDT:USDT and btc/usdt share one entry."""
+    return symbol.split(':')[0].upper()
+
+
+class FeatureStore:
+    def __init__(self, client=None, root=STORE_DIR, version=FEATURE_VERSION, columns=FEATURE_COLS):
+        self.client = client
+        self.root = root
+        self.version = version
+        self.columns = list(columns)
+        self._script = client.register_script(WRITE_ONCE_LUA) if client else None
+        self._latest = {}  # (symbol, timeframe) -> {'bar_ts', 'written_at', <columns>}
+        self._forming = {}  # (symbol, timeframe) -> (bar_ts, features) of the bar still open
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.writes = 0
+        self.duplicates = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, symbol, timeframe):
+        return f"features:v{self.version}:{_symbol_key(symbol)}:{timeframe}"
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, _symbol_key(symbol).replace('/', '-'), timeframe, f"v{self.version}")
+
+    def vector(self, features):
+        """Feature dict -> float64 array in column order (missing = 0, None = NaN for the imputer)."""
+        return np.array([np.nan if features.get(c, 0) is None else features.get(c, 0) for c in self.columns],
+                        dtype=np.float64)
+
+    # --- Write ---
+
+    def write(self, symbol, timeframe, bar_ts, features, written_at=None):
+        """
+        Stores the vector for one bar. Returns False, storing nothing, when a vector for this
+        bar (or a later one) already exists, so the first writer of each bar wins.
+        """
+        bar_ts = bar_ms(bar_ts)
+        written_at = int(written_at if written_at is not None else time.time() * 1000)
+        vec = self.vector(features)
+        entry = dict(zip(self.columns, vec.tolist()), bar_ts=bar_ts, written_at=written_at)
+
+        with self._lock:
+            held = self._latest.get((_symbol_key(symbol), timeframe))
+            if held and held['bar_ts'] >= bar_ts:
+                self.duplicates += 1
+                return False
+            if self._script is not None:
+                try:
+                    fields = []
+                    for k, v in entry.items():
+                        fields += [k, repr(v)]
+                    if not self._script(keys=[self._key(symbol, timeframe)], args=[bar_ts, LATEST_TTL] + fields):
+                        self.duplicates += 1
+                        return False
+                except Exception as e:
+                    print(f"   [FEATURES] Redis write failed for {symbol}: {e}")
+            self._latest[(_symbol_key(symbol), timeframe)] = entry
+            self._append(symbol, timeframe, np.r_[bar_ts, written_at, vec])
+            self.writes += 1
+        return True
+
+    def observe(self, symbol, timeframe, bar_ts, features):
+        """
+        Live vector of the forming bar. When a newer bar shows up, the last vector seen for the
+        previous bar (its values at the close) is written under that bar's bar_ts; a held bar
+        older than that is dropped, its last values being from before the close.
+        Returns True when a closed bar was written.
+        """
+        bar_ts = bar_ms(bar_ts)
+        key = (_symbol_key(symbol), timeframe)
+        with self._lock:
+            held = self._forming.get(key)
+            if held is None or held[0] <= bar_ts:
+                self._forming[key] = (bar_ts, dict(features))
+        if held is None or held[0] >= bar_ts or held[0] != bar_ts - timeframe_ms(timeframe):
+            return False
+        return self.write(symbol, timeframe, held[0], held[1])
+
+    def _append(self, symbol, timeframe, row):
+        directory = self._dir(symbol, timeframe)
+        key = str(np.datetime64(int(row[0]), 'ms').astype('datetime64[M]'))
+        path = os.path.join(directory, f"{key}.npy")
+        os.makedirs(directory, exist_ok=True)
+        part = np.load(path) if os.path.exists(path) else np.empty((0, len(row)))
+        if np.any(part[:, 0] == row[0]):
+            return  # Another process already archived this bar
+        part = np.concatenate([part, row[None, :]])
+        part = part[np.argsort(part[:, 0], kind='stable')]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, part)
+        os.replace(tmp, path)
+
+    # --- Read ---
+
+    def latest(self, symbol, timeframe, bar_ts=None):
+        """
+        Latest stored vector as a feature dict (plus bar_ts / written_at), or None.
+        With bar_ts, only a vector for exactly that bar is returned.
+        """
+        entry = self._latest.get((_symbol_key(symbol), timeframe))
+        if bar_ts is not None:
+            bar_ts = bar_ms(bar_ts)
+        if (entry is None or (bar_ts is not None and entry['bar_ts'] != bar_ts)) and self.client:
+            try:
+                raw = self.client.hgetall(self._key(symbol, timeframe))
+                if raw:
+                    entry = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+                    entry['bar_ts'], entry['written_at'] = int(entry['bar_ts']), int(entry['written_at'])
+            except Exception as e:
+                print(f"   [FEATURES] Redis read failed for {symbol}: {e}")
+        if entry is None or (bar_ts is not None and entry['bar_ts'] != bar_ts):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(entry)
+
+    def months(self, symbol, timeframe):
+        try:
+            names = os.listdir(self._dir(symbol, timeframe))
+        except OSError:
+            return []
+        return sorted(n[:-4] for n in names if n.endswith('.npy'))
+
+    def history(self, symbol, timeframe, start_ms=None, end_ms=None):
+        """Rows with start_ms <= bar_ts <= end_ms: float64 (n, 2 + len(columns)) [bar_ts, written_at, features...]."""
+        start = bar_ms(start_ms) if start_ms is not None else -np.inf
+        end = bar_ms(end_ms) if end_ms is not None else np.inf
+        directory = self._dir(symbol, timeframe)
+        chunks = []
+        for key in self.months(symbol, timeframe):
+            m0, m1 = _month_bounds(key)
+            if m1 <= start or m0 > end:
+                continue
+            part = np.load(os.path.join(directory, f"{key}.npy"), mmap_mode='r')
+            lo = np.searchsorted(part[:, 0], start, side='left')
+            hi = np.searchsorted(part[:, 0], end, side='right')
+            if hi > lo:
+                chunks.append(np.asarray(part[lo:hi]))
+        return np.concatenate(chunks) if chunks else np.empty((0, 2 + len(self.columns)))
+
+    def history_df(self, symbol, timeframe, start_ms=None, end_ms=None):
+        df = pd.DataFrame(self.history(symbol, timeframe, start_ms, end_ms), columns=['bar_ts', 'written_at'] + self.columns)
+        df[['bar_ts', 'written_at']] = df[['bar_ts', 'written_at']].astype(np.int64)
+        return df
+
+    def at_bars(self, symbol, timeframe, bar_ts):
+        """(len(bar_ts), len(columns)) matrix of the vectors stored for those exact bars; NaN rows where none."""
+        bar_ts = np.asarray([bar_ms(t) for t in bar_ts], dtype=np.int64)
+        out = np.full((len(bar_ts), len(self.columns)), np.nan)
+        if not len(bar_ts):
+            return out
+        rows = self.history(symbol, timeframe, bar_ts.min(), bar_ts.max())
+        idx = np.searchsorted(rows[:, 0], bar_ts)
+        found = idx < len(rows)
+        found[found] = rows[idx[found], 0] == bar_ts[found]
+        out[found] = rows[idx[found], 2:]
+        return out
+
+    def as_of(self, symbol, timeframe, times_ms, max_bars=MAX_AS_OF_BARS):
+        """
+        Point-in-time lookup: for each time, the vector of the latest bar among those already
+        written by then (written_at <= t), if that bar is at most `max_bars` bars old. NaN rows otherwise.
+        """
+        times = np.asarray([bar_ms(t) for t in times_ms], dtype=np.int64)
+        out = np.full((len(times), len(self.columns)), np.nan)
+        if not len(times):
+            return out
+        step = timeframe_ms(timeframe)
+        rows = self.history(symbol, timeframe, times.min() - (max_bars + 1) * step, times.max())
+        if not len(rows):
+            return out
+        # Rows are sorted by bar_ts, so the newest bar written by t is the largest row index seen in written_at order
+        order = np.argsort(rows[:, 1], kind='stable')
+        newest = np.maximum.accumulate(order)
+        k = np.searchsorted(rows[order, 1], times, side='right')
+        pick = newest[np.maximum(k - 1, 0)]
+        ok = (k > 0) & (rows[pick, 0] >= times - max_bars * step)
+        out[ok] = rows[pick[ok], 2:]
+        return out
+
+    def stats(self):
+        return {"version": self.version, "writes": self.writes, "duplicates": self.duplicates,
+                "hits": self.hits, "misses": self.misses}
+
+
+def _build_default():
+    try:
+        from redis_engine import redis_engine
+        return FeatureStore(redis_engine.client)
+    except Exception as e:
+        print(f"   [FEATURES] Redis unavailable ({e}). Latest vectors are per process.")
+        return FeatureStore(None)
+
+
+# Singleton (scanner writes; cosmos_oracle, CosmosBrain read)
+feature_store = _build_default()
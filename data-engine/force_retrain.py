@@ -7,6 +7,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
 import joblib
+from model_holder import atomic_dump # V6000: Readers hot-reload, never see partial writes
 
 # Setup paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -53,14 +54,14 @@ def retrain_model():
     model_path = os.path.join(current_dir, "xgb_model.pkl")
     
     print(f"--- SAVING COMPATIBLE MODEL TO: {model_path} ---")
-    joblib.dump(clf, model_path)
+    atomic_dump(clf, model_path)
     print("--- RETRAINING COMPLETE (Version 1.6.1 Compatible) ---")
     
     # Optional: If engine uses 'xgb_model_v4.pkl', create a copy or symlink
     # But better to standardise on one name.
     # Let's write to both to be safe during migration
     v4_path = os.path.join(current_dir, "xgb_model_v4.pkl")
-    joblib.dump(clf, v4_path)
+    atomic_dump(clf, v4_path)
     print(f"--- BACKUP SAVED TO: {v4_path} ---")
 
 if __name__ == "__main__":
@@ -0,0 +1,360 @@
+"""
+COSMOS AI - Incremental Indicator State
+Running RSI / EMA200 / ATR / MACD / Vol_MA state per (symbol, timeframe), updated in
+O(1) per closed candle instead of recomputing 100 bars every cycle.
+
+Definitions are the ones in indicators.py (and therefore scanner.analyze_market):
+- RSI: 14-bar simple mean of gains/losses (first delta counts as 0)
+- EMA200 / MACD 12-26-9: ewm(adjust=False), seeded with the first close
+- ATR: Wilder smoothing of the true range, seeded with the first high-low
+- Vol_MA: 20-bar simple mean of volume
+Seeded with the same bars, the output equals a full recompute; once the state has
+seen more history than the 100-bar scan window, EMA200 (and the EMA-type figures)
+are properly warmed up instead of being seeded 100 bars ago.
+
+The last committed bar is kept and compared with the same bar in each new frame, so
+bars from another venue (router switch, resampler fallback) reseed instead of being
+folded into the state. Snapshots are stored per process role (scanner, worker, ...).
+"""
+import os
+import sys
+import json
+import math
+from collections import deque
+
+import numpy as np
+
+from candle_cache import timeframe_ms
+
+RSI_PERIOD = 14
+EMA_PERIOD = 200
+ATR_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+VOL_MA_PERIOD = 20
+TAIL = 20                 # Recent per-bar rows kept for check_rsi_divergence / analyze_volume_pressure
+RESUM_EVERY = 500         # Re-add window sums from scratch to bound float drift
+STATE_KEY = "indicators:state"
+STATE_VERSION = 2         # V2: last_bar (venue check)
+STATE_ROLE = os.getenv("INDICATOR_STATE_ROLE") or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+COLUMNS = ('RSI', 'EMA_200', 'ATR', 'MACD', 'Signal_Line', 'Histogram', 'Vol_MA')
+
+
+class _RollingMean:
+    """Fixed-window mean with a running sum; NaN until the window is full."""
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.nonzero = 0
+        self.updates = 0
+
+    def next_total(self, x):
+        """Window sum after pushing x (without committing)."""
+        if len(self.window) == self.period:
+            old = self.window[0]
+            if self.nonzero - (old != 0) + (x != 0) == 0:
+                return 0.0
+            return self.total - old + x
+        return self.total + x
+
+    def push(self, x):
+        if len(self.window) == self.period:
+            self.total = self.next_total(x)
+            self.nonzero -= self.window[0] != 0
+        else:
+            self.total += x
+        self.window.append(x)
+        self.nonzero += x != 0
+        self.updates += 1
+        if self.updates % RESUM_EVERY == 0:
+            self.total = math.fsum(self.window)
+
+    def mean_with(self, x):
+        if len(self.window) + 1 < self.period:
+            return math.nan
+        return self.next_total(x) / self.period
+
+    def snapshot(self):
+        return {"window": list(self.window), "total": self.total, "updates": self.updates}
+
+    @classmethod
+    def restore(cls, period, data):
+        r = cls(period)
+        r.window.extend(data["window"])
+        r.total = data["total"]
+        r.nonzero = sum(1 for x in r.window if x != 0)
+        r.updates = data["updates"]
+        return r
+
+
+def _ema_step(prev, x, alpha):
+    return x if prev is None else alpha * x + (1.0 - alpha) * prev
+
+
+def _rsi(gain_mean, loss_mean):
+    """Same result as 100 - 100 / (1 + gain/loss) in float64 (inf -> 100, 0/0 -> NaN)."""
+    if math.isnan(gain_mean) or math.isnan(loss_mean):
+        return math.nan
+    if loss_mean == 0:
+        return 100.0 if gain_mean > 0 else math.nan
+    return 100.0 - (100.0 / (1.0 + gain_mean / loss_mean))
+
+
+class IndicatorState:
+    """Running state for one (symbol, timeframe). Bars are ccxt OHLCV rows."""
+    def __init__(self):
+        self.count = 0
+        self.last_ts = None
+        self.last_bar = None     # [open, high, low, close, volume] of the last committed bar
+        self.prev_close = None
+        self.ema_200 = None
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.atr = None
+        self.gains = _RollingMean(RSI_PERIOD)
+        self.losses = _RollingMean(RSI_PERIOD)
+        self.volume = _RollingMean(VOL_MA_PERIOD)
+        self.tail = deque(maxlen=TAIL)   # (ts, row) for the last committed bars
+
+    def _step(self, bar):
+        """Indicator row and next accumulators for `bar`, without mutating the state."""
+        _, _, high, low, close, volume = (float(v) for v in bar[:6])
+        if self.prev_close is None:
+            delta, tr = 0.0, high - low
+        else:
+            delta = close - self.prev_close
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        gain, loss = (delta if delta > 0 else 0.0), (-delta if delta < 0 else 0.0)
+        ema_200 = _ema_step(self.ema_200, close, 2.0 / (EMA_PERIOD + 1))
+        ema_fast = _ema_step(self.ema_fast, close, 2.0 / (MACD_FAST + 1))
+        ema_slow = _ema_step(self.ema_slow, close, 2.0 / (MACD_SLOW + 1))
+        macd = ema_fast - ema_slow
+        signal = _ema_step(self.signal, macd, 2.0 / (MACD_SIGNAL + 1))
+        atr = _ema_step(self.atr, tr, 1.0 / ATR_PERIOD)
+
+        row = {
+            'RSI': _rsi(self.gains.mean_with(gain), self.losses.mean_with(loss)),
+            'EMA_200': ema_200,
+            'ATR': atr,
+            'MACD': macd,
+            'Signal_Line': signal,
+            'Histogram': macd - signal,
+            'Vol_MA': self.volume.mean_with(volume),
+        }
+        return row, (gain, loss, volume, close, ema_200, ema_fast, ema_slow, signal, atr)
+
+    def update(self, bar):
+        """Commits one closed bar. Returns its indicator row (duplicates/out-of-order are ignored)."""
+        ts = int(bar[0])
+        if self.last_ts is not None and ts <= self.last_ts:
+            return None
+        row, (gain, loss, volume, close, ema_200, ema_fast, ema_slow, signal, atr) = self._step(bar)
+        self.gains.push(gain)
+        self.losses.push(loss)
+        self.volume.push(volume)
+        self.prev_close = close
+        self.ema_200, self.ema_fast, self.ema_slow, self.signal, self.atr = ema_200, ema_fast, ema_slow, signal, atr
+        self.last_ts = ts
+        self.last_bar = [float(v) for v in bar[1:6]]
+        self.count += 1
+        self.tail.append((ts, row))
+        return row
+
+    def peek(self, bar):
+        """Indicator row for a forming bar (not committed)."""
+        return self._step(bar)[0]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "last_ts": self.last_ts,
+            "last_bar": self.last_bar,
+            "prev_close": self.prev_close,
+            "ema_200": self.ema_200,
+            "ema_fast": self.ema_fast,
+            "ema_slow": self.ema_slow,
+            "signal": self.signal,
+            "atr": self.atr,
+            "gains": self.gains.snapshot(),
+            "losses": self.losses.snapshot(),
+            "volume": self.volume.snapshot(),
+            "tail": [[ts, [row[c] for c in COLUMNS]] for ts, row in self.tail],
+        }
+
+    @classmethod
+    def restore(cls, data):
+        s = cls()
+        for field in ("count", "last_ts", "last_bar", "prev_close", "ema_200", "ema_fast", "ema_slow", "signal", "atr"):
+            setattr(s, field, data[field])
+        s.gains = _RollingMean.restore(RSI_PERIOD, data["gains"])
+        s.losses = _RollingMean.restore(RSI_PERIOD, data["losses"])
+        s.volume = _RollingMean.restore(VOL_MA_PERIOD, data["volume"])
+        s.tail.extend((ts, dict(zip(COLUMNS, values))) for ts, values in data["tail"])
+        return s
+
+
+def _df_bars(df):
+    """DataFrame (scanner.bars_to_df layout) -> float64 OHLCV array with ms timestamps."""
+    bars = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64, copy=True)
+    bars[:, 0] = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    return bars
+
+
+class IndicatorEngine:
+    """
+    States keyed by (symbol, timeframe). analyze() takes the scan DataFrame, commits
+    any closed bars the state has not seen (normally 0-1 per cycle) and evaluates the
+    last row as the forming bar. A gap, a reordered feed, a last bar that differs from the
+    frame's (another venue) or a missing state reseeds from the DataFrame, which reproduces
+    the full recompute.
+    """
+    def __init__(self, client=None, key=f"{STATE_KEY}:{STATE_ROLE}"):
+        self.client = client
+        self.key = key
+        self.states = {}
+        self.seeds = 0
+        self.updates = 0
+
+    def seed(self, symbol, timeframe, bars):
+        state = IndicatorState()
+        for bar in bars:
+            state.update(bar)
+        self.states[(symbol, timeframe)] = state
+        self.seeds += 1
+        return state
+
+    def on_closed(self, symbol, timeframe, bar):
+        """Single closed candle (e.g. from the candle_closed channel)."""
+        state = self.states.get((symbol, timeframe))
+        if state is None:
+            return None
+        if state.last_ts is not None and int(bar[0]) != state.last_ts + timeframe_ms(timeframe):
+            if int(bar[0]) > state.last_ts:
+                del self.states[(symbol, timeframe)]  # Gap: next analyze() reseeds
+            return None
+        self.updates += 1
+        return state.update(bar)
+
+    def _sync(self, symbol, timeframe, closed):
+        state = self.states.get((symbol, timeframe))
+        if state is None or state.last_ts is None or not len(closed):
+            return self.seed(symbol, timeframe, closed)
+
+        step = timeframe_ms(timeframe)
+        ts = closed[:, 0]
+        start = int(np.searchsorted(ts, state.last_ts, side='right'))
+        known = (start > 0 and ts[start - 1] == state.last_ts
+                 and np.allclose(closed[start - 1, 1:6], state.last_bar, rtol=1e-9, atol=0.0))
+        if not known or (start < len(closed) and ts[start] != state.last_ts + step):
+            return self.seed(symbol, timeframe, closed)
+
+        for bar in closed[start:]:
+            state.update(bar)
+            self.updates += 1
+        return state
+
+    def evaluate(self, bars, symbol, timeframe):
+        """
+        V8300: Indicator rows (COLUMNS dicts) for the last min(len(bars), TAIL+1) bars of a
+        float64 OHLCV array; the last row is the forming bar. No DataFrame involved.
+        """
+        state = self._sync(symbol, timeframe, bars[:-1])
+        live = state.peek(bars[-1])
+        n = len(bars)
+        tail = list(state.tail)[-(n - 1):] if n > 1 else []
+        return [row for _, row in tail] + [live]
+
+    def analyze(self, df, symbol, timeframe):
+        """
+        Same dict as scanner.analyze_market (None on the same conditions). Writes the
+        indicator columns for the last TAIL+1 rows so the confluence helpers keep working.
+        """
+        rows = self.evaluate(_df_bars(df), symbol, timeframe)
+        live = rows[-1]
+
+        n = len(df)
+        for col in COLUMNS:
+            values = np.full(n, np.nan)
+            values[n - len(rows):] = [row[col] for row in rows]
+            df[col] = values
+
+        if math.isnan(live['RSI']) or math.isnan(live['EMA_200']):
+            return None
+
+        latest = df.iloc[-1]
+        return {
+            'timestamp': latest['timestamp'],
+            'symbol': symbol,
+            'price': latest['close'],
+            'rsi': live['RSI'],
+            'ema_200': live['EMA_200'],
+            'atr': live['ATR'],
+            'volume': latest['volume'],
+            'vol_ma': live['Vol_MA'],
+            'macd': live['MACD'],
+            'signal_line': live['Signal_Line'],
+            'histogram': live['Histogram']
+        }
+
+    def stats(self):
+        return {"states": len(self.states), "seeds": self.seeds, "updates": self.updates}
+
+    # --- Snapshot / restore ---
+
+    def snapshot(self):
+        return {
+            "version": STATE_VERSION,
+            "states": {f"{sym}|{tf}": s.snapshot() for (sym, tf), s in self.states.items()},
+        }
+
+    def restore(self, data):
+        if not data or data.get("version") != STATE_VERSION:
+            return 0
+        for key, snap in data["states"].items():
+            sym, tf = key.rsplit("|", 1)
+            self.states[(sym, tf)] = IndicatorState.restore(snap)
+        return len(data["states"])
+
+    def save(self):
+        """Persists all states to Redis (survives worker restarts; EMA200 stays warm)."""
+        if not self.client:
+            return False
+        try:
+            self.client.set(self.key, json.dumps(self.snapshot()))
+            return True
+        except Exception as e:
+            print(f"   [INDICATORS] State save failed: {e}")
+            return False
+
+    def load(self):
+        if not self.client:
+            return 0
+        try:
+            raw = self.client.get(self.key)
+            return self.restore(json.loads(raw)) if raw else 0
+        except Exception as e:
+            print(f"   [INDICATORS] State load failed: {e}")
+            return 0
+
+
+def _build_default_engine():
+    if os.getenv("INCREMENTAL_INDICATORS", "true").lower() == "false":
+        return None
+    client = None
+    try:
+        from redis_engine import redis_engine
+        client = redis_engine.client
+    except Exception as e:
+        print(f"   [INDICATORS] Redis unavailable ({e}). State kept in memory only.")
+    engine = IndicatorEngine(client)
+    restored = engine.load()
+    if restored:
+        print(f"   [INDICATORS] Restored {restored} indicator states.")
+    return engine
+
+
+# Singleton (None when disabled; analyze_market then recomputes from scratch)
+indicator_engine = _build_default_engine()
@@ -0,0 +1,126 @@
+"""
+COSMOS AI - Indicators
+Single implementation of RSI / EMA / MACD / ATR / SMA as NumPy kernels over
+contiguous float64 arrays, plus a pandas adapter (calculate_*) used by scanner,
+cosmos_oracle, cosmos_auditor and bootstrap_cosmos.
+
+Kernels work on the last axis, so a (symbols x bars) panel is one call
+(scanner.analyze_market_panel). They reproduce the previous pandas definitions:
+- RSI: SMA of gains/losses (rolling mean), first value at index period-1
+- EMA: ewm(adjust=False), seeded with the first value
+- ATR: Wilder smoothing (ewm alpha=1/period, adjust=False) of the true range
+
+The EMA/Wilder recursion runs as a numba kernel when numba is installed
+(kernels.ewm), otherwise through scipy's lfilter or a NumPy loop.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+import kernels # V8100: numba-compiled recursions when installed
+
+
+def _as_array(x):
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+# --- NumPy kernels ---
+
+def sma(x, period):
+    """Rolling mean; NaN for the first period-1 values (pandas rolling semantics)."""
+    x = _as_array(x)
+    out = np.full(x.shape, np.nan)
+    if period <= 0 or x.shape[-1] < period:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x, period, axis=-1)
+    out[..., period - 1:] = windows.sum(axis=-1) / period
+    return out
+
+
+def ewm(x, alpha):
+    """y[0] = x[0]; y[t] = alpha * x[t] + (1 - alpha) * y[t-1]  (ewm adjust=False)."""
+    x = _as_array(x)
+    if x.shape[-1] == 0:
+        return x.copy()
+    if kernels.USE_NUMBA:
+        return kernels.ewm(x, alpha)
+    if SCIPY_AVAILABLE:
+        y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=-1, zi=(1.0 - alpha) * x[..., :1])
+        return y
+    y = np.empty_like(x)
+    acc = x[..., 0]
+    for i in range(x.shape[-1]):
+        acc = alpha * x[..., i] + (1.0 - alpha) * acc
+        y[..., i] = acc
+    return y
+
+
+def ema(x, period):
+    return ewm(x, 2.0 / (period + 1.0))
+
+
+def rsi(close, period=14):
+    close = _as_array(close)
+    delta = np.zeros_like(close)  # pandas where(delta > 0, 0) maps the leading NaN to 0
+    delta[..., 1:] = np.diff(close, axis=-1)
+    gain = sma(np.where(delta > 0, delta, 0.0), period)
+    loss = sma(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100.0 - (100.0 / (1.0 + rs))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd_line, signal_line, histogram)."""
+    close = _as_array(close)
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def true_range(high, low, close):
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    tr = high - low
+    if tr.shape[-1] > 1:
+        prev = close[..., :-1]
+        tr[..., 1:] = np.maximum(tr[..., 1:], np.maximum(np.abs(high[..., 1:] - prev), np.abs(low[..., 1:] - prev)))
+    return tr
+
+
+def atr(high, low, close, period=14):
+    """Wilder ATR (the scanner's definition, which the stored atr_value features use)."""
+    return ewm(true_range(high, low, close), 1.0 / period)
+
+
+def atr_sma(high, low, close, period=14):
+    """Simple-average ATR (previous cosmos_oracle / bootstrap_cosmos definition)."""
+    return sma(true_range(high, low, close), period)
+
+
+# --- pandas adapter (same signatures the modules used before) ---
+
+def calculate_rsi(series, period=14):
+    return pd.Series(rsi(series.to_numpy(), period), index=series.index)
+
+
+def calculate_ema(series, period=200):
+    return pd.Series(ema(series.to_numpy(), period), index=series.index)
+
+
+def calculate_macd(series, fast=12, slow=26, signal=9):
+    line, sig, hist = macd(series.to_numpy(), fast, slow, signal)
+    idx = series.index
+    return pd.Series(line, index=idx), pd.Series(sig, index=idx), pd.Series(hist, index=idx)
+
+
+def calculate_atr(df, period=14):
+    return pd.Series(atr(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), period), index=df.index)
+
+
+def calculate_sma(series, period):
+    return pd.Series(sma(series.to_numpy(), period), index=series.index)
@@ -0,0 +1,241 @@
+"""
+COSMOS AI - Instrument Registry
+One table, built from the cached ccxt markets, that answers every symbol
+question with a dict lookup: canonical pair (BTC/USDT) -> Binance USD-M
+symbol, Kraken symbol, base/quote, tick size, lot size, minimum quantity,
+minimum notional and contract type. Replaces the per-call string munging
+(/USDT -> /USD, appending :USDT) and markets scans on the hot path, and rounds
+order quantities/prices to the venue's steps before they are sent.
+
+The table is rebuilt only when the markets behind it change (a new markets
+cache file, or new markets on an attached exchange).
+"""
+import time
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+
+import ccxt
+
+from markets_cache import markets_cache
+
+BINANCE_KEY = "binance-swap"   # markets_cache key of BinanceTrader / the APIs (defaultType swap)
+KRAKEN_KEY = "kraken-spot"     # markets_cache key of the Kraken fallback
+CHECK_INTERVAL = 60            # Seconds between checks for refreshed markets on the hit path
+
+LINEAR_PERPETUAL, SPOT = "linear_perpetual", "spot"
+
+
+class Instrument:
+    __slots__ = ("symbol", "base", "quote", "binance", "binance_id", "kraken", "contract_type",
+                 "contract_size", "tick_size", "lot_size", "min_qty", "min_notional")
+
+    def __init__(self, symbol, base, quote, binance, binance_id, kraken=None, contract_type=LINEAR_PERPETUAL,
+                 contract_size=1.0, tick_size=None, lot_size=None, min_qty=None, min_notional=None):
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.binance = binance
+        self.binance_id = binance_id
+        self.kraken = kraken
+        self.contract_type = contract_type
+        self.contract_size = contract_size
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.min_qty = min_qty
+        self.min_notional = min_notional
+
+    def __repr__(self):
+        return f"Instrument({self.symbol} -> {self.binance}, tick={self.tick_size}, lot={self.lot_size})"
+
+
+def _to_step(value, step, rounding):
+    """Rounds to a multiple of `step`; returned as a plain decimal string like ccxt's *_to_precision."""
+    value = Decimal(str(value))
+    if step:
+        step = Decimal(str(step))
+        value = (value / step).to_integral_value(rounding) * step
+    text = format(value, 'f')
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+def _contract_type(market):
+    if market.get('spot'):
+        return SPOT
+    if market.get('swap') and market.get('linear'):
+        return LINEAR_PERPETUAL
+    return None  # Inverse and dated contracts are not traded here
+
+
+def _step(market, field, precision_mode):
+    value = (market.get('precision') or {}).get(field)
+    if value is None:
+        return None
+    return 10 ** -int(value) if precision_mode == ccxt.DECIMAL_PLACES else float(value)
+
+
+def legacy_kraken_symbol(symbol):
+    """Pre-registry mapping (BTC/USDT -> BTC/USD), used until markets are loaded."""
+    return symbol.replace("/USDT", "/USD") if symbol else symbol
+
+
+class InstrumentRegistry:
+    def __init__(self, cache=markets_cache, binance_key=BINANCE_KEY, kraken_key=KRAKEN_KEY,
+                 check_interval=CHECK_INTERVAL, precision_mode=ccxt.TICK_SIZE):
+        self.cache = cache
+        self.binance_key = binance_key
+        self.kraken_key = kraken_key
+        self.check_interval = check_interval
+        self.precision_mode = precision_mode   # Binance and Kraken both report steps (TICK_SIZE)
+        self._exchanges = (None, None)
+        self._sources = (None, None)
+        self._by_symbol = {}      # Canonical symbol -> Instrument
+        self._aliases = {}        # Any accepted spelling -> Instrument
+        self._kraken_loaded = False
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.builds = 0
+        self.misses = 0
+
+    # --- Building ---
+
+    def attach(self, binance=None, kraken=None):
+        """Exchanges used when the markets cache has no file (e.g. read-only disk)."""
+        self._exchanges = (binance, kraken)
+        self.sync(force=True)
+
+    def _current_sources(self):
+        sources = []
+        for key, exchange in zip((self.binance_key, self.kraken_key), self._exchanges):
+            envelope = self.cache.read(key) if self.cache else None
+            if envelope:
+                sources.append(envelope["markets"])
+            elif exchange is not None and exchange.markets:
+                sources.append(exchange.markets)
+            else:
+                sources.append(None)
+        return tuple(sources)
+
+    def sync(self, force=False):
+        """Rebuilds when the markets behind the table changed. Cheap when they did not."""
+        now = time.time()
+        if not force and now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        sources = self._current_sources()
+        if all(a is b for a, b in zip(sources, self._sources)):
+            return False
+        binance, kraken = sources
+        self.load(binance.values() if isinstance(binance, dict) else binance or [],
+                  kraken.values() if isinstance(kraken, dict) else kraken or [])
+        self._sources = sources
+        return True
+
+    def load(self, binance_markets, kraken_markets=()):
+        """Builds the table from ccxt market structures (the linear perpetual wins over spot)."""
+        kraken_symbols = {m['symbol'] for m in kraken_markets if m.get('active') is not False}
+        by_symbol, aliases = {}, {}
+        for market in binance_markets:
+            kind = _contract_type(market)
+            if kind is None or market.get('active') is False:
+                continue
+            base, quote = market['base'], market['quote']
+            symbol = f"{base}/{quote}"
+            current = by_symbol.get(symbol)
+            if current is not None and current.contract_type == LINEAR_PERPETUAL:
+                continue
+            limits = market.get('limits') or {}
+            kraken = next((k for k in (f"{base}/USD", f"{base}/{quote}") if k in kraken_symbols), None)
+            by_symbol[symbol] = Instrument(
+                symbol, base, quote, market['symbol'], market['id'], kraken=kraken, contract_type=kind,
+                contract_size=float(market.get('contractSize') or 1.0),
+                tick_size=_step(market, 'price', self.precision_mode),
+                lot_size=_step(market, 'amount', self.precision_mode),
+                min_qty=(limits.get('amount') or {}).get('min'),
+                min_notional=(limits.get('cost') or {}).get('min'),
+            )
+        for inst in by_symbol.values():
+            for alias in (f"{inst.base}/USD", inst.binance_id.lower(), inst.binance_id, inst.binance):
+                aliases.setdefault(alias, inst)
+        aliases.update(by_symbol)  # A canonical symbol always resolves to itself
+
+        with self._lock:
+            self._by_symbol, self._aliases = by_symbol, aliases
+            self._kraken_loaded = bool(kraken_symbols)
+        self.builds += 1
+        print(f"   [INSTRUMENTS] {len(by_symbol)} instruments loaded (kraken pairs: {len(kraken_symbols)})")
+
+    # --- Lookups ---
+
+    def get(self, symbol):
+        """Instrument for BTC/USDT, BTC/USDT:USDT, BTC/USD, BTCUSDT or btcusdt; None if unlisted."""
+        self.sync()
+        inst = self._aliases.get(symbol)
+        if inst is None and symbol:
+            self.misses += 1
+            if self.sync(force=time.time() - self._checked > 1.0):  # Markets may have just been loaded
+                inst = self._aliases.get(symbol)
+        return inst
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def symbols(self):
+        self.sync()
+        return list(self._by_symbol)
+
+    def binance_symbol(self, symbol):
+        """Binance USD-M symbol (BTC/USDT -> BTC/USDT:USDT); unchanged when unknown."""
+        inst = self.get(symbol)
+        return inst.binance if inst else symbol
+
+    def kraken_symbol(self, symbol):
+        """Kraken symbol (BTC/USDT -> BTC/USD). None when Kraken's markets are loaded and lack the pair."""
+        inst = self.get(symbol)
+        if inst is None or not self._kraken_loaded:
+            return legacy_kraken_symbol(symbol)
+        return inst.kraken
+
+    def base(self, symbol):
+        """BTC/USDT -> BTC"""
+        inst = self.get(symbol)
+        return inst.base if inst else symbol.split('/')[0]
+
+    # --- Precision and limits ---
+
+    def _require(self, symbol):
+        inst = self.get(symbol)
+        if inst is None:
+            raise ccxt.BadSymbol(f"No instrument for {symbol}")
+        return inst
+
+    def round_amount(self, symbol, amount):
+        """Quantity truncated to the lot size (never rounds up past the intended risk)."""
+        return _to_step(amount, self._require(symbol).lot_size, ROUND_DOWN)
+
+    def round_price(self, symbol, price):
+        """Price rounded to the nearest tick."""
+        return _to_step(price, self._require(symbol).tick_size, ROUND_HALF_UP)
+
+    def order_amount(self, symbol, amount, price=None):
+        """
+        Rounded quantity, or None when it falls below the minimum quantity, or below the
+        minimum notional at `price` (when given). The exchange would reject those orders.
+        """
+        inst = self._require(symbol)
+        qty = self.round_amount(symbol, amount)
+        if float(qty) <= 0 or (inst.min_qty and float(qty) < inst.min_qty):
+            print(f"   [INSTRUMENTS] {symbol}: {amount} rounds to {qty}, below min qty {inst.min_qty}")
+            return None
+        if price and inst.min_notional and float(qty) * price * inst.contract_size < inst.min_notional:
+            print(f"   [INSTRUMENTS] {symbol}: notional {float(qty) * price:.2f} below min {inst.min_notional}")
+            return None
+        return qty
+
+    def stats(self):
+        return {"instruments": len(self._by_symbol), "builds": self.builds, "misses": self.misses}
+
+
+# Singleton shared by BinanceTrader, MarketGateway, book_keeper, the workers and the APIs
+instrument_registry = InstrumentRegistry()
@@ -0,0 +1,255 @@
+"""
+COSMOS AI - Numeric Kernels
+Sequential per-bar loops compiled with numba when it is installed (V8100), with
+pure-NumPy fallbacks picked automatically otherwise. Both paths return the same
+values; the loops below are plain Python, so they also serve as the reference.
+
+- ewm:               y[t] = alpha * x[t] + (1 - alpha) * y[t-1]  (EMA / Wilder smoothing)
+- structure_series:  scanner.check_market_structure for every bar (1 / -1 / 0)
+- divergence_series: scanner.check_rsi_divergence for every bar (1 / -1 / 0)
+- order_blocks:      smc_engine.ob_series in one pass (running nearest candidate)
+- structure_stops:   paper_trader's structure trailing stop replayed bar by bar
+
+Compiled kernels are cached on disk (numba cache=True), so only the first start
+after an install pays the compilation. COSMOS_NO_JIT=1 forces the NumPy path.
+"""
+import os
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+USE_NUMBA = NUMBA_AVAILABLE and os.getenv("COSMOS_NO_JIT") != "1"
+
+BULLISH, BEARISH, NEUTRAL = 1, -1, 0
+
+
+def _as_array(x):
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _compile(fn):
+    return njit(cache=True, nogil=True, error_model='numpy')(fn) if NUMBA_AVAILABLE else None
+
+
+# --- Loops (compiled by numba; run as Python they are the reference implementation) ---
+
+def _ewm_loop(x, alpha, out):
+    """x, out: (rows, bars)."""
+    for r in range(x.shape[0]):
+        acc = x[r, 0]
+        for i in range(x.shape[1]):
+            acc = alpha * x[r, i] + (1.0 - alpha) * acc
+            out[r, i] = acc
+
+
+def _structure_loop(close, high, low, lookback, out):
+    """Close vs the high/low range of the previous lookback-1 bars."""
+    for t in range(len(close)):
+        lo = max(0, t - lookback + 1)
+        if lo >= t:
+            out[t] = 0
+            continue
+        highest, lowest = high[lo], low[lo]
+        for j in range(lo + 1, t):
+            highest = max(highest, high[j])
+            lowest = min(lowest, low[j])
+        out[t] = 1 if close[t] > highest else (-1 if close[t] < lowest else 0)
+
+
+def _divergence_loop(close, rsi, lookback, out):
+    """RSI at the window's lowest (highest) close vs the current RSI; first occurrence like idxmin."""
+    for t in range(len(close)):
+        out[t] = 0
+        lo = t - lookback + 1
+        if lo < 0:
+            continue
+        if rsi[t] < 35:
+            i = lo
+            for j in range(lo + 1, t):
+                if close[j] < close[i]:
+                    i = j
+            if close[t] < close[i] and rsi[t] > rsi[i]:
+                out[t] = 1
+        if rsi[t] > 65:
+            i = lo
+            for j in range(lo + 1, t):
+                if close[j] > close[i]:
+                    i = j
+            if close[t] > close[i] and rsi[t] < rsi[i]:
+                out[t] = -1
+
+
+def _order_block_loop(open_, high, low, close, lookback, max_distance, bullish, bearish):
+    """Breakout of the previous `lookback` bars with a counter candle (bars 1..t-1) within max_distance."""
+    n = len(close)
+    bear_low = -np.inf   # Highest low of the bearish candles seen so far (nearest below a breakout)
+    bull_high = np.inf   # Lowest high of the bullish candles seen so far
+    for t in range(n):
+        if t >= 4:
+            lo = max(0, t - lookback)
+            prev_high, prev_low = -np.inf, np.inf
+            for j in range(lo, t):
+                prev_high = max(prev_high, high[j])
+                prev_low = min(prev_low, low[j])
+            bullish[t] = close[t] > prev_high and (close[t] - bear_low) / close[t] < max_distance
+            bearish[t] = close[t] < prev_low and (bull_high - close[t]) / close[t] < max_distance
+        if t >= 1:
+            if close[t] < open_[t]:
+                bear_low = max(bear_low, low[t])
+            elif close[t] > open_[t]:
+                bull_high = min(bull_high, high[t])
+
+
+def _structure_stop_loop(low, entry, current_sl, is_long, window, buffer, out):
+    """Stop after each bar: lowest low of the previous `window` bars -/+ buffer, only ever tightened past entry."""
+    sl = current_sl
+    for t in range(window, len(low)):
+        support = low[t - window]
+        for j in range(t - window + 1, t):
+            support = min(support, low[j])
+        if is_long:
+            new_sl = support * (1.0 - buffer)
+            if new_sl > sl and new_sl > entry:
+                sl = new_sl
+        else:
+            new_sl = support * (1.0 + buffer)
+            if (sl == 0 or new_sl < sl) and new_sl < entry:
+                sl = new_sl
+        out[t] = sl
+    out[:min(window, len(low))] = current_sl
+
+
+_ewm_jit = _compile(_ewm_loop)
+_structure_jit = _compile(_structure_loop)
+_divergence_jit = _compile(_divergence_loop)
+_order_block_jit = _compile(_order_block_loop)
+_structure_stop_jit = _compile(_structure_stop_loop)
+
+
+# --- NumPy fallbacks ---
+
+def _previous_window(x, width, fn, fill):
+    """fn over x[t-width : t] for every t (current bar excluded; padded at the start with `fill`)."""
+    padded = np.concatenate([np.full(width, fill), x])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, width)
+    return fn(windows[:len(x)], axis=-1)
+
+
+def _ewm_numpy(x, alpha, out):
+    acc = x[:, 0].copy()
+    for i in range(x.shape[1]):
+        acc = alpha * x[:, i] + (1.0 - alpha) * acc
+        out[:, i] = acc
+
+
+def _structure_numpy(close, high, low, lookback, out):
+    width = lookback - 1
+    if width < 1:
+        out[:] = 0
+        return
+    highest = _previous_window(high, width, np.max, -np.inf)
+    lowest = _previous_window(low, width, np.min, np.inf)
+    out[:] = np.where(close > highest, 1, np.where(close < lowest, -1, 0))
+    out[:1] = 0
+
+
+def _divergence_numpy(close, rsi, lookback, out):
+    out[:] = 0
+    n, width = len(close), lookback - 1
+    if n < lookback:
+        return
+    w_close = np.lib.stride_tricks.sliding_window_view(close[:-1], width)  # Window of bar t = row t - width
+    w_rsi = np.lib.stride_tricks.sliding_window_view(rsi[:-1], width)
+    rows = np.arange(len(w_close))
+    i_min, i_max = w_close.argmin(axis=1), w_close.argmax(axis=1)
+    c, r = close[width:], rsi[width:]
+    with np.errstate(invalid='ignore'):
+        bullish = (r < 35) & (c < w_close[rows, i_min]) & (r > w_rsi[rows, i_min])
+        bearish = (r > 65) & (c > w_close[rows, i_max]) & (r < w_rsi[rows, i_max])
+    out[width:] = np.where(bearish, -1, np.where(bullish, 1, 0))
+
+
+def _order_block_numpy(open_, high, low, close, lookback, max_distance, bullish, bearish):
+    from smc_engine import ob_series
+    bullish[:], bearish[:] = ob_series(open_, high, low, close, lookback, max_distance)
+
+
+def _structure_stop_numpy(low, entry, current_sl, is_long, window, buffer, out):
+    out[:] = current_sl
+    if len(low) <= window:
+        return
+    support = np.lib.stride_tricks.sliding_window_view(low[:-1], window).min(axis=1)  # Bars window..n-1
+    if is_long:
+        new_sl = support * (1.0 - buffer)
+        out[window:] = np.maximum(np.maximum.accumulate(np.where(new_sl > entry, new_sl, -np.inf)), current_sl)
+    else:
+        new_sl = support * (1.0 + buffer)
+        best = np.minimum.accumulate(np.where(new_sl < entry, new_sl, np.inf))
+        if current_sl != 0:
+            best = np.minimum(best, current_sl)
+        out[window:] = np.where(np.isinf(best), current_sl, best)
+
+
+# --- Public kernels ---
+
+def _pick(jit, numpy_fn, use_numba):
+    use = USE_NUMBA if use_numba is None else use_numba
+    return jit if use and jit is not None else numpy_fn
+
+
+def ewm(x, alpha, use_numba=None):
+    """EMA / Wilder smoothing along the last axis (adjust=False, seeded with the first value)."""
+    x = _as_array(x)
+    if x.shape[-1] == 0:
+        return x.copy()
+    rows = x.reshape(-1, x.shape[-1])
+    out = np.empty_like(rows)
+    _pick(_ewm_jit, _ewm_numpy, use_numba)(rows, float(alpha), out)
+    return out.reshape(x.shape)
+
+
+def structure_series(close, high, low, lookback=20, use_numba=None):
+    """int8 per bar: 1 breakout above / -1 breakdown below the previous lookback-1 bars, 0 otherwise."""
+    close, high, low = _as_array(close), _as_array(high), _as_array(low)
+    out = np.zeros(len(close), dtype=np.int8)
+    if len(close):
+        _pick(_structure_jit, _structure_numpy, use_numba)(close, high, low, int(lookback), out)
+    return out
+
+
+def divergence_series(close, rsi, lookback=10, use_numba=None):
+    """int8 per bar: 1 bullish / -1 bearish RSI divergence over the previous lookback-1 bars, 0 otherwise."""
+    close, rsi = _as_array(close), _as_array(rsi)
+    out = np.zeros(len(close), dtype=np.int8)
+    if len(close):
+        _pick(_divergence_jit, _divergence_numpy, use_numba)(close, rsi, int(lookback), out)
+    return out
+
+
+def order_blocks(open_, high, low, close, lookback=9, max_distance=0.05, use_numba=None):
+    """(bullish, bearish) order block flags per bar, as smc_engine.ob_series."""
+    open_, high, low, close = (_as_array(a) for a in (open_, high, low, close))
+    bullish = np.zeros(len(close), dtype=np.bool_)
+    bearish = np.zeros(len(close), dtype=np.bool_)
+    if len(close) >= 5:
+        _pick(_order_block_jit, _order_block_numpy, use_numba)(
+            open_, high, low, close, int(lookback), float(max_distance), bullish, bearish)
+    return bullish, bearish
+
+
+def structure_stops(low, entry, current_sl=0.0, is_long=True, window=5, buffer=0.002, use_numba=None):
+    """
+    Stop-loss level after each bar under paper_trader's structure trailing rule (lowest low of
+    the `window` bars before the current one, 0.2% buffer; current_sl 0 means no stop yet).
+    """
+    low = _as_array(low)
+    out = np.empty(len(low))
+    if len(low):
+        _pick(_structure_stop_jit, _structure_stop_numpy, use_numba)(
+            low, float(entry), float(current_sl), bool(is_long), int(window), float(buffer), out)
+    return out
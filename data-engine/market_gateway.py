@@ -0,0 +1,440 @@
+"""
+COSMOS AI - Market Data Gateway
+Fetches OHLCV frames, ticker and order book for the whole scan universe
+concurrently with ccxt.async_support (Kraken primary, Binance fallback).
+"""
+import os
+import time
+import asyncio
+import threading
+
+import ccxt
+import ccxt.async_support as ccxt_async
+
+from candle_cache import CandleCache
+from binance_engine import live_trader, proxy_config
+from candle_store import candle_store
+from shm_candles import shm_candles
+from book_store import book_store
+from resampler import resampler, BASE_SOURCE
+from rate_limiter import rate_limiter, endpoint_weight
+from markets_cache import markets_cache
+from instrument_registry import instrument_registry
+from provider_router import OPEN
+
+# Frames the worker loop needs per symbol: timeframe -> limit
+DEFAULT_FRAMES = {'5m': 100, '15m': 100, '4h': 50}
+DEFAULT_BOOK_LIMIT = 100  # Covers quant_engine (100) and analyze_quant_signal (top 50)
+
+MAX_CONCURRENCY = int(os.getenv("GATEWAY_MAX_CONCURRENCY", "16"))
+MAX_BUDGET_WAIT = float(os.getenv("GATEWAY_MAX_BUDGET_WAIT", "2.0"))  # Seconds before spilling to the next provider
+CYCLE_TIMEOUT = float(os.getenv("GATEWAY_CYCLE_TIMEOUT", "45"))
+
+# Request weights, mirroring ccxt's cost tables (Binance USDT-M / Kraken public)
+# Binance entries are (max_limit, weight) pairs; None = any limit above the previous row
+REQUEST_WEIGHTS = {
+    'binance': {
+        'ohlcv': [(99, 1), (499, 2), (1000, 5), (None, 10)],
+        'order_book': [(50, 2), (100, 5), (500, 10), (None, 20)],
+        'ticker': 1,
+    },
+    'kraken': {
+        'ohlcv': 1.2,
+        'order_book': 1.2,
+        'ticker': 1,
+    },
+}
+
+# Per-exchange budgets: (capacity, refill per second) in weight units
+DEFAULT_BUDGETS = {
+    'binance': (float(os.getenv("GATEWAY_BINANCE_WEIGHT", "1200")), float(os.getenv("GATEWAY_BINANCE_WEIGHT", "1200")) / 60),
+    'kraken': (float(os.getenv("GATEWAY_KRAKEN_BURST", "15")), float(os.getenv("GATEWAY_KRAKEN_RATE", "1.0"))),
+}
+
+
+# V7200: Shared (cross-process) bucket each gateway source spends from
+SHARED_BUCKETS = {'binance': 'binance_futures', 'kraken': 'kraken'}
+
+
+def request_weight(source, kind, limit=None):
+    """Weight of a single request against the exchange budget."""
+    cost = REQUEST_WEIGHTS[source][kind]
+    if not isinstance(cost, list):
+        return cost
+    for max_limit, weight in cost:
+        if max_limit is None or (limit or 0) <= max_limit:
+            return weight
+    return cost[-1][1]
+
+
+class WeightBudget:
+    """
+    Token bucket in request-weight units. Lives on the gateway event loop,
+    so no locking is needed between coroutines.
+    """
+    def __init__(self, name, capacity, refill_per_sec):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self.spent = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def wait_time(self, weight):
+        """Seconds until `weight` could be spent."""
+        self._refill()
+        weight = min(weight, self.capacity)
+        if self.tokens >= weight:
+            return 0.0
+        return (weight - self.tokens) / self.refill_per_sec
+
+    async def acquire(self, weight):
+        weight = min(weight, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= weight:
+                self.tokens -= weight
+                self.spent += weight
+                return
+            await asyncio.sleep((weight - self.tokens) / self.refill_per_sec)
+
+    def remaining(self):
+        self._refill()
+        return round(self.tokens, 2)
+
+
+class MarketGateway:
+    def __init__(self, candle_cache=None, max_concurrency=MAX_CONCURRENCY, budgets=None,
+                 max_budget_wait=MAX_BUDGET_WAIT, providers=('kraken', 'binance'), candle_store=None,
+                 book_store=None, resampler=None, rate_limiter=None, router=None, shm_candles=None):
+        self.candle_cache = candle_cache or CandleCache()
+        self.candle_store = candle_store  # V6400: Stream-built candles (candle_builder.py) skip REST entirely
+        self.shm_candles = shm_candles    # V8200: Same candles from shared memory (producer on this host)
+        self.book_store = book_store      # V6500: Local L2 replica (book_keeper.py) skips the REST book
+        self.resampler = resampler        # V6900: 5m/15m/1h/4h derived from one 1m base per symbol
+        self.rate_limiter = rate_limiter  # V7200: Redis-shared budget on top of the local one (scan lane)
+        self.router = router              # V7300: Provider health shared with the sync BinanceTrader path
+        self.max_concurrency = max_concurrency
+        self.max_budget_wait = max_budget_wait
+        self.providers = list(providers)
+        self.proxy = os.getenv("BINANCE_PROXY")
+
+        budgets = budgets or DEFAULT_BUDGETS
+        self.budgets = {name: WeightBudget(name, cap, rate) for name, (cap, rate) in budgets.items()}
+
+        # Async clients are bound to the gateway loop, which runs in its own daemon thread
+        self._exchanges = {}
+        self._market_locks = {}
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self.requests = {name: 0 for name in self.budgets}
+        self.last_cycle = {}
+
+    # --- Event loop ---
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="market-gateway", daemon=True)
+            thread.start()
+            self._loop, self._thread = loop, thread
+            return loop
+
+    def _run(self, coro, timeout):
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(timeout)
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            self._run(self._close_exchanges(), timeout=10)
+        except Exception as e:
+            print(f"   [GATEWAY] Close error: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _close_exchanges(self):
+        for ex in self._exchanges.values():
+            try:
+                await ex.close()
+            except Exception:
+                pass
+        self._exchanges = {}
+
+    # --- Exchanges ---
+
+    def _create_exchange(self, source):
+        # ccxt's own throttler is off: WeightBudget is the single source of pacing
+        if source == 'kraken':
+            return ccxt_async.kraken({'enableRateLimit': False})
+        config = {
+            'enableRateLimit': False,
+            'options': {'defaultType': 'swap'}  # V600: Same market type as BinanceTrader
+        }
+        config.update(proxy_config(self.proxy))  # Same routing as BinanceTrader
+        return ccxt_async.binance(config)
+
+    async def _exchange(self, source):
+        ex = self._exchanges.get(source)
+        if ex is None:
+            ex = self._exchanges[source] = self._create_exchange(source)
+        if not ex.markets:
+            lock = self._market_locks.setdefault(source, asyncio.Lock())
+            async with lock:
+                # V7400: Hydrated from the markets cache file; the sync BinanceTrader path refreshes it
+                if not ex.markets and not markets_cache.hydrate(ex, refresh_stale=False):
+                    await ex.load_markets()
+                    markets_cache.write(ex)
+        return ex
+
+    def _map_symbol(self, source, ex, symbol):
+        """BTC/USDT -> BTC/USD on Kraken, BTC/USDT:USDT on Binance Futures (V7700: instrument registry)."""
+        if source == 'kraken':
+            mapped = instrument_registry.kraken_symbol(symbol)
+        else:
+            mapped = instrument_registry.binance_symbol(symbol)
+            if mapped not in ex.markets:
+                mapped = f"{symbol}:USDT"  # Registry not built yet (no markets cache file)
+        if mapped not in ex.markets:
+            raise ccxt.BadSymbol(f"{source} has no market {mapped}")
+        return mapped
+
+    def _route(self, kind, limit=None):
+        """
+        Provider order: Kraken first unless its budget would stall us past max_budget_wait.
+        V7300: With a router, the base order comes from provider health and open circuits are skipped.
+        """
+        order = [p for p in self.providers if p in self.budgets]
+        if self.router:
+            order = self.router.order(kind, order) or order
+        primary = order[0]
+        if len(order) > 1 and self.budgets[primary].wait_time(request_weight(primary, kind, limit)) > self.max_budget_wait:
+            order = order[1:] + [primary]
+        return order
+
+    async def _request(self, source, kind, method, symbol, limit=None, **kwargs):
+        ex = await self._exchange(source)
+        mapped = self._map_symbol(source, ex, symbol)
+        await self.budgets[source].acquire(request_weight(source, kind, limit))
+        if self.rate_limiter:
+            bucket = SHARED_BUCKETS[source]
+            await self.rate_limiter.acquire_async(bucket, endpoint_weight(bucket, kind, limit), lane='scan')
+        async with self._semaphore:
+            self.requests[source] += 1
+            start = time.monotonic()
+            try:
+                if kind == 'ticker':
+                    result = await getattr(ex, method)(mapped)
+                else:
+                    result = await getattr(ex, method)(mapped, limit=limit, **kwargs)
+            except Exception:
+                if self.router:
+                    self.router.record(source, kind, time.monotonic() - start, False)
+                raise
+            if self.router:
+                self.router.record(source, kind, time.monotonic() - start, True)
+            return result
+
+    async def _with_fallback(self, kind, method, symbol, limit=None, **kwargs):
+        last_err = None
+        for source in self._route(kind, limit):
+            try:
+                return await self._request(source, kind, method, symbol, limit=limit, **kwargs), source
+            except Exception as e:
+                last_err = e
+        raise last_err
+
+    # --- Per-symbol fetches ---
+
+    async def _fetch_frame(self, symbol, timeframe, limit):
+        plan = self.candle_cache.plan(symbol, timeframe, limit)
+        if plan:
+            # V6200: Delta top-up from the provider that filled the buffer
+            source, since, delta_limit = plan
+            try:
+                bars = await self._request(source, 'ohlcv', 'fetch_ohlcv', symbol, limit=delta_limit,
+                                           timeframe=timeframe, since=since)
+                if self.candle_cache.merge(symbol, timeframe, bars):
+                    return self.candle_cache.read(symbol, timeframe, limit)
+            except Exception:
+                pass
+            self.candle_cache.invalidate(symbol, timeframe)
+
+        bars, source = await self._with_fallback('ohlcv', 'fetch_ohlcv', symbol, limit=limit, timeframe=timeframe)
+        if bars:
+            self.candle_cache.store(symbol, timeframe, bars, source)
+        return bars
+
+    async def _sync_base(self, symbol):
+        """
+        V6900: One 1m delta (or a capped, paged backfill) from the resampler's base source.
+        Skipped while the router holds its circuit open; frames then take the per-timeframe chain.
+        """
+        if self.router and self.router.state(BASE_SOURCE, 'ohlcv') == OPEN:
+            return False
+        for _ in range(2):
+            backfill, requests = self.resampler.plan(symbol)
+            bars = []
+            for since, limit in requests:
+                bars += await self._request(BASE_SOURCE, 'ohlcv', 'fetch_ohlcv', symbol, limit=limit,
+                                            timeframe='1m', since=since) or []
+            if self.resampler.apply(symbol, bars, backfill=backfill):
+                return True
+        return False
+
+    async def _fetch_symbol(self, symbol, frames, with_ticker, book_limit):
+        bundle = {'frames': {}, 'ticker': None, 'book': None, 'errors': {}}
+
+        async def frame(tf, limit):
+            try:
+                bundle['frames'][tf] = await self._fetch_frame(symbol, tf, limit)
+            except Exception as e:
+                bundle['errors'][tf] = str(e)
+
+        resampled = {tf: limit for tf, limit in frames.items() if self.resampler and self.resampler.supports(tf, limit)}
+        frames = {tf: limit for tf, limit in frames.items() if tf not in resampled}
+
+        async def base():
+            try:
+                ok = await self._sync_base(symbol)
+            except Exception as e:
+                bundle['errors']['1m'] = str(e)
+                ok = False
+            for tf, limit in resampled.items():
+                bars = self.resampler.frame(symbol, tf, limit) if ok else None
+                if bars:
+                    bundle['frames'][tf] = bars
+                else:
+                    await frame(tf, limit)  # Per-timeframe request as before
+
+        async def ticker():
+            try:
+                bundle['ticker'], _ = await self._with_fallback('ticker', 'fetch_ticker', symbol)
+            except Exception as e:
+                bundle['errors']['ticker'] = str(e)
+
+        async def book():
+            try:
+                bundle['book'], _ = await self._with_fallback('order_book', 'fetch_order_book', symbol, limit=book_limit)
+            except Exception as e:
+                bundle['errors']['book'] = str(e)
+
+        jobs = [frame(tf, limit) for tf, limit in frames.items()]
+        if resampled:
+            jobs.append(base())
+        if with_ticker:
+            jobs.append(ticker())
+        if book_limit:
+            jobs.append(book())
+        await asyncio.gather(*jobs)
+        return bundle
+
+    async def _fetch_universe(self, plan, with_ticker, timeout):
+        """plan: {symbol: (frames, book_limit)} with stream-served parts already removed."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        tasks = {asyncio.ensure_future(self._fetch_symbol(s, frames, with_ticker, book_limit)): s
+                 for s, (frames, book_limit) in plan.items()}
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        bundles = {}
+        for task in done:
+            try:
+                bundles[tasks[task]] = task.result()
+            except Exception as e:
+                print(f"   [GATEWAY] {tasks[task]} failed: {e}")
+        return bundles, len(pending)
+
+    def fetch_universe(self, symbols, frames=None, with_ticker=True, book_limit=DEFAULT_BOOK_LIMIT, timeout=CYCLE_TIMEOUT):
+        """
+        Fetches every symbol concurrently and returns
+        {symbol: {'frames': {tf: ohlcv_list}, 'ticker': dict, 'book': dict, 'errors': {...}}}.
+        Symbols that time out are left out; callers fall back to the sync BinanceTrader path.
+        """
+        frames = frames or DEFAULT_FRAMES
+        start = time.time()
+        requests_before = dict(self.requests)
+
+        # V6400/V6500: Frames and books the stream services already hold in Redis are not requested over REST
+        streamed = self._read_stream_frames(symbols, frames)
+        books = self._read_stream_books(symbols, book_limit)
+        plan = {
+            s: ({tf: limit for tf, limit in frames.items() if tf not in streamed.get(s, {})},
+                0 if s in books else book_limit)
+            for s in symbols
+        }
+        try:
+            bundles, timed_out = self._run(self._fetch_universe(plan, with_ticker, timeout), timeout + 5)
+        except Exception as e:
+            print(f"   [GATEWAY] Universe fetch failed: {e}")
+            bundles, timed_out = {}, len(symbols)
+        for symbol, bundle in bundles.items():
+            bundle['frames'].update(streamed.get(symbol, {}))
+            if symbol in books:
+                bundle['book'] = books[symbol]
+
+        self.last_cycle = {
+            "symbols": len(bundles),
+            "timed_out": timed_out,
+            "elapsed_ms": round((time.time() - start) * 1000, 1),
+            "requests": {k: self.requests[k] - requests_before.get(k, 0) for k in self.requests},
+            "errors": sum(len(b['errors']) for b in bundles.values()),
+            "stream_frames": sum(len(f) for f in streamed.values()),
+            "stream_books": len(books),
+        }
+        return bundles
+
+    def _read_stream_books(self, symbols, book_limit):
+        if not self.book_store or not book_limit:
+            return {}
+        books = {}
+        for symbol in symbols:
+            book = self.book_store.read(symbol, limit=book_limit)
+            if book:
+                books[symbol] = book
+        return books
+
+    def _read_stream_frames(self, symbols, frames):
+        if not self.candle_store and not self.shm_candles:
+            return {}
+        streamed = {}
+        for symbol in symbols:
+            for tf, limit in frames.items():
+                bars = self.shm_candles.read(symbol, tf, limit) if self.shm_candles else None
+                if not bars and self.candle_store:
+                    bars = self.candle_store.read(symbol, tf, limit)
+                if bars:
+                    streamed.setdefault(symbol, {})[tf] = bars
+        return streamed
+
+    def stats(self):
+        return {
+            **self.last_cycle,
+            "budget_remaining": {name: b.remaining() for name, b in self.budgets.items()},
+            **({"resampler": self.resampler.stats()} if self.resampler else {}),
+            **({"shared_budget": self.rate_limiter.stats()} if self.rate_limiter else {}),
+            **({"providers": self.router.stats()} if self.router else {}),
+        }
+
+
+# Singleton shared by scanner.main and cosmos_worker.main_loop
+# Sharing BinanceTrader's candle cache keeps the sync fetch_data() fallback warm too
+market_gateway = MarketGateway(candle_cache=live_trader.candle_cache, candle_store=candle_store, book_store=book_store,
+                               resampler=resampler, rate_limiter=rate_limiter, router=live_trader.router,
+                               shm_candles=shm_candles)
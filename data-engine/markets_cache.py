@@ -0,0 +1,136 @@
+"""
+COSMOS AI - Markets Cache
+ccxt load_markets() downloads megabytes of exchange metadata. Every process
+started by start_services.sh, and every per-request client in the APIs, used to
+pay for it. The loaded markets and currencies are kept on disk, one JSON file per
+(exchange, market type), and new ccxt instances are hydrated from that file with
+set_markets(). Stale files are still served while a background thread reloads them.
+
+{dir}/{exchange}-{type}.json   {"version", "ccxt", "fetched_at", "markets": [...], "currencies": {...}}
+"""
+import os
+import json
+import time
+import threading
+
+import ccxt
+
+CACHE_DIR = os.getenv("MARKETS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".markets_cache"))
+TTL = float(os.getenv("MARKETS_CACHE_TTL", "21600"))  # Seconds (6h); listings change rarely
+FORMAT_VERSION = 1                                    # Bump when the envelope layout changes
+
+
+class MarketsCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._envelopes = {}          # key -> (file mtime, envelope); parsed once per process
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.downloads = 0
+        self.refreshes = 0
+
+    def key(self, exchange):
+        return f"{exchange.id}-{exchange.options.get('defaultType', 'spot')}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def read(self, key):
+        """Envelope for `key`, or None when missing, unreadable or stamped by another format/ccxt version."""
+        path = self._path(key)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._envelopes.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path) as f:
+                envelope = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"   [MARKETS] Unreadable cache {path}: {e}")
+            return None
+        if envelope.get("version") != FORMAT_VERSION or envelope.get("ccxt") != ccxt.__version__:
+            return None
+        with self._lock:
+            self._envelopes[key] = (mtime, envelope)
+        return envelope
+
+    def write(self, exchange):
+        """Stores the exchange's loaded markets (atomic replace, so readers never see a partial file)."""
+        key = self.key(exchange)
+        envelope = {
+            "version": FORMAT_VERSION,
+            "ccxt": ccxt.__version__,
+            "fetched_at": time.time(),
+            "markets": list(exchange.markets.values()),
+            "currencies": exchange.currencies or {},
+        }
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(envelope, f, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"   [MARKETS] Could not write {path}: {e}")
+
+    def hydrate(self, exchange, refresh_stale=True):
+        """
+        Fills an exchange from the cache file without any request. Returns False when there
+        is no usable file. A stale file is still used and reloaded in the background.
+        """
+        key = self.key(exchange)
+        envelope = self.read(key)
+        if not envelope:
+            return False
+        exchange.set_markets(envelope["markets"], envelope["currencies"] or None)
+        self.hits += 1
+        if refresh_stale and time.time() - envelope["fetched_at"] > self.ttl:
+            self.refresh_async(exchange)
+        return True
+
+    def load(self, exchange):
+        """Drop-in for exchange.load_markets(): memory, then the cache file, then the exchange."""
+        if exchange.markets:
+            return exchange.markets
+        if self.hydrate(exchange):
+            return exchange.markets
+        markets = exchange.load_markets()
+        self.downloads += 1
+        self.write(exchange)
+        return markets
+
+    def refresh_async(self, exchange):
+        key = self.key(exchange)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                exchange.load_markets(reload=True)
+                self.write(exchange)
+                self.refreshes += 1
+            except Exception as e:
+                print(f"   [MARKETS] Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"markets-refresh-{key}", daemon=True).start()
+
+    def stats(self):
+        return {"hits": self.hits, "downloads": self.downloads, "refreshes": self.refreshes}
+
+
+# Singleton shared by BinanceTrader, MarketGateway, the APIs and bootstrap scripts
+markets_cache = MarketsCache()
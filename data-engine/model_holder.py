@@ -0,0 +1,150 @@
+"""
+COSMOS AI - Model Holder
+Keeps the inference model resident in memory and hot-reloads it when the
+artifact on disk changes (force_retrain.py / brain.train()).
+"""
+import os
+import time
+import threading
+import warnings
+
+try:
+    import joblib
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    print("   [MODEL HOLDER] Warning: joblib not installed. Model hot-reload disabled.")
+    JOBLIB_AVAILABLE = False
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# V410: Same resolution order predict_success used on every call
+DEFAULT_MODEL_CANDIDATES = [
+    os.path.join(current_dir, "xgb_model.pkl"),      # Priority 1: force_retrain.py output
+    os.path.join(current_dir, "xgb_model_v4.pkl"),   # Priority 2: Legacy fallback
+    "xgb_model.pkl",                                 # Priority 3: Root fallback
+]
+
+
+def atomic_dump(obj, path):
+    """
+    Writes a joblib artifact via temp file + os.replace so readers in other
+    processes never deserialize a half-written model.
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class ModelHolder:
+    def __init__(self, candidates=None, check_interval=1.0):
+        self.candidates = DEFAULT_MODEL_CANDIDATES if candidates is None else candidates
+        self.check_interval = check_interval  # Seconds between stat() checks on the artifact
+
+        # (model, path, signature) swapped as a single reference so readers never see a mix
+        self._state = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+        # Metrics
+        self.load_count = 0
+        self.last_load_ms = 0.0
+        self.inference_count = 0
+        self.inference_total_us = 0.0
+        self.last_inference_us = 0.0
+
+    def _resolve_path(self):
+        for path in self.candidates:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _signature(self, path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Returns the resident model, reloading only if the artifact changed."""
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._last_check < self.check_interval:
+            return state[0]
+        self._last_check = now
+
+        path = self._resolve_path()
+        if path is None:
+            return state[0] if state else None
+
+        try:
+            sig = self._signature(path)
+        except OSError:
+            return state[0] if state else None
+
+        if state is not None and state[1] == path and state[2] == sig:
+            return state[0]
+
+        return self._load(path, sig)
+
+    def _load(self, path, sig):
+        if not JOBLIB_AVAILABLE:
+            return None
+
+        with self._lock:
+            # Another thread may have finished the same reload while we waited
+            state = self._state
+            if state is not None and state[1] == path and state[2] == sig:
+                return state[0]
+
+            try:
+                start = time.perf_counter()
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    model = joblib.load(path)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                # Keep serving the previous model; retry on the next check
+                print(f"   [BRAIN] Model reload failed for {path} ({e}). Keeping current model.")
+                return state[0] if state else None
+
+            self._state = (model, path, sig)
+            self.load_count += 1
+            self.last_load_ms = elapsed_ms
+            action = "Loaded" if state is None else "Hot-Reloaded"
+            print(f"   [BRAIN] {action} Neural Model from: {path} ({elapsed_ms:.1f} ms)")
+            return model
+
+    def publish(self, model, source="memory"):
+        """
+        Swaps in a model trained in-process (brain.train()).
+        The current artifact signature is recorded so only a newer write on disk replaces it.
+        """
+        path = self._resolve_path()
+        sig = None
+        if path is not None:
+            try:
+                sig = self._signature(path)
+            except OSError:
+                path = None
+        self._state = (model, path or source, sig)
+        print(f"   [BRAIN] Model swapped in from {source}.")
+
+    def record_inference(self, seconds, rows=1):
+        us = seconds * 1_000_000
+        self.inference_count += rows
+        self.inference_total_us += us
+        self.last_inference_us = us / max(rows, 1)
+
+    def stats(self):
+        state = self._state
+        avg_us = self.inference_total_us / self.inference_count if self.inference_count else 0.0
+        return {
+            "model_path": state[1] if state else None,
+            "load_count": self.load_count,
+            "last_load_ms": round(self.last_load_ms, 2),
+            "inference_count": self.inference_count,
+            "avg_inference_us": round(avg_us, 1),
+            "last_inference_us": round(self.last_inference_us, 1),
+        }
+
+
+# Singleton shared by every CosmosBrain caller in this process
+model_holder = ModelHolder()
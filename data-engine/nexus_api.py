@@ -14,6 +14,9 @@ from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 from pusher import Pusher
 from cosmos_agent import cosmos_agent
+from rate_limiter import rate_limiter, endpoint_weight # V7200: Shared exchange weight budget
+from markets_cache import markets_cache # V7400: Markets metadata without a per-request download
+from instrument_registry import instrument_registry # V7700: Lot/tick sizes and minimums
 
 # 1. Config & Security
 load_dotenv()
@@ -206,10 +209,18 @@ async def execute_trade(req: TradeRequest):
         if restrictions.get('enableWithdrawals') is True:
             raise PermissionError("Withdrawals Enabled - Safety Abort")
 
-        exchange.load_markets()
+        # V7200: Reserve the whole trade's weight on the execution lane (preempts scanning)
+        orders = 1 + (req.stop_loss > 0) + (req.take_profit > 0)
+        await rate_limiter.acquire_async('binance_futures', endpoint_weight('binance_futures', 'ticker')
+                                         + orders * endpoint_weight('binance_futures', 'order'), lane='execution')
+        markets_cache.load(exchange)
+        instrument_registry.attach(exchange)  # Lot/tick sizes even when the cache file is unavailable
         price = exchange.fetch_ticker(req.symbol)['last']
         amount_coins = req.amount_usd / price
-        qty = exchange.amount_to_precision(req.symbol, amount_coins)
+        # V7700: Lot size, min qty and min notional checked here instead of by a rejected order
+        qty = instrument_registry.order_amount(req.symbol, amount_coins, price)
+        if qty is None:
+            raise ValueError(f"Order size {req.amount_usd} USD is below the minimum for {req.symbol}")
         
         order = exchange.create_market_order(req.symbol, req.side, qty)
         entry_price = float(order.get('average', price))
@@ -219,12 +230,12 @@ async def execute_trade(req: TradeRequest):
         sl_id, tp_id = None, None
         
         if req.stop_loss > 0:
-            sl_price = exchange.price_to_precision(req.symbol, req.stop_loss)
+            sl_price = instrument_registry.round_price(req.symbol, req.stop_loss)
             sl = exchange.create_order(req.symbol, 'STOP_MARKET', exit_side, qty, params={'stopPrice': sl_price, 'reduceOnly': True})
             sl_id = sl['id']
             
         if req.take_profit > 0:
-            tp_price = exchange.price_to_precision(req.symbol, req.take_profit)
+            tp_price = instrument_registry.round_price(req.symbol, req.take_profit)
             tp = exchange.create_order(req.symbol, 'TAKE_PROFIT_MARKET', exit_side, qty, params={'stopPrice': tp_price, 'reduceOnly': True})
             tp_id = tp['id']
 
@@ -17,6 +17,9 @@ from binance_engine import live_trader
 from db import log_error
 from supabase import create_client
 from pusher_client import pusher_client
+from book_store import book_store # V6500: Local L2 replica (book_keeper.py)
+import book_depth # V8400: Depth analytics (slippage curve)
+from book_depth import depth_cache
 
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -72,6 +75,23 @@ def validate_signal(data):
         
     return True, "OK"
 
+def cap_size_by_depth(symbol, side, usd_size):
+    """
+    V8400: Caps the order notional at what the visible book fills within MAX_SLIPPAGE
+    (VWAP vs the touch), read from the book's slippage curve.
+    """
+    try:
+        book = (book_store.read(symbol, limit=100) if book_store else None) or live_trader.fetch_order_book(symbol, limit=100)
+        if not book:
+            return usd_size
+        capacity = book_depth.max_notional(depth_cache.get(book, symbol), side, MAX_SLIPPAGE * 1e4)
+        if capacity < usd_size:
+            print(f"   [DEPTH] {symbol} book absorbs ${capacity:,.2f} within {MAX_SLIPPAGE*100:.2f}% slippage. Size capped.")
+            return capacity
+    except Exception as e:
+        print(f"   [DEPTH] Book check skipped: {e}")
+    return usd_size
+
 def handle_whale_defense(alert):
     """
     V4200: Autonomous Risk Mitigation
@@ -147,6 +167,10 @@ def main_loop():
             # Real logic: (Account * 0.05) * Leverage ?
             # Let's do $30 fixed for now.
             usd_size = 30.0 
+            usd_size = cap_size_by_depth(symbol, side, usd_size) # V8400
+            if usd_size < 10:
+                print(f"   [REJECT] Book too thin for a $10 order within {MAX_SLIPPAGE*100:.2f}% slippage")
+                continue
             amount = usd_size / float(data['price'])
             
             print(f"   [EXEC] Allocating ${usd_size} ({amount:.4f} coins)...")
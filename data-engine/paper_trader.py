@@ -9,6 +9,7 @@ from optimizer import run_optimization # V6 Engine
 from datetime import datetime, timedelta, timezone
 import json # V405
 from redis_engine import redis_engine # V1100: HA Broadcasts
+from kernels import structure_stops # V8100: Structure trailing rule shared with backtests
 
 # Load environment variables
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -54,13 +55,16 @@ TRADING_MODE = "PAPER"
 
 print(f"--- SIMULATION ENGINE READY ---")
 
-def get_current_price(symbol):
-    """V310: Use Binance for price data. V404: Early exit for blacklist."""
+def get_current_price(symbol, tickers=None):
+    """
+    V310: Use Binance for price data. V404: Early exit for blacklist.
+    V7000: `tickers` is a batched fetch_tickers() result, looked up before a per-symbol request.
+    """
     try:
         if any(b in symbol.upper() for b in ASSET_BLACKLIST):
             return None
             
-        ticker = live_trader.fetch_ticker(symbol)
+        ticker = (tickers or {}).get(symbol) or live_trader.fetch_ticker(symbol)
         if ticker:
             return ticker['last']
         return None
@@ -647,8 +651,15 @@ def monitor_positions():
             
         positions = response.data
         
+        # V7000: One batched request prices every position (kept here: the ticker cache TTL is ~1s)
+        tickers = {}
+        try:
+            tickers = live_trader.fetch_tickers([p['symbol'] for p in positions if not any(b in p['symbol'].upper() for b in ASSET_BLACKLIST)]) or {}
+        except Exception as e:
+            print(f"Error prefetching tickers: {e}")
+        
         for pos in positions:
-            current_price = get_current_price(pos['symbol'])
+            current_price = get_current_price(pos['symbol'], tickers)
             if not current_price:
                 continue
                 
@@ -703,37 +714,30 @@ def monitor_positions():
                 df_structure = fetch_data(pos['symbol'], timeframe='15m', limit=10)
                 if df_structure is not None and not df_structure.empty:
                     # Identify Structural Support (Lowest Low of last 5 closed candles)
-                    recent_lows = df_structure['low'].iloc[-6:-1] # Ignore current open candle
-                    structure_support = recent_lows.min()
+                    recent_lows = df_structure['low'].iloc[-6:] # Last 5 closed + the current open candle
+                    structure_support = recent_lows.iloc[:-1].min()
                     
                     entry_price = float(pos['entry_price'])
                     current_sl = float(pos.get('bot_stop_loss') or 0)
                     
-                    # Buffer: 0.2% below support to avoid wick-outs
-                    new_sl = structure_support * 0.998 if "BUY" in (pos.get('signal_type') or "BUY") else structure_support * 1.002
-                    
                     should_update_sl = False
                     reason = ""
                     
                     quantity = float(pos['quantity'])
 
-                    # LONG LOGIC
-                    if quantity > 0:
-                        # Only move SL UP, never down
-                        # And only if New SL is ABOVE BreakEven (Protect Profit)
-                        if new_sl > current_sl and new_sl > entry_price:
-                            should_update_sl = True
-                            # Verify PnL is positive enough to justify tight trail
-                            if current_price > (entry_price * 1.01): # Only active after 1% profit
-                                reason = f"Structure Support ({structure_support:.4f})"
-
-                    # SHORT LOGIC
-                    elif quantity < 0:
-                         # Only move SL DOWN, never up
-                         if (current_sl == 0 or new_sl < current_sl) and new_sl < entry_price:
-                             should_update_sl = True
-                             if current_price < (entry_price * 0.99):
-                                 reason = f"Structure Resistance ({structure_support:.4f})"
+                    # Buffer: 0.2% below (above) support to avoid wick-outs
+                    # LONG: only move SL UP, and only above BreakEven (Protect Profit)
+                    # SHORT: only move SL DOWN, and only below entry
+                    # V8100: Same kernel the backtests replay bar by bar; here only the current bar is evaluated
+                    if quantity != 0 and len(recent_lows) == 6:
+                        new_sl = float(structure_stops(recent_lows, entry_price, current_sl, is_long=quantity > 0)[-1])
+                        should_update_sl = new_sl != current_sl
+
+                    # Verify PnL is positive enough to justify tight trail (only active after 1% profit)
+                    if should_update_sl and quantity > 0 and current_price > (entry_price * 1.01):
+                        reason = f"Structure Support ({structure_support:.4f})"
+                    elif should_update_sl and quantity < 0 and current_price < (entry_price * 0.99):
+                        reason = f"Structure Resistance ({structure_support:.4f})"
                     
                     if should_update_sl:
                         print(f"       [SMART TRAILING] Moving SL to {new_sl:.4f} based on {reason}")
@@ -54,19 +54,23 @@ def main():
                 last_symbol_refresh = time.time()
                 logger.info(f"Refreshed symbols: {len(symbols)} active.")
 
+            # V7000: One batched request per tick instead of one per symbol
+            try:
+                tickers = live_trader.fetch_tickers(symbols)
+            except Exception as e:
+                logger.error(f"Error fetching tickers: {e}")
+                tickers = {}
+
             for symbol in symbols:
-                try:
-                    ticker = live_trader.fetch_ticker(symbol)
-                    if ticker and 'last' in ticker:
-                        price = ticker['last']
-                        # Publish to Redis
-                        redis_engine.publish("live_prices", {
-                            "symbol": symbol.upper(),
-                            "price": price,
-                            "time": int(time.time())
-                        })
-                except Exception as e:
-                    logger.error(f"Error fetching ticker for {symbol}: {e}")
+                ticker = tickers.get(symbol)
+                if ticker and 'last' in ticker:
+                    price = ticker['last']
+                    # Publish to Redis
+                    redis_engine.publish("live_prices", {
+                        "symbol": symbol.upper(),
+                        "price": price,
+                        "time": int(time.time())
+                    })
                 
             # Loop delay (1 second for ultra-responsive UI)
             time.sleep(1)
@@ -0,0 +1,175 @@
+"""
+COSMOS AI - Provider Router
+Adaptive ordering of the market-data fallback chain. Each (provider, endpoint)
+keeps a rolling window of latencies and outcomes plus a circuit breaker:
+
+closed     normal routing, ordered by p90 latency + error penalty + a small
+           per-position bias so the configured order wins when scores are close;
+           stats idle for longer than the cooldown are dropped, so a demoted
+           provider gets retried at its configured position
+open       skipped entirely, so an outage costs nothing per call
+half_open  after the cooldown one real request is routed to it first as a probe;
+           success closes the circuit, failure re-opens it with a longer cooldown
+"""
+import os
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+WINDOW = int(os.getenv("ROUTER_WINDOW", "50"))                          # Samples per (provider, endpoint)
+FAILURE_THRESHOLD = int(os.getenv("ROUTER_FAILURE_THRESHOLD", "3"))     # Consecutive failures that open a circuit
+ERROR_RATE_THRESHOLD = float(os.getenv("ROUTER_ERROR_RATE", "0.5"))     # ...or this error rate over MIN_SAMPLES
+MIN_SAMPLES = 10
+COOLDOWN_S = float(os.getenv("ROUTER_COOLDOWN", "30"))                  # First open period; doubles per failed probe
+MAX_COOLDOWN_S = float(os.getenv("ROUTER_MAX_COOLDOWN", "300"))
+PROBE_TIMEOUT_S = 30.0                                                  # A probe that never reports frees its slot
+ERROR_PENALTY_MS = 5000.0                                               # Roughly one request timeout
+PRIORITY_STEP_MS = 250.0                                                # Bias per position in the configured order
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class ProviderHealth:
+    """Rolling stats and circuit state for one (provider, endpoint)."""
+    def __init__(self, window=WINDOW):
+        self.latencies = deque(maxlen=window)   # Seconds, successful calls only
+        self.outcomes = deque(maxlen=window)    # 1 = ok, 0 = failure
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = COOLDOWN_S
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.updated = 0.0
+
+    def error_rate(self):
+        return 1.0 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) * 1000 if self.latencies else None
+
+    def score(self):
+        """Lower is better (ms). Untried providers score 0 and keep their configured position."""
+        p90 = self.percentile(90) or 0.0
+        return p90 + self.error_rate() * ERROR_PENALTY_MS
+
+
+class ProviderRouter:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, error_rate_threshold=ERROR_RATE_THRESHOLD,
+                 cooldown=COOLDOWN_S, max_cooldown=MAX_COOLDOWN_S, neutral_errors=()):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.neutral_errors = tuple(neutral_errors)  # e.g. BadSymbol: says nothing about provider health
+        self._health = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.skipped = 0   # Calls that did not wait on an open provider
+        self.probes = 0
+
+    def _get(self, provider, endpoint):
+        key = (provider, endpoint)
+        h = self._health.get(key)
+        if h is None:
+            h = self._health[key] = ProviderHealth()
+            h.cooldown = self.cooldown
+        return h
+
+    def order(self, endpoint, providers, now=None):
+        """
+        Eligible providers for one request, best first. A half-open provider whose
+        cooldown elapsed leads as the probe; open ones are left out unless every
+        provider is open (then the one closest to its retry time is tried).
+        """
+        now = now if now is not None else time.monotonic()
+        providers = list(providers)
+        with self._lock:
+            probe, ranked, blocked = [], [], []
+            for i, p in enumerate(providers):
+                h = self._get(p, endpoint)
+                if h.state == CLOSED:
+                    if h.outcomes and now - h.updated > h.cooldown:
+                        h.outcomes.clear()
+                        h.latencies.clear()
+                    ranked.append((h.score() + i * PRIORITY_STEP_MS, i, p))
+                    continue
+                if now - h.opened_at >= h.cooldown and (h.probe_started is None or now - h.probe_started > PROBE_TIMEOUT_S):
+                    h.state, h.probe_started = HALF_OPEN, now
+                    self.probes += 1
+                    probe.append(p)
+                else:
+                    blocked.append((h.opened_at + h.cooldown, p))
+            ordered = probe + [p for _, _, p in sorted(ranked)]
+            if blocked:
+                self.skipped += 1
+            if not ordered and blocked:
+                ordered = [min(blocked)[1]]
+            return ordered
+
+    def record(self, provider, endpoint, latency, ok, now=None):
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            h = self._get(provider, endpoint)
+            h.updated = now
+            if ok:
+                if h.state != CLOSED:
+                    print(f"   [ROUTER] {provider} {endpoint} recovered. Circuit closed.")
+                    h.outcomes.clear()  # Start the error rate afresh after an outage
+                h.outcomes.append(1)
+                h.latencies.append(latency)
+                h.consecutive_failures = 0
+                h.state, h.probe_started, h.cooldown = CLOSED, None, self.cooldown
+                return
+
+            h.outcomes.append(0)
+
+            h.consecutive_failures += 1
+            if h.state == HALF_OPEN:
+                h.cooldown = min(h.cooldown * 2, self.max_cooldown)
+                self._open(h, provider, endpoint, now)
+            elif h.state == CLOSED and (
+                    h.consecutive_failures >= self.failure_threshold
+                    or (len(h.outcomes) >= MIN_SAMPLES and h.error_rate() >= self.error_rate_threshold)):
+                self._open(h, provider, endpoint, now)
+
+    def _open(self, h, provider, endpoint, now):
+        h.state, h.opened_at, h.probe_started = OPEN, now, None
+        print(f"   [ROUTER] {provider} {endpoint} circuit OPEN for {h.cooldown:.0f}s "
+              f"({h.consecutive_failures} consecutive failures, error rate {h.error_rate():.0%}).")
+
+    def call(self, provider, endpoint, fn):
+        """Runs fn() and records its latency and outcome; errors are re-raised."""
+        start = time.monotonic()
+        try:
+            result = fn()
+        except self.neutral_errors:
+            with self._lock:
+                h = self._get(provider, endpoint)
+                h.probe_started = None  # A half-open probe told us nothing; the next request probes again
+            raise
+        except Exception:
+            self.record(provider, endpoint, time.monotonic() - start, False)
+            raise
+        self.record(provider, endpoint, time.monotonic() - start, True)
+        return result
+
+    def state(self, provider, endpoint):
+        with self._lock:
+            return self._get(provider, endpoint).state
+
+    def stats(self):
+        with self._lock:
+            providers = {
+                f"{p}:{e}": {
+                    "state": h.state,
+                    "p50_ms": round(h.percentile(50), 1) if h.latencies else None,
+                    "p90_ms": round(h.percentile(90), 1) if h.latencies else None,
+                    "error_rate": round(h.error_rate(), 2),
+                    "samples": len(h.outcomes),
+                }
+                for (p, e), h in self._health.items()
+            }
+        return {"providers": providers, "skipped": self.skipped, "probes": self.probes}
@@ -0,0 +1,217 @@
+"""
+COSMOS AI - Shared Rate Limiter
+Token buckets in exchange-weight units, stored in Redis and updated by one atomic
+Lua script, so every process (worker, oracle, paper trader, executor, APIs)
+draws from the same per-IP budget instead of a private @limits counter.
+
+ratelimit:{bucket}   hash {tokens, ts}; refilled lazily on each call (Redis TIME)
+
+Priority lanes: a lane may only spend tokens down to its reserve, so scanning
+leaves headroom that execution calls can always use.
+"""
+import os
+import time
+import asyncio
+import threading
+
+# (capacity, refill per second) in weight units. Exchanges count weight in fixed
+# 1-minute windows, so capacity + 60 * refill stays at the published limit.
+DEFAULT_BUCKETS = {
+    'binance_futures': (float(os.getenv("RATE_BINANCE_FUTURES_BURST", "480")), float(os.getenv("RATE_BINANCE_FUTURES_RATE", "32"))),    # 2400/min
+    'binance_spot': (float(os.getenv("RATE_BINANCE_SPOT_BURST", "1200")), float(os.getenv("RATE_BINANCE_SPOT_RATE", "80"))),            # 6000/min
+    'kraken': (float(os.getenv("RATE_KRAKEN_BURST", "15")), float(os.getenv("RATE_KRAKEN_RATE", "1.0"))),                                # Public counter
+}
+
+# Fraction of a bucket's capacity a lane must leave untouched
+LANES = {
+    'execution': 0.0,   # Orders, pre-trade price checks
+    'default': 0.1,     # Ad-hoc reads (oracle, auditor, paper trader)
+    'scan': 0.2,        # Universe scans (worker, scanner, price feed)
+}
+
+# Per-endpoint weights (Binance USD-M / spot tables; Kraken counts one per public call)
+# Lists are (max_limit, weight) pairs; None = any limit above the previous row
+ENDPOINT_WEIGHTS = {
+    'binance_futures': {
+        'ohlcv': [(99, 1), (499, 2), (1000, 5), (None, 10)],
+        'order_book': [(50, 2), (100, 5), (500, 10), (None, 20)],
+        'ticker': 1,
+        'tickers': 40,
+        'markets': 1,
+        'balance': 5,
+        'order': 1,
+        'cancel': 1,
+        'open_orders': 1,
+        'positions': 5,
+        'leverage': 1,
+    },
+    'binance_spot': {
+        'ohlcv': 2,
+        'order_book': [(100, 5), (500, 25), (1000, 50), (None, 250)],
+        'ticker': 2,
+        'tickers': 80,
+        'markets': 20,
+        'balance': 20,
+        'order': 1,
+    },
+    'kraken': {
+        'ohlcv': 1,
+        'order_book': 1,
+        'ticker': 1,
+        'tickers': 1,
+        'markets': 1,
+    },
+}
+
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])      -- tokens per ms
+local weight = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+if now < 0 then
+    local t = redis.call('TIME')
+    now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+if now > ts then
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    ts = now
+end
+
+local granted = 0
+local wait = 0
+if weight > 0 then
+    if tokens - weight >= reserve then
+        tokens = tokens - weight
+        granted = 1
+    else
+        wait = math.ceil((weight + reserve - tokens) / rate)
+    end
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', ts)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 60000)
+return {granted, wait, tostring(tokens)}
+"""
+
+
+def endpoint_weight(bucket, kind, limit=None):
+    """Weight of one request; unknown endpoints cost 1."""
+    cost = ENDPOINT_WEIGHTS.get(bucket, {}).get(kind, 1)
+    if not isinstance(cost, list):
+        return cost
+    for max_limit, weight in cost:
+        if max_limit is None or (limit or 0) <= max_limit:
+            return weight
+    return cost[-1][1]
+
+
+class _LocalBucket:
+    """In-process mirror of the Lua script, used while Redis is offline."""
+    def __init__(self, capacity, now_ms):
+        self.tokens = capacity
+        self.ts = now_ms
+
+
+class RateLimiter:
+    def __init__(self, client, buckets=None, prefix="ratelimit"):
+        self.client = client
+        self.buckets = dict(buckets or DEFAULT_BUCKETS)
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA) if client else None
+        self._local = {}
+        self._local_lock = threading.Lock()
+
+        # Metrics
+        self.granted = {name: 0.0 for name in self.buckets}   # Weight spent through this process
+        self.throttled_s = {name: 0.0 for name in self.buckets}
+
+    def _params(self, bucket, weight, lane):
+        capacity, rate = self.buckets[bucket]
+        reserve = capacity * LANES.get(lane, LANES['default'])
+        # A request heavier than the lane's share could never be granted
+        return capacity, rate, min(weight, capacity - reserve), reserve
+
+    def reserve(self, bucket, weight=1, lane='default', now_ms=None):
+        """
+        One atomic attempt. Returns (granted, wait_seconds, remaining_tokens);
+        weight 0 only refreshes and reports the bucket.
+        """
+        capacity, rate, weight, reserve = self._params(bucket, weight, lane)
+        if self._script is not None:
+            try:
+                granted, wait_ms, tokens = self._script(
+                    keys=[f"{self.prefix}:{bucket}"],
+                    args=[capacity, rate / 1000.0, weight, reserve, -1 if now_ms is None else now_ms])
+                return bool(granted), wait_ms / 1000.0, float(tokens)
+            except Exception as e:
+                print(f"   [RATE LIMIT] Redis script failed ({e}). Using the local bucket.")
+        return self._reserve_local(bucket, capacity, rate, weight, reserve, now_ms)
+
+    def _reserve_local(self, bucket, capacity, rate, weight, reserve, now_ms):
+        now = now_ms if now_ms is not None else time.time() * 1000
+        with self._local_lock:
+            b = self._local.setdefault(bucket, _LocalBucket(capacity, now))
+            if now > b.ts:
+                b.tokens = min(capacity, b.tokens + (now - b.ts) * rate / 1000.0)
+                b.ts = now
+            if weight <= 0:
+                return False, 0.0, b.tokens
+            if b.tokens - weight >= reserve:
+                b.tokens -= weight
+                return True, 0.0, b.tokens
+            return False, (weight + reserve - b.tokens) / rate, b.tokens
+
+    def acquire(self, bucket, weight=1, lane='default', timeout=None):
+        """Blocks until `weight` is granted. Returns False only on timeout."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            granted, wait, _ = self.reserve(bucket, weight, lane)
+            if granted:
+                self.granted[bucket] = self.granted.get(bucket, 0.0) + weight
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            self.throttled_s[bucket] = self.throttled_s.get(bucket, 0.0) + wait
+            time.sleep(wait)
+
+    async def acquire_async(self, bucket, weight=1, lane='default'):
+        """Event-loop variant (MarketGateway, API handlers): the Redis round-trip runs in a worker thread."""
+        while True:
+            if self._script is not None:
+                granted, wait, _ = await asyncio.to_thread(self.reserve, bucket, weight, lane)
+            else:
+                granted, wait, _ = self.reserve(bucket, weight, lane)   # Local bucket: no I/O
+            if granted:
+                self.granted[bucket] = self.granted.get(bucket, 0.0) + weight
+                return
+            self.throttled_s[bucket] = self.throttled_s.get(bucket, 0.0) + wait
+            await asyncio.sleep(wait)
+
+    def remaining(self, bucket):
+        """Tokens currently left in the shared bucket (all processes)."""
+        return round(self.reserve(bucket, 0)[2], 2)
+
+    def stats(self):
+        return {
+            "remaining": {name: self.remaining(name) for name in self.buckets},
+            "spent": {name: round(v, 1) for name, v in self.granted.items()},
+            "throttled_s": {name: round(v, 2) for name, v in self.throttled_s.items()},
+        }
+
+
+def _build_default():
+    try:
+        from redis_engine import redis_engine
+        return RateLimiter(redis_engine.client)
+    except Exception as e:
+        print(f"   [RATE LIMIT] Redis unavailable ({e}). Budgets are per process.")
+        return RateLimiter(None)
+
+
+# Singleton (per-process buckets when Redis is offline)
+rate_limiter = _build_default()
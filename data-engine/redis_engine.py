@@ -123,6 +123,21 @@ class RedisEngine:
             return json.loads(data) if data else None
         except: return None
 
+    def set_vpin(self, symbol, value):
+        """V7900: Latest trade-stream VPIN (stream_processor)."""
+        if not self.client: return
+        try:
+            self.client.setex(f"vpin:{symbol}", 300, str(value))
+        except: pass
+
+    def get_vpin(self, symbol):
+        """VPIN for BTC/USDT or BTCUSDT, or None."""
+        if not self.client: return None
+        try:
+            value = self.client.get(f"vpin:{symbol.replace('/', '').split(':')[0].upper()}")
+            return float(value) if value else None
+        except: return None
+
     # --- Metrics for Admin Dashboard ---
     def incr_counter(self, metric_name):
         if not self.client: return
@@ -0,0 +1,222 @@
+"""
+COSMOS AI - Timeframe Resampler
+One canonical 1m series per symbol; 5m/15m/1h/4h frames are derived from it
+(UTC-aligned buckets, forming bar included), so a symbol costs one 1m delta
+request per cycle instead of one request per timeframe and every timeframe
+is built from the same minutes.
+
+Used by scanner.fetch_data (sync) and MarketGateway (async); both drive it through
+plan() -> provider requests -> apply(). A cold symbol is backfilled newest pages
+first, at most BACKFILL_PAGES per cycle, so one cycle never pages the whole base;
+short timeframes are served as soon as the base covers them.
+"""
+import os
+import math
+import time
+import threading
+
+import numpy as np
+
+from candle_cache import timeframe_ms
+
+MINUTE_MS = 60_000
+DAY_MS = 86_400_000
+RESAMPLE_TIMEFRAMES = [tf.strip() for tf in os.getenv("RESAMPLE_TIMEFRAMES", "5m,15m,1h,4h").split(",") if tf.strip()]
+BASE_MINUTES = int(os.getenv("RESAMPLE_BASE_MINUTES", "12240"))  # 50 x 4h bars + the open bucket
+PAGE_LIMIT = 1000   # Binance USD-M klines: weight 5 up to 1000 bars (10 above)
+BACKFILL_PAGES = int(os.getenv("RESAMPLE_BACKFILL_PAGES", "3"))  # Per symbol per cycle (keeps a cold cycle within the gateway timeout)
+BASE_SOURCE = 'binance'  # Kraken only serves the last 720 minutes
+
+
+def resample(minutes, timeframe):
+    """
+    (N, 6) 1m OHLCV, sorted and unique -> `timeframe` bars aligned to UTC boundaries.
+    The last bar may be partial (forming). A leading bucket that starts before the
+    first minute is dropped, since its open and volume would be incomplete.
+    """
+    m = np.asarray(minutes, dtype=np.float64).reshape(-1, 6)
+    tf_ms = timeframe_ms(timeframe)
+    if DAY_MS % tf_ms:
+        raise ValueError(f"Timeframe {timeframe} does not align to UTC days")
+    if not len(m):
+        return np.empty((0, 6))
+
+    buckets = m[:, 0].astype(np.int64) // tf_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(m)] - 1
+
+    out = np.empty((len(starts), 6))
+    out[:, 0] = buckets[starts] * tf_ms
+    out[:, 1] = m[starts, 1]
+    out[:, 2] = np.maximum.reduceat(m[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(m[:, 3], starts)
+    out[:, 4] = m[ends, 4]
+    out[:, 5] = np.add.reduceat(m[:, 5], starts)
+
+    if int(m[0, 0]) % tf_ms:
+        out = out[1:]
+    return out
+
+
+def _to_ohlcv(rows):
+    return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in rows]
+
+
+def _fetch_minutes(symbol, since, limit):
+    """
+    One 1m page from the base source through the provider router (latency and failures scored).
+    None while its circuit is open: the fallback chain's own requests probe it back.
+    """
+    from binance_engine import live_trader
+    from provider_router import OPEN
+    if live_trader.router.state(BASE_SOURCE, 'ohlcv') == OPEN:
+        return None
+    return live_trader.router.call(BASE_SOURCE, 'ohlcv', lambda: live_trader._fetch_ohlcv_from(
+        BASE_SOURCE, symbol, '1m', limit, since=since))
+
+
+class TimeframeResampler:
+    def __init__(self, fetch_fn=_fetch_minutes, timeframes=RESAMPLE_TIMEFRAMES, max_minutes=BASE_MINUTES,
+                 backfill_pages=BACKFILL_PAGES):
+        self.fetch_fn = fetch_fn
+        self.timeframes = list(timeframes)
+        self.max_minutes = max_minutes
+        self.backfill_pages = max(1, backfill_pages)
+        self._series = {}   # symbol -> (N, 6) float64 1m bars, oldest first; the last one may be forming
+        self._floor = {}    # symbol -> oldest minute requested by the pending plan
+        self._complete = set()  # Symbols whose base reaches max_minutes or the start of their history
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.backfills = 0
+        self.deltas = 0
+        self.frames_served = 0
+
+    @staticmethod
+    def minutes_for(timeframe, limit):
+        """1m bars needed for `limit` bars: the window plus one bucket of slack for alignment."""
+        return (limit + 1) * timeframe_ms(timeframe) // MINUTE_MS
+
+    def supports(self, timeframe, limit):
+        return timeframe in self.timeframes and self.minutes_for(timeframe, limit) <= self.max_minutes
+
+    def plan(self, symbol, now_ms=None):
+        """
+        Returns (backfill, [(since, limit), ...]): the newest pages of history for a new or
+        stale symbol, otherwise one delta request starting at the last (forming) minute plus,
+        until the base is complete, up to backfill_pages older pages before its first minute.
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        with self._lock:
+            series = self._series.get(symbol)
+            has_series = series is not None and len(series)
+            first_ts = int(series[0, 0]) if has_series else None
+            last_ts = int(series[-1, 0]) if has_series else None
+            complete = symbol in self._complete
+
+        oldest = now_ms - now_ms % MINUTE_MS - (self.max_minutes - 1) * MINUTE_MS
+        backfill, floor = True, None
+        if last_ts is not None and (now_ms - last_ts) // MINUTE_MS + 2 <= PAGE_LIMIT:
+            backfill = False
+            requests = [(last_ts, int((now_ms - last_ts) // MINUTE_MS + 2))]
+            if not complete and first_ts > oldest:
+                floor = max(oldest, first_ts - self.backfill_pages * PAGE_LIMIT * MINUTE_MS)
+                requests += [(t, int(min(PAGE_LIMIT, (first_ts - t) // MINUTE_MS)))
+                             for t in range(floor, first_ts, PAGE_LIMIT * MINUTE_MS)]
+        else:
+            minutes = min(self.max_minutes, self.backfill_pages * PAGE_LIMIT)
+            floor = now_ms - now_ms % MINUTE_MS - (minutes - 1) * MINUTE_MS
+            requests = [(floor + i * PAGE_LIMIT * MINUTE_MS, PAGE_LIMIT) for i in range(math.ceil(minutes / PAGE_LIMIT))]
+
+        with self._lock:
+            self._floor[symbol] = floor
+            if backfill:
+                self._complete.discard(symbol)
+        return backfill, requests
+
+    def apply(self, symbol, bars, backfill=False):
+        """
+        Merges downloaded 1m bars (the forming minute and anything newer are replaced; older
+        pages are prepended). Returns False when a delta does not connect to the series; the
+        symbol is then dropped so the next plan() backfills.
+        """
+        with self._lock:
+            floor = self._floor.pop(symbol, None)
+        if not bars:
+            return False
+        new = np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+        new = new[np.unique(new[:, 0], return_index=True)[1]]  # Sorted, de-duplicated (page overlaps)
+
+        with self._lock:
+            series = self._series.get(symbol)
+            if backfill or series is None or not len(series):
+                merged = new
+                self.backfills += 1
+            else:
+                tail = new[new[:, 0] >= series[-1, 0]]
+                if not len(tail) or tail[0, 0] > series[-1, 0] + MINUTE_MS:
+                    del self._series[symbol]
+                    self._complete.discard(symbol)
+                    return False
+                merged = np.concatenate([series[~np.isin(series[:, 0], new[:, 0])], new])
+                merged = merged[np.argsort(merged[:, 0], kind='stable')]
+                self.deltas += 1
+            # Complete once max_minutes are held or the exchange has nothing before the requested floor
+            if len(merged) >= self.max_minutes or (floor is not None and merged[0, 0] > floor):
+                self._complete.add(symbol)
+            self._series[symbol] = merged[-self.max_minutes:]
+        return True
+
+    def frame(self, symbol, timeframe, limit):
+        """Last `limit` bars (ccxt OHLCV lists) or None when the base is too short."""
+        with self._lock:
+            series = self._series.get(symbol)
+            if series is None:
+                return None
+            window = series[-self.minutes_for(timeframe, limit):]
+        bars = resample(window, timeframe)
+        if len(bars) < limit:
+            return None
+        self.frames_served += 1
+        return _to_ohlcv(bars[-limit:])
+
+    def sync(self, symbol, now_ms=None):
+        """
+        Brings the base up to date with blocking requests (scanner.fetch_data path).
+        A page of None (base source unavailable) aborts without touching the series.
+        """
+        for _ in range(2):  # A delta that does not connect is retried as a backfill
+            backfill, requests = self.plan(symbol, now_ms)
+            bars = []
+            for since, limit in requests:
+                page = self.fetch_fn(symbol, since, limit)
+                if page is None:
+                    return False
+                bars += page
+            if self.apply(symbol, bars, backfill=backfill):
+                return True
+        return False
+
+    def fetch(self, symbol, timeframe, limit):
+        """Resampled frame with a fresh base, or None (callers fall back to a direct fetch)."""
+        if not self.supports(timeframe, limit):
+            return None
+        try:
+            if not self.sync(symbol):
+                return None
+        except Exception as e:
+            print(f"   [RESAMPLER] 1m base for {symbol} failed: {e}")
+            return None
+        return self.frame(symbol, timeframe, limit)
+
+    def stats(self):
+        return {
+            "symbols": len(self._series),
+            "backfills": self.backfills,
+            "deltas": self.deltas,
+            "frames_served": self.frames_served,
+        }
+
+
+# Singleton shared by scanner.fetch_data and MarketGateway (None when RESAMPLE_TIMEFRAMES is empty)
+resampler = TimeframeResampler() if RESAMPLE_TIMEFRAMES else None
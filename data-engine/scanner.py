@@ -1,4 +1,5 @@
 import ccxt
+import numpy as np
 import pandas as pd
 import requests
 import time
@@ -18,6 +19,19 @@ ASSET_BLACKLIST = ['PEPE', 'PEPE/USDT', 'PEPE/USD', 'DOGE', 'DOGE/USDT', 'USD1',
 
 # V310: Import Binance Engine for unified data/execution
 from binance_engine import live_trader
+from market_gateway import market_gateway # V6300: Concurrent universe fetch
+from candle_store import candle_store # V6400: Stream-built candles (candle_builder.py)
+from shm_candles import shm_candles # V8200: Same candles mapped from shared memory (same host)
+from book_store import book_store # V6500: Local L2 replica (book_keeper.py)
+from resampler import resampler # V6900: Higher timeframes from one 1m base
+import indicators
+from indicators import calculate_rsi, calculate_macd, calculate_ema, calculate_atr, calculate_sma # V6600: Shared NumPy kernels
+from indicator_state import indicator_engine # V6700: O(1) incremental indicator state
+import vpin # V7900: Vectorized order-flow toxicity
+from feature_store import feature_store # V8000: Model features stored once per bar
+import kernels # V8100: Compiled per-bar detectors (numba when installed)
+import book_depth # V8400: One-pass order book depth analytics
+from book_depth import depth_cache
 
 # V410: Global Config Loading
 config_path = os.path.join(parent_dir, "config", "conf_global.json")
@@ -30,85 +44,106 @@ PRIORITY_ASSETS = GLOBAL_CONFIG.get("priority_assets", ["BTC/USDT", "SOL/USDT"])
 ANALYSIS_TIMEFRAMES = GLOBAL_CONFIG.get("analysis_timeframes", ["5m", "15m"])
 SYMBOLS = GLOBAL_CONFIG.get("trading_pairs", ["BTC/USDT", "SOL/USDT", "ETH/USDT"])
 
-print("--- BINANCE DATA ENGINE ACTIVE (V310 Migration) ---")
-
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    exp1 = series.ewm(span=fast, adjust=False).mean()
-    exp2 = series.ewm(span=slow, adjust=False).mean()
-    macd_line = exp1 - exp2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
+# V8300: Per-symbol scan on raw OHLCV arrays (analyze_bars) instead of DataFrames + panel
+SCAN_FAST_PATH = os.getenv("SCAN_FAST_PATH", "true").lower() != "false"
 
-def calculate_ema(series, period=200):
-    return series.ewm(span=period, adjust=False).mean()
+print("--- BINANCE DATA ENGINE ACTIVE (V310 Migration) ---")
 
 def fetch_order_book(symbol='BTC/USD', limit=50):
-    """V310: Use Binance for Order Book."""
+    """V310: Use Binance for Order Book. V6500: Local L2 replica from Redis first."""
     try:
+        book = book_store.read(symbol, limit=limit) if book_store else None
+        if book:
+            return book
         # Map symbol if needed, but Binance/CCXT handles /USDT well
         return live_trader.fetch_order_book(symbol, limit=limit)
     except Exception as e:
         print(f"Error fetching order book for {symbol}: {e}")
         return None
 
-def fetch_data(symbol='BTC/USD', timeframe='1h', limit=100):
-    """V310: Use Binance for OHLCV."""
+def bars_to_df(bars, symbol=None, timeframe=None):
+    """ccxt OHLCV list -> DataFrame with datetime timestamps. V6700: Tags symbol/timeframe for analyze_market."""
+    if bars is None or not len(bars): return pd.DataFrame()
+    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    if symbol and timeframe:
+        df.attrs['symbol'] = symbol
+        df.attrs['timeframe'] = timeframe
+    return df
+
+def as_bars(bars):
+    """V8300: ccxt OHLCV list (or array) -> float64 (N, 6) array with ms timestamps."""
+    if bars is None or not len(bars): return np.empty((0, 6))
+    return np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+
+def fetch_bars(symbol='BTC/USD', timeframe='1h', limit=100):
+    """
+    V310: Use Binance for OHLCV. V6400: Stream-built candles from Redis first. V6900: Then the 1m resampler.
+    V8200: Shared-memory rings before Redis (no round trip, no JSON).
+    V8300: Returns the raw (N, 6) array (empty on failure); fetch_data wraps it in a DataFrame.
+    """
     try:
-        bars = live_trader.fetch_ohlcv(symbol, timeframe, limit=limit)
-        if not bars: return pd.DataFrame()
-        df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+        bars = shm_candles.read_array(symbol, timeframe, limit) if shm_candles else None
+        if bars is not None:
+            return bars
+        bars = candle_store.read(symbol, timeframe, limit) if candle_store else None
+        if not bars and resampler:
+            bars = resampler.fetch(symbol, timeframe, limit)
+        if not bars:
+            bars = live_trader.fetch_ohlcv(symbol, timeframe, limit=limit)
+        return as_bars(bars)
     except Exception as e:
         print(f"Error fetching data: {e}")
-        return pd.DataFrame()
+        return np.empty((0, 6))
+
+def fetch_data(symbol='BTC/USD', timeframe='1h', limit=100):
+    """fetch_bars() as a DataFrame (empty on failure)."""
+    return bars_to_df(fetch_bars(symbol, timeframe, limit), symbol, timeframe)
+
+def frame_from_bundle(bundle, symbol, timeframe, limit=100):
+    """V6300: Uses the gateway prefetch when present, else the sync fetch_data() path."""
+    bars = (bundle or {}).get('frames', {}).get(timeframe)
+    if bars:
+        return bars_to_df(bars[-limit:], symbol, timeframe)
+    return fetch_data(symbol, timeframe=timeframe, limit=limit)
+
+def bars_from_bundle(bundle, symbol, timeframe, limit=100):
+    """V8300: frame_from_bundle without the DataFrame (raw (N, 6) array)."""
+    bars = (bundle or {}).get('frames', {}).get(timeframe)
+    if bars:
+        return as_bars(bars[-limit:])
+    return fetch_bars(symbol, timeframe=timeframe, limit=limit)
+
+def book_from_bundle(bundle, limit=50):
+    """Top `limit` levels of the prefetched book (gateway fetches 100), or None."""
+    book = (bundle or {}).get('book')
+    if not book: return None
+    return {**book, 'bids': book['bids'][:limit], 'asks': book['asks'][:limit]}
 
 def calculate_imbalance(book):
     """
     Calculates Order Book Imbalance.
     Formula: (Bid_Vol - Ask_Vol) / (Bid_Vol + Ask_Vol)
     Returns: -1.0 (Bearish) to 1.0 (Bullish)
+    V8400: From the shared depth analytics (one pass per book update, see book_depth.py).
     """
     if not book: return 0
     
     bids = book['bids']
     asks = book['asks']
     
-    bid_vol = sum([b[1] for b in bids])
-    ask_vol = sum([a[1] for a in asks])
-    
-    total_vol = bid_vol + ask_vol
-    if total_vol == 0: return 0
-    
-    imbalance = (bid_vol - ask_vol) / total_vol
-    return imbalance
-
-def calculate_atr(df, period=14):
-    high = df['high']
-    low = df['low']
-    close = df['close'].shift(1)
-    
-    tr1 = high - low
-    tr2 = (high - close).abs()
-    tr3 = (low - close).abs()
-    
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1/period, adjust=False).mean()
-    return atr
+    # The cached result may come from a deeper copy of the same update: read this book's depth
+    analytics = depth_cache.get(book)
+    return float(book_depth.imbalance_at(analytics['bid'], analytics['ask'], max(len(bids), len(asks))))
 
 def analyze_market(df):
     if df.empty or len(df) < 50:
         return None
     
+    # V6700: Incremental state per (symbol, timeframe); full recompute for untagged frames
+    if indicator_engine and df.attrs.get('timeframe'):
+        return indicator_engine.analyze(df, df.attrs['symbol'], df.attrs['timeframe'])
+    
     # Calculate Indicators
     df['RSI'] = calculate_rsi(df['close'], 14)
     df['EMA_200'] = calculate_ema(df['close'], 200)
@@ -121,7 +156,7 @@ def analyze_market(df):
     df['Histogram'] = hist
     
     # Volume MA
-    df['Vol_MA'] = df['volume'].rolling(window=20).mean()
+    df['Vol_MA'] = calculate_sma(df['volume'], 20)
     
     latest = df.iloc[-1]
     
@@ -143,6 +178,61 @@ def analyze_market(df):
         'histogram': latest['Histogram']
     }
 
+def analyze_bars(bars, symbol=None, timeframe=None, structure_lookback=20, divergence_lookback=10):
+    """
+    V8300: DataFrame-free analyze_market for the per-symbol scan. Indicators run on column
+    views of the raw (N, 6) OHLCV array (incremental state when tagged with a timeframe, as
+    analyze_market does). Returns the panel_row dict: analyze_market's latest values plus
+    structure / divergence / volume_pressure / vpin, so analyze_quant_signal needs no
+    df_confluence. None where analyze_market would return None.
+    """
+    if bars is None or len(bars) < 50:
+        return None
+    ts, _, high, low, close, volume = np.ascontiguousarray(np.asarray(bars, dtype=np.float64).T)
+
+    if indicator_engine and timeframe:
+        rows = indicator_engine.evaluate(np.asarray(bars, dtype=np.float64), symbol, timeframe)
+        rsi = np.array([row['RSI'] for row in rows])  # Last TAIL+1 bars: enough for the divergence window
+        latest = rows[-1]
+    else:
+        rsi = indicators.rsi(close, 14)
+        macd, sig, hist = indicators.macd(close)
+        latest = {
+            'RSI': rsi[-1],
+            'EMA_200': indicators.ema(close, 200)[-1],
+            'ATR': indicators.atr(high, low, close, 14)[-1],
+            'MACD': macd[-1],
+            'Signal_Line': sig[-1],
+            'Histogram': hist[-1],
+            'Vol_MA': indicators.sma(volume, 20)[-1],
+        }
+
+    if np.isnan(latest['RSI']) or np.isnan(latest['EMA_200']):
+        return None
+
+    n = structure_lookback
+    structure = kernels.structure_series(close[-n:], high[-n:], low[-n:], n)[-1]
+    n = divergence_lookback
+    divergence = kernels.divergence_series(close[-n:], rsi[-n:], n)[-1]
+    vol_ma = latest['Vol_MA']
+    return {
+        'timestamp': pd.Timestamp(int(ts[-1]), unit='ms'),
+        'symbol': symbol or 'BTC/USD',
+        'price': close[-1],
+        'rsi': latest['RSI'],
+        'ema_200': latest['EMA_200'],
+        'atr': latest['ATR'],
+        'volume': volume[-1],
+        'vol_ma': vol_ma,
+        'macd': latest['MACD'],
+        'signal_line': latest['Signal_Line'],
+        'histogram': latest['Histogram'],
+        'structure': STRUCTURE_LABELS[int(structure)],
+        'divergence': DIVERGENCE_LABELS[int(divergence)],
+        'volume_pressure': 1.0 if vol_ma == 0 else volume[-1] / vol_ma,
+        'vpin': vpin.vpin_from_candles(close, volume),
+    }
+
 from supabase import create_client, Client
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -187,37 +277,24 @@ def fetch_fear_greed():
 
 # V415: Triple Confluence Helper Functions
 
+STRUCTURE_LABELS = {kernels.BULLISH: "BULLISH", kernels.BEARISH: "BEARISH", kernels.NEUTRAL: "NEUTRAL"}
+DIVERGENCE_LABELS = {kernels.BULLISH: "BULLISH", kernels.BEARISH: "BEARISH", kernels.NEUTRAL: "NONE"}
+
 def check_rsi_divergence(df, lookback=10):
     """
     Detects simple RSI Divergence.
     Bullish: Price Lower Low, RSI Higher Low
     Bearish: Price Higher High, RSI Lower High
+    (Current vs the lowest/highest close of the previous lookback-1 bars.)
     """
     if len(df) < lookback: return "NONE"
-    
-    price = df['close'].iloc[-1]
-    rsi = df['RSI'].iloc[-1]
-    
-    # Simple logic: Compare current vs lowest/highest in lookback
-    window = df.iloc[-lookback:-1]
-    
-    if rsi < 35: # Potential Bullish Div
-        min_price_idx = window['close'].idxmin()
-        min_price = window['close'][min_price_idx]
-        min_rsi = window['RSI'][min_price_idx]
-        
-        if price < min_price and rsi > min_rsi:
-            return "BULLISH"
-            
-    if rsi > 65: # Potential Bearish Div
-        max_price_idx = window['close'].idxmax()
-        max_price = window['close'][max_price_idx]
-        max_rsi = window['RSI'][max_price_idx]
-        
-        if price > max_price and rsi < max_rsi:
-            return "BEARISH"
-            
-    return "NONE"
+    tail = df.iloc[-lookback:]
+    return DIVERGENCE_LABELS[int(kernels.divergence_series(tail['close'], tail['RSI'], lookback)[-1])]
+
+def divergence_history(df, lookback=10):
+    """V8100: check_rsi_divergence for every bar of a long history (backtests)."""
+    codes = kernels.divergence_series(df['close'], df['RSI'], lookback)
+    return pd.Series(np.array(["NONE", "BULLISH", "BEARISH"])[codes], index=df.index)
 
 def analyze_volume_pressure(df):
     """
@@ -236,18 +313,130 @@ def check_market_structure(df, lookback=20):
     Bullish: Close > Highest High of last X periods (Breakout)
     Bearish: Close < Lowest Low of last X periods (Breakdown)
     """
-    current_close = df['close'].iloc[-1]
-    window = df.iloc[-lookback:-1]
-    
-    highest = window['high'].max()
-    lowest = window['low'].min()
-    
-    if current_close > highest:
-        return "BULLISH"
-    elif current_close < lowest:
-        return "BEARISH"
-    
-    return "NEUTRAL"
+    tail = df.iloc[-lookback:]
+    if tail.empty: return "NEUTRAL"
+    return STRUCTURE_LABELS[int(kernels.structure_series(tail['close'], tail['high'], tail['low'], lookback)[-1])]
+
+def structure_history(df, lookback=20):
+    """V8100: check_market_structure for every bar of a long history (backtests)."""
+    codes = kernels.structure_series(df['close'], df['high'], df['low'], lookback)
+    return pd.Series(np.array(["NEUTRAL", "BULLISH", "BEARISH"])[codes], index=df.index)
+
+# V6800: Panel (symbols x bars) mode: one vectorized pass for the whole universe
+
+PANEL_COLUMNS = ['timestamp', 'price', 'rsi', 'ema_200', 'atr', 'volume', 'vol_ma', 'macd', 'signal_line', 'histogram',
+                 'structure', 'divergence', 'volume_pressure', 'vpin', 'valid']
+
+def build_panel(frames, limit=100):
+    """
+    {symbol: ccxt OHLCV list} -> aligned (symbols x limit) arrays.
+    Symbols with fewer than `limit` bars are left out (callers use analyze_market for them).
+    """
+    symbols = [s for s, bars in frames.items() if bars and len(bars) >= limit]
+    data = np.array([frames[s][-limit:] for s in symbols], dtype=np.float64).reshape(len(symbols), limit, 6)
+    panel = {'symbols': symbols}
+    for i, col in enumerate(['timestamp', 'open', 'high', 'low', 'close', 'volume']):
+        panel[col] = data[:, :, i]
+    return panel
+
+def analyze_market_panel(symbols, timestamps, closes, highs, lows, volumes, structure_lookback=20, divergence_lookback=10):
+    """
+    Batch analyze_market: 2-D (symbols x bars) inputs, indicators for every symbol in one
+    NumPy pass. Returns a DataFrame indexed by symbol with analyze_market's latest values
+    plus check_market_structure / check_rsi_divergence / analyze_volume_pressure, and
+    'valid' = False where analyze_market would return None.
+    """
+    closes, highs, lows, volumes = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (closes, highs, lows, volumes))
+    n_bars = closes.shape[1]
+
+    rsi = indicators.rsi(closes, 14)
+    ema_200 = indicators.ema(closes, 200)
+    atr = indicators.atr(highs, lows, closes, 14)
+    macd, sig, hist = indicators.macd(closes)
+    vol_ma = indicators.sma(volumes, 20)
+
+    price = closes[:, -1]
+    last_rsi = rsi[:, -1]
+
+    # Structure: close vs the high/low range of the previous bars
+    window = slice(-structure_lookback, -1)
+    highest = highs[:, window].max(axis=1)
+    lowest = lows[:, window].min(axis=1)
+    structure = np.where(price > highest, "BULLISH", np.where(price < lowest, "BEARISH", "NEUTRAL"))
+
+    # Divergence: compare against the RSI at the window's lowest/highest close (first occurrence, like idxmin)
+    window = slice(-divergence_lookback, -1)
+    w_close, w_rsi = closes[:, window], rsi[:, window]
+    rows = np.arange(len(closes))
+    i_min, i_max = w_close.argmin(axis=1), w_close.argmax(axis=1)
+    with np.errstate(invalid='ignore'):
+        bullish = (last_rsi < 35) & (price < w_close[rows, i_min]) & (last_rsi > w_rsi[rows, i_min])
+        bearish = (last_rsi > 65) & (price > w_close[rows, i_max]) & (last_rsi < w_rsi[rows, i_max])
+    divergence = np.where(bullish, "BULLISH", np.where(bearish, "BEARISH", "NONE"))
+    if n_bars < divergence_lookback:
+        divergence[:] = "NONE"
+
+    # Volume pressure: current / 20-period MA (1.0 when the MA is zero)
+    last_vol, last_ma = volumes[:, -1], vol_ma[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pressure = np.where(last_ma == 0, 1.0, last_vol / last_ma)
+
+    # V7900: VPIN (BVC on close changes, mean-bar-volume buckets), row-wise over the whole panel
+    toxicity = vpin.vpin_from_candles(closes, volumes)
+
+    ts = np.atleast_2d(np.asarray(timestamps))[:, -1]
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(ts.astype(np.int64), unit='ms'),
+        'price': price,
+        'rsi': last_rsi,
+        'ema_200': ema_200[:, -1],
+        'atr': atr[:, -1],
+        'volume': last_vol,
+        'vol_ma': last_ma,
+        'macd': macd[:, -1],
+        'signal_line': sig[:, -1],
+        'histogram': hist[:, -1],
+        'structure': structure,
+        'divergence': divergence,
+        'volume_pressure': pressure,
+        'vpin': toxicity,
+        'valid': (n_bars >= 50) & ~np.isnan(last_rsi) & ~np.isnan(ema_200[:, -1]),
+    }, index=pd.Index(list(symbols), name='symbol'), columns=PANEL_COLUMNS)
+
+def panel_row(panel, symbol):
+    """analyze_market-shaped dict (plus confluence keys) for one symbol, or None."""
+    if panel is None or symbol not in panel.index:
+        return None
+    row = panel.loc[symbol]
+    if not row['valid']:
+        return None
+    out = row.drop('valid').to_dict()
+    out['symbol'] = symbol
+    return out
+
+def analyze_from_panel(panel, symbol, df):
+    """
+    V6800: Scan-loop entry point. Panel row when available; with incremental indicators
+    on, the history-dependent figures (EMA200/MACD/ATR) come from analyze_market and the
+    panel only supplies the confluence features.
+    """
+    row = panel_row(panel, symbol)
+    if row is None:
+        return analyze_market(df)
+    if indicator_engine and df.attrs.get('timeframe'):
+        techs = analyze_market(df)
+        if techs:
+            techs.update({k: row[k] for k in ('structure', 'divergence', 'volume_pressure', 'vpin')})
+        return techs
+    return row
+
+def scan_panel(bundles, timeframe, limit=100):
+    """V6800: Panel analysis of the gateway bundles for one timeframe (None if nothing aligns)."""
+    frames = {s: (b or {}).get('frames', {}).get(timeframe) for s, b in bundles.items()}
+    panel = build_panel(frames, limit)
+    if not panel['symbols']:
+        return None
+    return analyze_market_panel(panel['symbols'], panel['timestamp'], panel['close'], panel['high'], panel['low'], panel['volume'])
 
 def check_news_blackout():
     """
@@ -259,12 +448,15 @@ def check_news_blackout():
     # Let's keep it simple: No blackout unless manually added here.
     return False
 
-def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluence=None, df_htf=None, current_price=None):
+def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluence=None, df_htf=None, current_price=None, book=None, timeframe='5m'):
     """
     Combines Technicals (RSI/EMA/MACD) with Quant Data (Order Book)
     using DYNAMIC WEIGHTS from the Optimizer.
     V14: Added df_htf for H4 S/R checks.
     V15: Added current_price override for Real-Time Execution.
+    V6300: Added book override (gateway prefetch) to skip the per-symbol fetch.
+    V8000: Model features read from / written to the feature store (one vector per bar).
+    V8300: df_htf may be a raw (N, 6) OHLCV array (analyze_bars path).
     """
     if not tech_analysis: return None
     
@@ -273,7 +465,8 @@ def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluenc
     rsi = tech_analysis['rsi']
     
     # 1. Fetch Liquidity Data
-    book = fetch_order_book(symbol)
+    if book is None:
+        book = fetch_order_book(symbol)
     imbalance = calculate_imbalance(book) # -1 to 1
     
     # Spread Calculation
@@ -320,6 +513,12 @@ def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluenc
     vol_pressure = 1.0
     if df_confluence is not None:
         vol_pressure = analyze_volume_pressure(df_confluence)
+    
+    # V6800: Panel rows carry the confluence features precomputed
+    if 'structure' in tech_analysis:
+        structure = tech_analysis['structure']
+        divergence = tech_analysis['divergence']
+        vol_pressure = tech_analysis['volume_pressure']
         
     # LOGIC UPDATE: High Probability Filters
     
@@ -337,10 +536,14 @@ def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluenc
         
     # V1400: H4 Structure / Resistance Filter
     # If price is approaching H4 Resistance (High of last 20 candles), dampen Bullish confidence
-    if df_htf is not None:
-        htf_lookback = df_htf.iloc[-20:-1]
-        htf_high = htf_lookback['high'].max()
-        htf_low = htf_lookback['low'].min()
+    if df_htf is not None and len(df_htf) > 1:
+        if isinstance(df_htf, np.ndarray): # V8300: Raw OHLCV bars (analyze_bars path)
+            htf_high = df_htf[-20:-1, 2].max()
+            htf_low = df_htf[-20:-1, 3].min()
+        else:
+            htf_lookback = df_htf.iloc[-20:-1]
+            htf_high = htf_lookback['high'].max()
+            htf_low = htf_lookback['low'].min()
         
         # Proximity defined as within 1% of key level
         dist_to_res = (htf_high - price) / price
@@ -394,6 +597,10 @@ def analyze_quant_signal(symbol, tech_analysis, sentiment_score=50, df_confluenc
         'macd_line': tech_analysis['macd'],
         'histogram': tech_analysis['histogram']
     }
+    # V8000: Predict on the live vector; the store keeps each bar's last vector once it has closed
+    bar_ts = tech_analysis.get('timestamp')
+    if bar_ts is not None:
+        feature_store.observe(symbol, timeframe, bar_ts, features)
     ai_prob = brain.predict_success(features) # Returns 0.0 to 1.0 (e.g., 0.65)
     
     # Hybrid Score Adjustment
@@ -558,7 +765,7 @@ def get_top_vol_pairs(limit=15):
         
         # Ensure markets are loaded for validation
         if not live_trader.exchange.markets:
-             try: live_trader.exchange.load_markets()
+             try: live_trader.markets_cache.load(live_trader.exchange)
              except: pass
 
         for p in sorted_pairs[:limit*2]: # Check more candidates in case of filtering
@@ -607,8 +814,10 @@ def main():
     last_train_time = datetime.now()
     train_interval_hours = 6
     
-    # V24: Auto-Update Top Assets
-    last_asset_update = 0
+    # V7600: Top-volume refresh runs in the background; the loop reads the published universe
+    from universe_service import universe_service
+    universe_service.start()
+    universe_version = None
     
     while True:
         try:
@@ -620,15 +829,11 @@ def main():
                 brain.train()
                 last_train_time = now
             
-            # V24: Dynamic Asset List Update (Every 1 Hour)
-            # We merge PRIORITY_ASSETS (Fixed) + TOP_VOL_ASSETS (Dynamic)
-            if time.time() - last_asset_update > 3600:
-                print("--- [DYNAMIC] Refreshing Top Volume Assets ---")
-                dynamic_pairs = get_top_vol_pairs(limit=15)
-                # Merge Unique: Priority + Dynamic + Standard Symbols (Fallback)
-                current_scan_list = list(set(PRIORITY_ASSETS + dynamic_pairs + SYMBOLS))
-                last_asset_update = time.time()
-                print(f"   [SCAN LIST] Total: {len(current_scan_list)} Pairs (Dynamic: {len(dynamic_pairs)})")
+            # V24/V7600: PRIORITY_ASSETS (Fixed) + SYMBOLS + TOP_VOL_ASSETS (Dynamic) from the universe service
+            current_scan_list = universe_service.symbols() or list(dict.fromkeys(PRIORITY_ASSETS + SYMBOLS))
+            if universe_service.version() != universe_version:
+                universe_version = universe_service.version()
+                print(f"   [SCAN LIST] Universe v{universe_version}: {len(current_scan_list)} Pairs")
             
             # 1. Fetch Global Data (Sentiment)
             fng_index = fetch_fear_greed()
@@ -670,17 +875,29 @@ def main():
                 
             print(f"   [PORTFOLIO FLOW] Scanning {len(current_scan_list)} Assets...")
             
-            for symbol in current_scan_list:
-                if any(b in symbol.upper() for b in ASSET_BLACKLIST):
-                    continue
+            # V6300: Prefetch the whole universe concurrently (frames + book)
+            scan_symbols = [s for s in current_scan_list if not any(b in s.upper() for b in ASSET_BLACKLIST)]
+            bundles = market_gateway.fetch_universe(scan_symbols, frames={'5m': 100, '15m': 100}, with_ticker=False, book_limit=50)
+            print(f"   [GATEWAY] {market_gateway.stats()}")
+            if not SCAN_FAST_PATH:
+                panel_5m, panel_15m = scan_panel(bundles, '5m'), scan_panel(bundles, '15m') # V6800
+            
+            for symbol in scan_symbols:
+                bundle = bundles.get(symbol)
                 
                 # V410: Multi-Timeframe Confluence (5m & 15m)
                 # We analyze the faster timeframe (5m) for entries, confirmed by 15m trend.
-                df_5m = fetch_data(symbol, timeframe='5m', limit=100)
-                df_15m = fetch_data(symbol, timeframe='15m', limit=100)
-                
-                techs_5m = analyze_market(df_5m)
-                techs_15m = analyze_market(df_15m)
+                if SCAN_FAST_PATH:
+                    # V8300: Confluence features come with the techs; no DataFrame per symbol
+                    df_5m = None
+                    techs_5m = analyze_bars(bars_from_bundle(bundle, symbol, '5m', limit=100), symbol, '5m')
+                    techs_15m = analyze_bars(bars_from_bundle(bundle, symbol, '15m', limit=100), symbol, '15m')
+                else:
+                    df_5m = frame_from_bundle(bundle, symbol, '5m', limit=100)
+                    df_15m = frame_from_bundle(bundle, symbol, '15m', limit=100)
+                    
+                    techs_5m = analyze_from_panel(panel_5m, symbol, df_5m)
+                    techs_15m = analyze_from_panel(panel_15m, symbol, df_15m)
                 
                 if techs_5m and techs_15m:
                     # Logic: 5m signal MUST align with 15m EMA_200 trend
@@ -689,7 +906,7 @@ def main():
                     trend_15m = "BULLISH" if p_5m > ma_15m else "BEARISH"
                     
                     # Upgrade to V4 Analysis with Confluence (Pass the DF for history checks)
-                    quant_signal = analyze_quant_signal(symbol, techs_5m, sentiment_score=fng_index, df_confluence=df_5m)
+                    quant_signal = analyze_quant_signal(symbol, techs_5m, sentiment_score=fng_index, df_confluence=df_5m, book=book_from_bundle(bundle))
                     
                     if quant_signal:
                         # V410: STRENGTHEN FILTER - Confluence check
@@ -752,7 +969,12 @@ def main():
                         # Let's verify by calling a modified version or just trusting the logic is strict.
                         # For now, let's print a "Scanning..." message with basic metrics to prove it's alive.
                         print(f"   --- No Signal ({symbol}) -> RSI: {techs['rsi']:.1f}")
-                time.sleep(1) # Rate limit friendly per symbol
+                if not bundle:
+                    time.sleep(1) # Rate limit friendly per symbol (sync fallback only)
+
+            if indicator_engine:
+                indicator_engine.save() # V6700
+                print(f"   [INDICATORS] {indicator_engine.stats()}")
 
             print("Waiting 60s for next scan...")
             time.sleep(60)
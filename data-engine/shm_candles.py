@@ -0,0 +1,299 @@
+"""
+COSMOS AI - Shared-Memory Candles
+Per-symbol OHLCV ring buffers in multiprocessing.shared_memory, written by the
+single stream producer (candle_builder.py) and mapped by every process on the
+host (worker, oracle, paper trader, API) as NumPy arrays: no REST call, no Redis
+round trip, no JSON decoding, one copy of the data in RAM (V8200).
+
+Segment {prefix}_{BASEQUOTE}_{tf}, little-endian:
+  header  int64[8]  [magic, seq, capacity, head, updated_ms, 0, 0, 0]
+  data    float64[2 * capacity, 6]  [ts_ms, open, high, low, close, volume]
+
+- Ring: row i is written at i % capacity and again capacity rows later, so the
+  latest n bars are always one contiguous slice (zero-copy views).
+- Seqlock: the writer makes seq odd before touching the data and even after.
+  A reader that sees an odd seq, or a different seq after reading, retries.
+- head counts rows ever appended; updated_ms is the producer heartbeat.
+The last row is the forming bar (set_live), so reads look like a REST fetch_ohlcv.
+"""
+import os
+import time
+
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from candle_cache import timeframe_ms
+from candle_store import STREAM_TIMEFRAMES, MAX_STORED_BARS, LIVE_TTL
+
+SHM_PREFIX = os.getenv("CANDLE_SHM_PREFIX", "cosmos")
+SHM_ENABLED = os.getenv("CANDLE_SHM", "1") == "1"
+MAGIC = 0x434F534D4F53  # "COSMOS"
+HEADER_SLOTS = 8
+HEADER_BYTES = HEADER_SLOTS * 8
+MAGIC_SLOT, SEQ_SLOT, CAPACITY_SLOT, HEAD_SLOT, UPDATED_SLOT = range(5)
+READ_RETRIES = 100
+
+
+def segment_name(symbol, timeframe, prefix=SHM_PREFIX):
+    """BTC/USDT, BTC/USDT:USDT -> cosmos_BTCUSDT_5m"""
+    return f"{prefix}_{symbol.split(':')[0].replace('/', '').upper()}_{timeframe}"
+
+
+def _segment_size(capacity):
+    return HEADER_BYTES + 2 * capacity * 6 * 8
+
+
+_created = set()  # Segments this process owns (its resource tracker must keep them)
+
+
+def _attach(name):
+    """Maps an existing segment without letting this process's resource tracker unlink it at exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class CandleRing:
+    """One (symbol, timeframe) segment."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        capacity = int(self.header[CAPACITY_SLOT])
+        self.capacity = capacity
+        self.data = np.ndarray((2 * capacity, 6), dtype=np.float64, buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, name, capacity):
+        size = _segment_size(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a producer that died: reuse it if the layout fits, else replace it
+            shm = shared_memory.SharedMemory(name=name)
+            if shm.size < size:
+                shm.close()
+                shm.unlink()
+                shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created.add(name)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        seq = int(header[SEQ_SLOT]) if header[MAGIC_SLOT] == MAGIC else 0
+        header[SEQ_SLOT] = seq + (seq & 1) + 1  # Odd while initializing (readers of the old layout retry)
+        header[CAPACITY_SLOT] = capacity
+        header[HEAD_SLOT] = 0
+        header[UPDATED_SLOT] = 0
+        header[MAGIC_SLOT] = MAGIC
+        header[SEQ_SLOT] += 1
+        del header
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        shm = _attach(name)
+        if shm.size < HEADER_BYTES or np.ndarray((1,), dtype=np.int64, buffer=shm.buf)[0] != MAGIC:
+            shm.close()
+            raise FileNotFoundError(name)
+        return cls(shm)
+
+    # --- Writer (single producer) ---
+
+    def _put(self, i, bar):
+        slot = i % self.capacity
+        self.data[slot] = bar
+        self.data[slot + self.capacity] = bar
+
+    def write(self, bars=None, bar=None, replace=False):
+        """
+        replace=True: the ring becomes `bars`. Otherwise `bar` is upserted: same ts as the
+        last row overwrites it (forming bar updated or closed), a newer ts appends, an older one is ignored.
+        """
+        h = self.header
+        h[SEQ_SLOT] += 1  # Odd: write in progress
+        try:
+            if replace:
+                rows = np.asarray(bars, dtype=np.float64).reshape(-1, 6)[-self.capacity:]
+                for i, row in enumerate(rows):
+                    self._put(i, row)
+                h[HEAD_SLOT] = len(rows)
+            else:
+                head = int(h[HEAD_SLOT])
+                last_ts = self.data[(head - 1) % self.capacity, 0] if head else -np.inf
+                if head and bar[0] == last_ts:
+                    self._put(head - 1, bar)
+                elif bar[0] > last_ts:
+                    self._put(head, bar)
+                    h[HEAD_SLOT] = head + 1
+            h[UPDATED_SLOT] = int(time.time() * 1000)
+        finally:
+            h[SEQ_SLOT] += 1  # Even: consistent
+
+    # --- Reader ---
+
+    def view(self, limit):
+        """(read-only zero-copy view of the latest min(limit, available) bars, seq); check valid(seq) after use."""
+        seq = int(self.header[SEQ_SLOT])
+        head = int(self.header[HEAD_SLOT])
+        n = max(0, min(limit, head, self.capacity))
+        end = (head - 1) % self.capacity + self.capacity + 1 if head else 0
+        out = self.data[end - n:end]
+        out.flags.writeable = False
+        return out, seq
+
+    def valid(self, seq):
+        """True when no write started or finished since the view was taken at `seq`."""
+        return not seq & 1 and int(self.header[SEQ_SLOT]) == seq
+
+    def snapshot(self, limit):
+        """Consistent copy of the latest bars plus the heartbeat, or (None, 0) if the writer kept racing us."""
+        for _ in range(READ_RETRIES):
+            bars, seq = self.view(limit)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            copy, updated = bars.copy(), int(self.header[UPDATED_SLOT])
+            if self.valid(seq):
+                return copy, updated
+        return None, 0
+
+    def close(self):
+        self.header = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A caller still holds a view(); the mapping goes away with it
+
+
+class SharedCandleWriter:
+    """Producer side. Same writer interface as CandleStore, so candle_builder can mirror into it."""
+
+    def __init__(self, capacity=MAX_STORED_BARS, prefix=SHM_PREFIX):
+        self.capacity = capacity
+        self.prefix = prefix
+        self._rings = {}
+
+        # Metrics
+        self.writes = 0
+
+    def _ring(self, symbol, timeframe):
+        name = segment_name(symbol, timeframe, self.prefix)
+        ring = self._rings.get(name)
+        if ring is None:
+            ring = self._rings[name] = CandleRing.create(name, self.capacity)
+        return ring
+
+    def replace_history(self, symbol, timeframe, bars):
+        self._ring(symbol, timeframe).write(bars=bars, replace=True)
+        self.writes += 1
+
+    def append_closed(self, symbol, timeframe, bar):
+        self._ring(symbol, timeframe).write(bar=bar)
+        self.writes += 1
+
+    def set_live(self, symbol, bars_by_tf):
+        for timeframe, bar in bars_by_tf.items():
+            self._ring(symbol, timeframe).write(bar=bar)
+        self.writes += 1
+
+    def close(self, unlink=True):
+        for ring in self._rings.values():
+            shm = ring.shm
+            ring.close()
+            if unlink:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+        self._rings = {}
+
+    def stats(self):
+        return {"segments": len(self._rings), "writes": self.writes}
+
+
+class SharedCandleReader:
+    """Consumer side: any local process. Missing segments (no producer on this host) read as None."""
+
+    def __init__(self, prefix=SHM_PREFIX, max_age_ms=LIVE_TTL * 1000):
+        self.prefix = prefix
+        self.max_age_ms = max_age_ms
+        self._rings = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def _ring(self, symbol, timeframe):
+        name = segment_name(symbol, timeframe, self.prefix)
+        ring = self._rings.get(name)
+        if ring is None:
+            try:
+                ring = self._rings[name] = CandleRing.attach(name)
+            except (FileNotFoundError, ValueError, OSError):
+                return None
+        return ring
+
+    def _forget(self, symbol, timeframe):
+        """Drops a mapping whose producer went away (a restarted producer creates a new segment)."""
+        ring = self._rings.pop(segment_name(symbol, timeframe, self.prefix), None)
+        if ring:
+            ring.close()
+
+    def view(self, symbol, timeframe, limit=100):
+        """
+        Zero-copy (bars, seq) for NumPy consumers that can re-check valid(): the view aliases the
+        producer's ring, so it is only trustworthy while valid(symbol, timeframe, seq) holds.
+        """
+        ring = self._ring(symbol, timeframe)
+        if ring is None:
+            return None, 0
+        return ring.view(limit)
+
+    def valid(self, symbol, timeframe, seq):
+        ring = self._ring(symbol, timeframe)
+        return bool(ring) and ring.valid(seq)
+
+    def read_array(self, symbol, timeframe, limit=100, now_ms=None):
+        """
+        Latest `limit` bars (closed + forming) as a float64 (limit, 6) array, or None when the
+        producer is not running, is stale, or does not cover the request (CandleStore.read rules).
+        """
+        if timeframe not in STREAM_TIMEFRAMES:
+            return None
+        ring = self._ring(symbol, timeframe)
+        if ring is None or limit > ring.capacity:
+            self.misses += 1
+            return None
+        bars, updated = ring.snapshot(limit)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if bars is None or now_ms - updated > self.max_age_ms:
+            if bars is not None:
+                self._forget(symbol, timeframe)
+            self.misses += 1
+            return None
+
+        tf = timeframe_ms(timeframe)
+        if len(bars) < limit or now_ms - bars[-1, 0] > 2 * tf or (len(bars) > 1 and bars[-1, 0] - bars[-2, 0] != tf):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bars
+
+    def read(self, symbol, timeframe, limit=100, now_ms=None):
+        """read_array() as a ccxt-style list (drop-in for CandleStore.read)."""
+        bars = self.read_array(symbol, timeframe, limit, now_ms)
+        return bars.tolist() if bars is not None else None
+
+    def close(self):
+        for ring in self._rings.values():
+            ring.close()
+        self._rings = {}
+
+    def stats(self):
+        return {"segments": len(self._rings), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton reader (None when disabled; callers fall back to Redis / REST)
+shm_candles = SharedCandleReader() if SHM_ENABLED else None
@@ -0,0 +1,134 @@
+"""
+COSMOS AI - Single Flight
+Cross-process request coalescing over Redis. The worker, oracle, paper trader,
+executor and API all run BinanceTrader; when several of them ask for the same
+(endpoint, symbol, timeframe) at once, one process takes a short lock and calls
+the exchange, the others wait for the result it publishes.
+
+sf:lock:{key}     leader token (SET NX PX)
+sf:result:{key}   JSON envelope {"ok": value} or {"error": message}, kept RESULT_TTL_MS
+"""
+import os
+import json
+import time
+import uuid
+
+import redis
+
+LOCK_TTL_MS = int(os.getenv("SINGLE_FLIGHT_LOCK_MS", "10000"))      # Upper bound for one exchange call
+RESULT_TTL_MS = int(os.getenv("SINGLE_FLIGHT_RESULT_MS", "1000"))   # Late joiners within this window reuse the result
+WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT", "10"))
+POLL_INTERVAL = 0.02
+
+
+class SharedCallError(Exception):
+    """The leader's exchange call failed; the message is the original error text."""
+
+
+class SingleFlight:
+    def __init__(self, client, lock_ttl_ms=LOCK_TTL_MS, result_ttl_ms=RESULT_TTL_MS,
+                 wait_timeout=WAIT_TIMEOUT, poll_interval=POLL_INTERVAL):
+        self.client = client
+        self.lock_ttl_ms = lock_ttl_ms
+        self.result_ttl_ms = result_ttl_ms
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+        # Metrics
+        self.leads = 0
+        self.shared = 0
+        self.fallbacks = 0
+
+    def do(self, key, fn):
+        """
+        Returns fn() once across processes for concurrent callers of `key`.
+        Redis problems never block a caller: it falls back to calling fn() itself.
+        """
+        if not self.client:
+            return fn()
+        lock_key, result_key = f"sf:lock:{key}", f"sf:result:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            envelope = self._read(result_key)
+            if envelope is None:
+                if self.client.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                    return self._lead(fn, lock_key, result_key, token)
+                envelope = self._wait(lock_key, result_key)
+        except redis.RedisError:
+            envelope = None
+
+        if envelope is None:
+            # Leader died, timed out or Redis failed: call the exchange ourselves
+            self.fallbacks += 1
+            return fn()
+        self.shared += 1
+        if "error" in envelope:
+            raise SharedCallError(envelope["error"])
+        return envelope["ok"]
+
+    def _lead(self, fn, lock_key, result_key, token):
+        self.leads += 1
+        try:
+            try:
+                result = fn()
+            except Exception as e:
+                self._publish(result_key, {"error": str(e)})
+                raise
+            self._publish(result_key, {"ok": result})  # Before the release: a waiter sees the lock or the result
+            return result
+        finally:
+            self._release(lock_key, token)
+
+    def _read(self, result_key):
+        raw = self.client.get(result_key)
+        return json.loads(raw) if raw else None
+
+    def _wait(self, lock_key, result_key):
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            envelope = self._read(result_key)
+            if envelope is not None:
+                return envelope
+            if not self.client.exists(lock_key):
+                return self._read(result_key)  # Released: the result is there unless the leader died
+        return None
+
+    def _publish(self, result_key, envelope):
+        try:
+            self.client.set(result_key, json.dumps(envelope, default=str), px=self.result_ttl_ms)
+        except (redis.RedisError, TypeError, ValueError) as e:
+            print(f"   [SINGLE FLIGHT] Could not publish {result_key}: {e}")
+
+    def _release(self, lock_key, token):
+        """Deletes the lock only if we still own it (it may have expired and been re-taken)."""
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+        except redis.RedisError:
+            pass
+
+    def stats(self):
+        return {"leads": self.leads, "shared": self.shared, "fallbacks": self.fallbacks}
+
+
+def _build_default():
+    if os.getenv("SINGLE_FLIGHT", "true").lower() == "false":
+        return SingleFlight(None)
+    try:
+        from redis_engine import redis_engine
+        return SingleFlight(redis_engine.client)
+    except Exception as e:
+        print(f"   [SINGLE FLIGHT] Redis unavailable ({e}). Requests are not coalesced.")
+        return SingleFlight(None)
+
+
+# Singleton used by BinanceTrader (pass-through when Redis is offline)
+single_flight = _build_default()
@@ -1,7 +1,111 @@
+"""
+COSMOS AI - Smart Money Concepts
+Fair value gaps and order blocks as NumPy array operations (V7800).
 
+Kernels work on the last axis, so one call covers a single symbol's history
+or a (symbols x bars) panel. For every bar t they give the value analyze()
+returns for the candles up to and including t:
+- FVG: high[t-2] < low[t] (bullish) / low[t-2] > high[t] (bearish)
+- OB: close[t] breaks the previous 9 bars' high (low) and some earlier bearish
+  (bullish) candle, from index 1 on, sits within 5% of it. Whether one exists is
+  the running max of bearish lows (running min of bullish highs).
+
+analyze(df) keeps its output schema; analyze_batch() does the whole universe in
+one pass and analyze_history() gives per-bar results for backtests.
+"""
 import pandas as pd
 import numpy as np
 
+import kernels # V8100: Single-pass order block kernel (numba when installed)
+
+OB_LOOKBACK = 9         # Bars before the current one whose high/low must be broken
+OB_MAX_DISTANCE = 0.05  # Max distance from the current close to the order block candle
+HISTORY_COLUMNS = ['fvg_bullish', 'fvg_bearish', 'fvg_bottom', 'fvg_top', 'ob_bullish', 'ob_bearish']
+
+
+def _as_array(x):
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+# --- NumPy kernels ---
+
+def fvg_series(high, low):
+    """(bullish, bearish, top, bottom) per bar; False/0 for the first two bars."""
+    high, low = _as_array(high), _as_array(low)
+    bullish = np.zeros(high.shape, dtype=bool)
+    bearish = np.zeros(high.shape, dtype=bool)
+    top = np.zeros(high.shape)
+    bottom = np.zeros(high.shape)
+    if high.shape[-1] < 3:
+        return bullish, bearish, top, bottom
+    h1, l1 = high[..., :-2], low[..., :-2]   # Candle 1 (t-2)
+    h3, l3 = high[..., 2:], low[..., 2:]     # Candle 3 (t)
+    bullish[..., 2:] = h1 < l3
+    bearish[..., 2:] = l1 > h3
+    top[..., 2:] = np.where(bullish[..., 2:], l3, np.where(bearish[..., 2:], l1, 0.0))
+    bottom[..., 2:] = np.where(bullish[..., 2:], h1, np.where(bearish[..., 2:], h3, 0.0))
+    return bullish, bearish, top, bottom
+
+
+def _previous_extreme(x, lookback, fn, fill):
+    """fn over x[t-lookback : t] (current bar excluded, clipped at the start)."""
+    pad = np.full(x.shape[:-1] + (lookback,), fill)
+    padded = np.concatenate([pad, x], axis=-1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, lookback, axis=-1)
+    return fn(windows[..., :x.shape[-1], :], axis=-1)
+
+
+def _shift(x, fill):
+    out = np.empty_like(x)
+    out[..., 0] = fill
+    out[..., 1:] = x[..., :-1]
+    return out
+
+
+def ob_series(open_, high, low, close, lookback=OB_LOOKBACK, max_distance=OB_MAX_DISTANCE):
+    """(bullish, bearish) order block flags per bar; False for the first four bars."""
+    open_, high, low, close = (_as_array(a) for a in (open_, high, low, close))
+    n = close.shape[-1]
+    bullish = np.zeros(close.shape, dtype=bool)
+    bearish = np.zeros(close.shape, dtype=bool)
+    if n < 5:
+        return bullish, bearish
+
+    prev_high = _previous_extreme(high, lookback, np.max, -np.inf)
+    prev_low = _previous_extreme(low, lookback, np.min, np.inf)
+
+    # Candidates are bars 1..t-1: running extreme up to t-1, bar 0 excluded
+    eligible = np.arange(n) >= 1
+    bear_lows = np.where((close < open_) & eligible, low, -np.inf)
+    bull_highs = np.where((close > open_) & eligible, high, np.inf)
+    nearest_bear_low = _shift(np.maximum.accumulate(bear_lows, axis=-1), -np.inf)
+    nearest_bull_high = _shift(np.minimum.accumulate(bull_highs, axis=-1), np.inf)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bullish[..., 4:] = ((close > prev_high) & ((close - nearest_bear_low) / close < max_distance))[..., 4:]
+        bearish[..., 4:] = ((close < prev_low) & ((nearest_bull_high - close) / close < max_distance))[..., 4:]
+    return bullish, bearish
+
+
+def _columns(frame):
+    """open/high/low/close arrays from a DataFrame or a ccxt OHLCV list."""
+    if isinstance(frame, pd.DataFrame):
+        return tuple(frame[c].to_numpy(dtype=np.float64) for c in ('open', 'high', 'low', 'close'))
+    bars = np.asarray(frame, dtype=np.float64).reshape(-1, 6)
+    return bars[:, 1], bars[:, 2], bars[:, 3], bars[:, 4]
+
+
+def _result(fvg_bull, fvg_bear, bottom, top, ob_bull, ob_bear):
+    fvg_bull, fvg_bear = bool(fvg_bull), bool(fvg_bear)
+    return {
+        "fvg_bullish": fvg_bull,
+        "fvg_bearish": fvg_bear,
+        "ob_bullish": bool(ob_bull),
+        "ob_bearish": bool(ob_bear),
+        "fvg_levels": [float(bottom), float(top)] if (fvg_bull or fvg_bear) else []
+    }
+
+
 class SMCEngine:
     def __init__(self):
         self.is_active = True
@@ -12,21 +116,11 @@ class SMCEngine:
         A 3-candle pattern where there's a gap between Candle 1 and Candle 3.
         """
         if len(df) < 3: return {"bullish": False, "bearish": False}
-        
-        # Look at the last 3 candles
-        c1 = df.iloc[-3]
-        c2 = df.iloc[-2]
-        c3 = df.iloc[-1]
-        
-        bullish_fvg = c1['high'] < c3['low']
-        bearish_fvg = c1['low'] > c3['high']
-        
-        return {
-            "bullish": bullish_fvg,
-            "bearish": bearish_fvg,
-            "top": c3['low'] if bullish_fvg else (c1['low'] if bearish_fvg else 0),
-            "bottom": c1['high'] if bullish_fvg else (c3['high'] if bearish_fvg else 0)
-        }
+        high = df['high'].to_numpy(dtype=np.float64)[-3:]
+        low = df['low'].to_numpy(dtype=np.float64)[-3:]
+        bullish, bearish, top, bottom = fvg_series(high, low)
+        return {"bullish": bool(bullish[-1]), "bearish": bool(bearish[-1]),
+                "top": float(top[-1]), "bottom": float(bottom[-1])}
 
     def detect_ob(self, df: pd.DataFrame):
         """
@@ -35,48 +129,66 @@ class SMCEngine:
         Bearish OB: Last bullish candle before a strong downward move.
         """
         if len(df) < 5: return {"bullish": False, "bearish": False}
-        
-        # Simple Logic: Check if price just broke a recent high/low with momentum
-        last_price = df.iloc[-1]['close']
-        prev_highs = df['high'].iloc[-10:-1].max()
-        prev_lows = df['low'].iloc[-10:-1].min()
-        
-        # Bullish OB check
-        # If we just broke a recent high, the last bearish candle in the dip is the OB
+        open_, high, low, close = _columns(df)
+        last_price = close[-1]
+        body = slice(1, -1)  # Candidates: every candle but the first and the current one
+
         bullish_ob = False
-        if last_price > prev_highs:
-            # Look for the last bearish candle
-            for i in range(len(df)-2, 0, -1):
-                if df.iloc[i]['close'] < df.iloc[i]['open']:
-                    # We found a candidate, check if it's within a reasonable distance
-                    if (last_price - df.iloc[i]['low']) / last_price < 0.05:
-                        bullish_ob = True
-                        break
-        
-        # Bearish OB check
+        if last_price > high[-(OB_LOOKBACK + 1):-1].max():
+            lows = low[body][close[body] < open_[body]]
+            bullish_ob = bool(len(lows)) and (last_price - lows.max()) / last_price < OB_MAX_DISTANCE
+
         bearish_ob = False
-        if last_price < prev_lows:
-            for i in range(len(df)-2, 0, -1):
-                if df.iloc[i]['close'] > df.iloc[i]['open']:
-                    if (df.iloc[i]['high'] - last_price) / last_price < 0.05:
-                        bearish_ob = True
-                        break
-                        
-        return {"bullish": bullish_ob, "bearish": bearish_ob}
+        if last_price < low[-(OB_LOOKBACK + 1):-1].min():
+            highs = high[body][close[body] > open_[body]]
+            bearish_ob = bool(len(highs)) and (highs.min() - last_price) / last_price < OB_MAX_DISTANCE
+
+        return {"bullish": bool(bullish_ob), "bearish": bool(bearish_ob)}
 
     def analyze(self, df: pd.DataFrame):
         """Main analysis entry point."""
         if df.empty: return {}
-        
+
         fvg = self.detect_fvg(df)
         ob = self.detect_ob(df)
-        
-        return {
-            "fvg_bullish": fvg['bullish'],
-            "fvg_bearish": fvg['bearish'],
-            "ob_bullish": ob['bullish'],
-            "ob_bearish": ob['bearish'],
-            "fvg_levels": [fvg['bottom'], fvg['top']] if (fvg['bullish'] or fvg['bearish']) else []
-        }
+        return _result(fvg['bullish'], fvg['bearish'], fvg.get('bottom', 0), fvg.get('top', 0),
+                       ob['bullish'], ob['bearish'])
+
+    def analyze_batch(self, frames):
+        """
+        {symbol: DataFrame or ccxt OHLCV list} -> {symbol: analyze(df)}. Frames of equal
+        length are stacked into one (symbols x bars) array and analyzed in a single kernel pass.
+        """
+        groups = {}
+        for symbol, frame in frames.items():
+            if frame is not None and len(frame):
+                groups.setdefault(len(frame), []).append(symbol)
+
+        out = {}
+        for n, symbols in groups.items():
+            open_, high, low, close = (np.vstack(cols) for cols in zip(*(_columns(frames[s]) for s in symbols)))
+            fvg_bull, fvg_bear, top, bottom = fvg_series(high[:, -3:], low[:, -3:])
+            ob_bull, ob_bear = ob_series(open_, high, low, close)
+            for i, symbol in enumerate(symbols):
+                out[symbol] = _result(fvg_bull[i, -1], fvg_bear[i, -1], bottom[i, -1], top[i, -1],
+                                      ob_bull[i, -1], ob_bear[i, -1])
+        return out
+
+    def analyze_history(self, df: pd.DataFrame):
+        """
+        Long-history mode (backtests): one row per bar with what analyze() returns for the
+        candles up to that bar, as columns fvg_bullish/fvg_bearish/fvg_bottom/fvg_top/ob_bullish/ob_bearish.
+        """
+        open_, high, low, close = _columns(df)
+        fvg_bull, fvg_bear, top, bottom = fvg_series(high, low)
+        if kernels.USE_NUMBA:
+            ob_bull, ob_bear = kernels.order_blocks(open_, high, low, close, OB_LOOKBACK, OB_MAX_DISTANCE)
+        else:
+            ob_bull, ob_bear = ob_series(open_, high, low, close)
+        return pd.DataFrame({
+            'fvg_bullish': fvg_bull, 'fvg_bearish': fvg_bear, 'fvg_bottom': bottom, 'fvg_top': top,
+            'ob_bullish': ob_bull, 'ob_bearish': ob_bear,
+        }, index=df.index, columns=HISTORY_COLUMNS)
 
 smc_engine = SMCEngine()
+
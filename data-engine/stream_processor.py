@@ -3,6 +3,7 @@ import json
 import os
 import logging
 from redis_engine import redis_engine
+from vpin import StreamingVPIN # V7900: Per-symbol VPIN from the trade ticks
 import websockets
 from dotenv import load_dotenv
 
@@ -16,6 +17,7 @@ logger = logging.getLogger(__name__)
 # Config
 BINANCE_WSS = "wss://stream.binance.com:9443/ws"
 NOISE_THRESHOLD_USD = 1000 # Ignore trades < $1000 volume
+VPIN_BUCKET_USD = float(os.getenv("VPIN_BUCKET_USD", "250000")) # Quote volume per VPIN bucket
 
 # Assets to Watch (Aggregated Stream)
 # Format: btcusdt@trade/ethusdt@trade
@@ -23,6 +25,9 @@ WATCH_LIST = ["btcusdt", "ethusdt", "solusdt", "bnbusdt", "xrpusdt", "adausdt"]
 STREAM_STRING = "/".join([f"{s}@trade" for s in WATCH_LIST])
 FULL_URL = f"{BINANCE_WSS}/{STREAM_STRING}"
 
+# V7900: One streaming VPIN per symbol (every trade counts, including the ones the noise filter drops)
+vpin_state = {}
+
 async def process_trade(trade_data):
     """
     Filters noise and pushes significant flow to Redis.
@@ -35,6 +40,13 @@ async def process_trade(trade_data):
         
         volume_usd = price * qty
         
+        # 0. VPIN: m = buyer is maker, so the aggressor sold
+        flow = vpin_state.get(symbol)
+        if flow is None:
+            flow = vpin_state[symbol] = StreamingVPIN(VPIN_BUCKET_USD)
+        if flow.update(price, volume_usd, side='sell' if trade_data.get('m') else 'buy') and flow.value is not None:
+            redis_engine.set_vpin(symbol, round(flow.value, 4))
+        
         # 1. NOISE FILTER
         if volume_usd < NOISE_THRESHOLD_USD:
             return # Drop noise
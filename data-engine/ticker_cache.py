@@ -0,0 +1,75 @@
+"""
+COSMOS AI - Ticker Cache
+Short-TTL ticker snapshots shared by every caller of BinanceTrader.fetch_ticker(s),
+so the price feed, paper trader and worker loop hitting the same symbols within
+the window cost one exchange round-trip.
+"""
+import os
+import time
+import threading
+
+DEFAULT_TTL = float(os.getenv("TICKER_CACHE_TTL", "1.0"))  # Seconds
+
+
+class TickerCache:
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries = {}                    # symbol -> (monotonic time, ticker)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()    # One in-flight load; concurrent callers wait for it
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.round_trips = 0
+
+    def get(self, symbol, now=None):
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            entry = self._entries.get(symbol)
+        if entry and now - entry[0] <= self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, symbol, ticker, now=None):
+        self.put_many({symbol: ticker}, now)
+
+    def put_many(self, tickers, now=None):
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            for symbol, ticker in tickers.items():
+                if ticker:
+                    self._entries[symbol] = (now, ticker)
+
+    def _split(self, symbols):
+        fresh, missing = {}, []
+        for symbol in symbols:
+            ticker = self.get(symbol)
+            if ticker:
+                fresh[symbol] = ticker
+            else:
+                missing.append(symbol)
+        return fresh, missing
+
+    def get_many(self, symbols, loader):
+        """
+        Fresh snapshots from the cache; the rest through a single loader(missing) call
+        returning {symbol: ticker}. Symbols the loader cannot price are left out.
+        """
+        fresh, missing = self._split(symbols)
+        if missing:
+            with self._load_lock:
+                # A concurrent caller may have loaded them while we waited
+                late, missing = self._split(missing)
+                fresh.update(late)
+                if missing:
+                    loaded = loader(missing) or {}
+                    self.put_many(loaded)
+                    self.round_trips += 1
+                    fresh.update({s: loaded[s] for s in missing if loaded.get(s)})
+        self.hits += len(symbols) - len(missing)
+        self.misses += len(missing)
+        return fresh
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "round_trips": self.round_trips}
@@ -0,0 +1,202 @@
+"""
+COSMOS AI - Universe Service
+The ranked scan universe (priority assets + configured pairs + top-volume
+pairs, blacklist applied) is computed off the scan loop and published to Redis
+with a version number. Every process reads the same list; the version changes
+only when the list does, and each change is announced on a channel.
+
+universe:current   hash {version, symbols (JSON), dynamic (JSON), updated_at}
+universe:version   monotonically increasing counter
+universe:lock      one refresher across processes (SET NX PX)
+universe:updates   pub/sub channel, message = new version
+"""
+import os
+import json
+import time
+import uuid
+import threading
+
+import redis
+
+REFRESH_INTERVAL = float(os.getenv("UNIVERSE_REFRESH_INTERVAL", "1800"))  # Seconds
+DYNAMIC_LIMIT = int(os.getenv("UNIVERSE_DYNAMIC_LIMIT", "10"))             # Top-volume pairs merged in
+LOCK_TTL_MS = 120_000
+CHANNEL = "universe:updates"
+CURRENT_KEY, VERSION_KEY, LOCK_KEY = "universe:current", "universe:version", "universe:lock"
+
+
+def compute_universe(limit=DYNAMIC_LIMIT):
+    """(symbols, dynamic): priority + configured + top-volume pairs, ordered, blacklist applied."""
+    from scanner import SYMBOLS, PRIORITY_ASSETS, ASSET_BLACKLIST, get_top_vol_pairs
+    dynamic = get_top_vol_pairs(limit=limit) or []
+    unique = list(dict.fromkeys(list(PRIORITY_ASSETS) + list(SYMBOLS) + dynamic))
+    return [s for s in unique if not any(b in s.upper() for b in ASSET_BLACKLIST)], dynamic
+
+
+class UniverseService:
+    def __init__(self, client, compute=compute_universe, refresh_interval=REFRESH_INTERVAL):
+        self.client = client
+        self.compute = compute
+        self.refresh_interval = refresh_interval
+        self._snapshot = {"version": 0, "symbols": [], "dynamic": [], "updated_at": 0.0}
+        self._listening = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Metrics
+        self.refreshes = 0
+        self.changes = 0
+
+    # --- Read side ---
+
+    def get(self):
+        """Current snapshot. Served from memory while subscribed; otherwise one HGETALL."""
+        if self.client and not self._listening:
+            try:
+                self._load()
+            except redis.RedisError as e:
+                print(f"   [UNIVERSE] Redis read failed: {e}")
+        with self._lock:
+            return dict(self._snapshot)
+
+    def symbols(self):
+        """Universe for this cycle; computed inline only if nothing was ever published."""
+        snap = self.get()
+        if not snap["symbols"]:
+            self.refresh()
+            snap = self.get()
+        return list(snap["symbols"])
+
+    def version(self):
+        return self.get()["version"]
+
+    def on_change(self, callback):
+        """callback(snapshot) after each version change seen by this process."""
+        self._callbacks.append(callback)
+
+    def _load(self):
+        raw = self.client.hgetall(CURRENT_KEY)
+        if not raw:
+            return
+        snap = {
+            "version": int(raw["version"]),
+            "symbols": json.loads(raw["symbols"]),
+            "dynamic": json.loads(raw.get("dynamic", "[]")),
+            "updated_at": float(raw.get("updated_at", 0)),
+        }
+        with self._lock:
+            changed = snap["version"] != self._snapshot["version"]
+            self._snapshot = snap
+        if changed:
+            for cb in self._callbacks:
+                try:
+                    cb(dict(snap))
+                except Exception as e:
+                    print(f"   [UNIVERSE] Change callback failed: {e}")
+
+    # --- Write side ---
+
+    def _publish(self, symbols, dynamic, now):
+        """Bumps the version only when the list changed; otherwise just marks it fresh."""
+        if not self.client:
+            with self._lock:
+                changed = symbols != self._snapshot["symbols"]
+                version = self._snapshot["version"] + (1 if changed else 0)
+                self._snapshot = {"version": version, "symbols": symbols, "dynamic": dynamic, "updated_at": now}
+            return changed
+
+        current = self.client.hget(CURRENT_KEY, "symbols")
+        if current is not None and json.loads(current) == symbols:
+            self.client.hset(CURRENT_KEY, "updated_at", now)
+            return False
+        version = self.client.incr(VERSION_KEY)
+        with self.client.pipeline() as pipe:
+            pipe.hset(CURRENT_KEY, mapping={
+                "version": version, "symbols": json.dumps(symbols),
+                "dynamic": json.dumps(dynamic), "updated_at": now,
+            })
+            pipe.publish(CHANNEL, version)
+            pipe.execute()
+        return True
+
+    def refresh(self, force=False, now=None):
+        """Recomputes and publishes if the shared copy is stale (or force). Returns True when it ran."""
+        now = now if now is not None else time.time()
+        if not force and self._fresh(now):
+            return False
+        token = uuid.uuid4().hex
+        if self.client and not self.client.set(LOCK_KEY, token, nx=True, px=LOCK_TTL_MS):
+            return False  # Another process is refreshing
+        try:
+            symbols, dynamic = self.compute()
+            if not symbols:
+                return False  # Keep serving the previous universe
+            self.refreshes += 1
+            if self._publish(list(symbols), list(dynamic), now):
+                self.changes += 1
+                print(f"   [UNIVERSE] v{self.get()['version']}: {len(symbols)} pairs (dynamic: {dynamic})")
+            return True
+        finally:
+            if self.client and self.client.get(LOCK_KEY) == token:
+                self.client.delete(LOCK_KEY)
+
+    def _fresh(self, now):
+        if self.client:
+            updated = self.client.hget(CURRENT_KEY, "updated_at")
+            return updated is not None and now - float(updated) < self.refresh_interval
+        with self._lock:
+            return bool(self._snapshot["symbols"]) and now - self._snapshot["updated_at"] < self.refresh_interval
+
+    # --- Background ---
+
+    def start(self):
+        """Background refresher plus a subscriber that keeps the in-memory copy current."""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name="universe-refresh", daemon=True)
+        self._thread.start()
+        if self.client:
+            threading.Thread(target=self._listen, name="universe-listen", daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"   [UNIVERSE] Refresh failed: {e}")
+            time.sleep(min(60.0, self.refresh_interval))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub()
+                pubsub.subscribe(CHANNEL)
+                self._load()
+                self._listening = True
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._load()
+            except Exception as e:
+                print(f"   [UNIVERSE] Subscriber error: {e}")
+            self._listening = False
+            time.sleep(5)
+
+    def stats(self):
+        snap = self.get()
+        return {"version": snap["version"], "pairs": len(snap["symbols"]),
+                "age_s": round(time.time() - snap["updated_at"], 1) if snap["updated_at"] else None,
+                "refreshes": self.refreshes, "changes": self.changes}
+
+
+def _build_default():
+    try:
+        from redis_engine import redis_engine
+        return UniverseService(redis_engine.client)
+    except Exception as e:
+        print(f"   [UNIVERSE] Redis unavailable ({e}). Universe is per process.")
+        return UniverseService(None)
+
+
+# Singleton shared by cosmos_worker, scanner and candle_builder
+universe_service = _build_default()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+NEXUS AI - Indicator Benchmark
+Compares the shared NumPy kernels (data-engine/indicators.py) with the previous
+per-module pandas definitions at scanner size (100 bars) and backtest size (100k bars).
+
+Usage: python scripts/bench_indicators.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-engine'))
+
+import indicators
+
+
+# --- Previous pandas definitions (scanner.py / cosmos_oracle.py) ---
+
+def old_rsi(series, period=14):
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def old_macd(series, fast=12, slow=26, signal=9):
+    exp1 = series.ewm(span=fast, adjust=False).mean()
+    exp2 = series.ewm(span=slow, adjust=False).mean()
+    macd_line = exp1 - exp2
+    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+    return macd_line, signal_line, macd_line - signal_line
+
+def old_ema(series, period=200):
+    return series.ewm(span=period, adjust=False).mean()
+
+def old_atr(df, period=14):
+    close = df['close'].shift(1)
+    tr = pd.concat([df['high'] - df['low'], (df['high'] - close).abs(), (df['low'] - close).abs()], axis=1).max(axis=1)
+    return tr.ewm(alpha=1 / period, adjust=False).mean()
+
+
+def make_df(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    return pd.DataFrame({'high': close + spread, 'low': close - spread, 'close': close})
+
+
+def run_old(df):
+    old_rsi(df['close'])
+    old_macd(df['close'])
+    old_ema(df['close'])
+    old_atr(df)
+
+def run_pandas_adapter(df):
+    indicators.calculate_rsi(df['close'])
+    indicators.calculate_macd(df['close'])
+    indicators.calculate_ema(df['close'])
+    indicators.calculate_atr(df)
+
+def run_kernels(high, low, close):
+    indicators.rsi(close)
+    indicators.macd(close)
+    indicators.ema(close, 200)
+    indicators.atr(high, low, close)
+
+
+def bench(n, repeat):
+    df = make_df(n)
+    arrays = (df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+    rows = [
+        ("pandas (old)", lambda: run_old(df)),
+        ("adapter (calculate_*)", lambda: run_pandas_adapter(df)),
+        ("kernels (arrays)", lambda: run_kernels(*arrays)),
+    ]
+    base = None
+    print(f"\n{n:,} bars ({repeat} runs, best of 5)")
+    for name, fn in rows:
+        best = min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+        base = base or best
+        print(f"   {name:<24} {best * 1e6:>10.1f} us   x{base / best:.1f}")
+
+
+if __name__ == "__main__":
+    print(f"scipy lfilter: {'yes' if indicators.SCIPY_AVAILABLE else 'no (Python loop fallback)'}")
+    bench(100, repeat=500)
+    bench(100_000, repeat=10)
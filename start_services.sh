@@ -21,16 +21,16 @@ check_process() {
 
 # 1. INITIALIZATION PHASE
 echo ""
-echo "[1/6] Initializing AI Models..."
+echo "[1/8] Initializing AI Models..."
 python -u force_retrain.py || echo "⚠️  Model training skipped (may already exist)"
 
 echo ""
-echo "[2/6] Loading Academic Knowledge..."
+echo "[2/8] Loading Academic Knowledge..."
 python -u seed_academic_knowledge.py || echo "⚠️  Academic seeding skipped (may already exist)"
 
 # 2. START CORE SERVICES
 echo ""
-echo "[3/6] Starting Cosmos Worker (Signal Generator)..."
+echo "[3/8] Starting Cosmos Worker (Signal Generator)..."
 python -u cosmos_worker.py > /tmp/cosmos_worker.log 2>&1 &
 WORKER_PID=$!
 sleep 3
@@ -42,7 +42,7 @@ else
 fi
 
 echo ""
-echo "[4/6] Starting AI Oracle..."
+echo "[4/8] Starting AI Oracle..."
 python -u cosmos_oracle.py > /tmp/cosmos_oracle.log 2>&1 &
 ORACLE_PID=$!
 sleep 2
@@ -53,7 +53,7 @@ else
 fi
 
 echo ""
-echo "[5/6] Starting Macro Feed..."
+echo "[5/8] Starting Macro Feed..."
 python -u macro_feed.py > /tmp/macro_feed.log 2>&1 &
 MACRO_PID=$!
 sleep 2
@@ -64,7 +64,29 @@ else
 fi
 
 echo ""
-echo "[6/6] Starting Nexus Executor..."
+echo "[6/8] Starting Candle Builder (Kline Stream)..."
+python -u candle_builder.py > /tmp/candle_builder.log 2>&1 &
+CANDLE_PID=$!
+sleep 2
+if ps -p $CANDLE_PID > /dev/null; then
+    echo "✅ Candle Builder started (PID: $CANDLE_PID)"
+else
+    echo "⚠️  Candle Builder failed (non-critical, scanner falls back to REST)"
+fi
+
+echo ""
+echo "[7/8] Starting Book Keeper (L2 Replica)..."
+python -u book_keeper.py > /tmp/book_keeper.log 2>&1 &
+BOOK_PID=$!
+sleep 2
+if ps -p $BOOK_PID > /dev/null; then
+    echo "✅ Book Keeper started (PID: $BOOK_PID)"
+else
+    echo "⚠️  Book Keeper failed (non-critical, order books fall back to REST)"
+fi
+
+echo ""
+echo "[8/8] Starting Nexus Executor..."
 python -u nexus_executor.py > /tmp/nexus_executor.log 2>&1 &
 EXECUTOR_PID=$!
 sleep 2
@@ -86,7 +108,7 @@ echo ""
 cleanup() {
     echo ""
     echo "Shutting down services..."
-    kill $WORKER_PID $ORACLE_PID $MACRO_PID $EXECUTOR_PID 2>/dev/null || true
+    kill $WORKER_PID $ORACLE_PID $MACRO_PID $CANDLE_PID $BOOK_PID $EXECUTOR_PID 2>/dev/null || true
     exit 0
 }
 trap cleanup SIGTERM SIGINT
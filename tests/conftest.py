@@ -0,0 +1,20 @@
+"""
+COSMOS AI - Shared pytest configuration
+Benchmarks (@pytest.mark.benchmark) assert wall-clock thresholds, which depend on the
+machine; they are skipped unless COSMOS_BENCHMARKS=1 (run them with -s to see the numbers).
+"""
+import os
+import pytest
+
+BENCHMARKS = os.getenv("COSMOS_BENCHMARKS") == "1"
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: wall-clock threshold, runs only with COSMOS_BENCHMARKS=1")
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARKS:
+        return
+    skip = pytest.mark.skip(reason="benchmark (set COSMOS_BENCHMARKS=1)")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
@@ -0,0 +1,149 @@
+"""
+COSMOS AI - Unit Tests for Order Book Depth Analytics
+Tests para validar el análisis de profundidad en una pasada (desbalance, slippage, muros, caché por actualización)
+"""
+import pytest
+import sys
+import os
+import math
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from book_depth import analyze, DepthCache, imbalance_at, max_notional, slippage_bps, walls_at
+from book_store import book_metrics
+
+def make_book(levels=100, seed=0, mid=100.0, tick=0.01):
+    rng = np.random.default_rng(seed)
+    bids = [[round(mid - tick * (i + 1), 2), float(q)] for i, q in enumerate(rng.uniform(0.5, 5, levels))]
+    asks = [[round(mid + tick * (i + 1), 2), float(q)] for i, q in enumerate(rng.uniform(0.5, 5, levels))]
+    return bids, asks
+
+def walk(levels, notional):
+    """Referencia: recorre el libro nivel a nivel y devuelve el VWAP (None si no alcanza)"""
+    spent, qty = 0.0, 0.0
+    for price, size in levels:
+        take = min(size, (notional - spent) / price)
+        spent += take * price
+        qty += take
+        if spent >= notional - 1e-9:
+            return spent / qty
+    return None
+
+class TestAnalyze:
+    """Tests para book_depth.analyze"""
+
+    def test_imbalance_and_depth_match_python_sums(self):
+        """Test que los volúmenes coinciden bit a bit con sumar los niveles en Python"""
+        bids, asks = make_book(100, seed=1)
+        a = analyze(bids, asks)
+        bid_vol, ask_vol = sum(b[1] for b in bids), sum(x[1] for x in asks)
+
+        assert a['imbalance'] == (bid_vol - ask_vol) / (bid_vol + ask_vol)
+        assert a['depth'][10]['bid'] == sum(b[1] for b in bids[:10])
+        assert imbalance_at(a['bid'], a['ask'], 50) == pytest.approx(
+            (sum(b[1] for b in bids[:50]) - sum(x[1] for x in asks[:50])) / (sum(b[1] for b in bids[:50]) + sum(x[1] for x in asks[:50])))
+        assert a['spread_bps'] == pytest.approx(0.02 / 100 * 1e4)
+        assert a['bid']['cum_notional'][-1] == pytest.approx(sum(p * q for p, q in bids))
+
+    def test_book_metrics_keeps_its_layout(self):
+        """Test que book_metrics (payload de book_keeper) conserva las claves y añade slippage"""
+        bids = [[100.0 - i, 3.0] for i in range(60)]
+        asks = [[101.0 + i, 1.0] for i in range(60)]
+        m = book_metrics(bids, asks)
+
+        assert m['imbalance']['50'] == pytest.approx((150 - 50) / 200)
+        assert m['bid_depth']['10'] == 30.0 and m['ask_depth']['100'] == 60.0
+        assert m['slippage_bps']['buy']['1000'] == pytest.approx((1000 / 9.5 / 101 - 1) * 1e4, rel=1e-6)  # 9 niveles + medio nivel a 110
+        assert m['slippage_bps']['buy']['100000'] is None  # Más profundo que el libro
+
+    @pytest.mark.parametrize("notional", [50.0, 1_000.0, 10_000.0, 40_000.0])
+    def test_slippage_matches_book_walk(self, notional):
+        """Test que el slippage vectorizado coincide con recorrer el libro orden a orden"""
+        bids, asks = make_book(100, seed=2)
+        a = analyze(bids, asks, notionals=(notional,))
+        for side, levels, sign in (('buy', asks, 1), ('sell', bids, -1)):
+            vwap = walk(levels, notional)
+            expected = sign * (vwap / levels[0][0] - 1) * 1e4 if vwap else float('nan')
+            got = a['ask' if side == 'buy' else 'bid']['slippage'][notional]
+            assert got == pytest.approx(expected, rel=1e-9, abs=1e-9) or (math.isnan(got) and math.isnan(expected))
+
+            vwap = walk(levels, notional + 1.0)  # Fuera de SLIPPAGE_NOTIONALS: calculado a demanda
+            if vwap:
+                assert slippage_bps(a, side, notional + 1.0) == pytest.approx(sign * (vwap / levels[0][0] - 1) * 1e4, rel=1e-9)
+
+    @pytest.mark.parametrize("side", ['buy', 'sell'])
+    def test_max_notional_inverts_the_curve(self, side):
+        """Test que max_notional devuelve el tamaño cuyo slippage es justo el límite"""
+        a = analyze(*make_book(100, seed=3))
+        for bps in (0.5, 2.0, 10.0):
+            size = max_notional(a, side, bps)
+            assert slippage_bps(a, side, size) == pytest.approx(bps, rel=1e-6)
+            assert slippage_bps(a, side, size * 1.01) > bps
+        assert max_notional(a, side, 1e6) == pytest.approx(a['ask' if side == 'buy' else 'bid']['notional'])
+
+    def test_walls_are_clustered(self):
+        """Test que niveles contiguos por encima del 5% se agrupan y coinciden con la regla original"""
+        bids = [[100.0 - i, 1.0] for i in range(40)]
+        for i in (2, 3, 7):
+            bids[i][1] = 10.0
+        asks = [[101.0 + i, 1.0] for i in range(40)]
+        a = analyze(bids, asks)
+        total = sum(b[1] for b in bids)
+
+        walls = a['bid']['walls']
+        assert [(w['from'], w['to'], w['levels']) for w in walls] == [(98.0, 97.0, 2), (93.0, 93.0, 1)]
+        flagged = {b[0] for b in bids[:10] if b[1] > total * 0.05}
+        assert flagged == {98.0, 97.0, 93.0}
+        assert walls[0]['qty'] == 20.0 and walls[0]['share'] == pytest.approx(20 / total)
+        assert a['ask']['walls'] == []
+        assert [w['price'] for w in walls_at(a['bid'], depth=5)] == [98.0]  # Sólo los 5 primeros niveles
+
+    def test_empty_side(self):
+        """Test que un lado vacío no rompe el análisis"""
+        a = analyze([[99.0, 1.0]], [])
+        assert a['imbalance'] == 1.0 and a['spread_bps'] == 0.0
+        assert max_notional(a, 'buy', 10) == 0.0
+        assert math.isnan(slippage_bps(a, 'buy', 100))
+
+class TestDepthCache:
+    """Tests para la caché por actualización del libro"""
+
+    def test_one_computation_per_update(self):
+        """Test que la misma actualización (o una copia truncada) no se recalcula"""
+        cache = DepthCache()
+        bids, asks = make_book(100, seed=4)
+        book = {'symbol': 'BTC/USDT', 'bids': bids, 'asks': asks, 'nonce': 7, 'timestamp': 1}
+        first = cache.get(book)
+        top50 = {**book, 'bids': bids[:50], 'asks': asks[:50]}
+
+        assert cache.get(top50) is first
+        assert cache.get(book) is first
+        assert cache.stats() == {'symbols': 1, 'hits': 2, 'misses': 1}
+        assert cache.get({**book, 'nonce': 8}) is not first
+        assert cache.get({'bids': bids, 'asks': asks}) is not cache.get({'bids': bids, 'asks': asks})  # Sin versión
+
+    def test_consumers_share_it(self, monkeypatch):
+        """Test que scanner y cosmos_quant leen su profundidad del mismo resultado"""
+        import scanner
+        import cosmos_quant
+        cache = DepthCache()
+        monkeypatch.setattr(scanner, 'depth_cache', cache)
+        monkeypatch.setattr(cosmos_quant, 'depth_cache', cache)
+        bids, asks = make_book(100, seed=5)
+        bids[1][1] = 40.0
+        book = {'symbol': 'ETH/USDT', 'bids': bids, 'asks': asks, 'nonce': 1, 'timestamp': 1}
+
+        flow = cosmos_quant.QuantAnalyzer().analyze_order_flow('ETH/USDT', book=book)
+        top50 = {**book, 'bids': bids[:50], 'asks': asks[:50]}
+        imbalance = scanner.calculate_imbalance(top50)
+
+        b50, a50 = sum(b[1] for b in bids[:50]), sum(x[1] for x in asks[:50])
+        assert imbalance == (b50 - a50) / (b50 + a50)
+        assert flow['bid_vol'] == sum(b[1] for b in bids)
+        assert flow['whale_walls'] == [f"BUY_WALL @ {bids[1][0]}"]
+        assert cache.stats()['misses'] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+"""
+COSMOS AI - Unit Tests for Book Keeper
+Tests para validar la réplica local del libro L2 (snapshot + diffs)
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from book_store import BookStore, book_metrics
+from book_keeper import LocalOrderBook
+
+SNAPSHOT = {
+    'nonce': 100,
+    'timestamp': 1_700_000_000_000,
+    'bids': [[99.0, 1.0], [98.0, 2.0], [97.0, 3.0]],
+    'asks': [[101.0, 1.0], [102.0, 2.0], [103.0, 3.0]],
+}
+
+def diff(U, u, pu, bids=(), asks=()):
+    return {'e': 'depthUpdate', 'E': 1_700_000_000_000 + u, 's': 'BTCUSDT', 'U': U, 'u': u, 'pu': pu,
+            'b': [[str(p), str(q)] for p, q in bids], 'a': [[str(p), str(q)] for p, q in asks]}
+
+class TestLocalOrderBook:
+    """Tests para la secuenciación de diffs"""
+
+    def test_buffered_diffs_replayed_after_snapshot(self):
+        """Test que los diffs previos se descartan y los que cruzan el snapshot se aplican"""
+        book = LocalOrderBook('BTC/USDT')
+        assert book.on_event(diff(90, 95, 89, bids=[(99.0, 50.0)])) == 'buffered'    # u < lastUpdateId
+        assert book.on_event(diff(96, 105, 95, bids=[(99.0, 5.0)])) == 'buffered'    # Cruza el snapshot
+        assert book.on_event(diff(106, 110, 105, asks=[(101.0, 0)])) == 'buffered'   # Elimina nivel
+
+        assert book.apply_snapshot(SNAPSHOT) == 'synced'
+
+        bids, asks = book.top(2)
+        assert bids == [[99.0, 5.0], [98.0, 2.0]]
+        assert asks == [[102.0, 2.0], [103.0, 3.0]]
+        assert book.last_update_id == 110
+
+    def test_pu_mismatch_triggers_gap(self):
+        """Test que un salto en la secuencia (pu != u previo) fuerza resync"""
+        book = LocalOrderBook('BTC/USDT')
+        book.apply_snapshot(SNAPSHOT)
+        assert book.on_event(diff(100, 101, 99)) == 'applied'
+
+        assert book.on_event(diff(110, 112, 108)) == 'gap'
+        assert not book.synced
+        assert book.resyncs == 1
+        assert book.bids == {}
+
+    def test_snapshot_older_than_stream_is_rejected(self):
+        """Test que un snapshot más viejo que el primer diff se rechaza"""
+        book = LocalOrderBook('BTC/USDT')
+        book.on_event(diff(150, 160, 149))
+
+        assert book.apply_snapshot(SNAPSHOT) == 'gap'
+        assert not book.synced
+
+        # El diff queda para el siguiente snapshot
+        newer = {**SNAPSHOT, 'nonce': 155}
+        assert book.apply_snapshot(newer) == 'synced'
+        assert book.last_update_id == 160
+
+class TestBookStore:
+    """Tests para la publicación en Redis"""
+
+    @pytest.fixture
+    def store(self):
+        return BookStore(fakeredis.FakeRedis(decode_responses=True), top_n=100)
+
+    def test_roundtrip_truncates_and_feeds_liquidity(self, store):
+        """Test que la lectura es ccxt-compatible y liquidity:{symbol} se actualiza"""
+        bids = [[100.0 - i, 1.0] for i in range(100)]
+        asks = [[101.0 + i, 2.0] for i in range(100)]
+        store.write('BTC/USDT', bids, asks, timestamp=1, update_id=42)
+
+        book = store.read('BTC/USDT', limit=50)
+        assert len(book['bids']) == 50
+        assert book['nonce'] == 42
+        assert store.read('BTC/USDT', limit=500) is None
+
+        liq = store.client.get('liquidity:BTC/USDT')
+        assert '"bid": 100.0' in liq and '"ask": 200.0' in liq
+
+    def test_stale_book_is_ignored(self, store):
+        """Test que un libro viejo (keeper caído) no se usa"""
+        store.write('BTC/USDT', [[99.0, 1.0]], [[101.0, 1.0]], timestamp=1, update_id=1)
+        payload = store.read_payload('BTC/USDT')
+
+        assert store.read('BTC/USDT', limit=1, now_ms=payload['written_at'] + 60_000) is None
+
+    def test_metrics_match_scanner_imbalance(self):
+        """Test que el desbalance a 50 niveles coincide con scanner.calculate_imbalance"""
+        bids = [[100.0 - i, 3.0] for i in range(60)]
+        asks = [[101.0 + i, 1.0] for i in range(60)]
+        m = book_metrics(bids, asks)
+
+        assert m['imbalance']['50'] == pytest.approx((150 - 50) / 200)
+        assert m['bid_depth']['10'] == 30.0
+        assert m['spread_pct'] == pytest.approx(1 / 100.5 * 100)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
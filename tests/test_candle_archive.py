@@ -0,0 +1,139 @@
+"""
+COSMOS AI - Unit Tests for Candle Archive
+Tests para validar el archivo local de velas por mes, la detección de huecos y el backfill
+"""
+import pytest
+import sys
+import os
+import numpy as np
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from candle_archive import CandleArchive
+
+HOUR = 3_600_000
+T0 = 1_706_659_200_000  # 2024-01-31 00:00 UTC
+
+def bars(start, n, step=HOUR):
+    return [[start + i * step, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(n)]
+
+def exchange_fetch(available):
+    """Simula fetch_ohlcv(since=...): devuelve hasta `limit` velas desde since"""
+    by_ts = {b[0]: b for b in available}
+    def fetch(symbol, timeframe, since, limit):
+        return [by_ts[t] for t in sorted(by_ts) if t >= since][:limit]
+    return Mock(side_effect=fetch)
+
+@pytest.fixture
+def archive(tmp_path):
+    return CandleArchive(root=str(tmp_path))
+
+class TestCandleArchive:
+    """Tests para la clase CandleArchive"""
+
+    def test_month_partitions_and_range_read(self, archive):
+        """Test que las velas se parten por mes y se leen por rango a través de meses"""
+        archive.write('BTC/USDT', '1h', bars(T0, 48))  # 31 ene + 1 feb
+
+        assert archive.months('BTC/USDT', '1h') == ['2024-01', '2024-02']
+        out = archive.read('BTC/USDT', '1h', T0 + 20 * HOUR, T0 + 30 * HOUR)
+        assert out.shape == (11, 6)
+        assert out[0, 0] == T0 + 20 * HOUR and out[-1, 0] == T0 + 30 * HOUR
+
+    def test_rewrite_replaces_bar(self, archive):
+        """Test que reescribir un timestamp reemplaza la vela (sin duplicados)"""
+        archive.write('BTC/USDT', '1h', bars(T0, 5))
+        archive.write('BTC/USDT', '1h', [[T0 + 4 * HOUR, 9.0, 9.0, 9.0, 9.0, 9.0]])
+
+        out = archive.read('BTC/USDT', '1h')
+        assert len(out) == 5 and out[-1, 4] == 9.0
+
+    def test_gaps(self, archive):
+        """Test que se detectan huecos internos, al inicio y al final"""
+        archive.write('BTC/USDT', '1h', bars(T0 + 2 * HOUR, 3) + bars(T0 + 8 * HOUR, 2))
+
+        assert archive.gaps('BTC/USDT', '1h', T0, T0 + 11 * HOUR) == [
+            (T0, T0 + HOUR), (T0 + 5 * HOUR, T0 + 7 * HOUR), (T0 + 10 * HOUR, T0 + 11 * HOUR)]
+
+    def test_backfill_fetches_only_missing(self, archive):
+        """Test que el backfill solo pide los rangos que faltan"""
+        archive.write('BTC/USDT', '1h', bars(T0, 10))
+        fetch = exchange_fetch(bars(T0, 30))
+
+        written = archive.backfill('BTC/USDT', '1h', T0, T0 + 29 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert written == 20
+        assert fetch.call_args_list[0].args[2] == T0 + 10 * HOUR
+        assert archive.gaps('BTC/USDT', '1h', T0, T0 + 29 * HOUR) == []
+
+    def test_backfill_pages(self, archive):
+        """Test que un hueco largo se descarga en páginas"""
+        fetch = exchange_fetch(bars(T0, 25))
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 24 * HOUR, fetch=fetch, page=10, now_ms=T0 + 100 * HOUR)
+
+        assert fetch.call_count == 3
+        assert len(archive.read('BTC/USDT', '1h')) == 25
+
+    def test_exchange_holes_not_refetched(self, archive):
+        """Test que un rango sin datos en el exchange (pre-listing) no se vuelve a pedir"""
+        fetch = exchange_fetch(bars(T0 + 5 * HOUR, 5))
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+        calls = fetch.call_count
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert fetch.call_count == calls
+        assert archive.holes('BTC/USDT', '1h') == [(T0, T0 + 4 * HOUR)]
+
+    def test_interior_exchange_gap_is_a_hole(self, archive):
+        """Test que un hueco dentro de una página (caída del exchange) se registra y no se vuelve a pedir"""
+        fetch = exchange_fetch(bars(T0, 3) + bars(T0 + 6 * HOUR, 4))
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+        calls = fetch.call_count
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert archive.holes('BTC/USDT', '1h') == [(T0 + 3 * HOUR, T0 + 5 * HOUR)]
+        assert fetch.call_count == calls
+
+    def test_empty_tail_page_is_not_a_hole(self, archive):
+        """Test que una página vacía al final (velas aún no publicadas) no se registra como hueco"""
+        archive.write('BTC/USDT', '1h', bars(T0, 5))
+        fetch = exchange_fetch(bars(T0, 5))
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert archive.holes('BTC/USDT', '1h') == []
+        assert archive.gaps('BTC/USDT', '1h', T0, T0 + 9 * HOUR) == [(T0 + 5 * HOUR, T0 + 9 * HOUR)]
+
+    def test_empty_page_before_known_bar_is_a_hole(self, archive):
+        """Test que una página vacía antes de una vela conocida sí se registra, hasta esa vela"""
+        archive.write('BTC/USDT', '1h', bars(T0 + 6 * HOUR, 2))
+        fetch = Mock(return_value=[])
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 7 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert archive.holes('BTC/USDT', '1h') == [(T0, T0 + 5 * HOUR)]
+
+    def test_fetch_error_is_not_a_hole(self, archive):
+        """Test que un fallo de red no se registra como hueco del exchange"""
+        fetch = Mock(side_effect=Exception("timeout"))
+        archive.backfill('BTC/USDT', '1h', T0, T0 + 9 * HOUR, fetch=fetch, now_ms=T0 + 100 * HOUR)
+
+        assert archive.holes('BTC/USDT', '1h') == []
+
+    def test_forming_bar_excluded(self, archive):
+        """Test que la vela en formación no se archiva"""
+        fetch = exchange_fetch(bars(T0, 5))
+        archive.backfill('BTC/USDT', '1h', T0, fetch=fetch, now_ms=T0 + 4 * HOUR + 60_000)
+
+        assert archive.read('BTC/USDT', '1h')[-1, 0] == T0 + 3 * HOUR
+
+    def test_read_df(self, archive):
+        """Test que read_df devuelve el esquema de OHLCV con timestamp entero"""
+        archive.write('ETH/USDT', '1h', bars(T0, 3))
+        df = archive.read_df('ETH/USDT', '1h')
+
+        assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        assert df['timestamp'].dtype == np.int64
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""
+COSMOS AI - Unit Tests for Candle Builder
+Tests para validar la construcción de velas desde el stream de klines
+"""
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from candle_store import CandleStore
+from candle_builder import CandleBuilder
+
+MIN = 60_000
+T0 = 1_700_006_400_000  # Alineado a 4h (UTC)
+
+def minute_bar(ts, price, vol=1.0):
+    return [ts, price, price + 1, price - 1, price + 0.5, vol]
+
+def kline(bar, closed):
+    return {'t': bar[0], 'T': bar[0] + MIN - 1, 'o': str(bar[1]), 'h': str(bar[2]),
+            'l': str(bar[3]), 'c': str(bar[4]), 'v': str(bar[5]), 'x': closed}
+
+class TestCandleBuilder:
+    """Tests para la clase CandleBuilder"""
+
+    @pytest.fixture
+    def store(self):
+        return CandleStore(fakeredis.FakeRedis(decode_responses=True), max_bars=500)
+
+    @pytest.fixture
+    def builder(self, store):
+        b = CandleBuilder(store)
+        # Historial vacío: el primer bucket empieza en T0
+        b.seed('BTC/USDT', {'1m': [], '5m': [], '15m': [], '1h': [], '4h': []}, now_ms=T0)
+        return b
+
+    def test_5m_bar_closes_after_five_minutes(self, builder, store):
+        """Test que 5 velas de 1m cerradas producen una vela de 5m correcta"""
+        minutes = [minute_bar(T0 + i * MIN, 100 + i, vol=i + 1) for i in range(5)]
+        for m in minutes:
+            builder.on_kline('BTC/USDT', kline(m, closed=True))
+
+        closed_5m = store.client.lrange('candles:BTC/USDT:5m', 0, -1)
+        assert len(closed_5m) == 1
+        assert json.loads(closed_5m[0]) == [T0, 100.0, 105.0, 99.0, 104.5, 15.0]
+        assert store.client.llen('candles:BTC/USDT:1m') == 5
+        assert store.client.llen('candles:BTC/USDT:15m') == 0
+
+    def test_duplicate_close_is_ignored(self, builder, store):
+        """Test que un cierre repetido (reconexión) no duplica volumen"""
+        m = minute_bar(T0, 100)
+        builder.on_kline('BTC/USDT', kline(m, closed=True))
+        builder.on_kline('BTC/USDT', kline(m, closed=True))
+
+        assert store.client.llen('candles:BTC/USDT:1m') == 1
+        assert builder.live_bars('BTC/USDT')['5m'][5] == 1.0
+
+    def test_live_bar_includes_forming_minute(self, builder):
+        """Test que la vela en formación combina el bucket abierto y el minuto actual"""
+        builder.on_kline('BTC/USDT', kline(minute_bar(T0, 100, vol=2), closed=True))
+        builder.on_kline('BTC/USDT', kline(minute_bar(T0 + MIN, 110, vol=3), closed=False))
+
+        live = builder.live_bars('BTC/USDT')
+        assert live['1m'][0] == T0 + MIN
+        assert live['5m'] == [T0, 100.0, 111.0, 99.0, 110.5, 5.0]
+        assert live['4h'][0] == T0
+
+    def test_seed_rebuilds_open_bucket_from_minutes(self, store):
+        """Test que el backfill reconstruye el bucket abierto desde velas de 1m"""
+        builder = CandleBuilder(store)
+        now = T0 + 3 * MIN + 10_000
+        minutes = [minute_bar(T0 - 2 * MIN + i * MIN, 100 + i) for i in range(6)]  # último en formación
+        history = {'1m': minutes, '5m': [[T0 - 5 * MIN, 1, 2, 0, 1, 9], [T0, 9, 9, 9, 9, 9]]}
+        builder.seed('BTC/USDT', history, now_ms=now)
+
+        # Solo velas cerradas en Redis
+        assert store.client.llen('candles:BTC/USDT:1m') == 5
+        assert store.client.llen('candles:BTC/USDT:5m') == 1
+        # Bucket de 5m abierto = 3 minutos cerrados desde T0 (no la vela REST parcial)
+        assert builder._partial[('BTC/USDT', '5m')][5] == 3.0
+
+class TestCandleStoreRead:
+    """Tests para la lectura desde scanner.fetch_data"""
+
+    @pytest.fixture
+    def store(self):
+        return CandleStore(fakeredis.FakeRedis(decode_responses=True), max_bars=500)
+
+    def test_read_returns_closed_plus_live(self, store):
+        """Test que la lectura devuelve historial + vela en formación"""
+        bars = [minute_bar(T0 + i * MIN, 100) for i in range(10)]
+        store.replace_history('BTC/USDT', '1m', bars[:-1])
+        store.set_live('BTC/USDT', {'1m': bars[-1]})
+
+        out = store.read('BTC/USDT', '1m', limit=10, now_ms=T0 + 9 * MIN + 5000)
+        assert out == bars
+
+    def test_read_requires_live_heartbeat(self, store):
+        """Test que sin vela viva (builder caído) se usa REST"""
+        store.replace_history('BTC/USDT', '1m', [minute_bar(T0 + i * MIN, 100) for i in range(10)])
+
+        assert store.read('BTC/USDT', '1m', limit=5, now_ms=T0 + 10 * MIN) is None
+
+    def test_read_rejects_short_or_unsupported(self, store):
+        """Test que pedir más historial del disponible o un tf no construido devuelve None"""
+        store.replace_history('BTC/USDT', '1m', [minute_bar(T0 + i * MIN, 100) for i in range(3)])
+        store.set_live('BTC/USDT', {'1m': minute_bar(T0 + 3 * MIN, 100)})
+
+        assert store.read('BTC/USDT', '1m', limit=100, now_ms=T0 + 3 * MIN) is None
+        assert store.read('BTC/USDT', '1d', limit=2, now_ms=T0 + 3 * MIN) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
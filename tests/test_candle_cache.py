@@ -0,0 +1,123 @@
+"""
+COSMOS AI - Unit Tests for Candle Cache
+Tests para validar el cache incremental de OHLCV (delta fetching)
+"""
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from candle_cache import CandleCache, timeframe_ms
+
+TF = '5m'
+STEP = timeframe_ms(TF)
+
+def make_bars(start_ts, count, base=100.0):
+    return [[start_ts + i * STEP, base + i, base + i + 1, base + i - 1, base + i + 0.5, 10.0] for i in range(count)]
+
+class TestCandleCache:
+    """Tests para la clase CandleCache"""
+
+    @pytest.fixture
+    def cache(self):
+        return CandleCache(max_bars=500)
+
+    def test_plan_requires_full_fetch_when_empty(self, cache):
+        """Test que sin datos se pide una descarga completa"""
+        assert cache.plan('BTC/USDT', TF, 100) is None
+
+    def test_plan_delta_after_store(self, cache):
+        """Test que después de la primera descarga se pide solo el delta"""
+        bars = make_bars(0, 100)
+        cache.store('BTC/USDT', TF, bars, 'kraken')
+
+        now = bars[-1][0] + STEP + 1000  # Una vela nueva abierta
+        source, since, delta_limit = cache.plan('BTC/USDT', TF, 100, now_ms=now)
+
+        assert source == 'kraken'
+        assert since == bars[-1][0]
+        assert delta_limit == 3
+
+    def test_plan_full_fetch_when_stale(self, cache):
+        """Test que un buffer más viejo que la ventana se descarga completo"""
+        bars = make_bars(0, 100)
+        cache.store('BTC/USDT', TF, bars, 'kraken')
+
+        assert cache.plan('BTC/USDT', TF, 100, now_ms=bars[-1][0] + STEP * 500) is None
+
+    def test_merge_replaces_forming_bar(self, cache):
+        """Test que la vela en formación se reemplaza y las nuevas se agregan"""
+        bars = make_bars(0, 100)
+        cache.store('BTC/USDT', TF, bars, 'kraken')
+
+        last_ts = bars[-1][0]
+        delta = [[last_ts, 1, 2, 0, 1.5, 99.0], [last_ts + STEP, 2, 3, 1, 2.5, 5.0]]
+        assert cache.merge('BTC/USDT', TF, delta) is True
+
+        out = cache.read('BTC/USDT', TF, 100)
+        assert len(out) == 100
+        assert out[-2] == delta[0]
+        assert out[-1] == delta[1]
+        assert out[0][0] == STEP  # Ventana desplazada una vela
+
+    def test_merge_rejects_gap(self, cache):
+        """Test que un delta desconectado fuerza una descarga completa"""
+        cache.store('BTC/USDT', TF, make_bars(0, 100), 'kraken')
+
+        assert cache.merge('BTC/USDT', TF, make_bars(STEP * 200, 2)) is False
+
+class TestBinanceTraderCache:
+    """Tests de integración con BinanceTrader.fetch_ohlcv"""
+
+    @pytest.fixture
+    def trader(self):
+        from binance_engine import BinanceTrader
+        trader = BinanceTrader()
+        trader.fallback_exchange = Mock()
+        trader.exchange = Mock()
+        return trader
+
+    def test_second_call_is_delta(self, trader):
+        """Test que la segunda llamada usa 'since' y devuelve la misma forma"""
+        import time
+        now = int(time.time() * 1000)
+        start = (now // STEP) * STEP - STEP * 99
+        bars = make_bars(start, 100)
+        trader.fallback_exchange.fetch_ohlcv.return_value = bars
+
+        first = trader.fetch_ohlcv('BTC/USDT', TF, limit=100)
+        assert first == bars
+
+        trader.fallback_exchange.fetch_ohlcv.return_value = [[bars[-1][0], 1, 2, 0, 1.5, 3.0]]
+        second = trader.fetch_ohlcv('BTC/USDT', TF, limit=100)
+
+        kwargs = trader.fallback_exchange.fetch_ohlcv.call_args.kwargs
+        assert kwargs['since'] == bars[-1][0]
+        assert kwargs['limit'] <= 3
+        assert len(second) == 100
+        assert second[-1] == [bars[-1][0], 1, 2, 0, 1.5, 3.0]
+        assert trader.candle_cache.stats()['delta_fetches'] == 1
+
+    def test_delta_failure_falls_back_to_full_chain(self, trader):
+        """Test que si el delta falla se invalida y se usa la cadena completa"""
+        import time
+        now = int(time.time() * 1000)
+        start = (now // STEP) * STEP - STEP * 99
+        bars = make_bars(start, 100)
+        trader.fallback_exchange.fetch_ohlcv.return_value = bars
+        trader.fetch_ohlcv('BTC/USDT', TF, limit=100)
+
+        trader.fallback_exchange.fetch_ohlcv.side_effect = Exception("Kraken down")
+        trader.exchange.fetch_ohlcv.return_value = bars
+        trader.exchange.markets = {'BTC/USDT': {}}
+
+        out = trader.fetch_ohlcv('BTC/USDT', TF, limit=100)
+
+        assert out == bars
+        assert trader.candle_cache.plan('BTC/USDT', TF, 100)[0] == 'binance'
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -209,6 +209,63 @@ class TestCosmosBrain:
         assert len(reasoning) > 0
         # Puede incluir términos como "oversold", "bullish", "momentum", etc.
 
+class TestBatchInference:
+    """Tests para predict_success_batch (V6100)"""
+    
+    @pytest.fixture
+    def brain(self):
+        import numpy as np
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.impute import SimpleImputer
+        from model_holder import ModelHolder
+        
+        with patch('cosmos_engine.create_client'):
+            brain = CosmosBrain()
+        brain.is_trained = True
+        
+        rng = np.random.default_rng(7)
+        X = rng.uniform(-1, 1, size=(200, 6))
+        y = (X[:, 0] + X[:, 4] > 0).astype(int)
+        brain.imputer = SimpleImputer(strategy='mean').fit(X)
+        model = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=42).fit(X, y)
+        
+        brain.model_holder = ModelHolder(candidates=[], check_interval=3600)
+        brain.model_holder.publish(model, source="test")
+        return brain
+    
+    def test_batch_matches_single_predictions(self, brain):
+        """Test que el batch retorna lo mismo que N llamadas individuales"""
+        rows = [
+            {'rsi_value': 0.5, 'imbalance_ratio': -0.2, 'spread_pct': 0.1, 'atr_value': 0.3, 'macd_line': 0.9, 'histogram': 0.1},
+            {'rsi_value': -0.8, 'imbalance_ratio': 0.4, 'spread_pct': 0.0, 'atr_value': -0.1, 'macd_line': -0.7, 'histogram': 0.2},
+            {'rsi_value': 0.1},  # Faltan features
+        ]
+        
+        batch = brain.predict_success_batch(rows)
+        single = [brain.predict_success(r) for r in rows]
+        
+        assert len(batch) == 3
+        assert list(batch) == pytest.approx(single)
+    
+    def test_batch_accepts_numpy_matrix(self, brain):
+        """Test que el batch acepta una matriz N x 6 en el orden de feature_cols"""
+        import numpy as np
+        rows = [
+            {'rsi_value': 0.5, 'imbalance_ratio': -0.2, 'spread_pct': 0.1, 'atr_value': 0.3, 'macd_line': 0.9, 'histogram': 0.1},
+            {'rsi_value': -0.8, 'imbalance_ratio': 0.4, 'spread_pct': 0.0, 'atr_value': -0.1, 'macd_line': -0.7, 'histogram': 0.2},
+        ]
+        X = np.array([[r[c] for c in brain.feature_cols] for r in rows])
+        
+        assert list(brain.predict_success_batch(X)) == pytest.approx(list(brain.predict_success_batch(rows)))
+    
+    def test_batch_untrained_returns_neutral(self, brain):
+        """Test que sin entrenamiento retorna 0.5 para cada fila"""
+        brain.is_trained = False
+        
+        probs = brain.predict_success_batch([{}, {}, {}])
+        
+        assert list(probs) == [0.5, 0.5, 0.5]
+
 class TestEdgeCases:
     """Tests para casos extremos y edge cases"""
     
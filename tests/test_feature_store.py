@@ -0,0 +1,138 @@
+"""
+COSMOS AI - Unit Tests for Feature Store
+Tests para validar el almacén de features versionado (último vector en Redis, histórico en columnas)
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from feature_store import FeatureStore, FEATURE_COLS, bar_ms
+
+fakeredis = pytest.importorskip("fakeredis")
+
+STEP = 300_000  # 5m
+T0 = 1_717_200_000_000 // STEP * STEP
+
+def vec(i):
+    return {'rsi_value': 40.0 + i, 'imbalance_ratio': 0.1, 'spread_pct': 0.02,
+            'atr_value': 1.5, 'macd_line': 0.3, 'histogram': -0.1 * i}
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture
+def store(client, tmp_path):
+    return FeatureStore(client, root=str(tmp_path))
+
+class TestFeatureStore:
+    """Tests para la clase FeatureStore"""
+
+    def test_first_write_per_bar_wins(self, store):
+        """Test que cada vela se escribe una sola vez (el segundo vector de la misma vela se descarta)"""
+        assert store.write('BTC/USDT', '5m', T0, vec(0), written_at=T0 + 1000)
+        assert not store.write('BTC/USDT', '5m', T0, vec(9), written_at=T0 + 2000)
+        assert not store.write('BTC/USDT:USDT', '5m', T0 - STEP, vec(9))  # Older bar
+
+        latest = store.latest('BTC/USDT', '5m', T0)
+        assert latest['rsi_value'] == 40.0 and latest['bar_ts'] == T0
+        assert len(store.history('BTC/USDT', '5m')) == 1
+        assert store.latest('BTC/USDT', '5m', T0 + STEP) is None
+
+    def test_latest_shared_across_processes(self, client, tmp_path, store):
+        """Test que otro proceso (otra instancia) lee el vector de Redis y no puede reescribir la vela"""
+        store.write('ETH/USDT', '5m', pd.Timestamp(T0, unit='ms'), vec(1))
+        other = FeatureStore(client, root=str(tmp_path))
+
+        assert other.latest('eth/usdt', '5m', T0)['rsi_value'] == 41.0
+        assert not other.write('ETH/USDT', '5m', T0, vec(5))
+
+    def test_versions_do_not_mix(self, client, tmp_path, store):
+        """Test que un cambio de versión usa claves y ficheros propios"""
+        store.write('BTC/USDT', '5m', T0, vec(0))
+        v2 = FeatureStore(client, root=str(tmp_path), version=2)
+
+        assert v2.latest('BTC/USDT', '5m') is None
+        assert not len(v2.history('BTC/USDT', '5m'))
+
+    def test_history_across_months(self, store):
+        """Test del histórico columnar ordenado y filtrado por rango, cruzando particiones mensuales"""
+        start = bar_ms('2024-01-31 23:45')
+        for i in range(6):
+            store.write('SOL/USDT', '5m', start + i * STEP, vec(i))
+
+        assert store.months('SOL/USDT', '5m') == ['2024-01', '2024-02']
+        rows = store.history('SOL/USDT', '5m', start + STEP, start + 4 * STEP)
+        assert rows[:, 0].tolist() == [start + i * STEP for i in range(1, 5)]
+        assert rows[:, 2:].shape[1] == len(FEATURE_COLS)
+        assert store.history_df('SOL/USDT', '5m')['rsi_value'].tolist() == [40.0 + i for i in range(6)]
+
+    def test_as_of_is_point_in_time(self, store):
+        """Test que as_of solo ve vectores escritos antes del instante pedido y no demasiado antiguos"""
+        for i in range(3):
+            store.write('BTC/USDT', '5m', T0 + i * STEP, vec(i), written_at=T0 + i * STEP + 60_000)
+
+        out = store.as_of('BTC/USDT', '5m', [T0 + 30_000, T0 + 90_000, T0 + STEP + 30_000, T0 + 20 * STEP])
+        assert np.isnan(out[0]).all()                  # Nothing written yet
+        assert out[1, 0] == 40.0                       # Bar 0, written at +60s
+        assert out[2, 0] == 40.0                       # Bar 1 not written yet at that time
+        assert np.isnan(out[3]).all()                  # Latest vector too old
+
+    def test_at_bars(self, store):
+        """Test de la lectura por velas exactas (backtest de la última hora)"""
+        store.write('BTC/USDT', '5m', T0, vec(0))
+        store.write('BTC/USDT', '5m', T0 + 2 * STEP, vec(2))
+
+        out = store.at_bars('BTC/USDT', '5m', pd.to_datetime([T0, T0 + STEP, T0 + 2 * STEP], unit='ms'))
+        assert out[0, 0] == 40.0 and out[2, 0] == 42.0
+        assert np.isnan(out[1]).all()
+
+    def test_observe_stores_closed_bars_only(self, store):
+        """Test que la vela en formación no se guarda y al cerrar se escribe su último vector"""
+        assert not store.observe('BTC/USDT', '5m', T0, vec(0))
+        assert not store.observe('BTC/USDT', '5m', T0, vec(1))    # Misma vela: sólo actualiza el vector vivo
+        assert store.latest('BTC/USDT', '5m') is None
+
+        assert store.observe('BTC/USDT', '5m', T0 + STEP, vec(2))  # Cambio de vela: se cierra T0
+        latest = store.latest('BTC/USDT', '5m', T0)
+        assert latest['rsi_value'] == 41.0 and latest['bar_ts'] == T0
+        assert store.latest('BTC/USDT', '5m', T0 + STEP) is None
+
+        assert not store.observe('BTC/USDT', '5m', T0, vec(9))     # Vela antigua: se ignora
+        assert not store.observe('BTC/USDT', '5m', T0 + 5 * STEP, vec(5))  # T0+STEP no se vio al cierre
+        assert store.history('BTC/USDT', '5m')[:, 0].tolist() == [T0]
+
+    def test_scanner_predicts_on_live_features(self, monkeypatch, tmp_path):
+        """Test que el scanner predice con el vector vivo aunque la vela ya tenga uno guardado"""
+        import scanner
+        store = FeatureStore(None, root=str(tmp_path))
+        store.write('BTC/USDT', '5m', T0, vec(0))
+        monkeypatch.setattr(scanner, 'feature_store', store)
+        seen = []
+        monkeypatch.setattr(scanner.brain, 'predict_success', lambda f: seen.append(dict(f)) or 0.5)
+        monkeypatch.setattr(scanner, 'check_news_blackout', lambda: False)
+        tech = {'symbol': 'BTC/USDT', 'timestamp': T0, 'price': 100.0, 'rsi': 25.0, 'ema_200': 90.0, 'atr': 2.0,
+                'macd': 0.5, 'signal_line': 0.2, 'histogram': 0.3, 'volume': 10.0, 'vol_ma': 5.0,
+                'structure': 'BULLISH', 'divergence': 'NONE', 'volume_pressure': 2.0}
+        book = {'bids': [[99.9, 5.0]], 'asks': [[100.1, 1.0]]}
+        scanner.analyze_quant_signal('BTC/USDT', tech, book=book)
+
+        assert seen and seen[0]['rsi_value'] == 25.0 and seen[0]['atr_value'] == 2.0
+        assert store.history('BTC/USDT', '5m')[:, 2].tolist() == [40.0]  # El vector guardado no cambia
+
+    def test_offline_is_per_process(self, tmp_path):
+        """Test que sin Redis el último vector vive en memoria y el histórico en disco"""
+        store = FeatureStore(None, root=str(tmp_path))
+        assert store.write('BTC/USDT', '5m', T0, {**vec(0), 'spread_pct': None})
+
+        latest = store.latest('BTC/USDT', '5m')
+        assert np.isnan(latest['spread_pct'])
+        assert len(FeatureStore(None, root=str(tmp_path)).history('BTC/USDT', '5m')) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
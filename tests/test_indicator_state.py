@@ -0,0 +1,145 @@
+"""
+COSMOS AI - Unit Tests for Incremental Indicator State
+Tests para validar que el estado O(1) reproduce el recálculo completo de analyze_market
+"""
+import pytest
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from indicators import calculate_rsi, calculate_ema, calculate_atr, calculate_macd, calculate_sma
+from indicator_state import IndicatorEngine, IndicatorState
+
+STEP = 300_000  # 5m
+T0 = 1_700_000_000_000
+
+def make_bars(n, seed=3, start=T0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    vol = rng.uniform(1, 10, n)
+    return [[start + i * STEP, close[i], close[i] + spread[i], close[i] - spread[i], close[i], vol[i]] for i in range(n)]
+
+def to_df(bars):
+    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+def full_recompute(df):
+    """Misma lógica que la ruta no incremental de scanner.analyze_market"""
+    rsi = calculate_rsi(df['close'], 14)
+    ema = calculate_ema(df['close'], 200)
+    atr = calculate_atr(df, 14)
+    macd, sig, hist = calculate_macd(df['close'])
+    vol_ma = calculate_sma(df['volume'], 20)
+    return {'rsi': rsi.iloc[-1], 'ema_200': ema.iloc[-1], 'atr': atr.iloc[-1], 'macd': macd.iloc[-1],
+            'signal_line': sig.iloc[-1], 'histogram': hist.iloc[-1], 'vol_ma': vol_ma.iloc[-1], 'rsi_series': rsi}
+
+class TestIndicatorEngine:
+    """Tests para IndicatorEngine.analyze"""
+
+    def test_first_call_matches_full_recompute(self):
+        """Test que el sembrado desde el DataFrame da los mismos valores"""
+        engine = IndicatorEngine()
+        df = to_df(make_bars(100))
+        out = engine.analyze(df, 'BTC/USDT', '5m')
+        ref = full_recompute(df)
+
+        for key in ('rsi', 'ema_200', 'atr', 'macd', 'signal_line', 'histogram', 'vol_ma'):
+            assert out[key] == pytest.approx(ref[key], rel=1e-9)
+        # Las columnas de cola sirven a check_rsi_divergence
+        np.testing.assert_allclose(df['RSI'].iloc[-10:], ref['rsi_series'].iloc[-10:], rtol=1e-9)
+
+    def test_sliding_window_only_applies_new_bars(self):
+        """Test que ventanas sucesivas aplican una vela y mantienen EMA200 con todo el historial"""
+        bars = make_bars(400)
+        engine = IndicatorEngine()
+        for end in range(100, 401, 1):
+            out = engine.analyze(to_df(bars[end - 100:end]), 'BTC/USDT', '5m')
+
+        assert engine.seeds == 1
+        assert engine.updates == 300
+        # EMA200 calentada: igual al recálculo sobre las 400 velas, no sobre las últimas 100
+        long_ref = full_recompute(to_df(bars))
+        short_ref = full_recompute(to_df(bars[-100:]))
+        assert out['ema_200'] == pytest.approx(long_ref['ema_200'], rel=1e-9)
+        assert out['ema_200'] != pytest.approx(short_ref['ema_200'], rel=1e-9)
+        # RSI y Vol_MA son medias de ventana fija: no dependen del historial
+        assert out['rsi'] == pytest.approx(short_ref['rsi'], rel=1e-9)
+        assert out['vol_ma'] == pytest.approx(short_ref['vol_ma'], rel=1e-9)
+
+    def test_gap_reseeds(self):
+        """Test que un hueco en las velas fuerza un nuevo sembrado"""
+        bars = make_bars(300)
+        engine = IndicatorEngine()
+        engine.analyze(to_df(bars[:100]), 'BTC/USDT', '5m')
+        engine.analyze(to_df(bars[200:300]), 'BTC/USDT', '5m')
+
+        assert engine.seeds == 2
+
+    def test_other_venue_reseeds(self):
+        """Test que velas de otro exchange con los mismos timestamps no se pliegan al estado"""
+        bars = make_bars(200)
+        other = make_bars(200, seed=9)  # Mismos timestamps, otro venue
+        engine = IndicatorEngine()
+        engine.analyze(to_df(bars[:100]), 'BTC/USDT', '5m')
+        df = to_df(other[1:101])
+        out = engine.analyze(df, 'BTC/USDT', '5m')
+
+        assert engine.seeds == 2
+        assert out['ema_200'] == pytest.approx(full_recompute(to_df(other[1:101]))['ema_200'], rel=1e-9)
+
+    def test_flat_prices_return_none(self):
+        """Test que sin movimiento (RSI 0/0) devuelve None como analyze_market"""
+        bars = [[T0 + i * STEP, 100.0, 100.0, 100.0, 100.0, 1.0] for i in range(60)]
+        assert IndicatorEngine().analyze(to_df(bars), 'BTC/USDT', '5m') is None
+
+class TestSnapshot:
+    """Tests para snapshot/restore"""
+
+    def test_restore_continues_identically(self):
+        """Test que un estado restaurado (vía JSON) continúa igual que el original"""
+        bars = make_bars(150)
+        state = IndicatorState()
+        for bar in bars[:120]:
+            state.update(bar)
+        clone = IndicatorState.restore(json.loads(json.dumps(state.snapshot())))
+
+        for bar in bars[120:]:
+            assert clone.update(bar) == state.update(bar)
+
+    def test_engine_save_and_load(self):
+        """Test que el motor persiste y recupera sus estados en Redis"""
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis(decode_responses=True)
+        engine = IndicatorEngine(client)
+        engine.analyze(to_df(make_bars(100)), 'ETH/USDT', '15m')
+        assert engine.save()
+
+        restored = IndicatorEngine(client)
+        assert restored.load() == 1
+        assert restored.states[('ETH/USDT', '15m')].last_ts == engine.states[('ETH/USDT', '15m')].last_ts
+        assert restored.states[('ETH/USDT', '15m')].last_bar == engine.states[('ETH/USDT', '15m')].last_bar
+
+    def test_roles_do_not_share_a_snapshot(self):
+        """Test que scanner y worker guardan su estado en claves distintas"""
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis(decode_responses=True)
+        scanner_engine = IndicatorEngine(client, key="indicators:state:scanner")
+        worker_engine = IndicatorEngine(client, key="indicators:state:cosmos_worker")
+        scanner_engine.analyze(to_df(make_bars(100)), 'BTC/USDT', '5m')
+        worker_engine.analyze(to_df(make_bars(100)), 'ETH/USDT', '5m')
+        scanner_engine.save()
+        worker_engine.save()
+
+        restored = IndicatorEngine(client, key="indicators:state:scanner")
+        assert restored.load() == 1 and ('BTC/USDT', '5m') in restored.states
+        assert IndicatorEngine().key.startswith("indicators:state:")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,83 @@
+"""
+COSMOS AI - Unit Tests for Indicators
+Tests para validar que los kernels NumPy reproducen las definiciones pandas anteriores
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import indicators
+from indicators import calculate_rsi, calculate_ema, calculate_macd, calculate_atr, calculate_sma
+
+@pytest.fixture(params=[30, 500])
+def df(request):
+    rng = np.random.default_rng(request.param)
+    n = request.param
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    return pd.DataFrame({'high': close + spread, 'low': close - spread, 'close': close,
+                         'volume': rng.uniform(1, 10, n)})
+
+def true_range_pd(df):
+    close = df['close'].shift(1)
+    return pd.concat([df['high'] - df['low'], (df['high'] - close).abs(), (df['low'] - close).abs()], axis=1).max(axis=1)
+
+class TestPandasEquivalence:
+    """Tests contra las fórmulas pandas que usaban scanner/oracle/bootstrap"""
+
+    def test_rsi_matches_rolling_mean_definition(self, df):
+        """Test que el RSI (medias simples) coincide incluyendo los NaN iniciales"""
+        delta = df['close'].diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        expected = 100 - (100 / (1 + gain / loss))
+
+        pd.testing.assert_series_equal(calculate_rsi(df['close']), expected, check_names=False)
+
+    def test_ema_and_macd_match_ewm(self, df):
+        """Test que EMA y MACD coinciden con ewm(adjust=False)"""
+        close = df['close']
+        pd.testing.assert_series_equal(calculate_ema(close, 200), close.ewm(span=200, adjust=False).mean(), check_names=False)
+
+        line = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        signal = line.ewm(span=9, adjust=False).mean()
+        out_line, out_signal, out_hist = calculate_macd(close)
+        pd.testing.assert_series_equal(out_line, line, check_names=False)
+        pd.testing.assert_series_equal(out_signal, signal, check_names=False)
+        pd.testing.assert_series_equal(out_hist, line - signal, check_names=False)
+
+    def test_atr_is_wilder(self, df):
+        """Test que el ATR usa suavizado de Wilder y atr_sma la media simple anterior"""
+        tr = true_range_pd(df)
+        pd.testing.assert_series_equal(calculate_atr(df), tr.ewm(alpha=1 / 14, adjust=False).mean(), check_names=False)
+
+        expected_sma = tr.rolling(14).mean().to_numpy()
+        np.testing.assert_allclose(indicators.atr_sma(df['high'], df['low'], df['close']), expected_sma, equal_nan=True)
+
+    def test_sma_matches_rolling(self, df):
+        """Test que la SMA coincide con rolling().mean()"""
+        expected = df['volume'].rolling(window=20).mean()
+        pd.testing.assert_series_equal(calculate_sma(df['volume'], 20), expected, check_names=False)
+
+class TestEdgeCases:
+    """Tests para entradas degeneradas"""
+
+    def test_short_and_empty_inputs(self):
+        """Test que series más cortas que el periodo devuelven NaN sin fallar"""
+        assert np.isnan(indicators.sma([1.0, 2.0], 5)).all()
+        assert len(indicators.ema([], 10)) == 0
+        assert np.isnan(indicators.rsi([1.0, 2.0, 3.0])).all()
+
+    def test_python_fallback_matches_lfilter(self, df, monkeypatch):
+        """Test que el bucle sin scipy da el mismo resultado"""
+        expected = indicators.ewm(df['close'], 0.1)
+        monkeypatch.setattr(indicators, 'SCIPY_AVAILABLE', False)
+        np.testing.assert_allclose(indicators.ewm(df['close'], 0.1), expected)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
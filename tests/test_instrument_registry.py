@@ -0,0 +1,112 @@
+"""
+COSMOS AI - Unit Tests for Instrument Registry
+Tests para validar el mapeo de símbolos por venue, la precisión y los mínimos de orden
+"""
+import pytest
+import sys
+import os
+import ccxt
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from markets_cache import MarketsCache
+from instrument_registry import InstrumentRegistry, LINEAR_PERPETUAL, SPOT
+
+def binance_markets():
+    """Mercados sintéticos de Binance: spot y perpetuo lineal del mismo par, más un inverso"""
+    ex = ccxt.binance({'options': {'defaultType': 'swap'}})
+    raw = [
+        {'id': 'BTCUSDT', 'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT', 'type': 'spot', 'spot': True,
+         'active': True, 'precision': {'amount': 0.00001, 'price': 0.01}, 'limits': {'cost': {'min': 5.0}}},
+        {'id': 'BTCUSDT', 'symbol': 'BTC/USDT:USDT', 'base': 'BTC', 'quote': 'USDT', 'settle': 'USDT',
+         'type': 'swap', 'swap': True, 'contract': True, 'linear': True, 'active': True, 'contractSize': 1,
+         'precision': {'amount': 0.001, 'price': 0.1},
+         'limits': {'amount': {'min': 0.001}, 'cost': {'min': 100.0}}},
+        {'id': 'BTCUSD_PERP', 'symbol': 'BTC/USD:BTC', 'base': 'BTC', 'quote': 'USD', 'settle': 'BTC',
+         'type': 'swap', 'swap': True, 'contract': True, 'inverse': True, 'linear': False, 'active': True,
+         'precision': {'amount': 1, 'price': 0.1}, 'limits': {}},
+        {'id': '1000PEPEUSDT', 'symbol': '1000PEPE/USDT:USDT', 'base': '1000PEPE', 'quote': 'USDT', 'settle': 'USDT',
+         'type': 'swap', 'swap': True, 'contract': True, 'linear': True, 'active': True,
+         'precision': {'amount': 1, 'price': 0.0000001}, 'limits': {'amount': {'min': 1}, 'cost': {'min': 5.0}}},
+    ]
+    return [ex.safe_market_structure(m) for m in raw]
+
+def kraken_markets():
+    return [{'symbol': 'BTC/USD', 'active': True}, {'symbol': 'ETH/USD', 'active': True}]
+
+@pytest.fixture
+def registry():
+    reg = InstrumentRegistry(cache=None)
+    reg.load(binance_markets(), kraken_markets())
+    return reg
+
+class TestInstrumentRegistry:
+    """Tests para la clase InstrumentRegistry"""
+
+    def test_linear_perpetual_preferred_over_spot(self, registry):
+        """Test que el par canónico apunta al perpetuo lineal, no al spot ni al inverso"""
+        inst = registry.get('BTC/USDT')
+
+        assert inst.binance == 'BTC/USDT:USDT'
+        assert inst.contract_type == LINEAR_PERPETUAL
+        assert inst.tick_size == 0.1 and inst.lot_size == 0.001
+        assert inst.min_notional == 100.0
+
+    def test_aliases_resolve_to_same_instrument(self, registry):
+        """Test que las distintas grafías (futuros, Kraken, id, stream) dan el mismo instrumento"""
+        inst = registry.get('BTC/USDT')
+        for alias in ('BTC/USDT:USDT', 'BTC/USD', 'BTCUSDT', 'btcusdt'):
+            assert registry.get(alias) is inst
+
+    def test_venue_symbols(self, registry):
+        """Test del mapeo a Kraken y del par no listado en Kraken"""
+        assert registry.kraken_symbol('BTC/USDT') == 'BTC/USD'
+        assert registry.kraken_symbol('1000PEPE/USDT') is None
+        assert registry.base('1000PEPE/USDT') == '1000PEPE'
+
+    def test_unknown_symbol_falls_back(self, registry):
+        """Test que un par desconocido conserva el mapeo anterior"""
+        assert registry.get('NEW/USDT') is None
+        assert registry.binance_symbol('NEW/USDT') == 'NEW/USDT'
+        assert registry.kraken_symbol('NEW/USDT') == 'NEW/USD'
+        with pytest.raises(ccxt.BadSymbol):
+            registry.round_amount('NEW/USDT', 1.0)
+
+    def test_rounding_matches_ccxt(self, registry):
+        """Test que el redondeo coincide con amount_to_precision / price_to_precision de ccxt"""
+        ex = ccxt.binance({'options': {'defaultType': 'swap'}})
+        ex.set_markets(binance_markets())
+        for qty in (0.12345, 1.0, 0.0999, 3.1):
+            assert registry.round_amount('BTC/USDT', qty) == ex.amount_to_precision('BTC/USDT:USDT', qty)
+        for price in (43210.06, 43210.04, 100.0):
+            assert registry.round_price('BTC/USDT', price) == ex.price_to_precision('BTC/USDT:USDT', price)
+        assert registry.round_price('1000PEPE/USDT', 0.012345678) == '0.0123457'
+
+    def test_order_amount_enforces_minimums(self, registry):
+        """Test que cantidades bajo el mínimo o con nocional insuficiente se rechazan antes de enviarlas"""
+        assert registry.order_amount('BTC/USDT', 0.0009) is None              # Below min qty
+        assert registry.order_amount('BTC/USDT', 0.001, price=50000) is None  # 50 USD < 100 USD
+        assert registry.order_amount('BTC/USDT', 0.0025, price=50000) == '0.002'
+
+    def test_rebuilds_when_markets_cache_changes(self, tmp_path):
+        """Test que la tabla se construye desde el fichero de mercados y se reconstruye solo si cambia"""
+        cache = MarketsCache(cache_dir=str(tmp_path))
+        ex = ccxt.binance({'options': {'defaultType': 'swap'}})
+        ex.set_markets(binance_markets()[:2])
+        cache.write(ex)
+        reg = InstrumentRegistry(cache=cache, check_interval=0)
+
+        assert reg.get('BTC/USDT').binance == 'BTC/USDT:USDT'
+        assert reg.get('BTC/USDT').contract_type != SPOT
+        assert reg.builds == 1
+        reg.get('BTC/USDT')
+        assert reg.builds == 1
+
+        ex.set_markets(binance_markets())
+        cache.write(ex)
+        assert reg.get('1000PEPE/USDT') is not None
+        assert reg.builds == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,169 @@
+"""
+COSMOS AI - Unit Tests for Numeric Kernels
+Tests para validar que los kernels (numba o NumPy) coinciden con los bucles de referencia y con el scanner
+"""
+import pytest
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import kernels
+import indicators
+from smc_engine import ob_series
+
+def ohlc(bars, seed=3, vol=0.01):
+    """Velas sintéticas (paseo aleatorio) con RSI"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, vol, bars)))
+    open_ = np.r_[close[:1], close[:-1]] * (1 + rng.normal(0, vol / 2, bars))
+    spread = np.abs(rng.normal(0, vol / 2, bars)) * close
+    df = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + spread,
+                       'low': np.minimum(open_, close) - spread, 'close': close})
+    df['RSI'] = indicators.rsi(close, 14)
+    return df
+
+def reference(loop, *args, out):
+    """Ejecuta el bucle sin compilar (implementación de referencia)"""
+    loop(*args, out)
+    return out
+
+def stop_rule(lows, entry, current_sl, is_long):
+    """Regla original de paper_trader para una vela (mínimo de las 5 anteriores, 0.2% de margen)"""
+    support = lows[-6:-1].min()
+    if is_long:
+        new_sl = support * 0.998
+        return new_sl if new_sl > current_sl and new_sl > entry else current_sl
+    new_sl = support * 1.002
+    return new_sl if (current_sl == 0 or new_sl < current_sl) and new_sl < entry else current_sl
+
+class TestFallbackMatchesReference:
+    """Tests para validar que el camino NumPy da exactamente lo mismo que los bucles"""
+
+    def test_ewm(self):
+        """Test que la recursión EMA/Wilder coincide bit a bit"""
+        x = np.random.default_rng(0).normal(size=(3, 500))
+        out = reference(kernels._ewm_loop, x, 0.1, out=np.empty_like(x))
+        assert np.array_equal(kernels.ewm(x, 0.1, use_numba=False), out)
+
+    @pytest.mark.parametrize("lookback", [2, 5, 20])
+    def test_structure(self, lookback):
+        """Test de la estructura de mercado por vela"""
+        df = ohlc(1500)
+        c, h, l = (df[k].to_numpy() for k in ('close', 'high', 'low'))
+        out = reference(kernels._structure_loop, c, h, l, lookback, out=np.zeros(len(c), dtype=np.int8))
+        assert np.array_equal(kernels.structure_series(c, h, l, lookback, use_numba=False), out)
+        assert (out == 1).any() and (out == -1).any()
+
+    @pytest.mark.parametrize("lookback", [3, 10])
+    def test_divergence(self, lookback):
+        """Test de la divergencia RSI por vela"""
+        df = ohlc(3000, vol=0.02)
+        c, r = df['close'].to_numpy(), df['RSI'].to_numpy()
+        out = reference(kernels._divergence_loop, c, r, lookback, out=np.zeros(len(c), dtype=np.int8))
+        assert np.array_equal(kernels.divergence_series(c, r, lookback, use_numba=False), out)
+        assert (out == 1).any() and (out == -1).any()
+
+    def test_order_blocks(self):
+        """Test que el bucle de order blocks en una pasada coincide con smc_engine.ob_series"""
+        df = ohlc(2000, vol=0.01)
+        cols = [df[k].to_numpy() for k in ('open', 'high', 'low', 'close')]
+        bull, bear = np.zeros(len(df), dtype=bool), np.zeros(len(df), dtype=bool)
+        kernels._order_block_loop(*cols, 9, 0.05, bull, bear)
+        exp_bull, exp_bear = ob_series(*cols)
+        assert np.array_equal(bull, exp_bull) and np.array_equal(bear, exp_bear)
+        assert bull.any() and bear.any()
+
+    @pytest.mark.parametrize("is_long,current_sl", [(True, 0.0), (True, 95.0), (False, 0.0), (False, 130.0)])
+    def test_structure_stops(self, is_long, current_sl):
+        """Test que el trailing por estructura repetido vela a vela coincide con la regla de paper_trader"""
+        lows = ohlc(800, seed=9)['low'].to_numpy()
+        entry = lows[0] * (0.9 if is_long else 1.1)
+        out = reference(kernels._structure_stop_loop, lows, entry, current_sl, is_long, 5, 0.002, out=np.empty(len(lows)))
+        assert np.array_equal(kernels.structure_stops(lows, entry, current_sl, is_long, use_numba=False), out)
+
+        sl = current_sl
+        for t in range(5, len(lows)):
+            sl = stop_rule(lows[:t + 1], entry, sl, is_long)
+            assert out[t] == sl
+
+class TestScannerDetectors:
+    """Tests para validar los detectores del scanner frente a la versión pandas original"""
+
+    @staticmethod
+    def pandas_structure(df, lookback=20):
+        window = df.iloc[-lookback:-1]
+        close = df['close'].iloc[-1]
+        if close > window['high'].max(): return "BULLISH"
+        if close < window['low'].min(): return "BEARISH"
+        return "NEUTRAL"
+
+    @staticmethod
+    def pandas_divergence(df, lookback=10):
+        if len(df) < lookback: return "NONE"
+        price, rsi = df['close'].iloc[-1], df['RSI'].iloc[-1]
+        window = df.iloc[-lookback:-1]
+        if rsi < 35:
+            i = window['close'].idxmin()
+            if price < window['close'][i] and rsi > window['RSI'][i]: return "BULLISH"
+        if rsi > 65:
+            i = window['close'].idxmax()
+            if price > window['close'][i] and rsi < window['RSI'][i]: return "BEARISH"
+        return "NONE"
+
+    def test_last_bar_and_history(self):
+        """Test que check_* y *_history coinciden con la versión pandas en cada vela"""
+        from scanner import check_market_structure, check_rsi_divergence, structure_history, divergence_history
+        df = ohlc(400, seed=4, vol=0.02)
+        structure, divergence = structure_history(df), divergence_history(df)
+        for t in range(1, len(df)):
+            part = df.iloc[:t + 1]
+            assert check_market_structure(part) == self.pandas_structure(part) == structure.iloc[t]
+            assert check_rsi_divergence(part) == self.pandas_divergence(part) == divergence.iloc[t]
+        assert set(divergence) == {"NONE", "BULLISH", "BEARISH"}
+
+class TestBenchmark:
+    """Benchmarks sobre 100k velas"""
+
+    BARS = 100_000
+
+    @pytest.mark.benchmark
+    def test_throughput_100k_bars(self):
+        """Benchmark: el camino seleccionado (numba o NumPy) procesa >= 2M velas/s en cada detector"""
+        df = ohlc(self.BARS)
+        o, c, h, l, r = (df[k].to_numpy() for k in ('open', 'close', 'high', 'low', 'RSI'))
+        cases = {
+            "structure": lambda: kernels.structure_series(c, h, l, 20),
+            "divergence": lambda: kernels.divergence_series(c, r, 10),
+            "order_blocks": lambda: kernels.order_blocks(o, h, l, c),
+            "stops": lambda: kernels.structure_stops(l, l[0] * 0.9),
+        }
+        if kernels.USE_NUMBA:
+            cases["ewm"] = lambda: kernels.ewm(c, 1 / 14)
+        for name, run in cases.items():
+            run()  # Warm-up (numba compilation or cache load)
+            t0 = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - t0
+            print(f"   [KERNELS] {name}: {self.BARS / elapsed / 1e6:.1f}M bars/s (numba={kernels.USE_NUMBA})")
+            assert self.BARS / elapsed >= 2e6
+
+    @pytest.mark.skipif(not kernels.NUMBA_AVAILABLE, reason="numba not installed")
+    def test_numba_matches_numpy_on_100k_bars(self):
+        """Test que los kernels compilados coinciden con el camino NumPy sobre 100k velas"""
+        df = ohlc(self.BARS)
+        o, c, h, l, r = (df[k].to_numpy() for k in ('open', 'close', 'high', 'low', 'RSI'))
+        assert np.array_equal(kernels.ewm(c, 0.1, use_numba=True), kernels.ewm(c, 0.1, use_numba=False))
+        assert np.array_equal(kernels.structure_series(c, h, l, use_numba=True), kernels.structure_series(c, h, l, use_numba=False))
+        assert np.array_equal(kernels.divergence_series(c, r, use_numba=True), kernels.divergence_series(c, r, use_numba=False))
+        for a, b in zip(kernels.order_blocks(o, h, l, c, use_numba=True), kernels.order_blocks(o, h, l, c, use_numba=False)):
+            assert np.array_equal(a, b)
+        assert np.array_equal(kernels.structure_stops(l, l[0] * 0.9, use_numba=True),
+                              kernels.structure_stops(l, l[0] * 0.9, use_numba=False))
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,199 @@
+"""
+COSMOS AI - Unit Tests for Market Gateway
+Tests para validar el fetch concurrente del universo (ccxt async)
+"""
+import pytest
+import sys
+import os
+import time
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from market_gateway import MarketGateway, WeightBudget, request_weight
+
+LATENCY = 0.05  # Segundos simulados por request
+
+class FakeAsyncExchange:
+    """Exchange async mínimo con latencia fija"""
+
+    def __init__(self, symbols, fail=False):
+        self.markets = {s: {} for s in symbols}
+        self.fail = fail
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _hit(self, method, symbol):
+        self.calls.append((method, symbol))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+            if self.fail:
+                raise Exception("451 Service unavailable")
+        finally:
+            self.in_flight -= 1
+
+    async def load_markets(self):
+        return self.markets
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=100):
+        await self._hit('ohlcv', symbol)
+        step = 60_000
+        start = int(time.time() * 1000) // step * step - step * (limit - 1)
+        return [[start + i * step, 1, 2, 0, 1.5, 10] for i in range(limit)]
+
+    async def fetch_ticker(self, symbol):
+        await self._hit('ticker', symbol)
+        return {'symbol': symbol, 'last': 100.0}
+
+    async def fetch_order_book(self, symbol, limit=50):
+        await self._hit('book', symbol)
+        return {'bids': [[99.0, 1.0]] * limit, 'asks': [[101.0, 1.0]] * limit}
+
+    async def close(self):
+        pass
+
+SYMBOLS = [f"C{i}/USDT" for i in range(30)]
+BIG_BUDGETS = {'kraken': (10_000, 10_000), 'binance': (10_000, 10_000)}
+
+def make_gateway(kraken_fail=False, budgets=None, max_concurrency=64):
+    gw = MarketGateway(budgets=budgets or BIG_BUDGETS, max_concurrency=max_concurrency)
+    gw._exchanges['kraken'] = FakeAsyncExchange([s.replace('/USDT', '/USD') for s in SYMBOLS], fail=kraken_fail)
+    gw._exchanges['binance'] = FakeAsyncExchange([f"{s}:USDT" for s in SYMBOLS])
+    return gw
+
+class TestMarketGateway:
+    """Tests para la clase MarketGateway"""
+
+    def test_universe_bundle_shape(self):
+        """Test que cada símbolo trae frames, ticker y book"""
+        gw = make_gateway()
+        try:
+            bundles = gw.fetch_universe(SYMBOLS[:3])
+        finally:
+            gw.close()
+
+        assert set(bundles) == set(SYMBOLS[:3])
+        b = bundles['C0/USDT']
+        assert set(b['frames']) == {'5m', '15m', '4h'}
+        assert len(b['frames']['5m']) == 100
+        assert len(b['frames']['4h']) == 50
+        assert b['ticker']['last'] == 100.0
+        assert len(b['book']['bids']) == 100
+        assert b['errors'] == {}
+
+    def test_30_symbols_run_concurrently(self):
+        """Test que 30 símbolos x 5 requests no se ejecutan secuencialmente"""
+        gw = make_gateway()
+        try:
+            start = time.time()
+            bundles = gw.fetch_universe(SYMBOLS)
+            elapsed = time.time() - start
+        finally:
+            gw.close()
+
+        sequential = len(SYMBOLS) * 5 * LATENCY  # 7.5s
+        assert len(bundles) == 30
+        assert elapsed < sequential / 5
+        assert gw.last_cycle['requests']['kraken'] == 150
+
+    def test_kraken_failure_falls_back_to_binance(self):
+        """Test que si Kraken falla se usa Binance con el símbolo de futuros"""
+        gw = make_gateway(kraken_fail=True)
+        binance = gw._exchanges['binance']
+        try:
+            bundles = gw.fetch_universe(SYMBOLS[:2])
+        finally:
+            gw.close()
+
+        assert bundles['C0/USDT']['ticker']['symbol'] == 'C0/USDT:USDT'
+        assert ('ohlcv', 'C1/USDT:USDT') in binance.calls
+        assert gw.candle_cache.plan('C0/USDT', '5m', 100)[0] == 'binance'
+
+    def test_second_cycle_uses_delta_requests(self):
+        """Test que el segundo ciclo reutiliza el candle cache"""
+        gw = make_gateway()
+        kraken = gw._exchanges['kraken']
+        try:
+            gw.fetch_universe(SYMBOLS[:2], frames={'1m': 100}, with_ticker=False, book_limit=0)
+            gw.fetch_universe(SYMBOLS[:2], frames={'1m': 100}, with_ticker=False, book_limit=0)
+        finally:
+            gw.close()
+
+        assert len(kraken.calls) == 4
+        assert gw.candle_cache.stats()['delta_fetches'] == 2
+
+class TestBudgets:
+    """Tests para el presupuesto de peso por exchange"""
+
+    def test_request_weight_tables(self):
+        """Test que los pesos siguen las tablas de Binance/Kraken"""
+        assert request_weight('binance', 'ohlcv', 50) == 1
+        assert request_weight('binance', 'ohlcv', 100) == 2
+        assert request_weight('binance', 'order_book', 100) == 5
+        assert request_weight('binance', 'order_book', 5000) == 20
+        assert request_weight('kraken', 'ohlcv', 100) == 1.2
+
+    def test_budget_blocks_when_exhausted(self):
+        """Test que el bucket espera a recargar cuando se agota"""
+        budget = WeightBudget('test', capacity=2, refill_per_sec=20)
+
+        async def spend():
+            start = time.monotonic()
+            for _ in range(4):
+                await budget.acquire(1)
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(spend())
+        assert elapsed >= 0.09  # 2 tokens extra a 20/s
+
+    def test_semaphore_limit_is_respected(self):
+        """Test que nunca hay más requests en vuelo que el límite"""
+        gw = make_gateway(max_concurrency=4)
+        kraken = gw._exchanges['kraken']
+        try:
+            gw.fetch_universe(SYMBOLS[:10])
+        finally:
+            gw.close()
+
+        assert kraken.max_in_flight <= 4
+
+    def test_saturated_primary_spills_to_binance(self):
+        """Test que con Kraken sin presupuesto se enruta a Binance"""
+        gw = make_gateway(budgets={'kraken': (1, 0.01), 'binance': (10_000, 10_000)})
+        gw.max_budget_wait = 0.5
+        binance = gw._exchanges['binance']
+        try:
+            bundles = gw.fetch_universe(SYMBOLS[:5], timeout=5)
+        finally:
+            gw.close()
+
+        assert len(bundles) == 5
+        assert len(binance.calls) > 0
+
+class TestProxy:
+    """Tests para la configuración de proxy compartida con BinanceTrader"""
+
+    def test_sync_and_async_clients_route_the_same_way(self, monkeypatch):
+        """Test que el gateway async y el fallback sync resuelven el mismo proxy"""
+        import ccxt
+        from binance_engine import proxy_config
+        monkeypatch.setenv("BINANCE_PROXY", "http://proxy.local:8080")
+        gw = MarketGateway(budgets=BIG_BUDGETS)
+
+        async def create():
+            ex = gw._create_exchange('binance')
+            try:
+                return ex.check_proxy_settings('https://fapi.binance.com/fapi/v1/time')
+            finally:
+                await ex.close()
+
+        sync = ccxt.binance({**proxy_config()}).check_proxy_settings('https://fapi.binance.com/fapi/v1/time')
+        assert list(asyncio.run(create())) == list(sync) == [None, "http://proxy.local:8080", None]
+        assert proxy_config("") == {}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,99 @@
+"""
+COSMOS AI - Unit Tests for Panel Market Analysis
+Tests para validar que analyze_market_panel coincide con analyze_market y los helpers de confluencia
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import scanner
+import vpin
+from scanner import (analyze_market, analyze_market_panel, build_panel, panel_row,
+                     check_market_structure, check_rsi_divergence, analyze_volume_pressure)
+
+STEP = 300_000
+T0 = 1_700_000_000_000
+
+def make_bars(n, seed, drift=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(drift, 1, n))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    vol = rng.uniform(1, 10, n)
+    return [[T0 + i * STEP, close[i], close[i] + spread[i], close[i] - spread[i], close[i], vol[i]] for i in range(n)]
+
+def untagged_df(bars):
+    """DataFrame sin attrs: analyze_market usa el recálculo completo"""
+    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+@pytest.fixture
+def frames():
+    # Tendencias distintas para cubrir BULLISH/BEARISH/NEUTRAL en estructura y divergencia
+    out = {f'S{i}/USDT': make_bars(100, seed=i, drift=d) for i, d in enumerate([-0.8, -0.3, 0.0, 0.3, 0.8] * 6)}
+    # Divergencia alcista forzada: nuevo mínimo con RSI más alto que en el mínimo previo
+    div = make_bars(100, seed=99, drift=-0.6)
+    for k, px in enumerate([60.0, 50.0, 58.0, 57.0, 56.0, 55.0, 54.0, 53.0, 52.0, 49.9]):
+        div[90 + k][2:5] = [px + 0.2, px - 0.2, px]
+    out['DIV/USDT'] = div
+    return out
+
+class TestAnalyzeMarketPanel:
+    """Tests de equivalencia contra la ruta por símbolo"""
+
+    def test_matches_per_symbol_analysis(self, frames):
+        """Test que cada fila coincide con analyze_market + los tres helpers de confluencia"""
+        panel = build_panel(frames, limit=100)
+        result = analyze_market_panel(panel['symbols'], panel['timestamp'], panel['close'], panel['high'], panel['low'], panel['volume'])
+
+        seen = set()
+        for symbol, bars in frames.items():
+            df = untagged_df(bars)
+            ref = analyze_market(df)
+            row = panel_row(result, symbol)
+            for key in ('price', 'rsi', 'ema_200', 'atr', 'volume', 'vol_ma', 'macd', 'signal_line', 'histogram'):
+                assert row[key] == pytest.approx(ref[key], rel=1e-9), (symbol, key)
+            assert row['timestamp'] == ref['timestamp']
+            assert row['structure'] == check_market_structure(df)
+            assert row['divergence'] == check_rsi_divergence(df)
+            assert row['volume_pressure'] == pytest.approx(analyze_volume_pressure(df), rel=1e-9)
+            assert row['vpin'] == pytest.approx(vpin.vpin_from_candles(df['close'], df['volume']), rel=1e-9)
+            seen.update([row['structure'], row['divergence']])
+
+        assert {'BULLISH', 'BEARISH', 'NONE'} <= seen
+
+    def test_invalid_rows_map_to_none(self):
+        """Test que una serie plana (RSI NaN) se marca inválida como analyze_market"""
+        flat = np.full((1, 60), 100.0)
+        result = analyze_market_panel(['FLAT/USDT'], np.arange(60)[None, :], flat, flat, flat, np.ones((1, 60)))
+
+        assert not result.loc['FLAT/USDT', 'valid']
+        assert panel_row(result, 'FLAT/USDT') is None
+        assert panel_row(result, 'MISSING/USDT') is None
+
+class TestBuildPanel:
+    """Tests para la alineación de frames"""
+
+    def test_short_frames_are_left_out(self):
+        """Test que símbolos con menos velas que el límite quedan fuera del panel"""
+        panel = build_panel({'A/USDT': make_bars(120, 1), 'B/USDT': make_bars(80, 2), 'C/USDT': None}, limit=100)
+
+        assert panel['symbols'] == ['A/USDT']
+        assert panel['close'].shape == (1, 100)
+        assert panel['timestamp'][0, -1] == T0 + 119 * STEP
+
+    def test_scan_panel_from_bundles(self):
+        """Test que scan_panel lee los frames de los bundles del gateway"""
+        bundles = {'A/USDT': {'frames': {'5m': make_bars(100, 1)}}, 'B/USDT': None}
+
+        result = scanner.scan_panel(bundles, '5m')
+        assert list(result.index) == ['A/USDT']
+        assert scanner.scan_panel(bundles, '15m') is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
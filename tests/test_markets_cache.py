@@ -0,0 +1,87 @@
+"""
+COSMOS AI - Unit Tests for Markets Cache
+Tests para validar la persistencia de load_markets() en disco (TTL, sello de versión, refresco)
+"""
+import pytest
+import sys
+import os
+import json
+import time
+import ccxt
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from markets_cache import MarketsCache
+
+def binance_with_markets():
+    """Binance Futures con un mercado sintético (sin red)"""
+    ex = ccxt.binance({'options': {'defaultType': 'swap'}})
+    market = ex.safe_market_structure({
+        'id': 'BTCUSDT', 'symbol': 'BTC/USDT:USDT', 'base': 'BTC', 'quote': 'USDT', 'settle': 'USDT',
+        'type': 'swap', 'swap': True, 'contract': True, 'linear': True, 'active': True,
+        'precision': {'amount': 0.001, 'price': 0.1}, 'limits': {},
+    })
+    ex.set_markets([market])
+    return ex
+
+def fresh_binance():
+    return ccxt.binance({'options': {'defaultType': 'swap'}})
+
+class TestMarketsCache:
+    """Tests para la clase MarketsCache"""
+
+    def test_roundtrip_hydrates_usable_exchange(self, tmp_path):
+        """Test que un exchange nuevo queda operativo desde el fichero, sin descargar"""
+        cache = MarketsCache(cache_dir=str(tmp_path))
+        cache.write(binance_with_markets())
+
+        ex = fresh_binance()
+        with patch.object(ex, 'fetch_markets') as fetch:
+            assert cache.load(ex)
+            fetch.assert_not_called()
+        assert ex.market('BTC/USDT:USDT')['id'] == 'BTCUSDT'
+        assert ex.amount_to_precision('BTC/USDT:USDT', 0.12345) == '0.123'
+
+    def test_miss_downloads_and_writes(self, tmp_path):
+        """Test que sin fichero se descarga una vez y se persiste"""
+        cache = MarketsCache(cache_dir=str(tmp_path))
+        source = binance_with_markets()
+        ex = fresh_binance()
+
+        with patch.object(ex, 'load_markets', side_effect=lambda: ex.set_markets(list(source.markets.values()))):
+            cache.load(ex)
+
+        assert cache.downloads == 1
+        assert os.path.exists(tmp_path / 'binance-swap.json')
+
+    def test_version_stamp_mismatch_is_a_miss(self, tmp_path):
+        """Test que un fichero de otra versión de ccxt se ignora"""
+        cache = MarketsCache(cache_dir=str(tmp_path))
+        cache.write(binance_with_markets())
+        path = tmp_path / 'binance-swap.json'
+        envelope = json.loads(path.read_text())
+        envelope['ccxt'] = '0.0.1'
+        path.write_text(json.dumps(envelope))
+
+        assert MarketsCache(cache_dir=str(tmp_path)).hydrate(fresh_binance()) is False
+
+    def test_stale_file_served_and_refreshed_in_background(self, tmp_path):
+        """Test que un fichero caducado se usa y se refresca en segundo plano"""
+        cache = MarketsCache(cache_dir=str(tmp_path), ttl=0)
+        cache.write(binance_with_markets())
+        time.sleep(0.01)
+
+        ex = fresh_binance()
+        with patch.object(ex, 'load_markets') as reload:
+            assert cache.hydrate(ex)
+            deadline = time.time() + 2
+            while cache.refreshes == 0 and time.time() < deadline:
+                time.sleep(0.01)
+
+        reload.assert_called_once_with(reload=True)
+        assert 'BTC/USDT:USDT' in ex.markets
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
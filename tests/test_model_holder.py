@@ -0,0 +1,94 @@
+"""
+COSMOS AI - Unit Tests for Model Holder
+Tests para validar el modelo residente en memoria y el hot-reload
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import joblib
+from model_holder import ModelHolder, atomic_dump
+
+class TestModelHolder:
+    """Tests para la clase ModelHolder"""
+
+    @pytest.fixture
+    def artifact(self, tmp_path):
+        path = tmp_path / "xgb_model.pkl"
+        joblib.dump({"version": 1}, path)
+        return path
+
+    @pytest.fixture
+    def holder(self, artifact):
+        return ModelHolder(candidates=[str(artifact)], check_interval=0)
+
+    def test_loads_once_across_calls(self, holder):
+        """Test que el modelo se deserializa una sola vez"""
+        for _ in range(20):
+            assert holder.get() == {"version": 1}
+
+        assert holder.load_count == 1
+
+    def test_hot_reload_on_artifact_change(self, holder, artifact):
+        """Test que un nuevo artefacto en disco reemplaza el modelo"""
+        assert holder.get() == {"version": 1}
+
+        atomic_dump({"version": 2, "padding": "x" * 64}, str(artifact))
+
+        assert holder.get() == {"version": 2, "padding": "x" * 64}
+        assert holder.load_count == 2
+
+    def test_check_interval_throttles_stat(self, artifact):
+        """Test que dentro del intervalo no se revisa el disco"""
+        holder = ModelHolder(candidates=[str(artifact)], check_interval=3600)
+        assert holder.get() == {"version": 1}
+
+        atomic_dump({"version": 2, "padding": "x" * 64}, str(artifact))
+
+        assert holder.get() == {"version": 1}
+
+    def test_publish_survives_until_next_write(self, holder, artifact):
+        """Test que un modelo de brain.train() se mantiene hasta una nueva escritura"""
+        holder.get()
+        holder.publish({"version": "trained"}, source="test")
+
+        assert holder.get() == {"version": "trained"}
+
+        atomic_dump({"version": 3, "padding": "x" * 64}, str(artifact))
+        assert holder.get() == {"version": 3, "padding": "x" * 64}
+
+    def test_corrupt_artifact_keeps_current_model(self, holder, artifact):
+        """Test que un artefacto corrupto no tumba el modelo actual"""
+        holder.get()
+        artifact.write_bytes(b"not a pickle at all")
+
+        assert holder.get() == {"version": 1}
+
+    def test_missing_artifact_returns_none(self, tmp_path):
+        """Test que sin artefacto retorna None"""
+        holder = ModelHolder(candidates=[str(tmp_path / "missing.pkl")], check_interval=0)
+        assert holder.get() is None
+
+    def test_empty_candidates_do_not_fall_back_to_defaults(self):
+        """Test que una lista vacía de candidatos no carga los artefactos reales del disco"""
+        holder = ModelHolder(candidates=[], check_interval=0)
+        assert holder.candidates == []
+        assert holder.get() is None
+
+    def test_stats_reports_latency(self, holder):
+        """Test que stats reporta carga e inferencia"""
+        holder.get()
+        holder.record_inference(0.000050)
+        holder.record_inference(0.000150)
+
+        stats = holder.stats()
+
+        assert stats['load_count'] == 1
+        assert stats['inference_count'] == 2
+        assert stats['avg_inference_us'] == pytest.approx(100.0)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+"""
+COSMOS AI - Unit Tests for Provider Router
+Tests para validar el orden adaptativo de proveedores y los estados del circuit breaker
+"""
+import pytest
+import sys
+import os
+import ccxt
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from provider_router import ProviderRouter, CLOSED, OPEN, HALF_OPEN
+
+PROVIDERS = ('kraken', 'binance')
+
+def fail(router, provider, n, now=0.0):
+    for _ in range(n):
+        router.record(provider, 'ohlcv', 1.0, False, now=now)
+
+class TestProviderRouter:
+    """Tests para la clase ProviderRouter"""
+
+    def test_configured_order_without_samples(self):
+        """Test que sin datos se respeta el orden configurado"""
+        assert ProviderRouter().order('ohlcv', PROVIDERS) == ['kraken', 'binance']
+
+    def test_slow_primary_is_demoted(self):
+        """Test que un proveedor mucho más lento pasa detrás del más rápido"""
+        router = ProviderRouter()
+        for _ in range(10):
+            router.record('kraken', 'ohlcv', 2.0, True)
+            router.record('binance', 'ohlcv', 0.1, True)
+
+        assert router.order('ohlcv', PROVIDERS) == ['binance', 'kraken']
+
+    def test_close_scores_keep_configured_order(self):
+        """Test que con latencias parecidas no se alterna el orden"""
+        router = ProviderRouter()
+        for _ in range(10):
+            router.record('kraken', 'ohlcv', 0.25, True)
+            router.record('binance', 'ohlcv', 0.15, True)
+
+        assert router.order('ohlcv', PROVIDERS)[0] == 'kraken'
+
+    def test_consecutive_failures_open_circuit(self):
+        """Test que N fallos seguidos abren el circuito y el proveedor se salta"""
+        router = ProviderRouter(failure_threshold=3, cooldown=30)
+        fail(router, 'kraken', 3)
+
+        assert router.state('kraken', 'ohlcv') == OPEN
+        assert router.order('ohlcv', PROVIDERS, now=10.0) == ['binance']
+
+    def test_half_open_probe_then_close(self):
+        """Test que tras el cooldown se prueba una sola vez y un éxito cierra el circuito"""
+        router = ProviderRouter(failure_threshold=3, cooldown=30)
+        fail(router, 'kraken', 3)
+
+        assert router.order('ohlcv', PROVIDERS, now=31.0) == ['kraken', 'binance']
+        assert router.state('kraken', 'ohlcv') == HALF_OPEN
+        assert router.order('ohlcv', PROVIDERS, now=31.5) == ['binance']  # Solo un probe en vuelo
+
+        router.record('kraken', 'ohlcv', 0.2, True)
+        assert router.state('kraken', 'ohlcv') == CLOSED
+
+    def test_failed_probe_doubles_cooldown(self):
+        """Test que un probe fallido reabre el circuito con cooldown mayor"""
+        router = ProviderRouter(failure_threshold=3, cooldown=30)
+        fail(router, 'kraken', 3)
+        router.order('ohlcv', PROVIDERS, now=31.0)
+        fail(router, 'kraken', 1, now=31.0)
+
+        assert router.state('kraken', 'ohlcv') == OPEN
+        assert router.order('ohlcv', PROVIDERS, now=80.0) == ['binance']
+        assert router.order('ohlcv', PROVIDERS, now=92.0)[0] == 'kraken'
+
+    def test_stale_stats_restore_configured_order(self):
+        """Test que un proveedor degradado vuelve a su posición cuando sus datos envejecen"""
+        router = ProviderRouter(cooldown=30)
+        router.record('kraken', 'ohlcv', 1.0, False, now=0.0)
+        router.record('binance', 'ohlcv', 0.1, True, now=0.0)
+
+        assert router.order('ohlcv', PROVIDERS, now=10.0) == ['binance', 'kraken']
+        assert router.order('ohlcv', PROVIDERS, now=40.0) == ['kraken', 'binance']
+
+    def test_all_open_still_returns_one(self):
+        """Test que si todos están abiertos se intenta el más próximo a reintentar"""
+        router = ProviderRouter(failure_threshold=1, cooldown=30)
+        fail(router, 'kraken', 1, now=0.0)
+        fail(router, 'binance', 1, now=5.0)
+
+        assert router.order('ohlcv', PROVIDERS, now=10.0) == ['kraken']
+
+    def test_neutral_errors_not_counted(self):
+        """Test que BadSymbol no cuenta como fallo del proveedor"""
+        router = ProviderRouter(failure_threshold=1, neutral_errors=(ccxt.BadSymbol,))
+        with pytest.raises(ccxt.BadSymbol):
+            router.call('kraken', 'ohlcv', Mock(side_effect=ccxt.BadSymbol("no market")))
+
+        assert router.state('kraken', 'ohlcv') == CLOSED
+
+class TestBinanceTraderRouting:
+    """Tests de integración con BinanceTrader"""
+
+    def test_failing_primary_skipped_without_request(self):
+        """Test que con Kraken caído no se paga su timeout en cada llamada"""
+        from binance_engine import BinanceTrader
+        trader = BinanceTrader()
+        trader.rate_limiter = Mock()
+        trader.router = ProviderRouter(failure_threshold=2, cooldown=60)
+        trader.fallback_exchange = Mock()
+        trader.fallback_exchange.fetch_ticker.side_effect = ccxt.RequestTimeout("timeout")
+        trader.exchange = Mock()
+        trader.exchange.markets = {'BTC/USDT:USDT': {}}
+        trader.exchange.fetch_ticker.return_value = {'last': 100.0}
+
+        for _ in range(5):
+            assert trader._fetch_ticker_chain('BTC/USDT') == {'last': 100.0}
+
+        assert trader.fallback_exchange.fetch_ticker.call_count == 1
+        assert trader.exchange.fetch_ticker.call_count == 5
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
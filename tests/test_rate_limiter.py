@@ -0,0 +1,133 @@
+"""
+COSMOS AI - Unit Tests for Rate Limiter
+Tests para validar el token bucket compartido en Redis (script Lua), pesos y carriles de prioridad
+"""
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis necesita lupa para EVALSHA
+
+from rate_limiter import RateLimiter, endpoint_weight
+
+BUCKETS = {'binance_futures': (100.0, 10.0), 'kraken': (15.0, 1.0)}
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def process(server):
+    """Cada 'proceso' tiene su propio cliente sobre el mismo servidor Redis"""
+    return RateLimiter(fakeredis.FakeRedis(server=server, decode_responses=True), buckets=BUCKETS)
+
+class TestEndpointWeight:
+    """Tests para la tabla de pesos por endpoint"""
+
+    def test_binance_weights_by_limit(self):
+        """Test que el peso de klines y depth depende del limit"""
+        assert endpoint_weight('binance_futures', 'ohlcv', 50) == 1
+        assert endpoint_weight('binance_futures', 'ohlcv', 500) == 5
+        assert endpoint_weight('binance_futures', 'order_book', 100) == 5
+        assert endpoint_weight('binance_futures', 'order_book', 5000) == 20
+        assert endpoint_weight('binance_futures', 'tickers') == 40
+
+    def test_unknown_endpoint_costs_one(self):
+        """Test que un endpoint desconocido cuesta 1"""
+        assert endpoint_weight('kraken', 'something') == 1
+
+class TestRateLimiter:
+    """Tests para la clase RateLimiter"""
+
+    def test_bucket_shared_across_processes(self, server):
+        """Test que dos procesos gastan del mismo bucket"""
+        a, b = process(server), process(server)
+        assert a.reserve('binance_futures', 60, 'execution', now_ms=1000)[0]
+        granted, wait, tokens = b.reserve('binance_futures', 60, 'execution', now_ms=1000)
+
+        assert not granted
+        assert tokens == pytest.approx(40.0)
+        assert wait == pytest.approx(2.0)  # 20 tokens a 10/s
+
+    def test_refill_over_time(self, server):
+        """Test que el bucket se rellena según el tiempo transcurrido"""
+        limiter = process(server)
+        limiter.reserve('binance_futures', 100, 'execution', now_ms=0)
+        granted, _, tokens = limiter.reserve('binance_futures', 30, 'execution', now_ms=3000)
+
+        assert granted
+        assert tokens == pytest.approx(0.0)
+
+    def test_execution_lane_preempts_scan(self, server):
+        """Test que el carril de escaneo deja reserva que solo ejecución puede usar"""
+        limiter = process(server)
+        assert limiter.reserve('binance_futures', 80, 'scan', now_ms=0)[0]
+        assert not limiter.reserve('binance_futures', 1, 'scan', now_ms=0)[0]
+        assert limiter.reserve('binance_futures', 20, 'execution', now_ms=0)[0]
+
+    def test_remaining_metric(self, server):
+        """Test que remaining refleja el gasto de todos los procesos"""
+        process(server).acquire('kraken', 5, 'execution')
+        limiter = process(server)
+
+        assert limiter.remaining('kraken') == pytest.approx(10.0, abs=0.5)
+        assert set(limiter.stats()['remaining']) == {'binance_futures', 'kraken'}
+
+    def test_acquire_timeout(self, server):
+        """Test que acquire devuelve False si la espera supera el timeout"""
+        limiter = process(server)
+        limiter.acquire('kraken', 15, 'execution')
+
+        assert limiter.acquire('kraken', 10, 'execution', timeout=0.1) is False
+
+    def test_acquire_async_keeps_redis_off_the_loop(self, server):
+        """Test que acquire_async ejecuta la llamada a Redis fuera del hilo del event loop"""
+        import asyncio
+        import threading
+        limiter = process(server)
+        threads = []
+        reserve = limiter.reserve
+        limiter.reserve = lambda *a, **k: threads.append(threading.get_ident()) or reserve(*a, **k)
+
+        async def run():
+            await limiter.acquire_async('kraken', 5, lane='execution')
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+        assert threads and loop_thread not in threads
+        assert limiter.granted['kraken'] == 5
+
+    def test_offline_uses_local_bucket(self):
+        """Test que sin Redis se aplica el mismo algoritmo en memoria"""
+        limiter = RateLimiter(None, buckets=BUCKETS)
+        assert limiter.reserve('kraken', 15, 'execution', now_ms=0)[0]
+        granted, wait, _ = limiter.reserve('kraken', 2, 'execution', now_ms=1000)
+
+        assert not granted
+        assert wait == pytest.approx(1.0)
+
+class TestBinanceTraderRateLimit:
+    """Tests de integración con BinanceTrader"""
+
+    def test_each_provider_charged_to_its_bucket(self, server):
+        """Test que el fallback Kraken -> Binance cobra el peso correcto a cada bucket"""
+        from binance_engine import BinanceTrader
+        trader = BinanceTrader()
+        trader.single_flight = Mock(do=lambda key, fn: fn())
+        trader.fallback_exchange = Mock()
+        trader.fallback_exchange.fetch_order_book.side_effect = Exception("kraken down")
+        trader.exchange = Mock()
+        trader.exchange.fetch_order_book.return_value = {'bids': [], 'asks': []}
+        trader.rate_limiter = Mock()
+
+        trader.fetch_order_book('BTC/USDT', limit=100)
+
+        calls = [c.args for c in trader.rate_limiter.acquire.call_args_list]
+        assert calls == [('kraken', 1, 'scan'), ('binance_futures', 5, 'scan')]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,210 @@
+"""
+COSMOS AI - Unit Tests for Timeframe Resampler
+Tests para validar la construcción de 5m/15m/1h/4h desde una única serie de 1m
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from resampler import TimeframeResampler, resample, PAGE_LIMIT
+
+MIN = 60_000
+T0 = 1_700_006_400_000  # Alineado a 4h (UTC)
+
+def minutes(n, start=T0, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.2, n))
+    return [[start + i * MIN, close[i] - 0.1, close[i] + 0.3, close[i] - 0.3, close[i], float(rng.uniform(1, 5))]
+            for i in range(n)]
+
+def pandas_resample(bars, rule):
+    df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df.index = pd.to_datetime(df['timestamp'], unit='ms')
+    out = df.resample(rule).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+    return out
+
+class TestResample:
+    """Tests para la agregación vectorizada"""
+
+    @pytest.mark.parametrize("tf,rule", [('5m', '5min'), ('15m', '15min'), ('1h', '1h'), ('4h', '4h')])
+    def test_matches_pandas_resample(self, tf, rule):
+        """Test que coincide con pandas.resample (alineación UTC, última vela parcial incluida)"""
+        bars = minutes(600)
+        ref = pandas_resample(bars, rule)
+        out = resample(bars, tf)
+
+        assert len(out) == len(ref)
+        np.testing.assert_allclose(out[:, 1:], ref[['open', 'high', 'low', 'close', 'volume']].to_numpy())
+        assert out[-1, 0] == ref.index[-1].value // 1_000_000
+
+    def test_leading_partial_bucket_dropped(self):
+        """Test que un bucket inicial incompleto se descarta y el final parcial se conserva"""
+        bars = minutes(12, start=T0 + 3 * MIN)  # 3 minutos dentro del primer 5m
+        out = resample(bars, '5m')
+
+        assert out[0, 0] == T0 + 5 * MIN
+        assert out[-1, 0] == T0 + 10 * MIN
+        assert out[-1, 5] == pytest.approx(sum(b[5] for b in bars[7:]))
+
+    def test_unaligned_timeframe_rejected(self):
+        """Test que timeframes que no dividen el día UTC se rechazan"""
+        with pytest.raises(ValueError):
+            resample(minutes(10), '7m')
+
+class TestTimeframeResampler:
+    """Tests para la serie base por símbolo"""
+
+    def test_backfill_then_single_delta(self):
+        """Test que tras el backfill cada ciclo pide solo un delta de 1m"""
+        history = minutes(3000)
+        now = history[-1][0] + 30_000
+        calls = []
+
+        def fetch(symbol, since, limit):
+            calls.append((since, limit))
+            return [b for b in history if b[0] >= since][:limit]
+
+        r = TimeframeResampler(fetch_fn=fetch, max_minutes=2500)
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert len(calls) == 3  # ceil(2500 / 1000) páginas
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert calls[-1] == (history[-1][0], 2)
+        assert r.stats()['backfills'] == 1 and r.stats()['deltas'] == 1
+
+        bars = r.frame('BTC/USDT', '15m', 100)
+        assert len(bars) == 100
+        ref = pandas_resample(history[-2500:], '15min').iloc[-100:]
+        np.testing.assert_allclose(np.array(bars)[:, 4], ref['close'].to_numpy())
+
+    def test_delta_gap_forces_backfill(self):
+        """Test que un delta que no conecta con la serie descarta la base"""
+        r = TimeframeResampler(fetch_fn=None, max_minutes=500)
+        r.apply('BTC/USDT', minutes(100), backfill=True)
+
+        assert not r.apply('BTC/USDT', minutes(5, start=T0 + 200 * MIN))
+        backfill, requests = r.plan('BTC/USDT', now_ms=T0 + 205 * MIN)
+        assert backfill and len(requests) == 1 and requests[0][1] == PAGE_LIMIT
+
+    def test_cold_backfill_is_capped_per_cycle(self):
+        """Test que un símbolo nuevo se rellena por páginas en varios ciclos, las más recientes primero"""
+        history = minutes(6000)
+        now = history[-1][0] + 30_000
+        calls = []
+
+        def fetch(symbol, since, limit):
+            calls.append((since, limit))
+            return [b for b in history if b[0] >= since][:limit]
+
+        r = TimeframeResampler(fetch_fn=fetch, max_minutes=4500, backfill_pages=2)
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert len(calls) == 2
+        assert r.frame('BTC/USDT', '5m', 100) is not None      # Servible ya en el primer ciclo
+        assert r.frame('BTC/USDT', '1h', 50) is None           # Aún no cubre 51h de minutos
+
+        calls.clear()
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert len(calls) == 3                                 # Delta + 2 páginas anteriores
+        calls.clear()
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert len(calls) == 2                                 # Delta + la última página
+        calls.clear()
+        assert r.sync('BTC/USDT', now_ms=now)
+        assert calls == [(history[-1][0], 2)]                  # Base completa: sólo el delta
+        ref = pandas_resample(history[-4500:], '1h').iloc[-50:]
+        np.testing.assert_allclose(np.array(r.frame('BTC/USDT', '1h', 50))[:, 4], ref['close'].to_numpy())
+
+    def test_backfill_stops_at_listing(self):
+        """Test que un símbolo con menos historia que la base deja de pedir páginas antiguas"""
+        history = minutes(1500)
+        now = history[-1][0] + 30_000
+        calls = []
+
+        def fetch(symbol, since, limit):
+            calls.append((since, limit))
+            return [b for b in history if b[0] >= since][:limit]
+
+        r = TimeframeResampler(fetch_fn=fetch, max_minutes=5000, backfill_pages=1)
+        r.sync('BTC/USDT', now_ms=now)
+        r.sync('BTC/USDT', now_ms=now)   # La página anterior empieza en el listado
+        calls.clear()
+        r.sync('BTC/USDT', now_ms=now)
+
+        assert len(calls) == 1
+        assert r.frame('BTC/USDT', '15m', 90) is not None
+
+    def test_unavailable_source_leaves_base_untouched(self):
+        """Test que una página None (fuente no disponible) aborta el ciclo sin tocar la base"""
+        r = TimeframeResampler(fetch_fn=lambda *a: None, max_minutes=500)
+        r.apply('BTC/USDT', minutes(500), backfill=True)
+
+        assert not r.sync('BTC/USDT', now_ms=T0 + 500 * MIN)
+        assert len(r.frame('BTC/USDT', '5m', 90)) == 90
+
+    def test_base_fetch_goes_through_router(self, monkeypatch):
+        """Test que la base de 1m registra sus fallos en el router y no llama con el circuito abierto"""
+        import resampler
+        from binance_engine import live_trader
+        from provider_router import ProviderRouter, OPEN
+        router = ProviderRouter(failure_threshold=2)
+        fetch = Mock(side_effect=Exception("451 Unavailable For Legal Reasons"))
+        monkeypatch.setattr(live_trader, 'router', router)
+        monkeypatch.setattr(live_trader, '_fetch_ohlcv_from', fetch)
+
+        for _ in range(2):
+            with pytest.raises(Exception, match="451"):
+                resampler._fetch_minutes('BTC/USDT', T0, 10)
+        assert router.state('binance', 'ohlcv') == OPEN
+        assert resampler._fetch_minutes('BTC/USDT', T0, 10) is None
+        assert fetch.call_count == 2
+
+    def test_gateway_skips_base_on_open_circuit(self):
+        """Test que el gateway no pide la base de 1m a un proveedor con el circuito abierto"""
+        from test_market_gateway import make_gateway, SYMBOLS
+        from provider_router import ProviderRouter
+        gw = make_gateway()
+        gw.router = ProviderRouter(failure_threshold=1)
+        gw.router.record('binance', 'ohlcv', 0.1, False)
+        gw.resampler = TimeframeResampler(fetch_fn=None, max_minutes=1000)
+        exchanges = dict(gw._exchanges)
+        try:
+            bundles = gw.fetch_universe(SYMBOLS[:1], frames={'5m': 100}, with_ticker=False, book_limit=0)
+        finally:
+            gw.close()
+
+        assert ('ohlcv', 'C0/USDT:USDT') not in exchanges['binance'].calls
+        assert len(bundles['C0/USDT']['frames']['5m']) == 100  # Desde Kraken por la cadena de siempre
+
+    def test_timeframes_are_mutually_consistent(self):
+        """Test que el cierre de 4h coincide con el de 1h/15m/5m del mismo instante"""
+        r = TimeframeResampler(fetch_fn=None, max_minutes=12240)
+        r.apply('BTC/USDT', minutes(12240, start=T0), backfill=True)
+
+        closes = {tf: r.frame('BTC/USDT', tf, 50)[-1] for tf in ('5m', '15m', '1h', '4h')}
+        assert len({bar[4] for bar in closes.values()}) == 1
+        assert r.frame('BTC/USDT', '4h', 60) is None  # Más velas que la base disponible
+        assert not r.supports('1d', 10)
+
+    def test_gateway_derives_frames_from_one_request(self):
+        """Test que el gateway pide una sola serie de 1m por símbolo para 5m/15m"""
+        from test_market_gateway import make_gateway, SYMBOLS
+        gw = make_gateway()
+        gw.resampler = TimeframeResampler(fetch_fn=None, max_minutes=1000)
+        exchanges = dict(gw._exchanges)
+        try:
+            bundles = gw.fetch_universe(SYMBOLS[:2], frames={'5m': 100, '15m': 50}, with_ticker=False, book_limit=0)
+        finally:
+            gw.close()
+
+        calls = exchanges['binance'].calls + exchanges['kraken'].calls
+        assert sorted(calls) == [('ohlcv', 'C0/USDT:USDT'), ('ohlcv', 'C1/USDT:USDT')]
+        assert len(bundles['C0/USDT']['frames']['5m']) == 100
+        assert len(bundles['C0/USDT']['frames']['15m']) == 50
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
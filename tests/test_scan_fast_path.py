@@ -0,0 +1,132 @@
+"""
+COSMOS AI - Unit Tests for the DataFrame-free Scan Path
+Tests para validar que analyze_bars (arrays OHLCV) da la misma señal que la ruta con DataFrames
+"""
+import pytest
+import sys
+import os
+import time
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import scanner
+from scanner import (analyze_bars, analyze_market, analyze_quant_signal, as_bars, bars_from_bundle, frame_from_bundle,
+                     check_market_structure, check_rsi_divergence, analyze_volume_pressure)
+from indicator_state import IndicatorEngine
+from feature_store import FeatureStore
+
+STEP = 300_000
+T0 = 1_700_000_000_000
+KEYS = ('price', 'rsi', 'ema_200', 'atr', 'volume', 'vol_ma', 'macd', 'signal_line', 'histogram')
+
+def make_bars(n, seed, drift=0.0, step=STEP):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(drift, 1, n))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    vol = rng.uniform(1, 10, n)
+    vol[-1] *= 1 + seed % 3  # Presión de volumen variada (filtro 0.95 / bonus 1.5 y 2.0)
+    return [[T0 + i * step, close[i], close[i] + spread[i], close[i] - spread[i], close[i], vol[i]] for i in range(n)]
+
+def make_book(price, seed):
+    rng = np.random.default_rng(seed)
+    return {'bids': [[price * (1 - 0.0005 * (i + 1)), q] for i, q in enumerate(rng.uniform(0.1, 5, 20))],
+            'asks': [[price * (1 + 0.0005 * (i + 1)), q] for i, q in enumerate(rng.uniform(0.1, 5, 20))]}
+
+@pytest.fixture(params=['full', 'incremental'])
+def engines(request, monkeypatch):
+    """Un motor por ruta (mismo sembrado), o ninguno para el recálculo completo"""
+    if request.param == 'full':
+        monkeypatch.setattr(scanner, 'indicator_engine', None)
+        return None, None
+    return IndicatorEngine(), IndicatorEngine()
+
+def bundles():
+    drifts = [-0.8, -0.3, 0.0, 0.3, 0.8]
+    return {f'S{i}/USDT': {'frames': {'5m': make_bars(100, i, drifts[i % 5]),
+                                      '4h': make_bars(50, 100 + i, step=48 * STEP)}} for i in range(30)}
+
+class TestAnalyzeBars:
+    """Tests de equivalencia contra analyze_market + helpers de confluencia"""
+
+    def test_matches_dataframe_path(self, engines, monkeypatch):
+        """Test que los valores y la confluencia coinciden con la ruta DataFrame"""
+        seen = set()
+        for symbol, bundle in bundles().items():
+            monkeypatch.setattr(scanner, 'indicator_engine', engines[0])
+            df = frame_from_bundle(bundle, symbol, '5m')
+            ref = analyze_market(df)
+            monkeypatch.setattr(scanner, 'indicator_engine', engines[1])
+            out = analyze_bars(bars_from_bundle(bundle, symbol, '5m'), symbol, '5m')
+
+            for key in KEYS:
+                assert out[key] == pytest.approx(ref[key], rel=1e-12), (symbol, key)
+            assert out['timestamp'] == ref['timestamp'] and out['symbol'] == symbol
+            assert out['structure'] == check_market_structure(df)
+            assert out['divergence'] == check_rsi_divergence(df)
+            assert out['volume_pressure'] == pytest.approx(analyze_volume_pressure(df), rel=1e-12)
+            seen.update([out['structure'], out['divergence']])
+        assert {'BULLISH', 'BEARISH', 'NEUTRAL'} <= seen
+
+    def test_same_signal_output(self, engines, monkeypatch, tmp_path):
+        """Test que analyze_quant_signal devuelve exactamente la misma señal por las dos rutas"""
+        signals = 0
+        for k, (symbol, bundle) in enumerate(bundles().items()):
+            book = make_book(bundle['frames']['5m'][-1][4], k)
+
+            monkeypatch.setattr(scanner, 'indicator_engine', engines[0])
+            monkeypatch.setattr(scanner, 'feature_store', FeatureStore(None, root=str(tmp_path / f'df{k}')))
+            df = frame_from_bundle(bundle, symbol, '5m')
+            ref = analyze_quant_signal(symbol, analyze_market(df), df_confluence=df,
+                                       df_htf=frame_from_bundle(bundle, symbol, '4h', limit=50), book=book)
+
+            monkeypatch.setattr(scanner, 'indicator_engine', engines[1])
+            monkeypatch.setattr(scanner, 'feature_store', FeatureStore(None, root=str(tmp_path / f'np{k}')))
+            out = analyze_quant_signal(symbol, analyze_bars(bars_from_bundle(bundle, symbol, '5m'), symbol, '5m'),
+                                       df_htf=bars_from_bundle(bundle, symbol, '4h', limit=50), book=book)
+
+            assert out == ref, symbol
+            signals += out is not None
+        assert signals > 0
+
+    def test_none_like_analyze_market(self, monkeypatch):
+        """Test que pocas velas o una serie plana (RSI NaN) devuelven None"""
+        monkeypatch.setattr(scanner, 'indicator_engine', None)
+        assert analyze_bars(as_bars(make_bars(40, 1))) is None
+        assert analyze_bars(None) is None
+        flat = np.tile([T0, 100.0, 100.0, 100.0, 100.0, 1.0], (60, 1))
+        flat[:, 0] += np.arange(60) * STEP
+        assert analyze_bars(flat) is None
+
+class TestBenchmark:
+    """Benchmark por símbolo: bundle -> techs + confluencia"""
+
+    @pytest.mark.benchmark
+    def test_per_symbol_speedup(self, monkeypatch):
+        """Benchmark: la ruta con arrays es al menos 3x más rápida que DataFrame + helpers"""
+        monkeypatch.setattr(scanner, 'indicator_engine', None)
+        items = list(bundles().items())
+
+        def dataframe_path():
+            for symbol, bundle in items:
+                df = frame_from_bundle(bundle, symbol, '5m')
+                analyze_market(df)
+                check_market_structure(df), check_rsi_divergence(df), analyze_volume_pressure(df)
+
+        def array_path():
+            for symbol, bundle in items:
+                analyze_bars(bars_from_bundle(bundle, symbol, '5m'), symbol, '5m')
+
+        timings = {}
+        for name, run in (('dataframe', dataframe_path), ('arrays', array_path)):
+            run()
+            t0 = time.perf_counter()
+            for _ in range(5):
+                run()
+            timings[name] = (time.perf_counter() - t0) / (5 * len(items))
+            print(f"   [SCAN] {name}: {timings[name] * 1e6:.0f} us/symbol")
+        assert timings['arrays'] * 3 <= timings['dataframe']
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,176 @@
+"""
+COSMOS AI - Unit Tests for Shared-Memory Candles
+Tests para validar los ring buffers OHLCV en memoria compartida (seqlock, lectura zero-copy, varios procesos)
+"""
+import pytest
+import sys
+import os
+import uuid
+import multiprocessing as mp
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from shm_candles import SharedCandleWriter, SharedCandleReader, segment_name, SEQ_SLOT
+from candle_builder import CandleBuilder
+
+MIN = 60_000
+STEP = 300_000
+T0 = 1_700_006_400_000
+
+def bars(n, start=T0, step=STEP):
+    return [[start + i * step, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0 + i] for i in range(n)]
+
+@pytest.fixture
+def prefix():
+    return f"test{uuid.uuid4().hex[:8]}"
+
+@pytest.fixture
+def writer(prefix):
+    w = SharedCandleWriter(capacity=50, prefix=prefix)
+    yield w
+    w.close()
+
+@pytest.fixture
+def reader(prefix):
+    r = SharedCandleReader(prefix=prefix)
+    yield r
+    r.close()
+
+def now_for(history, step=STEP):
+    return int(history[-1][0]) + step // 2
+
+def _child_read(prefix, queue):
+    r = SharedCandleReader(prefix=prefix)
+    arr = r.read_array('BTC/USDT', '5m', 20, now_ms=T0 + 29 * STEP + STEP // 2)
+    queue.put(None if arr is None else arr.tolist())
+    r.close()
+
+def _child_write(prefix, rounds, ready):
+    w = SharedCandleWriter(capacity=50, prefix=prefix)
+    w.replace_history('ETH/USDT', '1m', [[T0 + i * MIN] + [float(i)] * 5 for i in range(50)])
+    ready.set()
+    for k in range(rounds):
+        w.set_live('ETH/USDT', {'1m': [T0 + (50 + k) * MIN] + [float(k)] * 5})
+    w.close(unlink=False)
+
+class TestSharedCandles:
+    """Tests para SharedCandleWriter / SharedCandleReader"""
+
+    def test_round_trip_like_candle_store(self, writer, reader):
+        """Test que el lector devuelve las últimas velas (cerradas + en formación) como un fetch REST"""
+        history = bars(30)
+        writer.replace_history('BTC/USDT', '5m', history[:-1])
+        writer.set_live('BTC/USDT', {'5m': history[-1]})
+
+        out = reader.read('BTC/USDT:USDT', '5m', 20, now_ms=now_for(history))
+        assert out == history[-20:]
+        assert reader.read_array('BTC/USDT', '5m', 20, now_ms=now_for(history)).shape == (20, 6)
+
+    def test_forming_bar_upserted_and_closed(self, writer, reader):
+        """Test que la vela en formación se sobrescribe y al cerrarse se mantiene una sola fila"""
+        history = bars(10)
+        writer.replace_history('BTC/USDT', '5m', history)
+        live = [T0 + 10 * STEP, 110.0, 111.0, 109.0, 110.2, 1.0]
+        writer.set_live('BTC/USDT', {'5m': live})
+        writer.set_live('BTC/USDT', {'5m': live[:4] + [110.4, 2.0]})
+        writer.append_closed('BTC/USDT', '5m', live[:4] + [110.6, 3.0])
+        writer.append_closed('BTC/USDT', '5m', history[3])  # Older bar: ignored
+
+        out = reader.read('BTC/USDT', '5m', 11, now_ms=live[0] + 1000)
+        assert out[:-1] == history
+        assert out[-1] == live[:4] + [110.6, 3.0]
+
+    def test_ring_wraps_and_views_are_zero_copy(self, writer, reader):
+        """Test que tras dar la vuelta al ring la vista sigue siendo contigua, ordenada y sin copia"""
+        history = bars(130)
+        writer.replace_history('SOL/USDT', '5m', history[:10])
+        for bar in history[10:]:
+            writer.append_closed('SOL/USDT', '5m', bar)
+
+        view, seq = reader.view('SOL/USDT', '5m', 50)
+        assert view.tolist() == history[-50:]
+        assert not view.flags.writeable and not view.flags.owndata
+        assert reader.valid('SOL/USDT', '5m', seq)
+
+        writer.set_live('SOL/USDT', {'5m': [T0 + 130 * STEP] + [1.0] * 5})
+        assert not reader.valid('SOL/USDT', '5m', seq)   # The producer wrote since the view was taken
+        assert view[0, 0] == T0 + 130 * STEP              # Same memory: the new bar reused the oldest slot
+
+    def test_torn_write_detected(self, writer, reader):
+        """Test que con una escritura a medias (seq impar) el lector no devuelve datos"""
+        history = bars(30)
+        writer.replace_history('BTC/USDT', '5m', history)
+        ring = writer._rings[segment_name('BTC/USDT', '5m', writer.prefix)]
+        ring.header[SEQ_SLOT] += 1
+        assert reader.read_array('BTC/USDT', '5m', 20, now_ms=now_for(history)) is None
+        ring.header[SEQ_SLOT] += 1
+        assert reader.read_array('BTC/USDT', '5m', 20, now_ms=now_for(history)) is not None
+
+    def test_stale_or_missing_producer(self, writer, reader):
+        """Test que sin productor, con heartbeat viejo o sin cobertura suficiente se devuelve None"""
+        assert reader.read('DOGE/USDT', '5m', 20) is None
+        history = bars(30)
+        writer.replace_history('BTC/USDT', '5m', history)
+
+        assert reader.read('BTC/USDT', '5m', 40, now_ms=now_for(history)) is None         # Not enough bars
+        assert reader.read('BTC/USDT', '5m', 20, now_ms=now_for(history) + 10 * STEP) is None  # Last bar too old
+        assert reader.read('BTC/USDT', '5m', 20, now_ms=10**13 + now_for(history)) is None     # Dead heartbeat
+
+        writer.close()
+        assert reader.read('BTC/USDT', '5m', 20, now_ms=now_for(history)) is None
+
+    def test_read_from_another_process(self, writer):
+        """Test que otro proceso mapea el segmento y lee las mismas velas"""
+        history = bars(30)
+        writer.replace_history('BTC/USDT', '5m', history)
+        ctx = mp.get_context('fork')
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_child_read, args=(writer.prefix, queue))
+        proc.start()
+        out = queue.get(timeout=20)
+        proc.join(timeout=20)
+
+        assert out == history[-20:]
+
+    def test_concurrent_writer_never_yields_torn_rows(self, prefix):
+        """Test que un lector concurrente nunca ve filas mezcladas mientras otro proceso escribe"""
+        ctx = mp.get_context('fork')
+        ready = ctx.Event()
+        proc = ctx.Process(target=_child_write, args=(prefix, 20_000, ready))
+        proc.start()
+        assert ready.wait(timeout=20)
+        reader = SharedCandleReader(prefix=prefix)
+        try:
+            reads = 0
+            while proc.is_alive() or reads == 0:
+                ring = reader._ring('ETH/USDT', '1m')
+                arr, _ = ring.snapshot(50)
+                if arr is not None:
+                    assert (arr[:, 1:] == arr[:, 1:2]).all()  # Every row written as [ts, k, k, k, k, k]
+                    assert (np.diff(arr[:, 0]) == MIN).all()
+                    reads += 1
+            proc.join(timeout=20)
+            assert reads > 0
+        finally:
+            reader.close()
+            ring = SharedCandleWriter(prefix=prefix)
+            ring._ring('ETH/USDT', '1m')
+            ring.close()
+
+    def test_builder_mirrors_into_shared_memory(self, writer, reader):
+        """Test que el candle builder escribe también en memoria compartida (sin Redis)"""
+        builder = CandleBuilder(None, mirror=writer)
+        builder.seed('BTC/USDT', {'1m': [], '5m': [], '15m': [], '1h': [], '4h': []}, now_ms=T0)
+        for i in range(6):
+            bar = [T0 + i * MIN, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1.0]
+            builder.on_kline('BTC/USDT', {'t': bar[0], 'T': bar[0] + MIN - 1, 'o': str(bar[1]), 'h': str(bar[2]),
+                                          'l': str(bar[3]), 'c': str(bar[4]), 'v': str(bar[5]), 'x': True})
+
+        closed_and_live = reader.read('BTC/USDT', '5m', 2, now_ms=T0 + 5 * MIN + 1000)
+        assert closed_and_live[0] == [T0, 100.0, 105.0, 99.0, 104.5, 5.0]
+        assert closed_and_live[1] == [T0 + STEP, 105.0, 106.0, 104.0, 105.5, 1.0]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
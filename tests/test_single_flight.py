@@ -0,0 +1,135 @@
+"""
+COSMOS AI - Unit Tests for Single Flight
+Tests para validar la coalescencia de requests entre procesos vía Redis
+"""
+import pytest
+import sys
+import os
+import time
+import threading
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from single_flight import SingleFlight, SharedCallError
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def process(server, **kwargs):
+    """Cada 'proceso' tiene su propio cliente sobre el mismo servidor Redis"""
+    return SingleFlight(fakeredis.FakeRedis(server=server, decode_responses=True), **kwargs)
+
+def run_concurrently(fns):
+    results = [None] * len(fns)
+    def run(i):
+        try:
+            results[i] = fns[i]()
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(fns))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+class TestSingleFlight:
+    """Tests para la clase SingleFlight"""
+
+    def test_concurrent_callers_share_one_call(self, server):
+        """Test que 5 procesos pidiendo lo mismo a la vez generan una sola llamada"""
+        calls = []
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return [[1, 2.0, 3.0, 1.0, 2.5, 10.0]]
+
+        flights = [process(server) for _ in range(5)]
+        results = run_concurrently([lambda f=f: f.do('ohlcv:BTC/USDT:5m:100', fetch) for f in flights])
+
+        assert len(calls) == 1
+        assert all(r == [[1, 2.0, 3.0, 1.0, 2.5, 10.0]] for r in results)
+        assert sum(f.leads for f in flights) == 1 and sum(f.shared for f in flights) == 4
+
+    def test_leader_error_is_shared(self, server):
+        """Test que el error del líder se propaga a los que esperan (sin ráfaga de reintentos)"""
+        fetch = Mock(side_effect=Exception("429 Too Many Requests"))
+        leader = process(server)
+        with pytest.raises(Exception):
+            leader.do('ticker:BTC/USDT', fetch)
+
+        with pytest.raises(SharedCallError, match="429"):
+            process(server).do('ticker:BTC/USDT', fetch)
+        assert fetch.call_count == 1
+
+    def test_result_published_before_release(self, server):
+        """Test que un proceso que consulta justo al liberarse el lock recibe el resultado del líder"""
+        fetch = Mock(return_value={'last': 2.0})
+        leader, waiter = process(server), process(server)
+        seen = []
+        release = leader._release
+        def release_then_join(lock_key, token):
+            release(lock_key, token)
+            seen.append(waiter.do('ticker:SOL/USDT', fetch))  # Justo en el hueco tras liberar el lock
+        leader._release = release_then_join
+
+        assert leader.do('ticker:SOL/USDT', fetch) == {'last': 2.0}
+        assert seen == [{'last': 2.0}]
+        assert fetch.call_count == 1 and waiter.fallbacks == 0 and waiter.shared == 1
+
+    def test_result_expires(self, server):
+        """Test que tras el TTL del resultado se vuelve a llamar al exchange"""
+        fetch = Mock(return_value={'last': 1.0})
+        flight = process(server, result_ttl_ms=50)
+        flight.do('ticker:ETH/USDT', fetch)
+        time.sleep(0.1)
+        flight.do('ticker:ETH/USDT', fetch)
+
+        assert fetch.call_count == 2
+
+    def test_dead_leader_falls_back(self, server):
+        """Test que si el líder muere sin publicar, el que espera llama por su cuenta"""
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        client.set('sf:lock:book:BTC/USDT:50', 'dead-process', px=100)
+        fetch = Mock(return_value={'bids': [], 'asks': []})
+
+        flight = process(server)
+        assert flight.do('book:BTC/USDT:50', fetch) == {'bids': [], 'asks': []}
+        assert fetch.call_count == 1 and flight.fallbacks == 1
+
+    def test_offline_is_passthrough(self):
+        """Test que sin Redis simplemente se llama a la función"""
+        fetch = Mock(return_value=42)
+        assert SingleFlight(None).do('x', fetch) == 42
+
+class TestBinanceTraderSingleFlight:
+    """Tests de integración con BinanceTrader"""
+
+    def test_order_book_coalesced_across_traders(self, server):
+        """Test que dos BinanceTrader (dos procesos) comparten un solo fetch_order_book"""
+        from binance_engine import BinanceTrader
+        exchange = Mock()
+        def slow_book(symbol, limit=50):
+            time.sleep(0.1)
+            return {'bids': [[99.0, 1.0]], 'asks': [[101.0, 1.0]]}
+        exchange.fetch_order_book.side_effect = slow_book
+
+        traders = []
+        for _ in range(2):
+            trader = BinanceTrader()
+            trader.fallback_exchange = exchange
+            trader.single_flight = process(server)
+            traders.append(trader)
+
+        results = run_concurrently([lambda t=t: t.fetch_order_book('BTC/USDT', limit=50) for t in traders])
+
+        assert exchange.fetch_order_book.call_count == 1
+        assert results[0] == results[1]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
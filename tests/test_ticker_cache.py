@@ -0,0 +1,94 @@
+"""
+COSMOS AI - Unit Tests for Ticker Cache
+Tests para validar fetch_tickers por lotes y el caché de tickers con TTL
+"""
+import pytest
+import sys
+import os
+import time
+import threading
+from unittest.mock import Mock, patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+from ticker_cache import TickerCache
+
+class TestTickerCache:
+    """Tests para la clase TickerCache"""
+
+    def test_ttl_expiry(self):
+        """Test que un snapshot caduca después del TTL"""
+        cache = TickerCache(ttl=1.0)
+        cache.put('BTC/USDT', {'last': 1.0}, now=100.0)
+
+        assert cache.get('BTC/USDT', now=100.5) == {'last': 1.0}
+        assert cache.get('BTC/USDT', now=101.5) is None
+
+    def test_get_many_loads_only_missing(self):
+        """Test que solo se piden los símbolos sin snapshot fresco"""
+        cache = TickerCache(ttl=60)
+        cache.put('BTC/USDT', {'last': 1.0})
+        loader = Mock(return_value={'ETH/USDT': {'last': 2.0}})
+
+        out = cache.get_many(['BTC/USDT', 'ETH/USDT', 'XYZ/USDT'], loader)
+
+        loader.assert_called_once_with(['ETH/USDT', 'XYZ/USDT'])
+        assert set(out) == {'BTC/USDT', 'ETH/USDT'}
+
+    def test_concurrent_callers_share_one_round_trip(self):
+        """Test que llamadas concurrentes dentro de la ventana comparten una sola carga"""
+        cache = TickerCache(ttl=60)
+        calls = []
+
+        def loader(symbols):
+            calls.append(list(symbols))
+            time.sleep(0.05)
+            return {s: {'last': 1.0} for s in symbols}
+
+        threads = [threading.Thread(target=cache.get_many, args=(['BTC/USDT', 'ETH/USDT'], loader)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert cache.stats()['round_trips'] == 1
+
+class TestBinanceTraderTickers:
+    """Tests de integración con BinanceTrader.fetch_tickers"""
+
+    @pytest.fixture
+    def trader(self):
+        from binance_engine import BinanceTrader
+        trader = BinanceTrader()
+        trader.fallback_exchange = Mock()
+        trader.exchange = Mock()
+        trader.exchange.markets = {'BTC/USDT:USDT': {}, 'NEW/USDT:USDT': {}}
+        trader.fallback_exchange.load_markets.return_value = {'BTC/USD': {}, 'ETH/USD': {}}
+        return trader
+
+    def test_kraken_batch_then_binance_then_coincap(self, trader):
+        """Test que la cadena Kraken -> Binance -> CoinCap se aplica por lote con el mapeo de símbolos"""
+        trader.fallback_exchange.fetch_tickers.return_value = {'BTC/USD': {'last': 100.0}, 'ETH/USD': {'last': 10.0}}
+        trader.exchange.fetch_ticker.side_effect = Exception("binance down")
+
+        with patch.object(trader, '_fetch_coincap_tickers', return_value={'NEW/USDT': {'last': 1.0}}) as coincap:
+            out = trader.fetch_tickers(['BTC/USDT', 'ETH/USDT', 'NEW/USDT'])
+
+        trader.fallback_exchange.fetch_tickers.assert_called_once_with(['BTC/USD', 'ETH/USD'])
+        trader.exchange.fetch_ticker.assert_called_once_with('NEW/USDT:USDT')
+        coincap.assert_called_once_with(['NEW/USDT'])
+        assert out['BTC/USDT']['last'] == 100.0
+        assert out['NEW/USDT']['last'] == 1.0
+
+    def test_fetch_ticker_served_from_batch_snapshot(self, trader):
+        """Test que fetch_ticker reutiliza el snapshot de fetch_tickers dentro del TTL"""
+        trader.fallback_exchange.fetch_tickers.return_value = {'BTC/USD': {'last': 100.0}}
+
+        trader.fetch_tickers(['BTC/USDT'])
+        assert trader.fetch_ticker('BTC/USDT') == {'last': 100.0}
+        trader.fallback_exchange.fetch_ticker.assert_not_called()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+COSMOS AI - Unit Tests for Universe Service
+Tests para validar el universo versionado en Redis, el refresco y las notificaciones
+"""
+import pytest
+import sys
+import os
+import time
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from universe_service import UniverseService, CHANNEL, LOCK_KEY
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def process(server, compute=None, **kwargs):
+    """Cada 'proceso' tiene su propio cliente sobre el mismo servidor Redis"""
+    compute = compute or Mock(return_value=(['BTC/USDT', 'ETH/USDT', 'PEPE/USDT'], ['PEPE/USDT']))
+    return UniverseService(fakeredis.FakeRedis(server=server, decode_responses=True), compute=compute, **kwargs)
+
+class TestUniverseService:
+    """Tests para la clase UniverseService"""
+
+    def test_published_universe_shared_across_processes(self, server):
+        """Test que otro proceso lee el mismo universo sin recalcularlo"""
+        writer = process(server)
+        writer.refresh()
+        reader = process(server)
+
+        assert reader.symbols() == ['BTC/USDT', 'ETH/USDT', 'PEPE/USDT']
+        assert reader.version() == 1
+        reader.compute.assert_not_called()
+
+    def test_version_bumps_only_on_change(self, server):
+        """Test que la versión solo cambia si cambia la lista"""
+        compute = Mock(return_value=(['BTC/USDT'], []))
+        svc = process(server, compute=compute)
+        svc.refresh(force=True)
+        svc.refresh(force=True)
+        assert svc.version() == 1
+
+        compute.return_value = (['BTC/USDT', 'SOL/USDT'], ['SOL/USDT'])
+        svc.refresh(force=True)
+        assert svc.version() == 2
+
+    def test_fresh_universe_not_recomputed(self, server):
+        """Test que dentro del intervalo no se vuelve a calcular"""
+        svc = process(server, refresh_interval=1800)
+        svc.refresh(now=1000.0)
+
+        assert svc.refresh(now=2000.0) is False
+        assert svc.refresh(now=3000.0) is True
+        assert svc.compute.call_count == 2
+
+    def test_single_refresher_across_processes(self, server):
+        """Test que si otro proceso tiene el lock no se calcula en paralelo"""
+        fakeredis.FakeRedis(server=server).set(LOCK_KEY, 'other', px=60000)
+        svc = process(server)
+
+        assert svc.refresh(force=True) is False
+        svc.compute.assert_not_called()
+
+    def test_empty_compute_keeps_previous(self, server):
+        """Test que si todas las fuentes fallan se conserva el universo anterior"""
+        compute = Mock(return_value=(['BTC/USDT'], []))
+        svc = process(server, compute=compute)
+        svc.refresh(force=True)
+        compute.return_value = ([], [])
+        svc.refresh(force=True)
+
+        assert svc.symbols() == ['BTC/USDT']
+
+    def test_change_is_announced(self, server):
+        """Test que un cambio se publica en el canal de notificaciones"""
+        listener = fakeredis.FakeRedis(server=server, decode_responses=True).pubsub()
+        listener.subscribe(CHANNEL)
+        listener.get_message(timeout=1)  # Confirmación de suscripción
+
+        process(server).refresh()
+        message = listener.get_message(timeout=1)
+
+        assert message['data'] == '1'
+
+    def test_subscriber_updates_memory_copy(self, server):
+        """Test que el suscriptor en segundo plano actualiza la copia local y avisa"""
+        reader = process(server)
+        seen = []
+        reader.on_change(lambda snap: seen.append(snap['version']))
+        reader.start()
+        deadline = time.time() + 2
+        redis_client = fakeredis.FakeRedis(server=server)
+        while (not reader._listening or reader.refreshes == 0 or redis_client.exists(LOCK_KEY)) and time.time() < deadline:
+            time.sleep(0.01)  # Su propio refresco inicial no debe competir por el lock
+
+        process(server, compute=Mock(return_value=(['SOL/USDT'], ['SOL/USDT']))).refresh(force=True)
+        deadline = time.time() + 2
+        while reader.get()['symbols'] != ['SOL/USDT'] and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert reader.get()['symbols'] == ['SOL/USDT']
+        assert seen and seen[-1] == reader.version()
+
+    def test_offline_mode(self):
+        """Test que sin Redis el universo se calcula y versiona en memoria"""
+        svc = UniverseService(None, compute=Mock(return_value=(['BTC/USDT'], [])))
+
+        assert svc.symbols() == ['BTC/USDT']
+        assert svc.version() == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,142 @@
+"""
+COSMOS AI - Unit Tests for VPIN
+Tests para validar el VPIN vectorizado (buckets por volumen, BVC) y la variante en streaming
+"""
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-engine'))
+
+import vpin
+from vpin import StreamingVPIN, volume_buckets, vpin_series, bvc_buy_volume, side_buy_volume
+
+def loop_vpin(volumes, sides, bucket_size, window):
+    """Versión original con iterrows (sin partir trades entre buckets)"""
+    buckets, buy, sell, cum = [], 0.0, 0.0, 0.0
+    for v, s in zip(volumes, sides):
+        if s in ('buy', 'BUY', 1, True): buy += v
+        else: sell += v
+        cum += v
+        if cum >= bucket_size:
+            buckets.append((buy, sell))
+            buy, sell, cum = 0.0, 0.0, 0.0
+    if len(buckets) < window:
+        return 0
+    recent = buckets[-window:]
+    return sum(abs(b - s) / (b + s) for b, s in recent) / len(recent)
+
+def trades(n, seed=5, lot=None):
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    volumes = np.full(n, lot) if lot else rng.exponential(2.0, n)
+    sides = np.where(rng.random(n) < 0.65, 'buy', 'sell')
+    return prices, volumes, sides
+
+class TestVectorizedVPIN:
+    """Tests para las funciones vectorizadas"""
+
+    def test_matches_loop_when_trades_fill_buckets_exactly(self):
+        """Test que sin trades partidos entre buckets coincide con la versión en bucles"""
+        prices, volumes, sides = trades(5000, lot=1.0)
+        expected = loop_vpin(volumes, sides, bucket_size=50, window=50)
+
+        assert vpin.vpin_from_trades(prices, volumes, sides, bucket_size=50, window=50) == pytest.approx(expected, rel=1e-12)
+
+    def test_straddling_trade_split_pro_rata(self):
+        """Test que un trade que cruza la frontera se reparte entre ambos buckets"""
+        buy, sell = volume_buckets([6.0, 6.0], side_buy_volume(['buy', 'sell'], [6.0, 6.0]), bucket_size=4.0)
+
+        assert buy.tolist() == [4.0, 2.0, 0.0]
+        assert sell.tolist() == [0.0, 2.0, 4.0]
+
+    def test_rolling_series(self):
+        """Test que la serie rolling es la media de los últimos `window` desequilibrios"""
+        buy = np.array([10.0, 5.0, 0.0, 7.5])
+        out = vpin_series(buy, 10.0 - buy, window=2)
+
+        assert np.isnan(out[0])
+        assert out[1:].tolist() == pytest.approx([0.5, 0.5, 0.75])
+
+    def test_bvc_classification(self):
+        """Test que subidas se clasifican mayoritariamente como compra y caídas como venta"""
+        buy = bvc_buy_volume([100.0, 101.0, 100.0, 100.0], [10.0, 10.0, 10.0, 10.0])
+
+        assert buy[0] == 5.0 and buy[3] == 5.0
+        assert buy[1] > 5.0 > buy[2]
+        assert buy[1] + buy[2] == pytest.approx(10.0)
+
+    def test_normal_cdf_fallback(self, monkeypatch):
+        """Test que sin scipy la CDF normal con math.erf da el mismo resultado"""
+        x = np.linspace(-4, 4, 41)
+        expected = vpin.normal_cdf(x)
+        monkeypatch.setattr(vpin, 'SCIPY_AVAILABLE', False)
+
+        assert vpin.normal_cdf(x) == pytest.approx(expected, abs=1e-12)
+
+    def test_candles(self):
+        """Test de VPIN sobre velas: acotado en [0, 1] y 0 con pocos buckets"""
+        rng = np.random.default_rng(1)
+        closes = 100 + np.cumsum(rng.normal(0, 1, 100))
+        volumes = rng.uniform(1, 10, 100)
+
+        assert 0 < vpin.vpin_from_candles(closes, volumes) < 1
+        assert vpin.vpin_from_candles(closes[:20], volumes[:20]) == 0.0
+
+    def test_panel_matches_per_symbol(self):
+        """Test que un panel (símbolos, velas) da el mismo VPIN que llamar símbolo a símbolo"""
+        rng = np.random.default_rng(2)
+        closes = 100 + np.cumsum(rng.normal(0, 1, (40, 100)), axis=1)
+        volumes = rng.uniform(1, 10, (40, 100))
+        volumes[3] = 0.0        # Sin volumen
+        closes[4] = 100.0       # Sin variación de precio
+        volumes[5, :60] = 0.0   # Volumen concentrado al final
+
+        out = vpin.vpin_from_candles(closes, volumes)
+        assert out.shape == (40,)
+        assert out.tolist() == [vpin.vpin_from_candles(c, v) for c, v in zip(closes, volumes)]
+        assert out[3] == 0.0
+        assert vpin.vpin_from_candles(closes[:, :20], volumes[:, :20]).tolist() == [0.0] * 40  # Pocos buckets
+
+    def test_rolling_series_panel(self):
+        """Test que vpin_series aplica la media rolling a lo largo del último eje"""
+        buy = np.array([[10.0, 5.0, 0.0, 7.5], [0.0, 0.0, 10.0, 10.0]])
+        out = vpin_series(buy, 10.0 - buy, window=2)
+
+        assert np.isnan(out[:, 0]).all()
+        assert out[0, 1:].tolist() == pytest.approx([0.5, 0.5, 0.75])
+        assert out[1, 1:].tolist() == pytest.approx([1.0, 1.0, 1.0])
+
+class TestStreamingVPIN:
+    """Tests para la variante en streaming"""
+
+    def test_matches_batch(self):
+        """Test que alimentar los trades uno a uno da el mismo VPIN que el cálculo por lotes"""
+        prices, volumes, sides = trades(3000)
+        stream = StreamingVPIN(bucket_size=40.0, window=20)
+        for p, v, s in zip(prices, volumes, sides):
+            stream.update(p, v, side=s)
+
+        assert stream.value == pytest.approx(vpin.vpin_from_trades(prices, volumes, sides, bucket_size=40.0, window=20), rel=1e-9)
+
+    def test_bvc_without_sides(self):
+        """Test que sin lado explícito clasifica con BVC y una tendencia alcista da VPIN alto"""
+        stream = StreamingVPIN(bucket_size=10.0, window=10)
+        for i in range(500):
+            stream.update(100 + i * 0.01 + (0.05 if i % 2 else 0.0), 1.0)
+
+        assert stream.buckets == 50
+        assert 0 < stream.value < 1
+
+    def test_none_until_window(self):
+        """Test que no hay valor hasta completar `window` buckets"""
+        stream = StreamingVPIN(bucket_size=10.0, window=3)
+        assert stream.update(100.0, 25.0, side='buy') == 2
+        assert stream.value is None
+        stream.update(100.0, 5.0, side='sell')
+        assert stream.value == pytest.approx((1.0 + 1.0 + 0.0) / 3)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])